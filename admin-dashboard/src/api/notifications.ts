@@ -43,9 +43,13 @@ export interface AdminPushBatchPayload {
   custom_data?: Record<string, any>;
 }
 
-export interface AdminPushBatchResponse {
-  detail: string;
+export type AdminPushBatchJobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface AdminPushBatchJob {
+  job_id: number;
+  status: AdminPushBatchJobStatus;
   target_user_count: number;
+  processed_user_count: number;
   sent_user_count: number;
   failed_user_count: number;
   skipped_user_count: number;
@@ -53,6 +57,10 @@ export interface AdminPushBatchResponse {
   failed: number;
   deactivated: number;
   truncated: boolean;
+  error?: string | null;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
 }
 
 export const sendAdminPush = async (payload: AdminPushPayload) => {
@@ -62,5 +70,10 @@ export const sendAdminPush = async (payload: AdminPushPayload) => {
 
 export const sendAdminPushBatch = async (payload: AdminPushBatchPayload) => {
   const response = await api.post('/notifications/admin/send-batch', payload);
-  return response.data as AdminPushBatchResponse;
+  return response.data as AdminPushBatchJob;
+};
+
+export const getAdminPushBatchJob = async (jobId: number) => {
+  const response = await api.get(`/notifications/admin/send-batch/${jobId}`);
+  return response.data as AdminPushBatchJob;
 };
@@ -4,8 +4,9 @@ import { toast } from 'react-toastify';
 import { AdminLayout } from '../layout/AdminLayout';
 import { TopBar } from '../layout/TopBar';
 import {
-  AdminPushBatchResponse,
+  AdminPushBatchJob,
   AdminPushResponse,
+  getAdminPushBatchJob,
   sendAdminPush,
   sendAdminPushBatch,
 } from '../api/notifications';
@@ -16,8 +17,15 @@ const DEFAULT_SINGLE_MESSAGE = 'You have a new update from NailsDash.';
 const DEFAULT_BATCH_TITLE = 'NailsDash Update';
 const DEFAULT_BATCH_MESSAGE = 'Please check your latest updates in NailsDash.';
 
+const MAX_BATCH_USERS = 10000;
+const BATCH_POLL_INTERVAL_MS = 1000;
+
 type BatchTargetMode = 'user_ids' | 'store';
 
+const isBatchJobFinished = (job: AdminPushBatchJob) => job.status === 'completed' || job.status === 'failed';
+
+const wait = (ms: number) => new Promise((resolve) => window.setTimeout(resolve, ms));
+
 const parseUserIds = (value: string): number[] => {
   const ids = value
     .split(/[\n,;\s]+/)
@@ -43,7 +51,7 @@ const PushCenter: React.FC = () => {
   const [batchMessage, setBatchMessage] = useState(DEFAULT_BATCH_MESSAGE);
   const [batchMaxUsers, setBatchMaxUsers] = useState('200');
   const [batchSending, setBatchSending] = useState(false);
-  const [batchResult, setBatchResult] = useState<AdminPushBatchResponse | null>(null);
+  const [batchResult, setBatchResult] = useState<AdminPushBatchJob | null>(null);
 
   useEffect(() => {
     const loadStores = async () => {
@@ -104,8 +112,8 @@ const PushCenter: React.FC = () => {
     }
 
     const maxUsers = Number.parseInt(batchMaxUsers, 10);
-    if (!Number.isInteger(maxUsers) || maxUsers < 1 || maxUsers > 500) {
-      toast.error('Max users must be between 1 and 500');
+    if (!Number.isInteger(maxUsers) || maxUsers < 1 || maxUsers > MAX_BATCH_USERS) {
+      toast.error(`Max users must be between 1 and ${MAX_BATCH_USERS}`);
       return;
     }
 
@@ -138,8 +146,18 @@ const PushCenter: React.FC = () => {
 
     setBatchSending(true);
     try {
-      const result = await sendAdminPushBatch(payload);
-      setBatchResult(result);
+      let job = await sendAdminPushBatch(payload);
+      setBatchResult(job);
+      while (!isBatchJobFinished(job)) {
+        await wait(BATCH_POLL_INTERVAL_MS);
+        job = await getAdminPushBatchJob(job.job_id);
+        setBatchResult(job);
+      }
+      if (job.status === 'failed') {
+        toast.error(job.error || 'Batch push failed');
+      } else if (job.target_user_count === 0) {
+        toast.info('Batch push finished with no eligible users; nothing was sent');
+      }
     } catch (error: any) {
       toast.error(error?.response?.data?.detail || 'Failed to send batch push');
     } finally {
@@ -240,7 +258,7 @@ const PushCenter: React.FC = () => {
             <input
               type="number"
               min={1}
-              max={500}
+              max={MAX_BATCH_USERS}
               step={1}
               value={batchMaxUsers}
               onChange={(event) => setBatchMaxUsers(event.target.value)}
@@ -248,7 +266,7 @@ const PushCenter: React.FC = () => {
               className="rounded-xl border border-blue-100 bg-white px-3 py-2 text-sm !text-slate-900"
             />
             <div className="flex items-center rounded-xl border border-blue-100 bg-blue-50/40 px-3 text-xs text-slate-600">
-              最大支持 500 用户
+              最大支持 {MAX_BATCH_USERS} 用户
             </div>
           </div>
 
@@ -311,13 +329,21 @@ const PushCenter: React.FC = () => {
 
           {batchResult && (
             <div className="rounded-xl border border-blue-100 bg-blue-50/40 p-3 text-sm text-slate-700 space-y-1">
-              <p className="font-semibold text-slate-900">Last Batch Result</p>
+              <p className="font-semibold text-slate-900">
+                Last Batch Job #{batchResult.job_id} · {batchResult.status}
+              </p>
+              <p>
+                Progress: {batchResult.processed_user_count} / {batchResult.target_user_count} users
+              </p>
               <p>
                 Users: target {batchResult.target_user_count}, sent {batchResult.sent_user_count}, failed {batchResult.failed_user_count}, skipped {batchResult.skipped_user_count}
               </p>
               <p>
                 Tokens: sent {batchResult.sent}, failed {batchResult.failed}, deactivated {batchResult.deactivated}
               </p>
+              {batchResult.status === 'completed' && batchResult.target_user_count === 0 && (
+                <p className="text-amber-700">No eligible users were left to push to; nothing was sent.</p>
+              )}
               {batchResult.truncated && (
                 <p className="text-amber-700">Recipient list exceeded max users and was truncated.</p>
               )}
@@ -0,0 +1,91 @@
+"""add customer stats table
+
+Revision ID: 20261017_000100
+Revises: 20260503_000100
+Create Date: 2026-10-17 00:01:00
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000100"
+down_revision = "20260503_000100"
+branch_labels = None
+depends_on = None
+
+
+def _scheduled_at_sql(dialect_name: str) -> str:
+    if dialect_name in {"mysql", "mariadb"}:
+        return "TIMESTAMP(appointment_date, appointment_time)"
+    if dialect_name == "postgresql":
+        return "(appointment_date + appointment_time)"
+    # SQLite stores both as ISO text, so joining them yields a DateTime the ORM can read.
+    return "(appointment_date || ' ' || appointment_time)"
+
+
+def backfill_sql(dialect_name: str) -> str:
+    """Same aggregates as crud.customer_stats._summarize, one row per (user, store)."""
+    scheduled_at = _scheduled_at_sql(dialect_name)
+    no_show = "LOWER(COALESCE(cancel_reason, '')) LIKE '%no show%'"
+    return f"""
+        INSERT INTO customer_stats (
+            user_id, store_id, total_count, completed_count, cancelled_count, no_show_count,
+            completed_spend, last_visit_at, next_appointment_at
+        )
+        SELECT
+            user_id,
+            store_id,
+            COUNT(*),
+            SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN status = 'cancelled' AND NOT ({no_show}) THEN 1 ELSE 0 END),
+            SUM(CASE WHEN status = 'cancelled' AND {no_show} THEN 1 ELSE 0 END),
+            ROUND(SUM(CASE
+                WHEN status <> 'completed' THEN 0
+                WHEN COALESCE(final_paid_amount, 0) > 0 THEN final_paid_amount
+                WHEN COALESCE(order_amount, 0) > 0 THEN order_amount
+                ELSE 0
+            END), 2),
+            MAX(CASE WHEN status = 'completed' THEN {scheduled_at} END),
+            MIN(CASE WHEN status IN ('pending', 'confirmed') AND {scheduled_at} >= :now THEN {scheduled_at} END)
+        FROM appointments
+        WHERE user_id IS NOT NULL AND store_id IS NOT NULL
+        GROUP BY user_id, store_id
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_stats",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("store_id", sa.Integer(), nullable=False),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cancelled_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("no_show_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_spend", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("last_visit_at", sa.DateTime(), nullable=True),
+        sa.Column("next_appointment_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "store_id", name="uq_customer_stats_user_store"),
+    )
+    op.create_index("ix_customer_stats_id", "customer_stats", ["id"], unique=False)
+    op.create_index("ix_customer_stats_user_id", "customer_stats", ["user_id"], unique=False)
+    op.create_index("ix_customer_stats_store_id", "customer_stats", ["store_id"], unique=False)
+    op.create_index("ix_customer_stats_next_appointment_at", "customer_stats", ["next_appointment_at"], unique=False)
+
+    bind = op.get_bind()
+    # Naive local time, matching the datetime.now() the projection is maintained with.
+    bind.execute(sa.text(backfill_sql(bind.dialect.name)), {"now": datetime.now().replace(microsecond=0)})
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_stats_next_appointment_at", table_name="customer_stats")
+    op.drop_index("ix_customer_stats_store_id", table_name="customer_stats")
+    op.drop_index("ix_customer_stats_user_id", table_name="customer_stats")
+    op.drop_index("ix_customer_stats_id", table_name="customer_stats")
+    op.drop_table("customer_stats")
@@ -0,0 +1,67 @@
+"""add technician ledger entries table
+
+Revision ID: 20261017_000200
+Revises: 20261017_000100
+Create Date: 2026-10-17 00:02:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.crud.technician_ledger import rebuild_technician_ledger
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000200"
+down_revision = "20261017_000100"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "technician_ledger_entries",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("store_id", sa.Integer(), nullable=False),
+        sa.Column("technician_id", sa.Integer(), nullable=False),
+        sa.Column("appointment_id", sa.Integer(), nullable=False),
+        sa.Column("split_id", sa.Integer(), nullable=True),
+        sa.Column("work_date", sa.Date(), nullable=False),
+        sa.Column("work_time", sa.Time(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("commission_amount", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_technician_ledger_entries_id", "technician_ledger_entries", ["id"], unique=False)
+    op.create_index(
+        "ix_technician_ledger_entries_appointment_id",
+        "technician_ledger_entries",
+        ["appointment_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_technician_ledger_store_date",
+        "technician_ledger_entries",
+        ["store_id", "work_date"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_technician_ledger_technician_date",
+        "technician_ledger_entries",
+        ["technician_id", "work_date", "work_time"],
+        unique=False,
+    )
+
+    # Backfill with the same code the write paths use; the split / service item
+    # commission rules are too involved to restate as INSERT ... SELECT.
+    with Session(bind=op.get_bind()) as session:
+        rebuild_technician_ledger(session)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_technician_ledger_technician_date", table_name="technician_ledger_entries")
+    op.drop_index("ix_technician_ledger_store_date", table_name="technician_ledger_entries")
+    op.drop_index("ix_technician_ledger_entries_appointment_id", table_name="technician_ledger_entries")
+    op.drop_index("ix_technician_ledger_entries_id", table_name="technician_ledger_entries")
+    op.drop_table("technician_ledger_entries")
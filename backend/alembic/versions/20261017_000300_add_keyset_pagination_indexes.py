@@ -0,0 +1,43 @@
+"""add keyset pagination indexes
+
+Revision ID: 20261017_000300
+Revises: 20261017_000200
+Create Date: 2026-10-17 00:03:00
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000300"
+down_revision = "20261017_000200"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_appointments_schedule_id",
+        "appointments",
+        ["appointment_date", "appointment_time", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_appointments_store_schedule_id",
+        "appointments",
+        ["store_id", "appointment_date", "appointment_time", "id"],
+        unique=False,
+    )
+    op.create_index("ix_system_logs_created_id", "system_logs", ["created_at", "id"], unique=False)
+    op.create_index("ix_security_block_logs_created_id", "security_block_logs", ["created_at", "id"], unique=False)
+    op.create_index("ix_reviews_created_id", "reviews", ["created_at", "id"], unique=False)
+    op.create_index("ix_reviews_store_created_id", "reviews", ["store_id", "created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reviews_store_created_id", table_name="reviews")
+    op.drop_index("ix_reviews_created_id", table_name="reviews")
+    op.drop_index("ix_security_block_logs_created_id", table_name="security_block_logs")
+    op.drop_index("ix_system_logs_created_id", table_name="system_logs")
+    op.drop_index("ix_appointments_store_schedule_id", table_name="appointments")
+    op.drop_index("ix_appointments_schedule_id", table_name="appointments")
@@ -0,0 +1,84 @@
+"""partition system_logs by day and add hourly rollups by route
+
+Revision ID: 20261017_000400
+Revises: 20261017_000300
+Create Date: 2026-10-17 00:04:00
+"""
+
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000400"
+down_revision = "20261017_000300"
+branch_labels = None
+depends_on = None
+
+# Keep in sync with PARTITION_PRECREATE_DAYS in log_retention_service.
+PRECREATE_DAYS = 3
+
+
+def _partition_clause(name: str, upper_day) -> str:
+    return f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper_day.isoformat()}'))"
+
+
+def upgrade() -> None:
+    op.add_column("system_logs", sa.Column("route", sa.String(length=255), nullable=True))
+    op.create_table(
+        "system_log_hourly_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("log_type", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("level", sa.String(length=10), nullable=False, server_default=""),
+        sa.Column("module", sa.String(length=50), nullable=False, server_default=""),
+        sa.Column("action", sa.String(length=80), nullable=False, server_default=""),
+        sa.Column("route", sa.String(length=255), nullable=False, server_default=""),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("latency_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("latency_sum_ms", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "bucket_start",
+            "log_type",
+            "level",
+            "module",
+            "action",
+            "route",
+            name="uq_system_log_hourly_rollups_key",
+        ),
+    )
+    op.create_index("ix_system_log_hourly_rollups_id", "system_log_hourly_rollups", ["id"], unique=False)
+    op.create_index(
+        "ix_system_log_hourly_rollups_bucket_start",
+        "system_log_hourly_rollups",
+        ["bucket_start"],
+        unique=False,
+    )
+    if op.get_bind().dialect.name != "mysql":
+        # Other backends keep one table; retention deletes in batches on ix_system_logs_created_at.
+        return
+
+    # MySQL requires the partitioning column in every unique key, including the primary key.
+    op.execute("ALTER TABLE system_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+    today = datetime.utcnow().date()
+    # Everything older than today goes into one catch-all partition that retention drops whole.
+    clauses = [_partition_clause(f"p{today - timedelta(days=1):%Y%m%d}", today)]
+    for offset in range(PRECREATE_DAYS + 1):
+        day = today + timedelta(days=offset)
+        clauses.append(_partition_clause(f"p{day:%Y%m%d}", day + timedelta(days=1)))
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    op.execute(
+        "ALTER TABLE system_logs PARTITION BY RANGE (TO_DAYS(created_at)) (" + ", ".join(clauses) + ")"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "mysql":
+        op.execute("ALTER TABLE system_logs REMOVE PARTITIONING")
+        op.execute("ALTER TABLE system_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.drop_index("ix_system_log_hourly_rollups_bucket_start", table_name="system_log_hourly_rollups")
+    op.drop_index("ix_system_log_hourly_rollups_id", table_name="system_log_hourly_rollups")
+    op.drop_table("system_log_hourly_rollups")
+    op.drop_column("system_logs", "route")
@@ -0,0 +1,50 @@
+"""add per-route request latency histograms
+
+Revision ID: 20261017_000500
+Revises: 20261017_000400
+Create Date: 2026-10-17 00:05:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000500"
+down_revision = "20261017_000400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_latency_histograms",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("method", sa.String(length=10), nullable=False),
+        sa.Column("route", sa.String(length=255), nullable=False),
+        sa.Column("status_class", sa.String(length=3), nullable=False),
+        sa.Column("upper_bound_ms", sa.BigInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "bucket_start",
+            "method",
+            "route",
+            "status_class",
+            "upper_bound_ms",
+            name="uq_request_latency_histograms_key",
+        ),
+    )
+    op.create_index("ix_request_latency_histograms_id", "request_latency_histograms", ["id"], unique=False)
+    op.create_index(
+        "ix_request_latency_histograms_bucket_start",
+        "request_latency_histograms",
+        ["bucket_start"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_request_latency_histograms_bucket_start", table_name="request_latency_histograms")
+    op.drop_index("ix_request_latency_histograms_id", table_name="request_latency_histograms")
+    op.drop_table("request_latency_histograms")
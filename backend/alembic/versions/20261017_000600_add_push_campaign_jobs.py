@@ -0,0 +1,60 @@
+"""add push campaign jobs table
+
+Revision ID: 20261017_000600
+Revises: 20261017_000500
+Create Date: 2026-10-17 00:06:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000600"
+down_revision = "20261017_000500"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "push_campaign_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("title", sa.String(length=120), nullable=False),
+        sa.Column("message", sa.String(length=500), nullable=False),
+        sa.Column("custom_data", sa.Text(), nullable=True),
+        sa.Column("store_id", sa.Integer(), nullable=True),
+        sa.Column("user_ids", sa.Text(), nullable=True),
+        sa.Column("max_users", sa.Integer(), nullable=False),
+        sa.Column("target_user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed_user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sent_user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed_user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skipped_user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("deactivated", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("truncated", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("last_user_id", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(length=500), nullable=True),
+        sa.Column("claim_token", sa.String(length=32), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_push_campaign_jobs_id", "push_campaign_jobs", ["id"], unique=False)
+    op.create_index(
+        "ix_push_campaign_jobs_status_heartbeat",
+        "push_campaign_jobs",
+        ["status", "heartbeat_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_push_campaign_jobs_status_heartbeat", table_name="push_campaign_jobs")
+    op.drop_index("ix_push_campaign_jobs_id", table_name="push_campaign_jobs")
+    op.drop_table("push_campaign_jobs")
@@ -0,0 +1,43 @@
+"""add push outbox table
+
+Revision ID: 20261017_000700
+Revises: 20261017_000600
+Create Date: 2026-10-17 00:07:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000700"
+down_revision = "20261017_000600"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "push_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("notification_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("claim_token", sa.String(length=32), nullable=True),
+        sa.Column("claimed_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_push_outbox_id", "push_outbox", ["id"], unique=False)
+    op.create_index("ix_push_outbox_notification_id", "push_outbox", ["notification_id"], unique=False)
+    op.create_index("ix_push_outbox_claim_token", "push_outbox", ["claim_token"], unique=False)
+    op.create_index("ix_push_outbox_status_available", "push_outbox", ["status", "available_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_push_outbox_status_available", table_name="push_outbox")
+    op.drop_index("ix_push_outbox_claim_token", table_name="push_outbox")
+    op.drop_index("ix_push_outbox_notification_id", table_name="push_outbox")
+    op.drop_index("ix_push_outbox_id", table_name="push_outbox")
+    op.drop_table("push_outbox")
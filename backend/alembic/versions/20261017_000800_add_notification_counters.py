@@ -0,0 +1,33 @@
+"""add notification counters table
+
+Revision ID: 20261017_000800
+Revises: 20261017_000700
+Create Date: 2026-10-17 00:08:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000800"
+down_revision = "20261017_000700"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("backend_users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread_count) "
+        "SELECT user_id, COUNT(*) FROM notifications WHERE is_read = 0 GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_counters")
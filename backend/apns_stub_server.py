@@ -0,0 +1,197 @@
+"""
+Local stand-in for APNs: HTTP/2 with prior knowledge over plain TCP.
+
+Accepts POST /3/device/<token> and answers like APNs: 200 with an apns-id,
+or a JSON ``{"reason": ...}`` body for tokens configured to fail. Tracks
+connections, requests and the peak number of concurrent streams so tests
+and benchmark_apns_sender.py can check that pushes are multiplexed.
+
+Usage:
+    python apns_stub_server.py --port 2197 --latency-ms 50 --bad-token deadbeef
+    APNS_HOST_OVERRIDE=http://127.0.0.1:2197 uvicorn app.main:app
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from typing import Iterable, Optional
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+
+class StubApnsServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency_seconds: float = 0.0,
+        bad_tokens: Iterable[str] = (),
+        unregistered_tokens: Iterable[str] = (),
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency_seconds = latency_seconds
+        self.bad_tokens = set(bad_tokens)
+        self.unregistered_tokens = set(unregistered_tokens)
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def respond(self, path: str) -> tuple[int, Optional[dict]]:
+        token = path.rsplit("/", 1)[-1]
+        if not path.startswith("/3/device/") or not token:
+            return 404, {"reason": "BadPath"}
+        if token in self.bad_tokens:
+            return 400, {"reason": "BadDeviceToken"}
+        if token in self.unregistered_tokens:
+            return 410, {"reason": "Unregistered"}
+        return 200, None
+
+    async def serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._server = await self._loop.create_server(lambda: _StubProtocol(self), self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def start(self) -> "StubApnsServer":
+        """Serve from a background thread; returns once the port is bound."""
+        ready = threading.Event()
+        loop = asyncio.new_event_loop()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.serve())
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="apns-stub", daemon=True)
+        self._thread.start()
+        ready.wait(5)
+        return self
+
+    def stop(self) -> None:
+        loop, server = self._loop, self._server
+        if loop is None or server is None:
+            return
+
+        async def shutdown() -> None:
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+class _StubProtocol(asyncio.Protocol):
+    def __init__(self, stub: StubApnsServer) -> None:
+        self._stub = stub
+        self._conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self._transport: Optional[asyncio.Transport] = None
+        self._paths: dict[int, str] = {}
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+        self._stub.connections += 1
+        self._conn.initiate_connection()
+        self._flush()
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            events = self._conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._flush()
+            self._transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self._paths[event.stream_id] = dict(event.headers).get(":path", "")
+            elif isinstance(event, h2.events.DataReceived):
+                self._conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(self._respond(event.stream_id))
+            elif isinstance(event, h2.events.StreamReset):
+                self._paths.pop(event.stream_id, None)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self._transport.close()
+        self._flush()
+
+    async def _respond(self, stream_id: int) -> None:
+        path = self._paths.pop(stream_id, "")
+        stub = self._stub
+        stub.requests += 1
+        stub.in_flight += 1
+        stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+        try:
+            if stub.latency_seconds:
+                await asyncio.sleep(stub.latency_seconds)
+            if self._transport.is_closing():
+                return
+            status, body = stub.respond(path)
+            headers = [(":status", str(status)), ("apns-id", str(uuid.uuid4()).upper())]
+            payload = json.dumps(body).encode("utf-8") if body is not None else b""
+            if payload:
+                headers.append(("content-type", "application/json"))
+            try:
+                self._conn.send_headers(stream_id, headers, end_stream=not payload)
+                if payload:
+                    self._conn.send_data(stream_id, payload, end_stream=True)
+            except h2.exceptions.StreamClosedError:
+                return
+            self._flush()
+        finally:
+            stub.in_flight -= 1
+
+    def _flush(self) -> None:
+        data = self._conn.data_to_send()
+        if data and self._transport is not None and not self._transport.is_closing():
+            self._transport.write(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local HTTP/2 APNs stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2197)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before every response.")
+    parser.add_argument("--bad-token", action="append", default=[], help="Answer 400 BadDeviceToken.")
+    parser.add_argument("--unregistered-token", action="append", default=[], help="Answer 410 Unregistered.")
+    args = parser.parse_args()
+
+    stub = StubApnsServer(
+        args.host,
+        args.port,
+        latency_seconds=args.latency_ms / 1000,
+        bad_tokens=args.bad_token,
+        unregistered_tokens=args.unregistered_token,
+    )
+
+    async def run() -> None:
+        await stub.serve()
+        print(f"APNs stub listening on {stub.url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"connections={stub.connections} requests={stub.requests} peak_in_flight={stub.peak_in_flight}")
+
+
+if __name__ == "__main__":
+    main()
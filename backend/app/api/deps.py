@@ -7,16 +7,15 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.core.security import decode_token, verify_token_type
-from app.crud import user as crud_user
-from app.models.risk import UserRiskState
 from app.models.user import User
+from app.services import principal_service
 
 
 # HTTP Bearer token security
 security = HTTPBearer()
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
@@ -53,16 +52,17 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    # Get user from database
-    user = crud_user.get(db, id=int(user_id))
-    if user is None:
+    # Load the principal (cached user fields and restriction expiry)
+    principal = principal_service.get_principal(db, int(user_id))
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    user_fields = principal["user"]
     
     # Check if user is active
-    if not user.is_active:
+    if not user_fields["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
@@ -70,19 +70,15 @@ async def get_current_user(
 
     # For regular frontend users, enforce temporary restriction globally.
     # This ensures H5 can immediately logout/redirect when account is restricted.
-    if not user.is_admin and user.store_id is None:
-        risk_state = (
-            db.query(UserRiskState)
-            .filter(UserRiskState.user_id == user.id)
-            .first()
+    # restricted_until is only cached for such users.
+    restricted_until = principal_service.restricted_until(principal)
+    if restricted_until and restricted_until > datetime.now(restricted_until.tzinfo):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your account is temporarily restricted from booking. Please try again later.",
         )
-        if risk_state and risk_state.restricted_until and risk_state.restricted_until > datetime.now():
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Your account is temporarily restricted from booking. Please try again later.",
-            )
     
-    return user
+    return principal_service.attach_user(db, principal)
 
 
 async def get_current_admin_user(
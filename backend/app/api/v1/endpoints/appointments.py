@@ -1,8 +1,8 @@
 """
 Appointments API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy import case, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -13,6 +13,8 @@ import secrets
 
 from app.api.deps import get_db, get_current_user
 from app.crud import appointment as crud_appointment
+from app.crud import customer_stats as crud_customer_stats
+from app.crud import technician_ledger as crud_technician_ledger
 from app.crud import points as crud_points
 from app.crud import store_holiday as crud_store_holiday
 from app.crud import store_hours as crud_store_hours
@@ -64,18 +66,26 @@ from app.models.user_coupon import UserCoupon, CouponStatus
 from app.models.user_points import UserPoints
 from app.models.point_transaction import PointTransaction, TransactionType
 from app.models.store_blocked_slot import StoreBlockedSlot
+from app.services import availability_service, booking_validation_service
 from app.services import notification_service
+from app.services import principal_service
 from app.services import reminder_service
 from app.services import risk_service
 from app.services import log_service
 from app.services.vip_config_service import load_vip_level_rows
 from app.crud import coupons as crud_coupons
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, SortKey, paginate
 from app.utils.phone_privacy import mask_phone
 from app.core.security import get_password_hash
 
 router = APIRouter()
 DEFAULT_STORE_TIMEZONE = "America/New_York"
 DEFAULT_STORE_TZ = ZoneInfo(DEFAULT_STORE_TIMEZONE)
+_ADMIN_APPOINTMENT_SORT_KEYS = (
+    SortKey(AppointmentModel.appointment_date, "date"),
+    SortKey(AppointmentModel.appointment_time, "time"),
+    SortKey(AppointmentModel.id, "int"),
+)
 logger = logging.getLogger(__name__)
 
 
@@ -766,6 +776,8 @@ def _recompute_group_host_status(db: Session, group_id: int) -> None:
             host.completed_at = datetime.utcnow()
         service = db.query(Service).filter(Service.id == host.service_id).first()
         _mark_paid_if_completed(host, service)
+    crud_customer_stats.refresh_customer_stats(db, [member.user_id for member in members])
+    crud_technician_ledger.refresh_appointment_ledger(db, [member.id for member in members])
 
 
 def _appointment_row_to_details_payload(row_tuple):
@@ -828,86 +840,50 @@ def create_appointment(
     user_id = current_user.id
     ip_address = request.client.host if request.client else None
 
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    if not store or store.is_visible is False:
-        raise HTTPException(status_code=400, detail="Store is not available")
-    store_timezone = _resolve_zoneinfo(store.time_zone)
-    _ensure_not_past_appointment(
-        appointment.appointment_date,
-        appointment.appointment_time,
-        store_timezone=store_timezone,
-    )
-
-    decision = risk_service.evaluate_booking_request(
-        db,
-        user_id=user_id,
-        appointment_date=appointment.appointment_date,
-        ip_address=ip_address,
-    )
-    if not decision.allowed:
-        risk_service.log_risk_event(
-            db,
-            user_id=user_id,
-            event_type="booking_blocked",
-            ip_address=ip_address,
-            reason=decision.error_code,
-            meta={"appointment_date": str(appointment.appointment_date)},
-        )
-        raise HTTPException(status_code=decision.status_code, detail=decision.message)
-
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    if not service:
-        raise HTTPException(status_code=404, detail="Service not found")
-    if service.store_id != appointment.store_id:
-        raise HTTPException(status_code=400, detail="Service does not belong to this store")
-    if service.is_active != 1:
-        raise HTTPException(status_code=400, detail="Service is not available")
-    _ensure_not_store_holiday(
-        db=db,
-        store_id=appointment.store_id,
-        appointment_date=appointment.appointment_date,
-    )
-    _ensure_within_store_business_hours(
-        db=db,
-        store_id=appointment.store_id,
-        appointment_date=appointment.appointment_date,
-        appointment_time=appointment.appointment_time,
-        duration_minutes=service.duration_minutes,
-    )
-    _ensure_not_blocked_by_store_slot(
-        db=db,
-        store_id=appointment.store_id,
-        appointment_date=appointment.appointment_date,
-        appointment_time=appointment.appointment_time,
-        duration_minutes=service.duration_minutes,
-    )
-    _ensure_technician_is_available(
-        db=db,
-        technician_id=appointment.technician_id,
-        appointment_date=appointment.appointment_date,
-        appointment_time=appointment.appointment_time,
-        duration_minutes=service.duration_minutes,
-    )
-
     try:
         # Serialize booking checks for the same user/technician to narrow race windows.
+        # Locks are taken first so the prefetched appointments below are read after them.
         _lock_booking_subjects(
             db,
             user_ids=[user_id],
             technician_ids=[appointment.technician_id],
         )
-
-        # Check for conflicts using improved conflict checker
-        conflict_result = crud_appointment.check_time_conflict(
+        context = booking_validation_service.load_booking_context(
             db,
-            appointment_date=appointment.appointment_date,
-            appointment_time=appointment.appointment_time,
+            user_id=user_id,
+            store_id=appointment.store_id,
             service_id=appointment.service_id,
+            appointment_date=appointment.appointment_date,
             technician_id=appointment.technician_id,
-            user_id=user_id,
+            ip_address=ip_address,
         )
-        if conflict_result["has_conflict"]:
-            raise HTTPException(status_code=400, detail=conflict_result["message"])
+
+        store = context.store
+        if not store or store.is_visible is False:
+            raise HTTPException(status_code=400, detail="Store is not available")
+        store_timezone = _resolve_zoneinfo(store.time_zone)
+        _ensure_not_past_appointment(
+            appointment.appointment_date,
+            appointment.appointment_time,
+            store_timezone=store_timezone,
+        )
+
+        decision = context.risk_decision(ip_address=ip_address)
+        if not decision.allowed:
+            risk_service.log_risk_event(
+                db,
+                user_id=user_id,
+                event_type="booking_blocked",
+                ip_address=ip_address,
+                reason=decision.error_code,
+                meta={"appointment_date": str(appointment.appointment_date)},
+            )
+            raise HTTPException(status_code=decision.status_code, detail=decision.message)
+
+        rejection = context.check_slot(appointment.appointment_time)
+        if rejection:
+            raise HTTPException(status_code=rejection.status_code, detail=rejection.detail)
+        service = context.service
 
         db_appointment = crud_appointment.create_appointment(
             db,
@@ -928,6 +904,7 @@ def create_appointment(
         db_appointment.points_earned = int(db_appointment.points_earned or 0)
         db_appointment.points_reverted = int(db_appointment.points_reverted or 0)
         db_appointment.settlement_status = db_appointment.settlement_status or "unsettled"
+        crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
 
         db.commit()
         db.refresh(db_appointment)
@@ -938,6 +915,7 @@ def create_appointment(
         db.rollback()
         raise
 
+    availability_service.invalidate_appointment(db_appointment)
     _run_appointment_creation_side_effects(
         db,
         appointment=db_appointment,
@@ -959,6 +937,48 @@ def _validate_store_service_for_group(db: Session, store_id: int, service_id: in
     return service
 
 
+def _validate_store_services_for_group(db: Session, store_id: int, service_ids: List[int]) -> dict[int, Service]:
+    services = {
+        int(row.id): row
+        for row in db.query(Service).filter(Service.id.in_(set(service_ids))).all()
+    } if service_ids else {}
+    for service_id in service_ids:
+        service = services.get(int(service_id))
+        if not service:
+            raise HTTPException(status_code=404, detail=f"Service {service_id} not found")
+        if service.store_id != store_id:
+            raise HTTPException(status_code=400, detail=f"Service {service.name} does not belong to this store")
+        if service.is_active != 1:
+            raise HTTPException(status_code=400, detail=f"Service {service.name} is not available")
+    return services
+
+
+def _ensure_no_group_conflicts(
+    db: Session,
+    *,
+    appointment_date,
+    appointment_time,
+    bookings: List[tuple[Service, Optional[int], Optional[int]]],
+) -> None:
+    """Conflict-check (service, technician_id, user_id) bookings of one group slot in a single pass."""
+    results = crud_appointment.check_time_conflicts_bulk(
+        db,
+        [
+            crud_appointment.ProposedBooking(
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                duration_minutes=service.duration_minutes,
+                technician_id=technician_id,
+                user_id=user_id,
+            )
+            for service, technician_id, user_id in bookings
+        ],
+    )
+    for result in results:
+        if result["has_conflict"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+
+
 def _create_group_child_appointment(
     db: Session,
     user_id: int,
@@ -969,13 +989,16 @@ def _create_group_child_appointment(
     item: AppointmentGroupGuestCreate,
     owner_user_id: Optional[int] = None,
     normalized_guest_phone: Optional[str] = None,
+    service: Optional[Service] = None,
 ) -> AppointmentModel:
+    # Time conflicts are checked by the caller for the whole group via _ensure_no_group_conflicts.
     _ensure_not_past_appointment(
         appointment_date,
         appointment_time,
         store_timezone=store_timezone,
     )
-    service = _validate_store_service_for_group(db, store_id, item.service_id)
+    if service is None:
+        service = _validate_store_service_for_group(db, store_id, item.service_id)
     _ensure_not_store_holiday(
         db=db,
         store_id=store_id,
@@ -1010,16 +1033,6 @@ def _create_group_child_appointment(
     resolved_owner_user_id = owner_user_id
     if resolved_owner_user_id is None:
         resolved_owner_user_id = _resolve_guest_owner_user_id(db, resolved_guest_phone, user_id)
-    conflict_result = crud_appointment.check_time_conflict(
-        db,
-        appointment_date=appointment_date,
-        appointment_time=appointment_time,
-        service_id=item.service_id,
-        technician_id=item.technician_id,
-        user_id=resolved_owner_user_id if resolved_owner_user_id != user_id else None,
-    )
-    if conflict_result["has_conflict"]:
-        raise HTTPException(status_code=400, detail=conflict_result["message"])
     child = crud_appointment.create_appointment(
         db,
         appointment=AppointmentCreate(
@@ -1119,16 +1132,25 @@ def create_appointment_group(
             technician_ids=[payload.host_technician_id] + [data["item"].technician_id for data in guest_inputs],
         )
 
-        conflict_result = crud_appointment.check_time_conflict(
+        guest_services = _validate_store_services_for_group(
+            db,
+            payload.store_id,
+            [data["item"].service_id for data in guest_inputs],
+        )
+        _ensure_no_group_conflicts(
             db,
             appointment_date=payload.appointment_date,
             appointment_time=payload.appointment_time,
-            service_id=payload.host_service_id,
-            technician_id=payload.host_technician_id,
-            user_id=current_user.id,
+            bookings=[(host_service, payload.host_technician_id, current_user.id)]
+            + [
+                (
+                    guest_services[int(data["item"].service_id)],
+                    data["item"].technician_id,
+                    data["owner_user_id"] if data["owner_user_id"] != current_user.id else None,
+                )
+                for data in guest_inputs
+            ],
         )
-        if conflict_result["has_conflict"]:
-            raise HTTPException(status_code=400, detail=conflict_result["message"])
 
         host = crud_appointment.create_appointment(
             db,
@@ -1181,6 +1203,7 @@ def create_appointment_group(
                 item=data["item"],
                 owner_user_id=data["owner_user_id"],
                 normalized_guest_phone=data["normalized_guest_phone"],
+                service=guest_services[int(data["item"].service_id)],
             )
             guest.group_id = group.id
             guest_appointments.append(guest)
@@ -1194,6 +1217,7 @@ def create_appointment_group(
         db.rollback()
         raise
 
+    availability_service.invalidate_store_day(payload.store_id, payload.appointment_date)
     rows = _get_group_appointments_with_details(db, group_id=group.id)
     row_map = {row[0].id: row for row in rows}
     host_payload = _appointment_row_to_details_payload(row_map[host.id])
@@ -1247,6 +1271,25 @@ def append_appointment_group_guests(
             technician_ids=[data["item"].technician_id for data in guest_inputs],
         )
 
+        guest_services = _validate_store_services_for_group(
+            db,
+            group.store_id,
+            [data["item"].service_id for data in guest_inputs],
+        )
+        _ensure_no_group_conflicts(
+            db,
+            appointment_date=group.appointment_date,
+            appointment_time=group.appointment_time,
+            bookings=[
+                (
+                    guest_services[int(data["item"].service_id)],
+                    data["item"].technician_id,
+                    data["owner_user_id"] if data["owner_user_id"] != host.user_id else None,
+                )
+                for data in guest_inputs
+            ],
+        )
+
         for data in guest_inputs:
             guest = _create_group_child_appointment(
                 db=db,
@@ -1258,6 +1301,7 @@ def append_appointment_group_guests(
                 item=data["item"],
                 owner_user_id=data["owner_user_id"],
                 normalized_guest_phone=data["normalized_guest_phone"],
+                service=guest_services[int(data["item"].service_id)],
             )
             guest.group_id = group.id
             guest_appointments.append(guest)
@@ -1271,6 +1315,7 @@ def append_appointment_group_guests(
         db.rollback()
         raise
 
+    availability_service.invalidate_store_day(group.store_id, group.appointment_date)
     rows = _get_group_appointments_with_details(db, group_id=group.id)
     host_payload = None
     guest_payloads = []
@@ -1371,8 +1416,10 @@ def get_my_appointments(
 @router.get("/admin", response_model=List[AppointmentWithDetails])
 def get_admin_appointments(
     request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page; overrides skip"),
     status: Optional[str] = Query(None, description="Filter by status"),
     store_id: Optional[int] = Query(None, description="Filter by store ID (super admin only)"),
     include_full_phone: bool = Query(False, description="Return full customer phone (audited)"),
@@ -1417,13 +1464,20 @@ def get_admin_appointments(
                 detail="Invalid status"
             )
 
-    appointments_data = crud_appointment.get_appointments_with_details(
-        db,
-        skip=skip,
-        limit=limit,
-        store_id=resolved_store_id,
-        status=status_enum
-    )
+    try:
+        page = paginate(
+            crud_appointment.appointments_with_details_query(db, store_id=resolved_store_id, status=status_enum),
+            _ADMIN_APPOINTMENT_SORT_KEYS,
+            key_of=lambda row: (row[0].appointment_date, row[0].appointment_time, row[0].id),
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    appointments_data = page.rows
     appointment_ids = [int(appt.id) for appt, *_ in appointments_data if appt.id is not None]
     service_rollup_map = _load_appointment_service_rollups(db, appointment_ids)
 
@@ -1441,35 +1495,12 @@ def get_admin_appointments(
             int(user_id): _parse_customer_tags(raw_tags)
             for user_id, raw_tags in user_rows
         }
-        completed_stats_rows = (
-            db.query(
-                AppointmentModel.user_id.label("user_id"),
-                func.count(AppointmentModel.id).label("completed_visits"),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (AppointmentModel.final_paid_amount > 0, AppointmentModel.final_paid_amount),
-                            else_=func.coalesce(AppointmentModel.order_amount, 0.0),
-                        )
-                    ),
-                    0.0,
-                ).label("completed_spend"),
-            )
-            .filter(
-                AppointmentModel.user_id.in_(user_ids),
-                AppointmentModel.status == AppointmentStatus.COMPLETED,
-            )
-            .group_by(AppointmentModel.user_id)
-            .all()
-        )
         levels = _load_vip_levels_for_appointments(db)
         stats_map = {uid: {"visits": 0, "spend": 0.0} for uid in user_ids}
-        for row in completed_stats_rows:
-            uid = int(row.user_id)
-            completed_user_ids.add(uid)
-            current = stats_map.setdefault(uid, {"visits": 0, "spend": 0.0})
-            current["visits"] = int(row.completed_visits or 0)
-            current["spend"] = float(row.completed_spend or 0.0)
+        for uid, totals in crud_customer_stats.get_users_totals(db, user_ids).items():
+            if totals["completed_count"] > 0:
+                completed_user_ids.add(uid)
+            stats_map[uid] = {"visits": totals["completed_count"], "spend": totals["completed_spend"]}
         vip_level_map = {
             uid: _resolve_vip_level(total_spend=stats["spend"], total_visits=stats["visits"], levels=levels)
             for uid, stats in stats_map.items()
@@ -1662,8 +1693,11 @@ def create_admin_walk_in_appointment(
         db_appointment.points_earned = int(db_appointment.points_earned or 0)
         db_appointment.points_reverted = int(db_appointment.points_reverted or 0)
         db_appointment.settlement_status = db_appointment.settlement_status or "unsettled"
+        crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
         db.commit()
         db.refresh(db_appointment)
+        if not _created:
+            principal_service.invalidate_principal(customer.id)
     except HTTPException:
         db.rollback()
         raise
@@ -1671,6 +1705,7 @@ def create_admin_walk_in_appointment(
         db.rollback()
         raise
 
+    availability_service.invalidate_appointment(db_appointment)
     _run_appointment_creation_side_effects(
         db,
         appointment=db_appointment,
@@ -1770,11 +1805,13 @@ def update_appointment(
         if conflict_result["has_conflict"]:
             raise HTTPException(status_code=400, detail=conflict_result["message"])
     
+    previous_date = appointment.appointment_date
     updated_appointment = crud_appointment.update_appointment(
         db,
         appointment_id=appointment_id,
         appointment=appointment_update
     )
+    availability_service.invalidate_appointment(updated_appointment, previous_date=previous_date)
     
     return updated_appointment
 
@@ -1815,6 +1852,7 @@ def cancel_appointment(
     if cancelled_appointment.group_id:
         _recompute_group_host_status(db, cancelled_appointment.group_id)
         db.commit()
+    availability_service.invalidate_appointment(cancelled_appointment)
     risk_service.log_risk_event(
         db,
         user_id=current_user.id,
@@ -1921,12 +1959,14 @@ def reschedule_appointment(
         )
     
     # Reschedule appointment
+    previous_date = appointment.appointment_date
     rescheduled_appointment = crud_appointment.reschedule_appointment(
         db,
         appointment_id=appointment_id,
         new_date=reschedule_data.new_date,
         new_time=reschedule_data.new_time
     )
+    availability_service.invalidate_appointment(rescheduled_appointment, previous_date=previous_date)
     
     # Send notification
     notification_service.notify_appointment_rescheduled(db, rescheduled_appointment)
@@ -2096,6 +2136,8 @@ def update_appointment_amount(
         # Keep settlement preview in sync before settlement is finalized.
         if settlement_status in {"", "unsettled"}:
             appointment.original_amount = float(amount_data.order_amount)
+    crud_customer_stats.refresh_customer_stats(db, [appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
     db.commit()
     db.refresh(appointment)
 
@@ -2318,6 +2360,8 @@ def settle_appointment(
             "final_paid_amount": appointment.final_paid_amount,
         }),
     ))
+    crud_customer_stats.refresh_customer_stats(db, [appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
 
     db.commit()
     db.refresh(appointment)
@@ -2484,6 +2528,8 @@ def refund_appointment(
             "reason": payload.reason,
         }),
     ))
+    crud_customer_stats.refresh_customer_stats(db, [appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
 
     db.commit()
     db.refresh(appointment)
@@ -2568,8 +2614,10 @@ def update_appointment_technician(
 
     before_technician_id = appointment.technician_id
     appointment.technician_id = payload.technician_id
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
     db.commit()
     db.refresh(appointment)
+    availability_service.invalidate_appointment(appointment)
 
     log_service.create_audit_log(
         db,
@@ -2630,9 +2678,11 @@ def update_appointment_guest_owner(
             .first()
         )
 
+    previous_user_id = appointment.user_id
     appointment.guest_phone = normalized_guest_phone
     appointment.guest_name = payload.guest_name.strip() if payload.guest_name else None
     appointment.user_id = int(target_user.id) if target_user else int(booked_by_user_id)
+    crud_customer_stats.refresh_customer_stats(db, [previous_user_id, appointment.user_id])
     db.commit()
     db.refresh(appointment)
 
@@ -2714,6 +2764,8 @@ def add_appointment_service_item(
         .all()
     )
     total_amount = _sync_appointment_total_from_service_items(appointment, items)
+    crud_customer_stats.refresh_customer_stats(db, [appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
     db.commit()
 
     log_service.create_audit_log(
@@ -2775,6 +2827,8 @@ def delete_appointment_service_item(
         .all()
     )
     total_amount = _sync_appointment_total_from_service_items(appointment, items)
+    crud_customer_stats.refresh_customer_stats(db, [appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
     db.commit()
 
     log_service.create_audit_log(
@@ -2945,7 +2999,9 @@ def update_appointment_staff_splits(
         appointment.technician_id = normalized_splits[0]["technician_id"]
     else:
         appointment.technician_id = None
+    crud_technician_ledger.refresh_appointment_ledger(db, [appointment.id])
     db.commit()
+    availability_service.invalidate_appointment(appointment)
 
     log_service.create_audit_log(
         db,
@@ -3070,6 +3126,7 @@ def update_appointment_status(
         if updated_appointment.group_id:
             _recompute_group_host_status(db, updated_appointment.group_id)
         db.commit()
+        availability_service.invalidate_appointment(updated_appointment)
 
         effective_amount = float(
             updated_appointment.order_amount
@@ -3164,6 +3221,7 @@ def update_appointment_status(
         if cancelled_appointment.group_id:
             _recompute_group_host_status(db, cancelled_appointment.group_id)
             db.commit()
+        availability_service.invalidate_appointment(cancelled_appointment)
         risk_service.log_risk_event(
             db,
             user_id=cancelled_appointment.user_id,
@@ -3335,6 +3393,7 @@ def mark_appointment_no_show(
     if no_show_appointment.group_id:
         _recompute_group_host_status(db, no_show_appointment.group_id)
         db.commit()
+    availability_service.invalidate_appointment(no_show_appointment)
     risk_service.log_risk_event(
         db,
         user_id=no_show_appointment.user_id,
@@ -3440,6 +3499,7 @@ def complete_appointment(
     if updated_appointment.group_id:
         _recompute_group_host_status(db, updated_appointment.group_id)
     db.commit()
+    availability_service.invalidate_appointment(updated_appointment)
 
     # Apply coupon if provided (admin selected)
     effective_amount = float(
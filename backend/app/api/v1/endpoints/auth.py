@@ -10,12 +10,13 @@ from app.schemas.verification import SendVerificationCodeRequest, VerifyCodeRequ
 from app.crud import user as crud_user
 from app.crud import verification_code as crud_verification
 from app.crud import coupons as crud_coupons
-from app.core.security import create_access_token, create_refresh_token, verify_password
+from app.core.security import create_access_token, create_refresh_token, verify_password_async
 from app.core.config import settings
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.risk import UserRiskState
 from app.models.appointment import Appointment as AppointmentModel
+from app.services import principal_service
 from app.services.upload_file_service import ensure_upload_root, validate_and_scan_image_bytes, write_upload_bytes
 import os
 from datetime import datetime, timedelta
@@ -48,7 +49,7 @@ def _claim_guest_phone_appointments(db: Session, phone: str, user_id: int) -> in
 
 
 @router.post("/send-verification-code", response_model=SendVerificationCodeResponse)
-async def send_verification_code(
+def send_verification_code(
     request: SendVerificationCodeRequest,
     db: Session = Depends(get_db)
 ):
@@ -94,7 +95,7 @@ async def send_verification_code(
 
 
 @router.post("/verify-code")
-async def verify_code(
+def verify_code(
     request: VerifyCodeRequest,
     db: Session = Depends(get_db)
 ):
@@ -122,7 +123,7 @@ async def verify_code(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(
+def register(
     user_in: UserCreate,
     db: Session = Depends(get_db)
 ):
@@ -241,39 +242,7 @@ async def register(
     return user
 
 
-@router.post("/login", response_model=Token)
-async def login(
-    user_credentials: UserLogin,
-    db: Session = Depends(get_db)
-):
-    """
-    User login with phone number
-    
-    Args:
-        user_credentials: User login credentials (phone, password)
-        db: Database session
-        
-    Returns:
-        JWT access and refresh tokens
-        
-    Raises:
-        HTTPException: If credentials are invalid
-    """
-    # Get user by phone
-    user = crud_user.get_by_phone(db, phone=user_credentials.phone)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect phone number or password"
-        )
-    
-    # Verify password
-    if not verify_password(user_credentials.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect phone number or password"
-        )
-    
+def _issue_login_tokens(db: Session, user: User, user_credentials: UserLogin) -> dict:
     # Check if user is active
     if not user.is_active:
         raise HTTPException(
@@ -308,6 +277,7 @@ async def login(
 
     user.last_login_at = datetime.utcnow()
     db.commit()
+    principal_service.invalidate_principal(user.id)
     crud_coupons.claim_phone_pending_grants(db, user_id=user.id, phone=user.phone)
     
     # Create tokens
@@ -327,6 +297,45 @@ async def login(
     }
 
 
+@router.post("/login", response_model=Token)
+async def login(
+    user_credentials: UserLogin,
+    db: Session = Depends(get_db)
+):
+    """
+    User login with phone number
+
+    Database work runs on the request threadpool and the bcrypt check on the
+    dedicated password hashing pool, so a login burst never blocks the event loop.
+    
+    Args:
+        user_credentials: User login credentials (phone, password)
+        db: Database session
+        
+    Returns:
+        JWT access and refresh tokens
+        
+    Raises:
+        HTTPException: If credentials are invalid
+    """
+    # Get user by phone
+    user = await run_in_threadpool(crud_user.get_by_phone, db, phone=user_credentials.phone)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect phone number or password"
+        )
+    
+    # Verify password
+    if not await verify_password_async(user_credentials.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect phone number or password"
+        )
+
+    return await run_in_threadpool(_issue_login_tokens, db, user, user_credentials)
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: User = Depends(get_current_user)
@@ -344,7 +353,7 @@ async def get_current_user_info(
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(
+def refresh_token(
     payload: dict | None = Body(default=None),
     query_refresh_token: str | None = Query(default=None, alias="refresh_token"),
     db: Session = Depends(get_db)
@@ -416,7 +425,7 @@ async def refresh_token(
 
 
 @router.put("/me", response_model=UserResponse)
-async def update_current_user(
+def update_current_user(
     user_update: dict,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -570,6 +579,6 @@ async def upload_avatar(
     
     # Update user avatar URL
     avatar_url = f"/uploads/avatars/{filename}"
-    crud_user.update_user(db, current_user.id, {"avatar_url": avatar_url})
+    await run_in_threadpool(crud_user.update_user, db, current_user.id, {"avatar_url": avatar_url})
     
     return {"avatar_url": avatar_url}
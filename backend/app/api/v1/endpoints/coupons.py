@@ -108,7 +108,12 @@ def _grant_coupon_for_phone(
     phone: str,
     coupon_id: int,
     operator_user_id: Optional[int],
+    notification_specs: Optional[List[notification_service.NotificationSpec]] = None,
 ) -> GrantCouponResult:
+    """
+    Grant one coupon by phone. Batch callers pass ``notification_specs`` to
+    collect the in-app notifications and create them in one bulk write.
+    """
     user = crud_user.get_by_phone(db, phone=phone)
     if user:
         user_coupon = crud_coupons.claim_coupon(
@@ -123,13 +128,16 @@ def _grant_coupon_for_phone(
                 discount_text = f"${coupon.discount_value:g} off"
             else:
                 discount_text = f"{coupon.discount_value:g}% off"
-            notification_service.notify_coupon_granted(
-                db=db,
+            spec = notification_service.build_coupon_granted(
                 user_id=user.id,
                 coupon_name=coupon.name,
                 discount_text=discount_text,
-                expires_at=user_coupon.expires_at
+                expires_at=user_coupon.expires_at,
             )
+            if notification_specs is None:
+                notification_service.create_notifications_bulk(db, [spec])
+            else:
+                notification_specs.append(spec)
         return GrantCouponResult(
             status="granted",
             detail="Coupon granted to registered user",
@@ -443,6 +451,7 @@ def grant_coupon_batch(
     _enforce_coupon_grant_guardrails(db, coupon=coupon, requested_count=len(payload.phones))
 
     items: List[GrantCouponBatchItem] = []
+    notification_specs: List[notification_service.NotificationSpec] = []
     seen = set()
 
     for raw_phone in payload.phones:
@@ -476,6 +485,7 @@ def grant_coupon_batch(
                 phone=normalized,
                 coupon_id=payload.coupon_id,
                 operator_user_id=current_user.id,
+                notification_specs=notification_specs,
             )
             items.append(GrantCouponBatchItem(
                 input_phone=input_phone,
@@ -494,6 +504,8 @@ def grant_coupon_batch(
                 detail=str(exc),
             ))
 
+    notification_service.create_notifications_bulk(db, notification_specs)
+
     granted_count = sum(1 for item in items if item.status == "granted")
     pending_count = sum(1 for item in items if item.status == "pending_claim")
     failed_count = sum(1 for item in items if item.status == "failed")
@@ -7,12 +7,14 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, case, func, or_
+from sqlalchemy import case, func, or_
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_store_admin, get_db
+from app.crud import customer_stats as crud_customer_stats
 from app.models.appointment import Appointment
 from app.models.coupon import Coupon
+from app.models.customer_stats import CustomerStats
 from app.models.gift_card import GiftCard
 from app.models.point_transaction import PointTransaction
 from app.models.risk import UserRiskState
@@ -22,7 +24,7 @@ from app.models.user_coupon import UserCoupon
 from app.models.user_points import UserPoints
 from app.models.user import User
 from app.models.referral import Referral
-from app.services import log_service
+from app.services import log_service, principal_service
 from app.utils.phone_privacy import mask_phone, validate_keyword_min_length
 
 router = APIRouter()
@@ -231,49 +233,39 @@ def _build_next_appointment_datetime(appointment: Optional[Appointment]) -> Opti
     return datetime.combine(appointment.appointment_date, appointment.appointment_time)
 
 
-def _summarize_customer(db: Session, customer_id: int, current_user: User):
-    scope_filters = _appointment_scope_filter(current_user)
-    no_show_expr = and_(
-        Appointment.status == "cancelled",
-        Appointment.cancel_reason.isnot(None),
-        func.lower(Appointment.cancel_reason).like("%no show%"),
+def _customer_stats_subquery(db: Session, current_user: User):
+    """Per-customer totals from the customer_stats projection, scoped like the appointment filters."""
+    now = datetime.now()
+    query = db.query(
+        CustomerStats.user_id.label("user_id"),
+        func.sum(CustomerStats.total_count).label("total"),
+        func.sum(CustomerStats.completed_count).label("completed"),
+        func.sum(CustomerStats.cancelled_count).label("cancelled"),
+        func.sum(CustomerStats.no_show_count).label("no_show"),
+        func.min(
+            case((CustomerStats.next_appointment_at >= now, CustomerStats.next_appointment_at), else_=None)
+        ).label("next_appointment_at"),
     )
+    if not current_user.is_admin:
+        if not current_user.store_id:
+            raise HTTPException(status_code=403, detail="Store admin scope is missing")
+        query = query.filter(CustomerStats.store_id == current_user.store_id)
+    return query.group_by(CustomerStats.user_id).subquery()
 
-    stats_row = (
-        db.query(
-            func.count(Appointment.id).label("total"),
-            func.sum(case((Appointment.status == "completed", 1), else_=0)).label("completed"),
-            func.sum(case((and_(Appointment.status == "cancelled", ~no_show_expr), 1), else_=0)).label("cancelled"),
-            func.sum(case((no_show_expr, 1), else_=0)).label("no_show"),
-        )
-        .filter(Appointment.user_id == customer_id, *scope_filters)
-        .first()
-    )
 
-    next_appointment = (
-        db.query(Appointment)
-        .filter(
-            Appointment.user_id == customer_id,
-            Appointment.status.in_(["pending", "confirmed"]),
-            or_(
-                Appointment.appointment_date > date.today(),
-                and_(
-                    Appointment.appointment_date == date.today(),
-                    Appointment.appointment_time >= datetime.now().time(),
-                ),
-            ),
-            *scope_filters,
-        )
-        .order_by(Appointment.appointment_date.asc(), Appointment.appointment_time.asc())
-        .first()
+def _summarize_customer(db: Session, customer_id: int, current_user: User):
+    _appointment_scope_filter(current_user)
+    totals = crud_customer_stats.get_user_totals(
+        db,
+        customer_id,
+        store_id=None if current_user.is_admin else current_user.store_id,
     )
-
     return {
-        "total": int(stats_row.total or 0),
-        "completed": int(stats_row.completed or 0),
-        "cancelled": int(stats_row.cancelled or 0),
-        "no_show": int(stats_row.no_show or 0),
-        "next_appointment_at": _build_next_appointment_datetime(next_appointment),
+        "total": totals["total_count"],
+        "completed": totals["completed_count"],
+        "cancelled": totals["cancelled_count"],
+        "no_show": totals["no_show_count"],
+        "next_appointment_at": totals["next_appointment_at"],
     }
 
 
@@ -327,38 +319,48 @@ def list_customers(
             UserRiskState.restricted_until > datetime.now(),
         )
 
-    rows = query.order_by(User.created_at.desc()).all()
+    stats = _customer_stats_subquery(db, current_user)
+    query = query.outerjoin(stats, stats.c.user_id == User.id)
+    if has_upcoming is True:
+        query = query.filter(stats.c.next_appointment_at.isnot(None))
+    elif has_upcoming is False:
+        query = query.filter(stats.c.next_appointment_at.is_(None))
 
-    result: List[CustomerListItem] = []
-    for user_row in rows:
-        user = user_row
-        state = (
-            db.query(UserRiskState)
-            .filter(UserRiskState.user_id == user.id)
-            .first()
+    total = query.with_entities(func.count(User.id)).scalar() or 0
+    rows = (
+        query.with_entities(
+            User,
+            UserRiskState.risk_level,
+            UserRiskState.restricted_until,
+            stats.c.total,
+            stats.c.completed,
+            stats.c.cancelled,
+            stats.c.no_show,
+            stats.c.next_appointment_at,
         )
-        summary = _summarize_customer(db, user.id, current_user)
-
-        if has_upcoming is True and not summary["next_appointment_at"]:
-            continue
-        if has_upcoming is False and summary["next_appointment_at"]:
-            continue
+        .order_by(User.created_at.desc(), User.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
-        restricted_until = state.restricted_until if state else None
-        is_restricted = bool(restricted_until and restricted_until > datetime.now())
-        result.append(
+    now = datetime.now()
+    page_items: List[CustomerListItem] = []
+    for user, risk_level_value, restricted_until, total_count, completed, cancelled, no_show, next_appointment_at in rows:
+        is_restricted = bool(restricted_until and restricted_until > now)
+        page_items.append(
             CustomerListItem(
                 id=user.id,
                 name=user.full_name or user.username,
                 phone=user.phone if include_full_phone else mask_phone(user.phone),
                 registered_at=user.created_at,
                 last_login_at=user.last_login_at or user.updated_at,
-                total_appointments=summary["total"],
-                completed_count=summary["completed"],
-                cancelled_count=summary["cancelled"],
-                no_show_count=summary["no_show"],
-                next_appointment_at=summary["next_appointment_at"],
-                risk_level=state.risk_level if state else "normal",
+                total_appointments=int(total_count or 0),
+                completed_count=int(completed or 0),
+                cancelled_count=int(cancelled or 0),
+                no_show_count=int(no_show or 0),
+                next_appointment_at=next_appointment_at,
+                risk_level=risk_level_value or "normal",
                 restricted_until=restricted_until,
                 status="restricted" if is_restricted else "active",
                 tags=_parse_customer_tags(user.customer_tags),
@@ -374,11 +376,9 @@ def list_customers(
             action="customers.list.full_phone",
             message="管理员查询客户列表明文手机号",
             target_type="customer",
-            meta={"count": len(result)},
+            meta={"count": total},
         )
 
-    total = len(result)
-    page_items = result[skip : skip + limit]
     return CustomerListResponse(items=page_items, total=total, skip=skip, limit=limit)
 
 
@@ -461,6 +461,7 @@ def update_customer_tags(
     db.add(customer)
     db.commit()
     db.refresh(customer)
+    principal_service.invalidate_principal(customer.id)
 
     log_service.create_audit_log(
         db,
@@ -1,7 +1,7 @@
 """
 System logs admin endpoints.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import json
 import re
@@ -12,12 +12,14 @@ from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import desc, false, func, or_
+from sqlalchemy import case, desc, false, func, or_
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin_user, get_db
-from app.models.system_log import SystemLog
+from app.models.system_log import SystemLog, SystemLogHourlyRollup
 from app.models.user import User
+from app.services import cache_service, log_service, request_latency_service
+from app.utils.pagination import InvalidCursor, SortKey, cached_count, paginate
 
 router = APIRouter()
 ET_TZ = ZoneInfo("America/New_York")
@@ -26,6 +28,8 @@ _PHONE_STRIP_CHARS = (" ", "-", "(", ")", "+", ".", "/")
 _LOG_STATS_CACHE_TTL_SECONDS = max(1, int(os.getenv("LOG_STATS_CACHE_TTL_SECONDS", "15")))
 _LOG_STATS_CACHE_LOCK = Lock()
 _LOG_STATS_CACHE: Dict[str, Any] = {"expires_at": 0.0, "value": None}
+_LOG_LIST_COUNT_TTL_SECONDS = max(1, int(os.getenv("LOG_LIST_COUNT_TTL_SECONDS", "30")))
+_LOG_SORT_KEYS = (SortKey(SystemLog.created_at, "datetime"), SortKey(SystemLog.id, "int"))
 
 
 class SystemLogOut(BaseModel):
@@ -57,10 +61,11 @@ class SystemLogOut(BaseModel):
 
 
 class SystemLogListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
     items: List[SystemLogOut]
+    next_cursor: Optional[str] = None
 
 
 class SystemLogDetailOut(SystemLogOut):
@@ -74,7 +79,9 @@ class SystemLogStatsOut(BaseModel):
     today_error_count: int
     today_security_count: int
     avg_latency_ms: int
+    p50_latency_ms: int
     p95_latency_ms: int
+    p99_latency_ms: int
     top_modules: List[Dict[str, Any]]
     top_actions: List[Dict[str, Any]]
     top_error_paths: List[Dict[str, Any]]
@@ -150,9 +157,27 @@ def list_logs_admin(
     date_to: Optional[datetime] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page; overrides skip"),
+    include_total: bool = Query(True, description="Total is cached briefly per filter set"),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_admin_user),
 ):
+    filters = {
+        "log_type": log_type,
+        "level": level,
+        "module": module,
+        "action": action,
+        "operator_user_id": operator_user_id,
+        "operator_role": operator_role,
+        "operator": operator,
+        "target_type": target_type,
+        "target_id": target_id,
+        "request_id": request_id,
+        "ip_address": ip_address,
+        "status_code": status_code,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
     query = db.query(SystemLog)
     valid_operator_roles = {"super_admin", "store_admin", "normal_user"}
     if log_type and log_type != "all":
@@ -220,8 +245,19 @@ def list_logs_admin(
     if date_to:
         query = query.filter(SystemLog.created_at <= date_to)
 
-    total = query.count()
-    items = query.order_by(desc(SystemLog.created_at)).offset(skip).limit(limit).all()
+    total = cached_count(query, "system_logs", filters, _LOG_LIST_COUNT_TTL_SECONDS) if include_total else None
+    try:
+        page = paginate(
+            query,
+            _LOG_SORT_KEYS,
+            key_of=lambda item: (item.created_at, item.id),
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    items = page.rows
     operator_phone_map = _build_operator_phone_map(db, items)
     response_items = [
         SystemLogOut(
@@ -230,7 +266,13 @@ def list_logs_admin(
         )
         for item in items
     ]
-    return SystemLogListOut(total=total, skip=skip, limit=limit, items=response_items)
+    return SystemLogListOut(
+        total=total,
+        skip=skip,
+        limit=limit,
+        items=response_items,
+        next_cursor=page.next_cursor,
+    )
 
 
 @router.get("/admin/stats", response_model=SystemLogStatsOut)
@@ -249,95 +291,87 @@ def get_log_stats_admin(
     # so compare using UTC naive boundaries.
     day_start = day_start_et.astimezone(UTC_TZ).replace(tzinfo=None)
 
-    today_total = (
-        db.query(func.count(SystemLog.id))
-        .filter(SystemLog.created_at >= day_start)
-        .scalar()
-        or 0
-    )
-    today_error_count = (
-        db.query(func.count(SystemLog.id))
-        .filter(SystemLog.created_at >= day_start, SystemLog.level.in_(["error", "critical"]))
-        .scalar()
-        or 0
-    )
-    today_security_count = (
-        db.query(func.count(SystemLog.id))
-        .filter(SystemLog.created_at >= day_start, SystemLog.log_type == "security")
-        .scalar()
-        or 0
-    )
-
-    avg_latency = (
-        db.query(func.avg(SystemLog.latency_ms))
-        .filter(SystemLog.created_at >= day_start, SystemLog.latency_ms.isnot(None))
-        .scalar()
-    )
-    avg_latency_ms = int(avg_latency or 0)
-
-    # Approximate P95 by taking top 5% threshold position in descending-ordered latencies.
-    latency_count = (
-        db.query(func.count(SystemLog.id))
-        .filter(SystemLog.created_at >= day_start, SystemLog.latency_ms.isnot(None))
-        .scalar()
-        or 0
-    )
-    p95_latency_ms = 0
-    if latency_count > 0:
-        skip_rows = max(0, int(latency_count * 0.05) - 1)
-        p95_row = (
-            db.query(SystemLog.latency_ms)
-            .filter(SystemLog.created_at >= day_start, SystemLog.latency_ms.isnot(None))
-            .order_by(desc(SystemLog.latency_ms))
-            .offset(skip_rows)
-            .limit(1)
-            .first()
+    rollup = SystemLogHourlyRollup
+    is_error = rollup.level.in_(["error", "critical"])
+    totals = (
+        db.query(
+            func.coalesce(func.sum(rollup.count), 0),
+            func.coalesce(func.sum(case((is_error, rollup.count), else_=0)), 0),
+            func.coalesce(func.sum(case((rollup.log_type == "security", rollup.count), else_=0)), 0),
+            func.coalesce(func.sum(rollup.latency_count), 0),
+            func.coalesce(func.sum(rollup.latency_sum_ms), 0),
         )
-        p95_latency_ms = int(p95_row[0]) if p95_row and p95_row[0] is not None else 0
-
-    top_modules_rows = (
-        db.query(SystemLog.module, func.count(SystemLog.id).label("count"))
-        .filter(SystemLog.created_at >= day_start, SystemLog.module.isnot(None))
-        .group_by(SystemLog.module)
-        .order_by(desc("count"))
-        .limit(8)
-        .all()
+        .filter(rollup.bucket_start >= day_start)
+        .one()
     )
-    top_actions_rows = (
-        db.query(SystemLog.action, func.count(SystemLog.id).label("count"))
-        .filter(SystemLog.created_at >= day_start, SystemLog.action.isnot(None))
-        .group_by(SystemLog.action)
-        .order_by(desc("count"))
-        .limit(8)
-        .all()
-    )
-    top_error_paths_rows = (
-        db.query(SystemLog.path, func.count(SystemLog.id).label("count"))
-        .filter(
-            SystemLog.created_at >= day_start,
-            SystemLog.path.isnot(None),
-            SystemLog.level.in_(["error", "critical"]),
+    today_total, today_error_count, today_security_count, latency_count, latency_sum_ms = totals
+    avg_latency_ms = int(latency_sum_ms / latency_count) if latency_count else 0
+
+    # Percentiles come from the unsampled request histograms, not the sampled access logs.
+    percentiles = request_latency_service.overall_percentiles(db, day_start)
+
+    def _top(column, *filters):
+        total = func.sum(rollup.count).label("count")
+        return (
+            db.query(column, total)
+            .filter(rollup.bucket_start >= day_start, column != "", *filters)
+            .group_by(column)
+            .order_by(desc("count"))
+            .limit(8)
+            .all()
         )
-        .group_by(SystemLog.path)
-        .order_by(desc("count"))
-        .limit(8)
-        .all()
-    )
+
+    top_modules_rows = _top(rollup.module)
+    top_actions_rows = _top(rollup.action)
+    top_error_paths_rows = _top(rollup.route, is_error)
 
     result = SystemLogStatsOut(
         today_total=int(today_total),
         today_error_count=int(today_error_count),
         today_security_count=int(today_security_count),
         avg_latency_ms=avg_latency_ms,
-        p95_latency_ms=p95_latency_ms,
-        top_modules=[{"module": row.module, "count": int(row.count)} for row in top_modules_rows],
-        top_actions=[{"action": row.action, "count": int(row.count)} for row in top_actions_rows],
-        top_error_paths=[{"path": row.path, "count": int(row.count)} for row in top_error_paths_rows],
+        p50_latency_ms=percentiles[0.5],
+        p95_latency_ms=percentiles[0.95],
+        p99_latency_ms=percentiles[0.99],
+        top_modules=[{"module": row[0], "count": int(row.count)} for row in top_modules_rows],
+        top_actions=[{"action": row[0], "count": int(row.count)} for row in top_actions_rows],
+        top_error_paths=[{"path": row[0], "count": int(row.count)} for row in top_error_paths_rows],
     )
     _set_cached_log_stats(result)
     return result
 
 
+@router.get("/admin/latency")
+def get_route_latency_admin(
+    hours: int = Query(24, ge=1, le=24 * 31),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    """p50/p95/p99 per route template and status class over the last ``hours``."""
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    return {
+        "since": since,
+        "items": request_latency_service.route_percentiles(db, since, limit=limit),
+    }
+
+
+@router.get("/admin/writer-metrics")
+def get_log_writer_metrics_admin(
+    _: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    """Async log writer queue depth, drop/spill counts, batch sizes and flush latency."""
+    return log_service.get_async_logger_metrics()
+
+
+@router.get("/admin/cache-metrics")
+def get_cache_metrics_admin(
+    _: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    """This worker's in-process cache size and hit/miss, load and invalidation counts."""
+    return cache_service.get_cache_stats()
+
+
 @router.get("/admin/{log_id}", response_model=SystemLogDetailOut)
 def get_log_admin(
     log_id: int,
@@ -2,8 +2,9 @@
 Notifications API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List, Set
+from typing import List
 
 from app.api.deps import get_db, get_current_user
 from app.models.appointment import Appointment
@@ -13,7 +14,7 @@ from app.crud import notification as crud_notification
 from app.crud import push_device_token as crud_push_device_token
 from app.schemas.notification import (
     AdminPushBatchRequest,
-    AdminPushBatchResponse,
+    AdminPushBatchJob,
     AdminPushSendRequest,
     AdminPushSendResponse,
     Notification,
@@ -24,6 +25,8 @@ from app.schemas.notification import (
     AdminTestPushRequest,
 )
 from app.core.config import settings
+from app.services import principal_service
+from app.services import push_campaign_service
 from app.services import push_service
 
 router = APIRouter()
@@ -166,6 +169,7 @@ def update_notification_preferences(
     current_user.push_notifications_enabled = bool(payload.push_enabled)
     db.add(current_user)
     db.commit()
+    principal_service.invalidate_principal(current_user.id)
     db.refresh(current_user)
 
     if not current_user.push_notifications_enabled:
@@ -193,6 +197,7 @@ def update_notification_preferences_settings(
     current_user.push_notifications_enabled = bool(payload.push_enabled)
     db.add(current_user)
     db.commit()
+    principal_service.invalidate_principal(current_user.id)
     db.refresh(current_user)
 
     if not current_user.push_notifications_enabled:
@@ -276,103 +281,72 @@ def send_admin_push(
     )
 
 
-@router.post("/admin/send-batch", response_model=AdminPushBatchResponse)
+@router.post("/admin/send-batch", response_model=AdminPushBatchJob, status_code=202)
 def send_admin_push_batch(
     payload: AdminPushBatchRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Send push notification to multiple users (super admin only).
+    Queue a push to multiple users (super admin only).
     Supports explicit user_ids and/or all users who booked a selected store.
+    Targets are resolved and sent in the background; poll
+    GET /admin/send-batch/{job_id} for progress and counts. Requests with no
+    candidate users (400) or no eligible ones (404) are rejected up front;
+    a job can still finish with zero targets when max_users truncates away
+    every eligible user.
     """
     _ensure_super_admin(current_user)
 
-    candidate_user_ids: Set[int] = set()
-    if payload.user_ids:
-        candidate_user_ids.update(int(user_id) for user_id in payload.user_ids if int(user_id) > 0)
-
+    user_ids = sorted({int(user_id) for user_id in payload.user_ids or [] if int(user_id) > 0})
+    eligible = [User.is_active == True, User.is_admin == False]
+    candidate_filters = [User.id.in_(user_ids)] if user_ids else []
     if payload.store_id is not None:
         store_exists = db.query(Store.id).filter(Store.id == int(payload.store_id)).first()
         if not store_exists:
             raise HTTPException(status_code=404, detail="Store not found")
-        booked_user_rows = (
-            db.query(Appointment.user_id)
-            .filter(Appointment.store_id == int(payload.store_id))
-            .distinct()
-            .all()
+        candidate_filters.append(
+            db.query(Appointment.id)
+            .filter(Appointment.store_id == int(payload.store_id), Appointment.user_id == User.id)
+            .exists()
         )
-        candidate_user_ids.update(int(row[0]) for row in booked_user_rows if row[0])
-
-    if not candidate_user_ids:
+        if not user_ids and not db.query(Appointment.id).filter(Appointment.store_id == int(payload.store_id)).first():
+            raise HTTPException(status_code=400, detail="No target users found")
+    elif not user_ids:
         raise HTTPException(status_code=400, detail="No target users found")
 
-    sorted_user_ids = sorted(candidate_user_ids)
-    truncated = False
-    if len(sorted_user_ids) > payload.max_users:
-        sorted_user_ids = sorted_user_ids[: payload.max_users]
-        truncated = True
-
-    target_rows = (
-        db.query(User.id)
-        .filter(
-            User.id.in_(sorted_user_ids),
-            User.is_active == True,
-            User.is_admin == False,
-        )
-        .order_by(User.id.asc())
-        .all()
-    )
-    target_user_ids = [int(row[0]) for row in target_rows]
-    if not target_user_ids:
+    if not db.query(User.id).filter(or_(*candidate_filters), *eligible).first():
         raise HTTPException(status_code=404, detail="No valid target users found")
 
-    sent_users = 0
-    failed_users = 0
-    skipped_users = 0
-    sent = 0
-    failed = 0
-    deactivated = 0
-
-    for user_id in target_user_ids:
-        custom_data = payload.custom_data or {"notification_type": "admin_batch_push"}
-        if payload.store_id is not None and isinstance(custom_data, dict):
-            custom_data = {**custom_data, "store_id": int(payload.store_id)}
-        result = push_service.send_push_to_user(
-            db,
-            user_id=user_id,
-            title=payload.title,
-            body=payload.message,
-            custom_data=custom_data,
-        )
-        user_sent = int(result.get("sent", 0))
-        user_failed = int(result.get("failed", 0))
-        user_deactivated = int(result.get("deactivated", 0))
-
-        sent += user_sent
-        failed += user_failed
-        deactivated += user_deactivated
-
-        if user_sent > 0:
-            sent_users += 1
-        elif user_failed > 0 or user_deactivated > 0:
-            failed_users += 1
-        else:
-            skipped_users += 1
-
-    return AdminPushBatchResponse(
-        detail="Batch push processed",
-        target_user_count=len(target_user_ids),
-        sent_user_count=sent_users,
-        failed_user_count=failed_users,
-        skipped_user_count=skipped_users,
-        sent=sent,
-        failed=failed,
-        deactivated=deactivated,
-        truncated=truncated,
+    return push_campaign_service.create_job(
+        db,
+        created_by=int(current_user.id),
+        title=payload.title,
+        message=payload.message,
+        user_ids=payload.user_ids,
+        store_id=payload.store_id,
+        max_users=payload.max_users,
+        custom_data=payload.custom_data,
     )
 
 
+@router.get("/admin/send-batch/{job_id}", response_model=AdminPushBatchJob)
+def get_admin_push_batch_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Batch push job progress (super admin only).
+    """
+    _ensure_super_admin(current_user)
+
+    job = push_campaign_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Push batch job not found")
+    return job
+
+
 @router.get("/{notification_id}", response_model=Notification)
 def get_notification(
     notification_id: int,
@@ -17,10 +17,14 @@ from app.schemas.review import (
     ReviewAdminListResponse,
 )
 from app.api.deps import get_current_user, get_current_store_admin
+from app.services import catalog_cache_service
+from app.utils.pagination import InvalidCursor, SortKey, cached_count, paginate
 from app.utils.security_validation import sanitize_image_url
 
 router = APIRouter()
 REVIEW_WINDOW_DAYS = 30
+_ADMIN_REVIEW_COUNT_TTL_SECONDS = 30
+_ADMIN_REVIEW_SORT_KEYS = (SortKey(Review.created_at, "datetime"), SortKey(Review.id, "int"))
 
 
 def _build_reply_payload_map(db: Session, review_ids: List[int]) -> Dict[int, dict]:
@@ -157,6 +161,7 @@ def create_review(
     db.add(new_review)
     _refresh_store_rating_summary(db, appointment.store_id)
     db.commit()
+    catalog_cache_service.invalidate_store(appointment.store_id)
     db.refresh(new_review)
     
     # 7. 构建响应（包含用户信息）
@@ -178,6 +183,8 @@ def get_admin_reviews(
     replied: Optional[bool] = Query(None),
     rating: Optional[int] = Query(None, ge=1, le=5),
     keyword: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page; overrides skip"),
+    include_total: bool = Query(True, description="Total is cached briefly per filter set"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_store_admin),
 ):
@@ -209,8 +216,25 @@ def get_admin_reviews(
             (Appointment.order_number.ilike(kw))
         )
 
-    total = query.count()
-    rows = query.order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    filters = {
+        "store_id": current_user.store_id if not current_user.is_admin else store_id,
+        "replied": replied,
+        "rating": rating,
+        "keyword": keyword,
+    }
+    total = cached_count(query, "admin_reviews", filters, _ADMIN_REVIEW_COUNT_TTL_SECONDS) if include_total else None
+    try:
+        page = paginate(
+            query,
+            _ADMIN_REVIEW_SORT_KEYS,
+            key_of=lambda row: (row.created_at, row.id),
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows = page.rows
 
     review_ids = [row.id for row in rows]
     store_ids = {row.store_id for row in rows}
@@ -251,7 +275,7 @@ def get_admin_reviews(
         payload.has_reply = payload.reply is not None
         items.append(payload)
 
-    return ReviewAdminListResponse(total=total, skip=skip, limit=limit, items=items)
+    return ReviewAdminListResponse(total=total, skip=skip, limit=limit, items=items, next_cursor=page.next_cursor)
 
 
 @router.get("/stores/{store_id}", response_model=List[ReviewResponse])
@@ -424,6 +448,7 @@ def update_review(
     
     _refresh_store_rating_summary(db, review.store_id)
     db.commit()
+    catalog_cache_service.invalidate_store(review.store_id)
     db.refresh(review)
     
     # 5. 构建响应
@@ -470,5 +495,6 @@ def delete_review(
     db.delete(review)
     _refresh_store_rating_summary(db, store_id_for_refresh)
     db.commit()
+    catalog_cache_service.invalidate_store(store_id_for_refresh)
     
     return None
@@ -4,7 +4,7 @@ Risk control admin endpoints
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -12,10 +12,13 @@ from app.api.deps import get_current_admin_user, get_db
 from app.models.risk import UserRiskState
 from app.models.user import User
 from app.services import log_service
+from app.services import principal_service
 from app.services import risk_service
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursor, SortKey, paginate
 from app.utils.phone_privacy import mask_phone, validate_keyword_min_length
 
 router = APIRouter()
+_RISK_USER_SORT_KEYS = (SortKey(User.id, "int"),)
 
 
 class RiskUserItem(BaseModel):
@@ -42,12 +45,14 @@ class RiskUserActionPayload(BaseModel):
 @router.get("/users", response_model=List[RiskUserItem])
 def list_risk_users(
     request: Request,
+    response: Response,
     keyword: Optional[str] = Query(None),
     include_full_phone: bool = Query(False, description="Only super admin can request full phone"),
     risk_level: Optional[str] = Query(None),
     restricted_only: bool = Query(False),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page; overrides skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ):
@@ -74,7 +79,20 @@ def list_risk_users(
     if restricted_only:
         query = query.filter(UserRiskState.restricted_until.isnot(None), UserRiskState.restricted_until > datetime.now())
 
-    rows = query.order_by(User.id.desc()).offset(skip).limit(limit).all()
+    try:
+        page = paginate(
+            query,
+            _RISK_USER_SORT_KEYS,
+            key_of=lambda row: (row[0].id,),
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    rows = page.rows
 
     result: List[RiskUserItem] = []
     for user, state in rows:
@@ -177,6 +195,7 @@ def handle_risk_user_action(
         target_user.is_active = False
         db.add(target_user)
         db.commit()
+        principal_service.invalidate_principal(user_id)
         db.refresh(target_user)
         state = risk_service.set_user_risk_level(
             db,
@@ -207,6 +226,7 @@ def handle_risk_user_action(
         target_user.is_active = True
         db.add(target_user)
         db.commit()
+        principal_service.invalidate_principal(user_id)
         db.refresh(target_user)
         state = risk_service.unrestrict_user(
             db,
@@ -13,9 +13,12 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_current_admin_user, get_db
 from app.models.security import SecurityBlockLog, SecurityIPRule
 from app.models.user import User
-from app.services import log_service
+from app.services import log_service, security_rule_service
+from app.utils.pagination import InvalidCursor, SortKey, cached_count, paginate
 
 router = APIRouter()
+_BLOCK_LOG_COUNT_TTL_SECONDS = 30
+_BLOCK_LOG_SORT_KEYS = (SortKey(SecurityBlockLog.created_at, "datetime"), SortKey(SecurityBlockLog.id, "int"))
 
 
 class SecurityRuleIn(BaseModel):
@@ -74,10 +77,11 @@ class QuickBlockPayload(BaseModel):
 
 
 class SecurityBlockLogListOut(BaseModel):
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
     items: List[SecurityBlockLogOut]
+    next_cursor: Optional[str] = None
 
 
 def _validate_target(target_type: str, target_value: str) -> str:
@@ -113,6 +117,7 @@ def _create_or_update_rule(
     rule.expires_at = payload.expires_at
 
     db.commit()
+    security_rule_service.invalidate_security_rules()
     db.refresh(rule)
     return rule
 
@@ -257,9 +262,12 @@ def list_block_logs(
     scope: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page; overrides skip"),
+    include_total: bool = Query(True, description="Total is cached briefly per filter set"),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_admin_user),
 ):
+    filters = {"ip_address": ip_address, "block_reason": block_reason, "path_keyword": path_keyword, "scope": scope}
     query = db.query(SecurityBlockLog)
     if ip_address:
         query = query.filter(SecurityBlockLog.ip_address == ip_address.strip())
@@ -269,9 +277,19 @@ def list_block_logs(
         query = query.filter(SecurityBlockLog.scope == scope)
     if path_keyword:
         query = query.filter(SecurityBlockLog.path.ilike(f"%{path_keyword.strip()}%"))
-    total = query.count()
-    items = query.order_by(desc(SecurityBlockLog.created_at)).offset(skip).limit(limit).all()
-    return SecurityBlockLogListOut(total=total, skip=skip, limit=limit, items=items)
+    total = cached_count(query, "security_block_logs", filters, _BLOCK_LOG_COUNT_TTL_SECONDS) if include_total else None
+    try:
+        page = paginate(
+            query,
+            _BLOCK_LOG_SORT_KEYS,
+            key_of=lambda item: (item.created_at, item.id),
+            limit=limit,
+            cursor=cursor,
+            skip=skip,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return SecurityBlockLogListOut(total=total, skip=skip, limit=limit, items=page.rows, next_cursor=page.next_cursor)
 
 
 @router.get("/summary", response_model=SecuritySummary)
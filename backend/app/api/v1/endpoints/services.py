@@ -48,7 +48,13 @@ def get_service_catalog(
     db: Session = Depends(get_db),
 ):
     """Public catalog endpoint kept for backward compatibility."""
-    return _query_service_catalog(skip, limit, active_only, category, db)
+    return crud_service.get_catalog_items_cached(
+        db,
+        skip=skip,
+        limit=limit,
+        active_only=active_only,
+        category=category,
+    )
 
 
 @router.get("/admin/catalog", response_model=List[ServiceCatalog])
@@ -102,7 +108,7 @@ def get_store_services(
     db: Session = Depends(get_db),
 ):
     """Get services of a specific store"""
-    return crud_service.get_store_services(db, store_id=store_id, include_inactive=include_inactive)
+    return crud_service.get_store_services_cached(db, store_id=store_id, include_inactive=include_inactive)
 
 
 @router.post("/stores/{store_id}", response_model=Service, status_code=201)
@@ -206,7 +212,7 @@ def get_services(
 @router.get("/categories", response_model=List[str])
 def get_service_categories(db: Session = Depends(get_db)):
     """Get list of all service categories"""
-    categories = crud_service.get_service_categories(db)
+    categories = crud_service.get_service_categories_cached(db)
     return categories
 
 
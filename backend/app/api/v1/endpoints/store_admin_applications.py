@@ -12,6 +12,7 @@ from app.models.store_admin_application import StoreAdminApplication
 from app.models.store import Store
 from app.schemas.store import StoreCreate
 from app.crud import store as crud_store
+from app.services import principal_service
 from app.schemas.store_admin_application import (
     StoreAdminApplicationCreate,
     StoreAdminApplicationResponse,
@@ -87,6 +88,7 @@ def submit_for_review(
     db.add(application)
     db.add(current_user)
     db.commit()
+    principal_service.invalidate_principal(current_user.id)
     db.refresh(application)
     return application
 
@@ -171,6 +173,7 @@ def approve_application(
     db.add(user)
     db.add(application)
     db.commit()
+    principal_service.invalidate_principal(user.id)
     db.refresh(application)
     return application
 
@@ -203,5 +206,7 @@ def reject_application(
 
     db.add(application)
     db.commit()
+    if user:
+        principal_service.invalidate_principal(user.id)
     db.refresh(application)
     return application
@@ -25,11 +25,11 @@ def get_store_hours(
     Public endpoint - no authentication required
     """
     # Check if store exists
-    store = crud_store.get_store(db, store_id=store_id)
+    store = crud_store.get_store_detail_cached(db, store_id=store_id)
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
     
-    hours = crud_store_hours.get_store_hours(db, store_id=store_id)
+    hours = crud_store_hours.get_store_hours_cached(db, store_id=store_id)
     
     # If no hours set, return default hours (9:00-18:00, Monday-Saturday, Sunday closed)
     if not hours:
@@ -40,7 +40,7 @@ def get_store_portfolio(
     - **skip**: Number of records to skip (for pagination)
     - **limit**: Maximum number of records to return
     """
-    portfolio_items = crud_portfolio.get_store_portfolio(
+    portfolio_items = crud_portfolio.get_store_portfolio_cached(
         db,
         store_id=store_id,
         skip=skip,
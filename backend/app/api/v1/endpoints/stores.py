@@ -26,7 +26,7 @@ from app.schemas.store import (
 )
 from app.schemas.service import Service
 from app.schemas.user import UserResponse
-from app.services import log_service
+from app.services import availability_service, catalog_cache_service, log_service
 from app.models.store_blocked_slot import StoreBlockedSlot
 from app.utils.security_validation import sanitize_image_url
 
@@ -70,6 +70,18 @@ def _can_access_hidden_store(user: Optional[User], store_id: Optional[int] = Non
     return False
 
 
+def _get_visible_store_detail(db: Session, request: Request, store_id: int) -> dict:
+    """Cached store payload; hidden stores 404 unless the caller is an admin or that store's manager."""
+    store = crud_store.get_store_detail_cached(db, store_id=store_id)
+    if not store:
+        raise HTTPException(status_code=404, detail="Store not found")
+    if store["is_visible"] is False and not _can_access_hidden_store(
+        _resolve_optional_user(db, request), store_id=store_id
+    ):
+        raise HTTPException(status_code=404, detail="Store not found")
+    return store
+
+
 @router.get("/", response_model=List[Store])
 def get_stores(
     request: Request,
@@ -122,23 +134,7 @@ def get_store(
     """
     Get store details by ID including images
     """
-    store = crud_store.get_store(db, store_id=store_id)
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    current_user = _resolve_optional_user(db, request)
-    if store.is_visible is False and not _can_access_hidden_store(current_user, store_id=store.id):
-        raise HTTPException(status_code=404, detail="Store not found")
-    
-    # Get store images
-    images = crud_store.get_store_images(db, store_id=store_id)
-    
-    # Convert to response model
-    store_dict = {
-        **store.__dict__,
-        "images": images
-    }
-    
-    return store_dict
+    return _get_visible_store_detail(db, request, store_id)
 
 
 @router.get("/{store_id}/images", response_model=List[StoreImage])
@@ -150,15 +146,7 @@ def get_store_images(
     """
     Get store images
     """
-    store = crud_store.get_store(db, store_id=store_id)
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    current_user = _resolve_optional_user(db, request)
-    if store.is_visible is False and not _can_access_hidden_store(current_user, store_id=store.id):
-        raise HTTPException(status_code=404, detail="Store not found")
-    
-    images = crud_store.get_store_images(db, store_id=store_id)
-    return images
+    return _get_visible_store_detail(db, request, store_id)["images"]
 
 
 @router.get("/{store_id}/services", response_model=List[Service])
@@ -170,15 +158,8 @@ def get_store_services(
     """
     Get all services offered by a store
     """
-    store = crud_store.get_store(db, store_id=store_id)
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    current_user = _resolve_optional_user(db, request)
-    if store.is_visible is False and not _can_access_hidden_store(current_user, store_id=store.id):
-        raise HTTPException(status_code=404, detail="Store not found")
-    
-    services = crud_service.get_store_services(db, store_id=store_id)
-    return services
+    _get_visible_store_detail(db, request, store_id)
+    return crud_service.get_store_services_cached(db, store_id=store_id)
 
 
 @router.patch("/{store_id}/visibility", response_model=Store)
@@ -198,6 +179,7 @@ def update_store_visibility(
     store.is_visible = bool(payload.is_visible)
     db.commit()
     db.refresh(store)
+    catalog_cache_service.invalidate_store(store.id)
 
     log_service.create_audit_log(
         db,
@@ -246,6 +228,7 @@ def update_store_ranking(
 
     db.commit()
     db.refresh(store)
+    catalog_cache_service.invalidate_store(store.id)
 
     log_service.create_audit_log(
         db,
@@ -711,6 +694,7 @@ def create_store_blocked_slot(
     db.add(row)
     db.commit()
     db.refresh(row)
+    availability_service.invalidate_store_day(store_id, row.blocked_date)
 
     log_service.create_audit_log(
         db,
@@ -782,6 +766,7 @@ def update_store_blocked_slot(
         "reason": row.reason,
         "status": row.status,
     }
+    previous_date = row.blocked_date
     row.blocked_date = next_date
     row.start_time = next_start
     row.end_time = next_end
@@ -789,6 +774,7 @@ def update_store_blocked_slot(
     row.status = next_status
     db.commit()
     db.refresh(row)
+    availability_service.invalidate_store_days(store_id, [previous_date, row.blocked_date])
 
     log_service.create_audit_log(
         db,
@@ -835,8 +821,10 @@ def delete_store_blocked_slot(
         "reason": row.reason,
         "status": row.status,
     }
+    blocked_date = row.blocked_date
     db.delete(row)
     db.commit()
+    availability_service.invalidate_store_day(store_id, blocked_date)
 
     log_service.create_audit_log(
         db,
@@ -3,7 +3,7 @@ Technicians API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime, date
@@ -11,14 +11,12 @@ from zoneinfo import ZoneInfo
 
 from app.api.deps import get_db, get_current_admin_user, get_current_store_admin
 from app.models.user import User
-from app.models.appointment import Appointment, AppointmentStatus
-from app.models.appointment_service_item import AppointmentServiceItem
-from app.models.appointment_staff_split import AppointmentStaffSplit
+from app.models.appointment import Appointment
 from app.models.service import Service
+from app.models.technician_ledger import TechnicianLedgerEntry
 from app.models.technician import Technician as TechnicianModel
-from app.models.store_blocked_slot import StoreBlockedSlot
 from app.crud import technician as crud_technician
-from app.crud import store_holiday as crud_store_holiday
+from app.services import availability_service
 from app.schemas.technician import Technician as TechnicianSchema, TechnicianCreate, TechnicianUpdate
 
 router = APIRouter()
@@ -32,119 +30,6 @@ def _ensure_store_scope(current_user: User, target_store_id: int) -> None:
         raise HTTPException(status_code=403, detail="You can only access data from your own store")
 
 
-def _normalize_commission_config(
-    commission_type: Optional[str],
-    commission_value: Optional[float],
-    commission_amount: Optional[float] = None,
-) -> tuple[str, float]:
-    normalized_type = (commission_type or Service.COMMISSION_TYPE_FIXED).lower()
-    if normalized_type not in {Service.COMMISSION_TYPE_FIXED, Service.COMMISSION_TYPE_PERCENT}:
-        normalized_type = Service.COMMISSION_TYPE_FIXED
-    normalized_value = commission_value
-    if normalized_value is None:
-        normalized_value = commission_amount or 0.0
-    normalized_value = max(float(normalized_value or 0), 0.0)
-    # Backward compatibility: old fixed rows may still store only commission_amount.
-    if (
-        normalized_type == Service.COMMISSION_TYPE_FIXED
-        and normalized_value <= 0
-        and float(commission_amount or 0) > 0
-    ):
-        normalized_value = float(commission_amount or 0)
-    if normalized_type == Service.COMMISSION_TYPE_PERCENT:
-        normalized_value = min(normalized_value, 100.0)
-    return normalized_type, normalized_value
-
-
-def _load_service_commission_config_map(db: Session, service_ids: set[int]) -> dict[int, tuple[str, float]]:
-    if not service_ids:
-        return {}
-    rows = (
-        db.query(
-            Service.id.label("service_id"),
-            Service.commission_type.label("commission_type"),
-            Service.commission_value.label("commission_value"),
-            Service.commission_amount.label("commission_amount"),
-        )
-        .filter(Service.id.in_(service_ids))
-        .all()
-    )
-    return {
-        int(row.service_id): _normalize_commission_config(
-            row.commission_type,
-            row.commission_value,
-            row.commission_amount,
-        )
-        for row in rows
-    }
-
-
-def _load_appointment_service_amount_map(
-    db: Session, appointment_ids: list[int]
-) -> tuple[dict[int, list[tuple[int, float]]], dict[int, dict[int, float]]]:
-    if not appointment_ids:
-        return {}, {}
-    rows = (
-        db.query(
-            AppointmentServiceItem.appointment_id.label("appointment_id"),
-            AppointmentServiceItem.service_id.label("service_id"),
-            AppointmentServiceItem.amount.label("amount"),
-        )
-        .filter(AppointmentServiceItem.appointment_id.in_(appointment_ids))
-        .all()
-    )
-    items_map: dict[int, list[tuple[int, float]]] = {}
-    totals_map: dict[int, dict[int, float]] = {}
-    for row in rows:
-        appointment_id = int(row.appointment_id)
-        service_id = int(row.service_id)
-        amount = float(row.amount or 0)
-        items_map.setdefault(appointment_id, []).append((service_id, amount))
-        totals_map.setdefault(appointment_id, {})
-        totals_map[appointment_id][service_id] = totals_map[appointment_id].get(service_id, 0.0) + amount
-    return items_map, totals_map
-
-
-def _calculate_commission_by_amount(
-    amount: float,
-    commission_type: str,
-    commission_value: float,
-) -> float:
-    amount = float(amount or 0)
-    if amount <= 0 or commission_value <= 0:
-        return 0.0
-    if commission_type == Service.COMMISSION_TYPE_PERCENT:
-        return amount * (commission_value / 100.0)
-    return commission_value
-
-
-def _calculate_split_commission(
-    split_amount: float,
-    service_total: float,
-    commission_type: str,
-    commission_value: float,
-) -> float:
-    if commission_type == Service.COMMISSION_TYPE_PERCENT:
-        return _calculate_commission_by_amount(split_amount, commission_type, commission_value)
-    if service_total <= 0 or commission_value <= 0:
-        return 0.0
-    return commission_value * (float(split_amount or 0) / float(service_total))
-
-
-def _calculate_items_commission(
-    items: list[tuple[int, float]],
-    service_commission_map: dict[int, tuple[str, float]],
-) -> float:
-    total = 0.0
-    for item_service_id, item_amount in items:
-        commission_type, commission_value = service_commission_map.get(
-            int(item_service_id),
-            (Service.COMMISSION_TYPE_FIXED, 0.0),
-        )
-        total += _calculate_commission_by_amount(item_amount, commission_type, commission_value)
-    return total
-
-
 @router.get("/", response_model=List[TechnicianSchema])
 def get_technicians(
     skip: int = Query(0, ge=0),
@@ -168,6 +53,60 @@ def get_technicians(
     return technicians
 
 
+@router.get("/available-slots", response_model=List[dict])
+def get_store_available_slots(
+    store_id: int = Query(..., description="Store ID"),
+    date: str = Query(..., description="Date to check availability (YYYY-MM-DD)"),
+    service_id: int = Query(..., description="Service ID to calculate duration"),
+    technician_ids: Optional[str] = Query(None, description="Comma-separated technician IDs (default: all active)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get available time slots for every technician of a store in one call
+    """
+    service = db.query(Service).filter(Service.id == service_id).first()
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    if service.store_id != store_id:
+        raise HTTPException(status_code=400, detail="Service does not belong to this store")
+
+    try:
+        check_date = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    requested_ids = None
+    if technician_ids:
+        try:
+            requested_ids = [int(item) for item in technician_ids.split(",") if item.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid technician_ids. Use comma-separated integers")
+
+    technician_query = db.query(TechnicianModel).filter(
+        TechnicianModel.store_id == store_id,
+        TechnicianModel.is_active == 1,
+    )
+    if requested_ids is not None:
+        technician_query = technician_query.filter(TechnicianModel.id.in_(requested_ids))
+    technicians = technician_query.order_by(TechnicianModel.name.asc(), TechnicianModel.id.asc()).all()
+
+    slots_by_technician = availability_service.get_free_slots(
+        db,
+        store_id=store_id,
+        check_date=check_date,
+        technician_ids=[technician.id for technician in technicians],
+        duration_minutes=service.duration_minutes,
+    )
+    return [
+        {
+            "technician_id": technician.id,
+            "technician_name": technician.name,
+            "slots": slots_by_technician[technician.id],
+        }
+        for technician in technicians
+    ]
+
+
 @router.get("/performance/summary", response_model=List[dict])
 def get_technician_performance_summary(
     store_id: Optional[int] = Query(None),
@@ -189,147 +128,32 @@ def get_technician_performance_summary(
     _ensure_store_scope(current_user, target_store_id)
 
     today_et = datetime.now(ET_TZ).date()
-    agg_map: dict[int, dict] = {}
-
-    completed_appointments = (
+    is_today = TechnicianLedgerEntry.work_date == today_et
+    agg_rows = (
         db.query(
-            Appointment.id.label("appointment_id"),
-            Appointment.order_number.label("order_number"),
-            Appointment.appointment_date.label("appointment_date"),
-            Appointment.appointment_time.label("appointment_time"),
-            Appointment.technician_id.label("appointment_technician_id"),
-            Appointment.service_id.label("appointment_service_id"),
-            Appointment.order_amount.label("order_amount"),
-            Service.price.label("service_price"),
-        )
-        .join(Service, Service.id == Appointment.service_id)
-        .filter(
-            Appointment.store_id == target_store_id,
-            Appointment.status == AppointmentStatus.COMPLETED,
+            TechnicianLedgerEntry.technician_id,
+            func.count(TechnicianLedgerEntry.id),
+            func.sum(TechnicianLedgerEntry.amount),
+            func.sum(TechnicianLedgerEntry.commission_amount),
+            func.sum(case((is_today, 1), else_=0)),
+            func.sum(case((is_today, TechnicianLedgerEntry.amount), else_=0.0)),
+            func.sum(case((is_today, TechnicianLedgerEntry.commission_amount), else_=0.0)),
         )
+        .filter(TechnicianLedgerEntry.store_id == target_store_id)
+        .group_by(TechnicianLedgerEntry.technician_id)
         .all()
     )
-    appointment_ids = [row.appointment_id for row in completed_appointments]
-    split_rows = []
-    if appointment_ids:
-        split_rows = (
-            db.query(
-                AppointmentStaffSplit.id.label("split_id"),
-                AppointmentStaffSplit.appointment_id.label("appointment_id"),
-                AppointmentStaffSplit.technician_id.label("technician_id"),
-                AppointmentStaffSplit.service_id.label("service_id"),
-                AppointmentStaffSplit.amount.label("amount"),
-            )
-            .filter(AppointmentStaffSplit.appointment_id.in_(appointment_ids))
-            .all()
-        )
-    split_map: dict[int, list] = {}
-    split_service_totals: dict[int, dict[int, float]] = {}
-    for row in split_rows:
-        appointment_id = int(row.appointment_id)
-        service_id = int(row.service_id) if row.service_id else None
-        split_map.setdefault(appointment_id, []).append(row)
-        if service_id is not None:
-            split_service_totals.setdefault(appointment_id, {})
-            split_service_totals[appointment_id][service_id] = (
-                split_service_totals[appointment_id].get(service_id, 0.0) + float(row.amount or 0)
-            )
-
-    service_items_map, service_item_totals_map = _load_appointment_service_amount_map(db, appointment_ids)
-
-    service_ids: set[int] = set()
-    service_ids.update(
-        int(row.appointment_service_id)
-        for row in completed_appointments
-        if row.appointment_service_id is not None
-    )
-    service_ids.update(
-        int(row.service_id)
-        for row in split_rows
-        if row.service_id is not None
-    )
-    for items in service_items_map.values():
-        for service_id, _ in items:
-            service_ids.add(int(service_id))
-    service_commission_map = _load_service_commission_config_map(db, service_ids)
-
-    for appt in completed_appointments:
-        order_amount = float(appt.order_amount if appt.order_amount is not None else (appt.service_price or 0))
-        appointment_id = int(appt.appointment_id)
-        appointment_splits = split_map.get(appointment_id, [])
-        appointment_items = service_items_map.get(appointment_id, [])
-
-        if appointment_splits:
-            for split in appointment_splits:
-                technician_id = int(split.technician_id)
-                split_amount = float(split.amount or 0)
-                split_service_id = int(split.service_id) if split.service_id is not None else int(appt.appointment_service_id)
-                commission_type, commission_value = service_commission_map.get(
-                    split_service_id,
-                    (Service.COMMISSION_TYPE_FIXED, 0.0),
-                )
-                service_total = service_item_totals_map.get(appointment_id, {}).get(split_service_id, 0.0)
-                if service_total <= 0:
-                    service_total = split_service_totals.get(appointment_id, {}).get(split_service_id, 0.0)
-                split_commission = _calculate_split_commission(
-                    split_amount=split_amount,
-                    service_total=service_total,
-                    commission_type=commission_type,
-                    commission_value=commission_value,
-                )
-                metrics = agg_map.setdefault(
-                    technician_id,
-                    {
-                        "total_order_count": 0,
-                        "total_amount": 0.0,
-                        "total_commission": 0.0,
-                        "today_order_count": 0,
-                        "today_amount": 0.0,
-                        "today_commission": 0.0,
-                    },
-                )
-                metrics["total_order_count"] += 1
-                metrics["total_amount"] += split_amount
-                metrics["total_commission"] += split_commission
-                if appt.appointment_date == today_et:
-                    metrics["today_order_count"] += 1
-                    metrics["today_amount"] += split_amount
-                    metrics["today_commission"] += split_commission
-            continue
-
-        if not appt.appointment_technician_id:
-            continue
-
-        if appointment_items:
-            unsplit_amount = sum(float(item_amount or 0) for _, item_amount in appointment_items)
-            unsplit_commission = _calculate_items_commission(appointment_items, service_commission_map)
-        else:
-            unsplit_amount = order_amount
-            commission_type, commission_value = service_commission_map.get(
-                int(appt.appointment_service_id),
-                (Service.COMMISSION_TYPE_FIXED, 0.0),
-            )
-            unsplit_commission = _calculate_commission_by_amount(order_amount, commission_type, commission_value)
-
-        technician_id = int(appt.appointment_technician_id)
-        metrics = agg_map.setdefault(
-            technician_id,
-            {
-                "total_order_count": 0,
-                "total_amount": 0.0,
-                "total_commission": 0.0,
-                "today_order_count": 0,
-                "today_amount": 0.0,
-                "today_commission": 0.0,
-            },
-        )
-        metrics["total_order_count"] += 1
-        metrics["total_amount"] += unsplit_amount
-        metrics["total_commission"] += unsplit_commission
-        if appt.appointment_date == today_et:
-            metrics["today_order_count"] += 1
-            metrics["today_amount"] += unsplit_amount
-            metrics["today_commission"] += unsplit_commission
+    agg_map: dict[int, dict] = {
+        int(row[0]): {
+            "total_order_count": int(row[1] or 0),
+            "total_amount": float(row[2] or 0),
+            "total_commission": float(row[3] or 0),
+            "today_order_count": int(row[4] or 0),
+            "today_amount": float(row[5] or 0),
+            "today_commission": float(row[6] or 0),
+        }
+        for row in agg_rows
+    }
 
     technicians = (
         db.query(TechnicianModel)
@@ -387,158 +211,61 @@ def get_technician_performance_detail(
     if from_date_obj and to_date_obj and from_date_obj > to_date_obj:
         raise HTTPException(status_code=400, detail="date_from cannot be later than date_to")
 
-    completed_appointments = (
-        db.query(
-            Appointment.id.label("appointment_id"),
-            Appointment.order_number.label("order_number"),
-            Appointment.appointment_date.label("appointment_date"),
-            Appointment.appointment_time.label("appointment_time"),
-            Appointment.technician_id.label("appointment_technician_id"),
-            Appointment.service_id.label("appointment_service_id"),
-            Appointment.order_amount.label("order_amount"),
+    ledger_query = db.query(TechnicianLedgerEntry).filter(
+        TechnicianLedgerEntry.technician_id == technician_id,
+        TechnicianLedgerEntry.store_id == technician.store_id,
+    )
+    period_query = ledger_query
+    if from_date_obj:
+        period_query = period_query.filter(TechnicianLedgerEntry.work_date >= from_date_obj)
+    if to_date_obj:
+        period_query = period_query.filter(TechnicianLedgerEntry.work_date <= to_date_obj)
+
+    def _totals(query) -> tuple[int, float, float]:
+        count, amount, commission = query.with_entities(
+            func.count(TechnicianLedgerEntry.id),
+            func.sum(TechnicianLedgerEntry.amount),
+            func.sum(TechnicianLedgerEntry.commission_amount),
+        ).one()
+        return int(count or 0), round(float(amount or 0), 2), round(float(commission or 0), 2)
+
+    total_all_orders, total_all_amount, total_all_commission = _totals(ledger_query)
+    total_period_orders, total_period_amount, total_period_commission = _totals(period_query)
+
+    page_rows = (
+        period_query.join(Appointment, Appointment.id == TechnicianLedgerEntry.appointment_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .join(User, User.id == Appointment.user_id)
+        .with_entities(
+            TechnicianLedgerEntry,
+            Appointment.order_number,
             Service.name.label("service_name"),
-            Service.price.label("service_price"),
             func.coalesce(User.full_name, User.username).label("customer_name"),
         )
-        .join(Service, Service.id == Appointment.service_id)
-        .join(User, User.id == Appointment.user_id)
-        .filter(
-            Appointment.store_id == technician.store_id,
-            Appointment.status == AppointmentStatus.COMPLETED,
+        .order_by(
+            TechnicianLedgerEntry.work_date.desc(),
+            TechnicianLedgerEntry.work_time.desc(),
+            TechnicianLedgerEntry.id.desc(),
         )
+        .offset(skip)
+        .limit(limit)
         .all()
     )
-    appointment_ids = [row.appointment_id for row in completed_appointments]
-    split_rows = []
-    if appointment_ids:
-        split_rows = (
-            db.query(
-                AppointmentStaffSplit.id.label("split_id"),
-                AppointmentStaffSplit.appointment_id.label("appointment_id"),
-                AppointmentStaffSplit.technician_id.label("technician_id"),
-                AppointmentStaffSplit.service_id.label("service_id"),
-                AppointmentStaffSplit.amount.label("amount"),
-            )
-            .filter(AppointmentStaffSplit.appointment_id.in_(appointment_ids))
-            .all()
-        )
-    split_map: dict[int, list] = {}
-    split_service_totals: dict[int, dict[int, float]] = {}
-    for row in split_rows:
-        appointment_id = int(row.appointment_id)
-        service_id = int(row.service_id) if row.service_id else None
-        split_map.setdefault(appointment_id, []).append(row)
-        if service_id is not None:
-            split_service_totals.setdefault(appointment_id, {})
-            split_service_totals[appointment_id][service_id] = (
-                split_service_totals[appointment_id].get(service_id, 0.0) + float(row.amount or 0)
-            )
-
-    service_items_map, service_item_totals_map = _load_appointment_service_amount_map(db, appointment_ids)
-
-    service_ids: set[int] = set()
-    service_ids.update(
-        int(row.appointment_service_id)
-        for row in completed_appointments
-        if row.appointment_service_id is not None
-    )
-    service_ids.update(
-        int(row.service_id)
-        for row in split_rows
-        if row.service_id is not None
-    )
-    for items in service_items_map.values():
-        for service_id, _ in items:
-            service_ids.add(int(service_id))
-    service_commission_map = _load_service_commission_config_map(db, service_ids)
-
-    all_items = []
-    for appt in completed_appointments:
-        order_amount = float(appt.order_amount if appt.order_amount is not None else (appt.service_price or 0))
-        appointment_id = int(appt.appointment_id)
-        appointment_splits = split_map.get(appointment_id, [])
-        appointment_items = service_items_map.get(appointment_id, [])
-        if appointment_splits:
-            for split in appointment_splits:
-                if split.technician_id != technician_id:
-                    continue
-                split_amount = float(split.amount or 0)
-                split_service_id = int(split.service_id) if split.service_id is not None else int(appt.appointment_service_id)
-                commission_type, commission_value = service_commission_map.get(
-                    split_service_id,
-                    (Service.COMMISSION_TYPE_FIXED, 0.0),
-                )
-                service_total = service_item_totals_map.get(appointment_id, {}).get(split_service_id, 0.0)
-                if service_total <= 0:
-                    service_total = split_service_totals.get(appointment_id, {}).get(split_service_id, 0.0)
-                split_commission = _calculate_split_commission(
-                    split_amount=split_amount,
-                    service_total=service_total,
-                    commission_type=commission_type,
-                    commission_value=commission_value,
-                )
-                all_items.append(
-                    {
-                        "split_id": int(split.split_id),
-                        "appointment_id": appt.appointment_id,
-                        "order_number": appt.order_number,
-                        "appointment_date": str(appt.appointment_date),
-                        "appointment_time": str(appt.appointment_time),
-                        "service_name": appt.service_name,
-                        "customer_name": appt.customer_name,
-                        "work_type": appt.service_name,
-                        "amount": split_amount,
-                        "commission_amount": split_commission,
-                    }
-                )
-            continue
-
-        if appt.appointment_technician_id != technician_id:
-            continue
-        if appointment_items:
-            unsplit_amount = sum(float(item_amount or 0) for _, item_amount in appointment_items)
-            unsplit_commission = _calculate_items_commission(appointment_items, service_commission_map)
-        else:
-            unsplit_amount = order_amount
-            commission_type, commission_value = service_commission_map.get(
-                int(appt.appointment_service_id),
-                (Service.COMMISSION_TYPE_FIXED, 0.0),
-            )
-            unsplit_commission = _calculate_commission_by_amount(order_amount, commission_type, commission_value)
-        all_items.append(
-            {
-                "split_id": -int(appt.appointment_id),
-                "appointment_id": appt.appointment_id,
-                "order_number": appt.order_number,
-                "appointment_date": str(appt.appointment_date),
-                "appointment_time": str(appt.appointment_time),
-                "service_name": appt.service_name,
-                "customer_name": appt.customer_name,
-                "work_type": appt.service_name,
-                "amount": unsplit_amount,
-                "commission_amount": unsplit_commission,
-            }
-        )
-
-    def _in_period(item: dict) -> bool:
-        item_date = datetime.strptime(item["appointment_date"], "%Y-%m-%d").date()
-        if from_date_obj and item_date < from_date_obj:
-            return False
-        if to_date_obj and item_date > to_date_obj:
-            return False
-        return True
-
-    period_items = [item for item in all_items if _in_period(item)]
-    all_items.sort(key=lambda item: (item["appointment_date"], item["appointment_time"]), reverse=True)
-    period_items.sort(key=lambda item: (item["appointment_date"], item["appointment_time"]), reverse=True)
-    paged_items = period_items[skip : skip + limit]
-
-    total_all_orders = len(all_items)
-    total_all_amount = round(sum(float(item["amount"] or 0) for item in all_items), 2)
-    total_all_commission = round(sum(float(item["commission_amount"] or 0) for item in all_items), 2)
-    total_period_orders = len(period_items)
-    total_period_amount = round(sum(float(item["amount"] or 0) for item in period_items), 2)
-    total_period_commission = round(sum(float(item["commission_amount"] or 0) for item in period_items), 2)
+    paged_items = [
+        {
+            "split_id": int(entry.split_id) if entry.split_id is not None else -int(entry.appointment_id),
+            "appointment_id": entry.appointment_id,
+            "order_number": order_number,
+            "appointment_date": str(entry.work_date),
+            "appointment_time": str(entry.work_time),
+            "service_name": service_name,
+            "customer_name": customer_name,
+            "work_type": service_name,
+            "amount": entry.amount,
+            "commission_amount": entry.commission_amount,
+        }
+        for entry, order_number, service_name, customer_name in page_rows
+    ]
 
     return {
         "technician_id": technician.id,
@@ -816,11 +543,6 @@ def get_technician_available_slots(
     """
     Get technician's available time slots for a specific date and service
     """
-    from app.models.appointment import Appointment, AppointmentStatus
-    from app.models.service import Service
-    from app.models.store import Store
-    from datetime import datetime, timedelta, time as time_type
-    
     # Check if technician exists
     technician = crud_technician.get_technician(db, technician_id=technician_id)
     if not technician:
@@ -837,105 +559,11 @@ def get_technician_available_slots(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    if crud_store_holiday.is_holiday(db, technician.store_id, check_date):
-        return []
-    
-    # Get store hours from database
-    from app.crud import store_hours as crud_store_hours
-    
-    # Get day of week (0=Monday, 6=Sunday)
-    day_of_week = check_date.weekday()
-    
-    # Get store hours for this day
-    store_hours = crud_store_hours.get_store_hours_for_day(db, technician.store_id, day_of_week)
-    
-    # If store is closed or no hours set, return empty list
-    if not store_hours or store_hours['is_closed']:
-        return []
-    
-    store_open_time = store_hours['open_time']
-    store_close_time = store_hours['close_time']
-    slot_interval = 30  # 30-minute slots
-    
-    # Get technician's existing appointments for the date
-    existing_appointments = db.query(Appointment, Service).join(
-        Service, Appointment.service_id == Service.id
-    ).filter(
-        Appointment.technician_id == technician_id,
-        Appointment.appointment_date == check_date,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-    ).all()
-    
-    # Check if technician is unavailable on this date
-    from app.crud import technician_unavailable as crud_unavailable
-    is_unavailable = crud_unavailable.check_technician_unavailable(
-        db, technician_id, check_date
-    )
-    if is_unavailable:
-        return []  # Technician is unavailable for the entire day
-    
-    # Build list of busy time ranges (appointments + partial unavailable periods)
-    busy_ranges = []
-    
-    # Add existing appointments
-    for appt, appt_service in existing_appointments:
-        start_datetime = datetime.combine(check_date, appt.appointment_time)
-        end_datetime = start_datetime + timedelta(minutes=appt_service.duration_minutes)
-        busy_ranges.append((start_datetime, end_datetime))
-    
-    # Add partial unavailable periods (with specific start/end times)
-    unavailable_periods = crud_unavailable.get_unavailable_periods(
-        db, technician_id, check_date, check_date
-    )
-    for period in unavailable_periods:
-        if period.start_time and period.end_time:
-            # Partial day unavailability
-            start_datetime = datetime.combine(check_date, period.start_time)
-            end_datetime = datetime.combine(check_date, period.end_time)
-            busy_ranges.append((start_datetime, end_datetime))
-
-    # Add store-level blocked slots
-    blocked_slots = (
-        db.query(StoreBlockedSlot)
-        .filter(
-            StoreBlockedSlot.store_id == technician.store_id,
-            StoreBlockedSlot.blocked_date == check_date,
-            StoreBlockedSlot.status == "active",
-        )
-        .all()
+    slots_by_technician = availability_service.get_free_slots(
+        db,
+        store_id=technician.store_id,
+        check_date=check_date,
+        technician_ids=[technician_id],
+        duration_minutes=service.duration_minutes,
     )
-    for slot in blocked_slots:
-        busy_ranges.append(
-            (
-                datetime.combine(check_date, slot.start_time),
-                datetime.combine(check_date, slot.end_time),
-            )
-        )
-    
-    # Generate available slots
-    available_slots = []
-    current_time = datetime.combine(check_date, store_open_time)
-    end_time = datetime.combine(check_date, store_close_time)
-    service_duration = timedelta(minutes=service.duration_minutes)
-    
-    while current_time + service_duration <= end_time:
-        slot_end_time = current_time + service_duration
-        
-        # Check if this slot conflicts with any busy range
-        is_available = True
-        for busy_start, busy_end in busy_ranges:
-            if (current_time < busy_end and slot_end_time > busy_start):
-                is_available = False
-                break
-        
-        if is_available:
-            available_slots.append({
-                "start_time": current_time.strftime("%H:%M"),
-                "end_time": slot_end_time.strftime("%H:%M"),
-                "duration_minutes": service.duration_minutes
-            })
-        
-        # Move to next slot
-        current_time += timedelta(minutes=slot_interval)
-    
-    return available_slots
+    return slots_by_technician[technician_id]
@@ -15,6 +15,7 @@ from app.crud import verification_code as crud_verification
 from app.crud import push_device_token as crud_push_device_token
 from app.core.security import verify_password, get_password_hash
 from app.schemas.user import UserResponse
+from app.services import principal_service
 from app.utils.security_validation import sanitize_image_url
 
 
@@ -355,6 +356,7 @@ async def update_settings(
 
     db.add(current_user)
     db.commit()
+    principal_service.invalidate_principal(current_user.id)
     db.refresh(current_user)
 
     if request.notification_enabled is False:
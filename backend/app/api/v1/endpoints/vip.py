@@ -5,8 +5,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.deps import get_db, get_current_user, get_current_admin_user
+from app.crud import customer_stats as crud_customer_stats
 from app.models.user import User
-from app.models.appointment import Appointment, AppointmentStatus
 from app.models.vip_level import VIPLevelConfig
 from app.schemas.vip import VipLevelItem, VipLevelsUpdateRequest, VipProgress, VipStatusResponse
 from app.services.vip_config_service import invalidate_vip_levels_cache, load_vip_level_rows
@@ -182,26 +182,9 @@ def update_admin_vip_levels(
 
 def build_vip_status(db: Session, user_id: int) -> VipStatusResponse:
     levels = _load_vip_levels(db)
-    completed_rows = (
-        db.query(
-            Appointment.order_amount,
-            Appointment.final_paid_amount,
-        )
-        .filter(
-            Appointment.user_id == user_id,
-            Appointment.status == AppointmentStatus.COMPLETED,
-        )
-        .all()
-    )
-
-    total_visits = len(completed_rows)
-    total_spend = 0.0
-    for row in completed_rows:
-        final_paid = float(row.final_paid_amount or 0)
-        order_amount = float(row.order_amount or 0)
-        total_spend += final_paid if final_paid > 0 else max(order_amount, 0)
-
-    total_spend = round(total_spend, 2)
+    totals = crud_customer_stats.get_user_totals(db, user_id)
+    total_visits = int(totals["completed_count"])
+    total_spend = round(float(totals["completed_spend"]), 2)
     current_level = _resolve_current_level(total_spend=total_spend, total_visits=total_visits, levels=levels)
 
     next_level = None
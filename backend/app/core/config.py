@@ -26,9 +26,30 @@ class Settings(BaseSettings):
     WEB_PROXY_HEADERS: bool = True
     WEB_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
     WEB_LOG_LEVEL: str = "info"
+    METRICS_ENABLED: bool = True
+    # When set, /metrics requires "Authorization: Bearer <token>".
+    METRICS_BEARER_TOKEN: str = ""
+    # Shared directory for aggregating metrics across uvicorn workers; app.server wipes it on start.
+    PROMETHEUS_MULTIPROC_DIR: str = ""
+    # Port for the standalone scheduler worker's metrics endpoint (0 disables it).
+    SCHEDULER_METRICS_PORT: int = 0
     EMBEDDED_SCHEDULER_ENABLED: str = ""
+    # Unused since pushes go through the push_outbox table; kept so existing .env files still load.
     ASYNC_PUSH_QUEUE_SIZE: int = 2000
+    # Push outbox rows each dispatcher claims per pass and sends as one concurrent APNs batch.
+    ASYNC_PUSH_BATCH_SIZE: int = 50
+    # Push outbox retries: first backoff (doubling per attempt) and attempts before a row is marked dead.
+    PUSH_OUTBOX_RETRY_BASE_SECONDS: int = 5
+    PUSH_OUTBOX_MAX_ATTEMPTS: int = 6
+    # Admin batch push jobs: users per bulk query / concurrent APNs batch, and how long a
+    # running job may go without progress before another process reclaims it.
+    PUSH_CAMPAIGN_CHUNK_SIZE: int = 500
+    PUSH_CAMPAIGN_STALE_SECONDS: int = 300
     REMINDER_PROCESS_BATCH_SIZE: int = 200
+    # How often the scheduler recounts unread notifications to repair drifted notification_counters (0 disables).
+    NOTIFICATION_COUNTER_RECONCILE_SECONDS: int = 3600
+    # How often the scheduler refreshes customer_stats rows whose stored next appointment has passed (0 disables).
+    CUSTOMER_STATS_REFRESH_SECONDS: int = 300
     DAILY_CHECKIN_REWARD_POINTS: int = 5
     DAILY_CHECKIN_TIMEZONE: str = "America/New_York"
     
@@ -43,6 +64,7 @@ class Settings(BaseSettings):
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    PASSWORD_HASH_WORKERS: int = 2
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
@@ -167,6 +189,9 @@ class Settings(BaseSettings):
     APNS_PRIVATE_KEY_PATH: str = ""  # optional .p8 file path
     APNS_USE_SANDBOX: bool = True
     APNS_TIMEOUT_SECONDS: int = 8
+    APNS_MAX_CONCURRENT_REQUESTS: int = 100  # streams in flight across all APNs hosts
+    APNS_MAX_CONNECTIONS_PER_HOST: int = 2
+    APNS_HOST_OVERRIDE: str = ""  # e.g. http://127.0.0.1:2197 for apns_stub_server.py
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,180 @@
+"""
+Prometheus metrics.
+
+With PROMETHEUS_MULTIPROC_DIR in the process environment (app.server exports
+it before forking workers), every uvicorn worker writes its samples to mmap
+files in that shared directory and /metrics aggregates them across workers;
+otherwise the in-process registry is served.
+
+Hot paths only touch counters and histograms. Gauges (queue depths, pool
+usage) are set by registered samplers, at scrape time and every
+METRICS_SAMPLE_SECONDS in each worker, so enqueue/checkout stay untouched.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from threading import Event, Thread
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_SECONDS = max(1.0, float(os.getenv("METRICS_SAMPLE_SECONDS", "5")))
+# prometheus_client picks its value storage from this variable on import, so read it once alongside.
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+HTTP_REQUEST_DURATION = Histogram(
+    "nailsdash_http_request_duration_seconds",
+    "HTTP request latency by route template; the _count series is the request count.",
+    ["method", "route", "status_class"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "nailsdash_db_pool_checked_out",
+    "Database connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "nailsdash_db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is not yet full).",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge("nailsdash_db_pool_size", "Configured pool_size.", multiprocess_mode="livesum")
+DB_POOL_WAIT = Histogram(
+    "nailsdash_db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+BACKGROUND_QUEUE_DEPTH = Gauge(
+    "nailsdash_background_queue_depth",
+    "Items waiting in an in-process background queue.",
+    ["queue"],
+    multiprocess_mode="livesum",
+)
+BACKGROUND_QUEUE_ENQUEUED = Counter(
+    "nailsdash_background_queue_enqueued_total",
+    "Items accepted by an in-process background queue.",
+    ["queue"],
+)
+BACKGROUND_QUEUE_DROPPED = Counter(
+    "nailsdash_background_queue_dropped_total",
+    "Items dropped because an in-process background queue was full.",
+    ["queue"],
+)
+PUSH_OUTBOX_ROWS = Counter(
+    "nailsdash_push_outbox_rows_total",
+    "Push outbox rows settled by outcome (delivered, retried, dead, missing).",
+    ["outcome"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "nailsdash_cache_lookups_total",
+    "cache_service reads by outcome.",
+    ["result"],
+)
+CACHE_FALLBACKS = Counter(
+    "nailsdash_cache_fallbacks_total",
+    "cache_service operations served from process memory because Redis was unavailable or failed.",
+    ["operation"],
+)
+CACHE_TIER_HITS = Counter(
+    "nailsdash_cache_tier_hits_total",
+    "cache_service hits by tier: l1 is this process's memory, l2 is Redis.",
+    ["tier"],
+)
+CACHE_LOADS = Counter(
+    "nailsdash_cache_loads_total",
+    "get_or_set_json loader calls (loaded, early_refresh) and loads avoided by waiting for another caller.",
+    ["outcome"],
+)
+CACHE_L1_ENTRIES = Gauge(
+    "nailsdash_cache_l1_entries",
+    "Entries held in the in-process cache tier.",
+    multiprocess_mode="livesum",
+)
+
+SCHEDULER_LOOP_DURATION = Histogram(
+    "nailsdash_scheduler_loop_duration_seconds",
+    "Duration of one scheduler pass.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0),
+)
+SCHEDULER_LOOP_FAILURES = Counter(
+    "nailsdash_scheduler_loop_failures_total",
+    "Scheduler passes that raised.",
+    ["task"],
+)
+
+_GAUGE_SAMPLERS: list[Callable[[], None]] = []
+_SAMPLER_STOP = Event()
+_SAMPLER_THREAD: Optional[Thread] = None
+
+
+def register_gauge_sampler(sampler: Callable[[], None]) -> Callable[[], None]:
+    """Register a callback that sets gauges from current in-process state."""
+    _GAUGE_SAMPLERS.append(sampler)
+    return sampler
+
+
+def sample_gauges() -> None:
+    for sampler in list(_GAUGE_SAMPLERS):
+        try:
+            sampler()
+        except Exception:
+            logger.debug("Metrics gauge sampler failed", exc_info=True)
+
+
+def _run_sampler() -> None:
+    while not _SAMPLER_STOP.wait(_SAMPLE_SECONDS):
+        sample_gauges()
+
+
+def start_gauge_sampler(always: bool = False) -> None:
+    """
+    Keep this process's gauges fresh for scrapes that do not run the samplers
+    themselves: sibling workers in multiprocess mode, or ``always`` for the
+    standalone exporter.
+    """
+    global _SAMPLER_THREAD
+    if not (always or MULTIPROCESS_DIR) or (_SAMPLER_THREAD and _SAMPLER_THREAD.is_alive()):
+        return
+    _SAMPLER_STOP.clear()
+    _SAMPLER_THREAD = Thread(target=_run_sampler, name="metrics-gauge-sampler", daemon=True)
+    _SAMPLER_THREAD.start()
+
+
+def shutdown_gauge_sampler() -> None:
+    _SAMPLER_STOP.set()
+    if MULTIPROCESS_DIR:
+        # Drops this worker's live gauges from the aggregate.
+        multiprocess.mark_process_dead(os.getpid())
+
+
+@contextmanager
+def scheduler_pass(task: str) -> Iterator[None]:
+    """Time one scheduler pass, counting it as failed if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SCHEDULER_LOOP_FAILURES.labels(task=task).inc()
+        raise
+    finally:
+        SCHEDULER_LOOP_DURATION.labels(task=task).observe(time.perf_counter() - started)
+
+
+def render_latest() -> tuple[bytes, str]:
+    sample_gauges()
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,6 +1,8 @@
 """
 Security utilities for authentication and authorization
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import logging
 from typing import Optional, Dict, Any
@@ -14,6 +16,13 @@ logger = logging.getLogger(__name__)
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt costs ~100ms of CPU per call. Async callers hash on this bounded pool so a
+# login burst queues here instead of occupying the event loop or the request threadpool.
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.PASSWORD_HASH_WORKERS),
+    thread_name_prefix="password-hash",
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -59,6 +68,12 @@ def get_password_hash(password: str) -> str:
         raise
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the dedicated password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token
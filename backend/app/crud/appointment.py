@@ -1,8 +1,10 @@
 """
 Appointment CRUD operations
 """
+from dataclasses import dataclass
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from datetime import date, time, datetime, timedelta, timezone
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.store import Store
@@ -11,6 +13,8 @@ from app.models.review import Review
 from app.models.user import User
 from app.models.technician import Technician
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
+from app.crud import customer_stats as crud_customer_stats
+from app.crud import technician_ledger as crud_technician_ledger
 
 
 def get_appointment(db: Session, appointment_id: int) -> Optional[Appointment]:
@@ -68,14 +72,12 @@ def get_user_appointments_with_details(db: Session, user_id: int, skip: int = 0,
     return appointments
 
 
-def get_appointments_with_details(
+def appointments_with_details_query(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
     store_id: Optional[int] = None,
     status: Optional[AppointmentStatus] = None
 ):
-    """Get appointments with store and service details (admin)"""
+    """Unordered admin appointment query with store and service details"""
     appointments = db.query(
         Appointment,
         Store.name.label('store_name'),
@@ -106,10 +108,7 @@ def get_appointments_with_details(
     if status is not None:
         appointments = appointments.filter(Appointment.status == status)
 
-    return appointments.order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.appointment_time.desc()
-    ).offset(skip).limit(limit).all()
+    return appointments
 
 
 def create_appointment(
@@ -150,6 +149,8 @@ def update_appointment(
     update_data = appointment.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_appointment, field, value)
+    crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [db_appointment.id])
     
     db.commit()
     db.refresh(db_appointment)
@@ -163,6 +164,8 @@ def cancel_appointment(db: Session, appointment_id: int) -> Optional[Appointment
         return None
     
     db_appointment.status = AppointmentStatus.CANCELLED
+    crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [db_appointment.id])
     db.commit()
     db.refresh(db_appointment)
     return db_appointment
@@ -185,6 +188,135 @@ def check_appointment_conflict(
     return existing is not None
 
 
+@dataclass(frozen=True)
+class ProposedBooking:
+    """A booking to be conflict-checked before insert."""
+
+    appointment_date: date
+    appointment_time: time
+    duration_minutes: int
+    technician_id: Optional[int] = None
+    user_id: Optional[int] = None
+    exclude_appointment_id: Optional[int] = None
+
+
+_NO_CONFLICT = {"has_conflict": False, "conflict_type": None, "message": "No conflict"}
+
+
+def _technician_conflict(existing_start: datetime, existing_end: datetime) -> dict:
+    return {
+        "has_conflict": True,
+        "conflict_type": "technician",
+        "message": (
+            f"The technician is already booked from {existing_start.strftime('%H:%M')} "
+            f"to {existing_end.strftime('%H:%M')}. Please choose a time after "
+            f"{existing_end.strftime('%H:%M')} or pick another technician."
+        )
+    }
+
+
+def _user_conflict(existing_start: datetime, existing_end: datetime) -> dict:
+    return {
+        "has_conflict": True,
+        "conflict_type": "user",
+        "message": (
+            f"You already have an appointment from {existing_start.strftime('%H:%M')} "
+            f"to {existing_end.strftime('%H:%M')}. Please choose a time after "
+            f"{existing_end.strftime('%H:%M')}."
+        )
+    }
+
+
+def _time_window(appointment_date: date, appointment_time: time, duration_minutes: Optional[int]) -> tuple[datetime, datetime]:
+    start = datetime.combine(appointment_date, appointment_time)
+    return start, start + timedelta(minutes=int(duration_minutes or 0))
+
+
+def _booking_window(booking: ProposedBooking) -> tuple[datetime, datetime]:
+    return _time_window(booking.appointment_date, booking.appointment_time, booking.duration_minutes)
+
+
+def find_time_conflict(
+    booking: ProposedBooking,
+    existing_rows: Sequence[tuple],
+    earlier: Sequence[ProposedBooking] = (),
+) -> dict:
+    """
+    Check one booking against preloaded active appointments on its date.
+
+    ``existing_rows`` are (id, technician_id, user_id, appointment_time,
+    duration_minutes) tuples; ``earlier`` are bookings of the same batch that
+    will be inserted alongside this one. Technician conflicts win over user
+    conflicts, as in check_time_conflict.
+    """
+    start, end = _booking_window(booking)
+    existing = [
+        (technician_id, user_id, *_time_window(booking.appointment_date, appointment_time, duration_minutes))
+        for appt_id, technician_id, user_id, appointment_time, duration_minutes in existing_rows
+        if appt_id != booking.exclude_appointment_id
+    ] + [(other.technician_id, other.user_id, *_booking_window(other)) for other in earlier]
+
+    if booking.technician_id:
+        for technician_id, _user_id, other_start, other_end in existing:
+            if technician_id == booking.technician_id and start < other_end and end > other_start:
+                return _technician_conflict(other_start, other_end)
+    if booking.user_id:
+        for _technician_id, user_id, other_start, other_end in existing:
+            if user_id == booking.user_id and start < other_end and end > other_start:
+                return _user_conflict(other_start, other_end)
+    return dict(_NO_CONFLICT)
+
+
+def check_time_conflicts_bulk(db: Session, bookings: Sequence[ProposedBooking]) -> List[dict]:
+    """
+    Conflict-check many proposed bookings at once.
+
+    Existing active appointments are loaded with one range-bounded query per
+    date covering every technician and user in the batch. Each booking is
+    also checked against the bookings that precede it in the batch.
+    Returns one result per booking, in order, shaped like check_time_conflict.
+    """
+    by_date: dict[date, list[int]] = {}
+    for index, booking in enumerate(bookings):
+        by_date.setdefault(booking.appointment_date, []).append(index)
+
+    results: List[dict] = [dict(_NO_CONFLICT) for _ in bookings]
+    for appointment_date, indexes in by_date.items():
+        day_bookings = [bookings[index] for index in indexes]
+        technician_ids = {b.technician_id for b in day_bookings if b.technician_id}
+        user_ids = {b.user_id for b in day_bookings if b.user_id}
+        rows: list = []
+        if technician_ids or user_ids:
+            subject_filters = []
+            if technician_ids:
+                subject_filters.append(Appointment.technician_id.in_(technician_ids))
+            if user_ids:
+                subject_filters.append(Appointment.user_id.in_(user_ids))
+            query = db.query(
+                Appointment.id,
+                Appointment.technician_id,
+                Appointment.user_id,
+                Appointment.appointment_time,
+                Service.duration_minutes,
+            ).join(
+                Service, Appointment.service_id == Service.id
+            ).filter(
+                Appointment.appointment_date == appointment_date,
+                Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
+                or_(*subject_filters),
+            )
+            # Nothing starting at or after the latest proposed end can overlap.
+            latest_end = max(_booking_window(b)[1] for b in day_bookings)
+            if latest_end.date() == appointment_date:
+                query = query.filter(Appointment.appointment_time < latest_end.time())
+            rows = query.all()
+
+        for position, index in enumerate(indexes):
+            results[index] = find_time_conflict(bookings[index], rows, earlier=day_bookings[:position])
+
+    return results
+
+
 def check_time_conflict(
     db: Session,
     appointment_date: date,
@@ -198,73 +330,24 @@ def check_time_conflict(
     Check for time conflicts considering service duration
     Returns: {"has_conflict": bool, "conflict_type": str, "message": str}
     """
-    from app.models.service import Service
-    
     # Get service duration
-    service = db.query(Service).filter(Service.id == service_id).first()
-    if not service:
+    duration_minutes = db.query(Service.duration_minutes).filter(Service.id == service_id).scalar()
+    if duration_minutes is None:
         return {"has_conflict": True, "conflict_type": "invalid_service", "message": "Service not found"}
-    
-    duration_minutes = service.duration_minutes
-    
-    # Convert appointment_time to datetime for calculation
-    appt_datetime = datetime.combine(appointment_date, appointment_time)
-    appt_end_time = appt_datetime + timedelta(minutes=duration_minutes)
-    
-    # Build base query for active appointments on the same date
-    query = db.query(Appointment, Service).join(
-        Service, Appointment.service_id == Service.id
-    ).filter(
-        Appointment.appointment_date == appointment_date,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-    )
-    
-    # Exclude current appointment if updating
-    if exclude_appointment_id:
-        query = query.filter(Appointment.id != exclude_appointment_id)
-    
-    # Check technician conflict
-    if technician_id:
-        technician_appointments = query.filter(Appointment.technician_id == technician_id).all()
-        
-        for appt, svc in technician_appointments:
-            existing_datetime = datetime.combine(appointment_date, appt.appointment_time)
-            existing_end_time = existing_datetime + timedelta(minutes=svc.duration_minutes)
-            
-            # Check if time ranges overlap
-            if (appt_datetime < existing_end_time and appt_end_time > existing_datetime):
-                return {
-                    "has_conflict": True,
-                    "conflict_type": "technician",
-                    "message": (
-                        f"The technician is already booked from {existing_datetime.strftime('%H:%M')} "
-                        f"to {existing_end_time.strftime('%H:%M')}. Please choose a time after "
-                        f"{existing_end_time.strftime('%H:%M')} or pick another technician."
-                    )
-                }
-    
-    # Check user conflict
-    if user_id:
-        user_appointments = query.filter(Appointment.user_id == user_id).all()
-        
-        for appt, svc in user_appointments:
-            existing_datetime = datetime.combine(appointment_date, appt.appointment_time)
-            existing_end_time = existing_datetime + timedelta(minutes=svc.duration_minutes)
-            
-            # Check if time ranges overlap
-            if (appt_datetime < existing_end_time and appt_end_time > existing_datetime):
-                return {
-                    "has_conflict": True,
-                    "conflict_type": "user",
-                    "message": (
-                        f"You already have an appointment from {existing_datetime.strftime('%H:%M')} "
-                        f"to {existing_end_time.strftime('%H:%M')}. Please choose a time after "
-                        f"{existing_end_time.strftime('%H:%M')}."
-                    )
-                }
-    
-    return {"has_conflict": False, "conflict_type": None, "message": "No conflict"}
 
+    return check_time_conflicts_bulk(
+        db,
+        [
+            ProposedBooking(
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                duration_minutes=duration_minutes,
+                technician_id=technician_id,
+                user_id=user_id,
+                exclude_appointment_id=exclude_appointment_id,
+            )
+        ],
+    )[0]
 
 
 def cancel_appointment_with_reason(
@@ -282,6 +365,8 @@ def cancel_appointment_with_reason(
     db_appointment.cancel_reason = cancel_reason
     db_appointment.cancelled_at = datetime.now()
     db_appointment.cancelled_by = cancelled_by
+    crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [db_appointment.id])
     
     db.commit()
     db.refresh(db_appointment)
@@ -311,6 +396,8 @@ def reschedule_appointment(
     
     # Reset status to pending (needs confirmation again)
     db_appointment.status = AppointmentStatus.PENDING
+    crud_customer_stats.refresh_customer_stats(db, [db_appointment.user_id])
+    crud_technician_ledger.refresh_appointment_ledger(db, [db_appointment.id])
     
     db.commit()
     db.refresh(db_appointment)
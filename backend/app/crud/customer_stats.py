@@ -0,0 +1,196 @@
+"""
+Customer stats projection CRUD operations
+
+Rows are recomputed per customer from appointments inside the caller's
+transaction, so every write path that changes an appointment's owner, status,
+schedule or paid amount keeps the projection consistent on commit.
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.customer_stats import CustomerStats
+from app.models.user import User
+
+UPCOMING_STATUSES = {AppointmentStatus.PENDING.value, AppointmentStatus.CONFIRMED.value}
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status) or ""
+
+
+def is_no_show(status, cancel_reason: Optional[str]) -> bool:
+    return (
+        _status_value(status) == AppointmentStatus.CANCELLED.value
+        and "no show" in (cancel_reason or "").lower()
+    )
+
+
+def completed_amount(final_paid_amount: Optional[float], order_amount: Optional[float]) -> float:
+    final_paid = float(final_paid_amount or 0)
+    return final_paid if final_paid > 0 else max(float(order_amount or 0), 0.0)
+
+
+def _empty_summary() -> dict:
+    return {
+        "total_count": 0,
+        "completed_count": 0,
+        "cancelled_count": 0,
+        "no_show_count": 0,
+        "completed_spend": 0.0,
+        "last_visit_at": None,
+        "next_appointment_at": None,
+    }
+
+
+def _summarize(rows, now: datetime) -> dict[tuple[int, int], dict]:
+    summaries: dict[tuple[int, int], dict] = {}
+    for user_id, store_id, status, cancel_reason, appointment_date, appointment_time, order_amount, final_paid in rows:
+        summary = summaries.setdefault((int(user_id), int(store_id)), _empty_summary())
+        scheduled_at = datetime.combine(appointment_date, appointment_time)
+        status_value = _status_value(status)
+        summary["total_count"] += 1
+        if status_value == AppointmentStatus.COMPLETED.value:
+            summary["completed_count"] += 1
+            summary["completed_spend"] += completed_amount(final_paid, order_amount)
+            if summary["last_visit_at"] is None or scheduled_at > summary["last_visit_at"]:
+                summary["last_visit_at"] = scheduled_at
+        elif is_no_show(status, cancel_reason):
+            summary["no_show_count"] += 1
+        elif status_value == AppointmentStatus.CANCELLED.value:
+            summary["cancelled_count"] += 1
+        elif status_value in UPCOMING_STATUSES and scheduled_at >= now:
+            if summary["next_appointment_at"] is None or scheduled_at < summary["next_appointment_at"]:
+                summary["next_appointment_at"] = scheduled_at
+    for summary in summaries.values():
+        summary["completed_spend"] = round(summary["completed_spend"], 2)
+    return summaries
+
+
+def refresh_customer_stats(db: Session, user_ids: Iterable[Optional[int]], now: Optional[datetime] = None) -> None:
+    """
+    Recompute the projection rows of the given customers.
+
+    Flushes pending appointment changes and writes the rows without
+    committing; the caller's commit makes both visible together. The user
+    rows are locked first so concurrent refreshes of one customer serialize.
+    """
+    ids = sorted({int(user_id) for user_id in user_ids if user_id is not None})
+    if not ids:
+        return
+    db.flush()
+    db.query(User.id).filter(User.id.in_(ids)).with_for_update().all()
+
+    rows = (
+        db.query(
+            Appointment.user_id,
+            Appointment.store_id,
+            Appointment.status,
+            Appointment.cancel_reason,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.order_amount,
+            Appointment.final_paid_amount,
+        )
+        .filter(Appointment.user_id.in_(ids))
+        .all()
+    )
+    summaries = _summarize(rows, now or datetime.now())
+    existing = {
+        (int(row.user_id), int(row.store_id)): row
+        for row in db.query(CustomerStats).filter(CustomerStats.user_id.in_(ids)).all()
+    }
+    for key, row in existing.items():
+        if key not in summaries:
+            db.delete(row)
+    for (user_id, store_id), summary in summaries.items():
+        row = existing.get((user_id, store_id))
+        if row is None:
+            row = CustomerStats(user_id=user_id, store_id=store_id)
+            db.add(row)
+        for field, value in summary.items():
+            setattr(row, field, value)
+    db.flush()
+
+
+def get_user_totals(db: Session, user_id: int, store_id: Optional[int] = None) -> dict:
+    """Customer totals across stores, or for one store when ``store_id`` is given."""
+    totals = get_users_totals(db, [user_id], store_id=store_id)
+    return totals.get(int(user_id), _empty_summary())
+
+
+def get_users_totals(
+    db: Session,
+    user_ids: Iterable[int],
+    store_id: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> dict[int, dict]:
+    ids = sorted({int(user_id) for user_id in user_ids if user_id is not None})
+    if not ids:
+        return {}
+    query = db.query(
+        CustomerStats.user_id,
+        func.sum(CustomerStats.total_count),
+        func.sum(CustomerStats.completed_count),
+        func.sum(CustomerStats.cancelled_count),
+        func.sum(CustomerStats.no_show_count),
+        func.sum(CustomerStats.completed_spend),
+        func.max(CustomerStats.last_visit_at),
+    ).filter(CustomerStats.user_id.in_(ids))
+    if store_id is not None:
+        query = query.filter(CustomerStats.store_id == store_id)
+    totals = {}
+    for user_id, total, completed, cancelled, no_show, spend, last_visit in query.group_by(CustomerStats.user_id).all():
+        totals[int(user_id)] = {
+            "total_count": int(total or 0),
+            "completed_count": int(completed or 0),
+            "cancelled_count": int(cancelled or 0),
+            "no_show_count": int(no_show or 0),
+            "completed_spend": round(float(spend or 0.0), 2),
+            "last_visit_at": last_visit,
+            "next_appointment_at": None,
+        }
+
+    next_query = db.query(CustomerStats.user_id, func.min(CustomerStats.next_appointment_at)).filter(
+        CustomerStats.user_id.in_(ids),
+        CustomerStats.next_appointment_at >= (now or datetime.now()),
+    )
+    if store_id is not None:
+        next_query = next_query.filter(CustomerStats.store_id == store_id)
+    for user_id, next_at in next_query.group_by(CustomerStats.user_id).all():
+        if int(user_id) in totals:
+            totals[int(user_id)]["next_appointment_at"] = next_at
+    return totals
+
+
+def rebuild_customer_stats(
+    db: Session,
+    *,
+    batch_size: int = 500,
+    stale_only: bool = False,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Recompute the projection from appointments in batches, committing per batch.
+
+    With ``stale_only`` only customers whose stored next appointment has
+    already passed are refreshed. Returns the number of customers refreshed.
+    """
+    now = now or datetime.now()
+    if stale_only:
+        id_query = db.query(CustomerStats.user_id).filter(CustomerStats.next_appointment_at < now).distinct()
+    else:
+        id_query = db.query(Appointment.user_id).distinct()
+        orphan_ids = db.query(Appointment.user_id).distinct()
+        db.query(CustomerStats).filter(~CustomerStats.user_id.in_(orphan_ids)).delete(synchronize_session=False)
+        db.commit()
+
+    user_ids = sorted(int(row[0]) for row in id_query.all() if row[0] is not None)
+    batch_size = max(1, int(batch_size))
+    for offset in range(0, len(user_ids), batch_size):
+        refresh_customer_stats(db, user_ids[offset : offset + batch_size], now=now)
+        db.commit()
+    return len(user_ids)
@@ -1,15 +1,30 @@
 """
 Notification CRUD operations
+
+Unread counts are denormalized into notification_counters: every write that
+creates, reads or deletes an unread notification adjusts the user's counter
+in the same transaction, so the badge read is a primary-key lookup (behind
+the cache) instead of a COUNT over notifications. The scheduler runs
+``reconcile_unread_counters`` to repair drift from writes that bypass this
+module, such as cascading deletes.
 """
+import logging
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+from app.models.user import User
 from app.services import cache_service
+from app.services.log_rollup_service import upsert_adding
 
+logger = logging.getLogger(__name__)
 
-UNREAD_COUNT_CACHE_TTL_SECONDS = 15
+# Every counter change invalidates the key, so the TTL only bounds how long a missed invalidation lingers.
+UNREAD_COUNT_CACHE_TTL_SECONDS = 300
 
 
 def _unread_count_cache_key(user_id: int) -> str:
@@ -20,6 +35,37 @@ def invalidate_unread_count_cache(user_id: int) -> None:
     cache_service.delete(_unread_count_cache_key(user_id))
 
 
+def invalidate_unread_count_caches(user_ids: Iterable[int]) -> None:
+    """Drop many users' unread counts with one pipelined cache call."""
+    cache_service.delete_many([_unread_count_cache_key(user_id) for user_id in sorted({int(uid) for uid in user_ids})])
+
+
+def add_unread_counts(db: Session, deltas: Dict[int, int]) -> None:
+    """
+    Add per-user deltas to notification_counters in ``db``'s open transaction.
+    The caller commits and then invalidates the users' cached counts.
+    """
+    increments = [
+        {"user_id": int(user_id), "unread_count": int(delta)}
+        for user_id, delta in sorted(deltas.items())
+        if int(delta) > 0
+    ]
+    upsert_adding(db, NotificationCounter.__table__, increments, ["user_id"])
+    for user_id, delta in sorted(deltas.items()):
+        if int(delta) >= 0:
+            continue
+        # A missing row already reads as zero; clamp so drift never shows a negative badge.
+        db.query(NotificationCounter).filter(NotificationCounter.user_id == int(user_id)).update(
+            {
+                "unread_count": case(
+                    (NotificationCounter.unread_count + int(delta) < 0, 0),
+                    else_=NotificationCounter.unread_count + int(delta),
+                )
+            },
+            synchronize_session=False,
+        )
+
+
 def get_user_notifications(
     db: Session,
     user_id: int,
@@ -46,8 +92,16 @@ def mark_as_read(db: Session, notification_id: int) -> Optional[Notification]:
     notification = get_notification(db, notification_id)
     if notification and not notification.is_read:
         user_id = int(notification.user_id)
-        notification.is_read = True
-        notification.read_at = datetime.utcnow()
+        # Conditional UPDATE so concurrent requests decrement the counter once.
+        updated = db.query(Notification).filter(
+            Notification.id == notification_id,
+            Notification.is_read == False
+        ).update({
+            "is_read": True,
+            "read_at": datetime.utcnow()
+        }, synchronize_session=False)
+        if updated:
+            add_unread_counts(db, {user_id: -updated})
         db.commit()
         db.refresh(notification)
         invalidate_unread_count_cache(user_id)
@@ -63,6 +117,8 @@ def mark_all_as_read(db: Session, user_id: int) -> int:
         "is_read": True,
         "read_at": datetime.utcnow()
     })
+    if count:
+        add_unread_counts(db, {int(user_id): -count})
     db.commit()
     invalidate_unread_count_cache(int(user_id))
     return count
@@ -73,7 +129,14 @@ def delete_notification(db: Session, notification_id: int) -> bool:
     notification = get_notification(db, notification_id)
     if notification:
         user_id = int(notification.user_id)
-        db.delete(notification)
+        unread_deleted = db.query(Notification).filter(
+            Notification.id == notification_id,
+            Notification.is_read == False
+        ).delete()
+        if unread_deleted:
+            add_unread_counts(db, {user_id: -unread_deleted})
+        else:
+            db.query(Notification).filter(Notification.id == notification_id).delete()
         db.commit()
         invalidate_unread_count_cache(user_id)
         return True
@@ -82,20 +145,86 @@ def delete_notification(db: Session, notification_id: int) -> bool:
 
 def get_unread_count(db: Session, user_id: int) -> int:
     """Get count of unread notifications"""
-    return int(
-        cache_service.get_or_set_json(
-            _unread_count_cache_key(user_id),
-            ttl_seconds=UNREAD_COUNT_CACHE_TTL_SECONDS,
-            loader=lambda: int(
-                db.query(Notification).filter(
-                    Notification.user_id == user_id,
-                    Notification.is_read == False
-                ).count()
-            ),
-        )
+    return max(
+        0,
+        int(
+            cache_service.get_or_set_json(
+                _unread_count_cache_key(user_id),
+                ttl_seconds=UNREAD_COUNT_CACHE_TTL_SECONDS,
+                loader=lambda: int(
+                    db.query(NotificationCounter.unread_count)
+                    .filter(NotificationCounter.user_id == user_id)
+                    .scalar()
+                    or 0
+                ),
+            )
+        ),
     )
 
 
+def reconcile_unread_counters(db: Session, chunk_size: int = 500) -> dict:
+    """
+    Recount unread notifications for users in id order, ``chunk_size`` at a
+    time, and overwrite counters that drifted. Each chunk locks its counter
+    rows before counting, so writers committing meanwhile apply their delta
+    after the repair rather than being overwritten by it. The locking read
+    must open the chunk's transaction: under REPEATABLE READ an earlier
+    plain read would pin the snapshot the count runs against.
+    """
+    stats = {"checked": 0, "repaired": 0}
+    chunk_size = max(1, int(chunk_size))
+    last_user_id = 0
+    while True:
+        user_ids = [
+            int(row[0])
+            for row in db.query(User.id).filter(User.id > last_user_id).order_by(User.id.asc()).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+        # End the transaction the id query opened, so the count sees every write committed before the lock.
+        db.commit()
+
+        counters = {
+            int(counter.user_id): counter
+            for counter in db.query(NotificationCounter)
+            .filter(NotificationCounter.user_id.in_(user_ids))
+            .with_for_update()
+            .all()
+        }
+        actual = {
+            int(user_id): int(count)
+            for user_id, count in db.query(Notification.user_id, func.count(Notification.id))
+            .filter(Notification.user_id.in_(user_ids), Notification.is_read == False)
+            .group_by(Notification.user_id)
+            .all()
+        }
+        repaired: List[int] = []
+        for user_id in user_ids:
+            expected = actual.get(user_id, 0)
+            counter = counters.get(user_id)
+            if (int(counter.unread_count) if counter else 0) == expected:
+                continue
+            if counter is None:
+                db.add(NotificationCounter(user_id=user_id, unread_count=expected))
+            else:
+                counter.unread_count = expected
+            repaired.append(user_id)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A writer created one of the missing rows first; the next pass rechecks it.
+            db.rollback()
+            repaired = []
+
+        stats["checked"] += len(user_ids)
+        if repaired:
+            stats["repaired"] += len(repaired)
+            invalidate_unread_count_caches(repaired)
+            logger.warning("Repaired unread notification counters for user_ids=%s", repaired[:20])
+    return stats
+
+
 def create_notification(
     db: Session,
     user_id: int,
@@ -114,6 +243,7 @@ def create_notification(
         is_read=False
     )
     db.add(notification)
+    add_unread_counts(db, {int(user_id): 1})
     db.commit()
     db.refresh(notification)
     invalidate_unread_count_cache(int(user_id))
@@ -103,6 +103,26 @@ def get_active_user_tokens(
     )
 
 
+def get_active_tokens_for_users(
+    db: Session,
+    *,
+    user_ids: Iterable[int],
+    platform: str = "ios",
+) -> List[PushDeviceToken]:
+    normalized_ids = sorted({int(user_id) for user_id in user_ids})
+    if not normalized_ids:
+        return []
+    return (
+        db.query(PushDeviceToken)
+        .filter(
+            PushDeviceToken.user_id.in_(normalized_ids),
+            PushDeviceToken.platform == platform,
+            PushDeviceToken.is_active == True,
+        )
+        .all()
+    )
+
+
 def deactivate_tokens_by_value(
     db: Session,
     *,
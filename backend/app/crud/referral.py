@@ -9,6 +9,7 @@ from datetime import datetime
 
 from app.models.referral import Referral
 from app.models.user import User
+from app.services import principal_service
 
 
 def generate_referral_code() -> str:
@@ -35,6 +36,7 @@ def get_or_create_referral_code(db: Session, user_id: int) -> str:
             if user:
                 user.referral_code = code
                 db.commit()
+                principal_service.invalidate_principal(user.id)
                 db.refresh(user)
             return code
     
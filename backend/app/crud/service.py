@@ -8,6 +8,8 @@ from sqlalchemy.orm import Session
 
 from app.models.service import Service
 from app.models.service_catalog import ServiceCatalog
+from app.schemas.service import Service as ServiceSchema
+from app.schemas.service import ServiceCatalog as ServiceCatalogSchema
 from app.schemas.service import (
     ServiceCatalogCreate,
     ServiceCatalogUpdate,
@@ -16,6 +18,13 @@ from app.schemas.service import (
     StoreServiceAssign,
     StoreServiceUpdate,
 )
+from app.services import catalog_cache_service
+
+
+def _invalidate_service_caches(store_id: Optional[int]) -> None:
+    # Category lists are derived from active store services, so any service write touches both.
+    catalog_cache_service.invalidate_store(store_id)
+    catalog_cache_service.invalidate_service_catalog()
 
 
 def _normalize_commission_payload(
@@ -84,6 +93,17 @@ def get_store_services(db: Session, store_id: int, include_inactive: bool = Fals
     return query.order_by(Service.id.desc()).all()
 
 
+def get_store_services_cached(db: Session, store_id: int, include_inactive: bool = False) -> List[dict]:
+    """get_store_services as Service payloads, cached per store"""
+    return catalog_cache_service.get_or_load(
+        catalog_cache_service.store_key(store_id, "services", include_inactive=bool(include_inactive)),
+        lambda: [
+            ServiceSchema.model_validate(service).model_dump(mode="json")
+            for service in get_store_services(db, store_id=store_id, include_inactive=include_inactive)
+        ],
+    )
+
+
 def create_service(db: Session, service: ServiceCreate) -> Service:
     """Create new service"""
     payload = service.model_dump()
@@ -100,6 +120,7 @@ def create_service(db: Session, service: ServiceCreate) -> Service:
     db.add(db_service)
     db.commit()
     db.refresh(db_service)
+    _invalidate_service_caches(db_service.store_id)
     return db_service
 
 
@@ -131,6 +152,7 @@ def update_service(db: Session, service_id: int, service: ServiceUpdate) -> Opti
 
     db.commit()
     db.refresh(db_service)
+    _invalidate_service_caches(db_service.store_id)
     return db_service
 
 
@@ -145,14 +167,24 @@ def get_service_categories(db: Session) -> List[str]:
     return [cat[0] for cat in categories if cat[0]]
 
 
+def get_service_categories_cached(db: Session) -> List[str]:
+    """get_service_categories, cached until the next service write"""
+    return catalog_cache_service.get_or_load(
+        catalog_cache_service.service_catalog_key("categories"),
+        lambda: get_service_categories(db),
+    )
+
+
 def delete_service(db: Session, service_id: int) -> bool:
     """Delete service"""
     db_service = get_service(db, service_id=service_id)
     if not db_service:
         return False
 
+    store_id = db_service.store_id
     db.delete(db_service)
     db.commit()
+    _invalidate_service_caches(store_id)
     return True
 
 
@@ -185,6 +217,26 @@ def get_catalog_items(
     return query.order_by(ServiceCatalog.sort_order.asc(), ServiceCatalog.id.desc()).offset(skip).limit(limit).all()
 
 
+def get_catalog_items_cached(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    active_only: bool = False,
+    category: Optional[str] = None,
+) -> List[dict]:
+    """get_catalog_items as ServiceCatalog payloads, cached per filter combination"""
+    key = catalog_cache_service.service_catalog_key(
+        "items", skip=skip, limit=limit, active_only=bool(active_only), category=category
+    )
+    return catalog_cache_service.get_or_load(
+        key,
+        lambda: [
+            ServiceCatalogSchema.model_validate(item).model_dump(mode="json")
+            for item in get_catalog_items(db, skip=skip, limit=limit, active_only=active_only, category=category)
+        ],
+    )
+
+
 def create_catalog_item(db: Session, payload: ServiceCatalogCreate) -> ServiceCatalog:
     """Create service catalog item"""
     normalized_name = _normalize_text(payload.name)
@@ -214,6 +266,7 @@ def create_catalog_item(db: Session, payload: ServiceCatalogCreate) -> ServiceCa
     db.add(item)
     db.commit()
     db.refresh(item)
+    catalog_cache_service.invalidate_service_catalog()
     return item
 
 
@@ -261,6 +314,7 @@ def update_catalog_item(
         setattr(item, field, value)
     db.commit()
     db.refresh(item)
+    catalog_cache_service.invalidate_service_catalog()
     return item
 
 
@@ -303,6 +357,7 @@ def assign_catalog_service_to_store(
         existing.is_active = 1
         db.commit()
         db.refresh(existing)
+        _invalidate_service_caches(store_id)
         return existing
 
     commission_type, commission_value, commission_amount = _normalize_commission_payload(
@@ -327,6 +382,7 @@ def assign_catalog_service_to_store(
     db.add(db_service)
     db.commit()
     db.refresh(db_service)
+    _invalidate_service_caches(store_id)
     return db_service
 
 
@@ -361,6 +417,7 @@ def update_store_service(
         setattr(service, field, value)
     db.commit()
     db.refresh(service)
+    _invalidate_service_caches(service.store_id)
     return service
 
 
@@ -372,4 +429,5 @@ def deactivate_service(db: Session, service_id: int) -> Optional[Service]:
     service.is_active = 0
     db.commit()
     db.refresh(service)
+    _invalidate_service_caches(service.store_id)
     return service
@@ -7,7 +7,8 @@ from typing import List, Optional
 from datetime import datetime, timezone
 from math import asin, cos, radians, sin, sqrt
 from app.models.store import Store, StoreImage
-from app.schemas.store import StoreCreate, StoreUpdate
+from app.schemas.store import StoreCreate, StoreUpdate, StoreWithImages
+from app.services import catalog_cache_service
 
 
 def get_store(db: Session, store_id: int) -> Optional[Store]:
@@ -15,6 +16,18 @@ def get_store(db: Session, store_id: int) -> Optional[Store]:
     return db.query(Store).filter(Store.id == store_id).first()
 
 
+def get_store_detail_cached(db: Session, store_id: int) -> Optional[dict]:
+    """Store row plus images as a StoreWithImages payload, cached per store; None if no such store"""
+    def _loader() -> Optional[dict]:
+        store = get_store(db, store_id)
+        if not store:
+            return None
+        images = get_store_images(db, store_id=store_id)
+        return StoreWithImages.model_validate({**store.__dict__, "images": images}).model_dump(mode="json")
+
+    return catalog_cache_service.get_or_load(catalog_cache_service.store_key(store_id, "detail"), _loader)
+
+
 def get_stores(
     db: Session,
     skip: int = 0,
@@ -205,6 +218,7 @@ def update_store(db: Session, store_id: int, store: StoreUpdate) -> Optional[Sto
     
     db.commit()
     db.refresh(db_store)
+    catalog_cache_service.invalidate_store(store_id)
     return db_store
 
 
@@ -226,6 +240,7 @@ def create_store_image(db: Session, store_id: int, image_url: str, is_primary: i
     db.add(db_image)
     db.commit()
     db.refresh(db_image)
+    catalog_cache_service.invalidate_store(store_id)
     return db_image
 
 
@@ -241,6 +256,7 @@ def delete_store(db: Session, store_id: int) -> bool:
     # Delete store
     db.delete(db_store)
     db.commit()
+    catalog_cache_service.invalidate_store(store_id)
     return True
 
 
@@ -256,4 +272,5 @@ def delete_store_image(db: Session, image_id: int, store_id: int) -> bool:
     
     db.delete(db_image)
     db.commit()
+    catalog_cache_service.invalidate_store(store_id)
     return True
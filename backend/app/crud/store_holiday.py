@@ -7,6 +7,7 @@ from datetime import date
 
 from app.models.store_holiday import StoreHoliday
 from app.schemas.store_holiday import StoreHolidayCreate, StoreHolidayUpdate
+from app.services import availability_service
 
 
 def get_store_holidays(
@@ -53,6 +54,7 @@ def create_holiday(
     db.add(holiday)
     db.commit()
     db.refresh(holiday)
+    availability_service.invalidate_store_day(store_id, holiday.holiday_date)
     return holiday
 
 
@@ -66,12 +68,14 @@ def update_holiday(
     if not holiday:
         return None
     
+    previous_date = holiday.holiday_date
     update_data = holiday_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(holiday, field, value)
     
     db.commit()
     db.refresh(holiday)
+    availability_service.invalidate_store_days(holiday.store_id, [previous_date, holiday.holiday_date])
     return holiday
 
 
@@ -81,6 +85,8 @@ def delete_holiday(db: Session, holiday_id: int) -> bool:
     if not holiday:
         return False
     
+    store_id, holiday_date = holiday.store_id, holiday.holiday_date
     db.delete(holiday)
     db.commit()
+    availability_service.invalidate_store_day(store_id, holiday_date)
     return True
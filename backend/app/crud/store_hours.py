@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.store_hours import StoreHours
 from app.schemas.store_hours import StoreHoursCreate, StoreHoursUpdate
+from app.schemas.store_hours import StoreHours as StoreHoursSchema
+from app.services import availability_service, catalog_cache_service
 
 
 def get_store_hours(db: Session, store_id: int) -> List[StoreHours]:
@@ -14,6 +16,19 @@ def get_store_hours(db: Session, store_id: int) -> List[StoreHours]:
     ).order_by(StoreHours.day_of_week).all()
 
 
+def get_store_hours_cached(db: Session, store_id: int) -> List[dict]:
+    """get_store_hours as StoreHours payloads, cached per store"""
+    return catalog_cache_service.get_or_load(
+        catalog_cache_service.store_key(store_id, "hours"),
+        lambda: [StoreHoursSchema.model_validate(hours).model_dump(mode="json") for hours in get_store_hours(db, store_id)],
+    )
+
+
+def _invalidate_store_hours(store_id: int) -> None:
+    availability_service.invalidate_store(store_id)
+    catalog_cache_service.invalidate_store(store_id)
+
+
 def get_store_hours_by_day(db: Session, store_id: int, day_of_week: int) -> Optional[StoreHours]:
     """Get hours for a specific day"""
     return db.query(StoreHours).filter(
@@ -34,6 +49,7 @@ def create_store_hours(db: Session, store_id: int, hours: StoreHoursCreate) -> S
     db.add(db_hours)
     db.commit()
     db.refresh(db_hours)
+    _invalidate_store_hours(store_id)
     return db_hours
 
 
@@ -54,6 +70,7 @@ def update_store_hours(
     
     db.commit()
     db.refresh(db_hours)
+    _invalidate_store_hours(store_id)
     return db_hours
 
 
@@ -65,6 +82,7 @@ def delete_store_hours(db: Session, store_id: int, day_of_week: int) -> bool:
     
     db.delete(db_hours)
     db.commit()
+    _invalidate_store_hours(store_id)
     return True
 
 
@@ -94,6 +112,7 @@ def batch_create_or_update_store_hours(
         result.append(db_hours)
     
     db.commit()
+    _invalidate_store_hours(store_id)
     
     # Refresh all objects
     for db_hours in result:
@@ -5,7 +5,9 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.models.store_portfolio import StorePortfolio
+from app.schemas.store_portfolio import StorePortfolio as StorePortfolioSchema
 from app.schemas.store_portfolio import StorePortfolioCreate, StorePortfolioUpdate
+from app.services import catalog_cache_service
 
 
 def get_store_portfolio(
@@ -23,6 +25,22 @@ def get_store_portfolio(
     ).offset(skip).limit(limit).all()
 
 
+def get_store_portfolio_cached(
+    db: Session,
+    store_id: int,
+    skip: int = 0,
+    limit: int = 50
+) -> List[dict]:
+    """get_store_portfolio as StorePortfolio payloads, cached per store and page"""
+    return catalog_cache_service.get_or_load(
+        catalog_cache_service.store_key(store_id, "portfolio", skip=skip, limit=limit),
+        lambda: [
+            StorePortfolioSchema.model_validate(item).model_dump(mode="json")
+            for item in get_store_portfolio(db, store_id=store_id, skip=skip, limit=limit)
+        ],
+    )
+
+
 def get_portfolio_item(db: Session, portfolio_id: int) -> Optional[StorePortfolio]:
     """Get a specific portfolio item"""
     return db.query(StorePortfolio).filter(StorePortfolio.id == portfolio_id).first()
@@ -41,6 +59,7 @@ def create_portfolio_item(
     db.add(portfolio)
     db.commit()
     db.refresh(portfolio)
+    catalog_cache_service.invalidate_store(store_id)
     return portfolio
 
 
@@ -60,6 +79,7 @@ def update_portfolio_item(
     
     db.commit()
     db.refresh(portfolio)
+    catalog_cache_service.invalidate_store(portfolio.store_id)
     return portfolio
 
 
@@ -69,8 +89,10 @@ def delete_portfolio_item(db: Session, portfolio_id: int) -> bool:
     if not portfolio:
         return False
     
+    store_id = portfolio.store_id
     db.delete(portfolio)
     db.commit()
+    catalog_cache_service.invalidate_store(store_id)
     return True
 
 
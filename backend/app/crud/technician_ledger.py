@@ -0,0 +1,268 @@
+"""
+Technician commission ledger CRUD operations
+
+Entries are recomputed per appointment inside the caller's transaction, so
+completion, settlement, amount, technician, split and service item changes
+are reflected on commit. Commission rates are taken from the services at
+that time.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment_service_item import AppointmentServiceItem
+from app.models.appointment_staff_split import AppointmentStaffSplit
+from app.models.service import Service
+from app.models.technician_ledger import TechnicianLedgerEntry
+
+
+def normalize_commission_config(
+    commission_type: Optional[str],
+    commission_value: Optional[float],
+    commission_amount: Optional[float] = None,
+) -> tuple[str, float]:
+    normalized_type = (commission_type or Service.COMMISSION_TYPE_FIXED).lower()
+    if normalized_type not in {Service.COMMISSION_TYPE_FIXED, Service.COMMISSION_TYPE_PERCENT}:
+        normalized_type = Service.COMMISSION_TYPE_FIXED
+    normalized_value = commission_value
+    if normalized_value is None:
+        normalized_value = commission_amount or 0.0
+    normalized_value = max(float(normalized_value or 0), 0.0)
+    # Backward compatibility: old fixed rows may still store only commission_amount.
+    if (
+        normalized_type == Service.COMMISSION_TYPE_FIXED
+        and normalized_value <= 0
+        and float(commission_amount or 0) > 0
+    ):
+        normalized_value = float(commission_amount or 0)
+    if normalized_type == Service.COMMISSION_TYPE_PERCENT:
+        normalized_value = min(normalized_value, 100.0)
+    return normalized_type, normalized_value
+
+
+def calculate_commission_by_amount(
+    amount: float,
+    commission_type: str,
+    commission_value: float,
+) -> float:
+    amount = float(amount or 0)
+    if amount <= 0 or commission_value <= 0:
+        return 0.0
+    if commission_type == Service.COMMISSION_TYPE_PERCENT:
+        return amount * (commission_value / 100.0)
+    return commission_value
+
+
+def calculate_split_commission(
+    split_amount: float,
+    service_total: float,
+    commission_type: str,
+    commission_value: float,
+) -> float:
+    if commission_type == Service.COMMISSION_TYPE_PERCENT:
+        return calculate_commission_by_amount(split_amount, commission_type, commission_value)
+    if service_total <= 0 or commission_value <= 0:
+        return 0.0
+    return commission_value * (float(split_amount or 0) / float(service_total))
+
+
+def calculate_items_commission(
+    items: list[tuple[int, float]],
+    service_commission_map: dict[int, tuple[str, float]],
+) -> float:
+    total = 0.0
+    for item_service_id, item_amount in items:
+        commission_type, commission_value = service_commission_map.get(
+            int(item_service_id),
+            (Service.COMMISSION_TYPE_FIXED, 0.0),
+        )
+        total += calculate_commission_by_amount(item_amount, commission_type, commission_value)
+    return total
+
+
+def _load_service_commission_config_map(db: Session, service_ids: set[int]) -> dict[int, tuple[str, float]]:
+    if not service_ids:
+        return {}
+    rows = (
+        db.query(
+            Service.id.label("service_id"),
+            Service.commission_type.label("commission_type"),
+            Service.commission_value.label("commission_value"),
+            Service.commission_amount.label("commission_amount"),
+        )
+        .filter(Service.id.in_(service_ids))
+        .all()
+    )
+    return {
+        int(row.service_id): normalize_commission_config(
+            row.commission_type,
+            row.commission_value,
+            row.commission_amount,
+        )
+        for row in rows
+    }
+
+
+def build_ledger_entries(db: Session, appointment_ids: list[int]) -> list[TechnicianLedgerEntry]:
+    """Compute the ledger entries of the completed appointments among ``appointment_ids``."""
+    if not appointment_ids:
+        return []
+    appointments = (
+        db.query(
+            Appointment.id.label("appointment_id"),
+            Appointment.store_id.label("store_id"),
+            Appointment.appointment_date.label("appointment_date"),
+            Appointment.appointment_time.label("appointment_time"),
+            Appointment.technician_id.label("appointment_technician_id"),
+            Appointment.service_id.label("appointment_service_id"),
+            Appointment.order_amount.label("order_amount"),
+            Service.price.label("service_price"),
+        )
+        .join(Service, Service.id == Appointment.service_id)
+        .filter(
+            Appointment.id.in_(appointment_ids),
+            Appointment.status == AppointmentStatus.COMPLETED,
+        )
+        .all()
+    )
+    completed_ids = [int(row.appointment_id) for row in appointments]
+    if not completed_ids:
+        return []
+
+    split_map: dict[int, list] = {}
+    split_service_totals: dict[int, dict[int, float]] = {}
+    split_rows = (
+        db.query(
+            AppointmentStaffSplit.id.label("split_id"),
+            AppointmentStaffSplit.appointment_id.label("appointment_id"),
+            AppointmentStaffSplit.technician_id.label("technician_id"),
+            AppointmentStaffSplit.service_id.label("service_id"),
+            AppointmentStaffSplit.amount.label("amount"),
+        )
+        .filter(AppointmentStaffSplit.appointment_id.in_(completed_ids))
+        .order_by(AppointmentStaffSplit.id.asc())
+        .all()
+    )
+    for row in split_rows:
+        appointment_id = int(row.appointment_id)
+        split_map.setdefault(appointment_id, []).append(row)
+        if row.service_id:
+            totals = split_service_totals.setdefault(appointment_id, {})
+            totals[int(row.service_id)] = totals.get(int(row.service_id), 0.0) + float(row.amount or 0)
+
+    items_map: dict[int, list[tuple[int, float]]] = {}
+    item_totals: dict[int, dict[int, float]] = {}
+    item_rows = (
+        db.query(
+            AppointmentServiceItem.appointment_id,
+            AppointmentServiceItem.service_id,
+            AppointmentServiceItem.amount,
+        )
+        .filter(AppointmentServiceItem.appointment_id.in_(completed_ids))
+        .all()
+    )
+    for appointment_id, service_id, amount in item_rows:
+        items_map.setdefault(int(appointment_id), []).append((int(service_id), float(amount or 0)))
+        totals = item_totals.setdefault(int(appointment_id), {})
+        totals[int(service_id)] = totals.get(int(service_id), 0.0) + float(amount or 0)
+
+    service_ids = {int(row.appointment_service_id) for row in appointments if row.appointment_service_id is not None}
+    service_ids.update(int(row.service_id) for row in split_rows if row.service_id is not None)
+    for items in items_map.values():
+        service_ids.update(int(service_id) for service_id, _ in items)
+    commission_map = _load_service_commission_config_map(db, service_ids)
+
+    entries: list[TechnicianLedgerEntry] = []
+    for appt in appointments:
+        appointment_id = int(appt.appointment_id)
+
+        def _entry(technician_id: int, amount: float, commission: float, split_id: Optional[int] = None):
+            return TechnicianLedgerEntry(
+                store_id=int(appt.store_id),
+                technician_id=int(technician_id),
+                appointment_id=appointment_id,
+                split_id=split_id,
+                work_date=appt.appointment_date,
+                work_time=appt.appointment_time,
+                amount=amount,
+                commission_amount=commission,
+            )
+
+        appointment_splits = split_map.get(appointment_id, [])
+        if appointment_splits:
+            for split in appointment_splits:
+                split_amount = float(split.amount or 0)
+                split_service_id = (
+                    int(split.service_id) if split.service_id is not None else int(appt.appointment_service_id)
+                )
+                commission_type, commission_value = commission_map.get(
+                    split_service_id,
+                    (Service.COMMISSION_TYPE_FIXED, 0.0),
+                )
+                service_total = item_totals.get(appointment_id, {}).get(split_service_id, 0.0)
+                if service_total <= 0:
+                    service_total = split_service_totals.get(appointment_id, {}).get(split_service_id, 0.0)
+                commission = calculate_split_commission(
+                    split_amount=split_amount,
+                    service_total=service_total,
+                    commission_type=commission_type,
+                    commission_value=commission_value,
+                )
+                entries.append(_entry(split.technician_id, split_amount, commission, int(split.split_id)))
+            continue
+
+        if not appt.appointment_technician_id:
+            continue
+        appointment_items = items_map.get(appointment_id, [])
+        if appointment_items:
+            amount = sum(item_amount for _, item_amount in appointment_items)
+            commission = calculate_items_commission(appointment_items, commission_map)
+        else:
+            amount = float(appt.order_amount if appt.order_amount is not None else (appt.service_price or 0))
+            commission_type, commission_value = commission_map.get(
+                int(appt.appointment_service_id),
+                (Service.COMMISSION_TYPE_FIXED, 0.0),
+            )
+            commission = calculate_commission_by_amount(amount, commission_type, commission_value)
+        entries.append(_entry(appt.appointment_technician_id, amount, commission))
+    return entries
+
+
+def refresh_appointment_ledger(db: Session, appointment_ids: Iterable[Optional[int]]) -> None:
+    """
+    Replace the ledger entries of the given appointments.
+
+    Flushes pending changes and writes without committing; the caller's
+    commit makes the appointment change and its entries visible together.
+    """
+    ids = sorted({int(appointment_id) for appointment_id in appointment_ids if appointment_id is not None})
+    if not ids:
+        return
+    db.flush()
+    db.query(TechnicianLedgerEntry).filter(TechnicianLedgerEntry.appointment_id.in_(ids)).delete(
+        synchronize_session=False
+    )
+    db.add_all(build_ledger_entries(db, ids))
+    db.flush()
+
+
+def rebuild_technician_ledger(db: Session, *, batch_size: int = 500, store_id: Optional[int] = None) -> int:
+    """
+    Rebuild the ledger from completed appointments in batches, committing per
+    batch. Returns the number of appointments processed.
+    """
+    stale_query = db.query(TechnicianLedgerEntry)
+    id_query = db.query(Appointment.id).filter(Appointment.status == AppointmentStatus.COMPLETED)
+    if store_id is not None:
+        stale_query = stale_query.filter(TechnicianLedgerEntry.store_id == store_id)
+        id_query = id_query.filter(Appointment.store_id == store_id)
+    stale_query.delete(synchronize_session=False)
+    db.commit()
+
+    appointment_ids = [int(row[0]) for row in id_query.order_by(Appointment.id.asc()).all()]
+    batch_size = max(1, int(batch_size))
+    for offset in range(0, len(appointment_ids), batch_size):
+        db.add_all(build_ledger_entries(db, appointment_ids[offset : offset + batch_size]))
+        db.commit()
+    return len(appointment_ids)
@@ -5,8 +5,15 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
+from app.models.technician import Technician
 from app.models.technician_unavailable import TechnicianUnavailable
 from app.schemas.technician_unavailable import TechnicianUnavailableCreate, TechnicianUnavailableUpdate
+from app.services import availability_service
+
+
+def _invalidate_technician_availability(db: Session, technician_id: int) -> None:
+    store_id = db.query(Technician.store_id).filter(Technician.id == technician_id).scalar()
+    availability_service.invalidate_store(store_id)
 
 
 def create_unavailable_period(
@@ -22,6 +29,7 @@ def create_unavailable_period(
     db.add(db_unavailable)
     db.commit()
     db.refresh(db_unavailable)
+    _invalidate_technician_availability(db, technician_id)
     return db_unavailable
 
 
@@ -71,6 +79,7 @@ def update_unavailable_period(
     
     db.commit()
     db.refresh(db_unavailable)
+    _invalidate_technician_availability(db, db_unavailable.technician_id)
     return db_unavailable
 
 
@@ -83,8 +92,10 @@ def delete_unavailable_period(
     if not db_unavailable:
         return False
     
+    technician_id = db_unavailable.technician_id
     db.delete(db_unavailable)
     db.commit()
+    _invalidate_technician_availability(db, technician_id)
     return True
 
 
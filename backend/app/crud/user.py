@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.services import principal_service
 
 
 def get(db: Session, id: int) -> Optional[User]:
@@ -108,6 +109,7 @@ def update(db: Session, db_obj: User, obj_in: UserUpdate) -> User:
     
     db.add(db_obj)
     db.commit()
+    principal_service.invalidate_principal(db_obj.id)
     db.refresh(db_obj)
     return db_obj
 
@@ -127,6 +129,7 @@ def delete(db: Session, id: int) -> Optional[User]:
     if obj:
         db.delete(obj)
         db.commit()
+        principal_service.invalidate_principal(id)
     return obj
 
 
@@ -146,6 +149,7 @@ def deactivate(db: Session, id: int) -> Optional[User]:
         obj.is_active = False
         db.add(obj)
         db.commit()
+        principal_service.invalidate_principal(id)
         db.refresh(obj)
     return obj
 
@@ -176,5 +180,6 @@ def update_user(db: Session, user_id: int, update_data: dict) -> User:
     
     db.add(user)
     db.commit()
+    principal_service.invalidate_principal(user_id)
     db.refresh(user)
     return user
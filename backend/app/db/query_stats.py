@@ -0,0 +1,189 @@
+"""
+Per-request SQL statistics.
+
+SQLAlchemy cursor events count statements, database time and repeated
+statement shapes for the request tracked in the current context (the request
+pipeline middleware tracks every HTTP request under its X-Request-Id). A
+shape is the statement with IN-lists and numeric literals collapsed, so a
+query issued once per row of a page shows up as one shape with a high count.
+
+Outside a tracked request the hooks cost one ContextVar lookup.
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator, Mapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# A shape executed this many times in one request is reported as a likely N+1.
+REPEAT_WARN_THRESHOLD = max(2, int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "5")))
+SERVER_TIMING_METRIC = "db"
+_MAX_REPORTED_SHAPES = 5
+_MAX_SHAPE_CHARS = 300
+_STARTED_KEY = "query_stats_started"
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SERVER_TIMING_DB = re.compile(
+    rf'(?:^|,)\s*{SERVER_TIMING_METRIC};dur=(?P<dur>[\d.]+);desc="queries=(?P<queries>\d+) max_repeat=(?P<max_repeat>\d+)"'
+)
+
+_CURRENT: ContextVar[Optional["QueryStats"]] = ContextVar("sql_query_stats", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+@dataclass
+class QueryStats:
+    request_id: str = ""
+    count: int = 0
+    total_seconds: float = 0.0
+    shapes: dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    @property
+    def db_ms(self) -> float:
+        return round(self.total_seconds * 1000, 2)
+
+    @property
+    def max_repeat(self) -> int:
+        return max(self.shapes.values(), default=0)
+
+    def repeated(self, threshold: int = REPEAT_WARN_THRESHOLD) -> list[tuple[str, int]]:
+        items = [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+        return sorted(items, key=lambda item: -item[1])
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "queries": self.count,
+            "db_ms": self.db_ms,
+            "max_repeat": self.max_repeat,
+            "repeated": [
+                {"count": count, "sql": shape[:_MAX_SHAPE_CHARS]}
+                for shape, count in self.repeated()[:_MAX_REPORTED_SHAPES]
+            ],
+        }
+
+    def server_timing(self) -> str:
+        return f'{SERVER_TIMING_METRIC};dur={self.db_ms:.2f};desc="queries={self.count} max_repeat={self.max_repeat}"'
+
+
+def current() -> Optional[QueryStats]:
+    return _CURRENT.get()
+
+
+def begin(request_id: str = "") -> tuple[QueryStats, Token]:
+    stats = QueryStats(request_id=request_id)
+    return stats, _CURRENT.set(stats)
+
+
+def end(token: Token) -> None:
+    _CURRENT.reset(token)
+
+
+@contextmanager
+def track(request_id: str = "") -> Iterator[QueryStats]:
+    stats, token = begin(request_id)
+    try:
+        yield stats
+    finally:
+        end(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeat: Optional[int] = None, label: str = "") -> Iterator[QueryStats]:
+    """Fail if the wrapped block issues more than ``max_queries`` statements (or repeats one shape too often)."""
+    with track(label) as stats:
+        yield stats
+    _check_budget(stats.count, stats.max_repeat, max_queries, max_repeat, label, stats.repeated(2))
+
+
+def parse_server_timing(header: Optional[str]) -> Optional[dict[str, float]]:
+    match = _SERVER_TIMING_DB.search(header or "")
+    if not match:
+        return None
+    return {
+        "queries": int(match.group("queries")),
+        "db_ms": float(match.group("dur")),
+        "max_repeat": int(match.group("max_repeat")),
+    }
+
+
+def assert_query_budget(
+    headers: Mapping[str, str],
+    max_queries: int,
+    max_repeat: Optional[int] = None,
+    label: str = "",
+) -> dict[str, float]:
+    """
+    Check a response's Server-Timing header against a query budget; works
+    against a live non-production server or an in-process TestClient.
+    """
+    timing = parse_server_timing(headers.get("Server-Timing"))
+    if timing is None:
+        raise QueryBudgetExceeded(f"{label or 'response'}: no Server-Timing db metric (production server?)")
+    _check_budget(int(timing["queries"]), int(timing["max_repeat"]), max_queries, max_repeat, label)
+    return timing
+
+
+def _check_budget(
+    queries: int,
+    repeat: int,
+    max_queries: int,
+    max_repeat: Optional[int],
+    label: str,
+    repeated: Optional[list[tuple[str, int]]] = None,
+) -> None:
+    problems = []
+    if queries > max_queries:
+        problems.append(f"{queries} queries > budget {max_queries}")
+    if max_repeat is not None and repeat > max_repeat:
+        problems.append(f"one statement shape ran {repeat} times > {max_repeat}")
+    if problems:
+        detail = "; ".join(problems)
+        if repeated:
+            detail += "; repeated: " + "; ".join(f"{count}x {shape[:120]}" for shape, count in repeated[:3])
+        raise QueryBudgetExceeded(f"{label or 'query budget'}: {detail}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _CURRENT.get() is not None:
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _CURRENT.get()
+    started = conn.info.pop(_STARTED_KEY, None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install() -> None:
+    """Attach the cursor hooks to every Engine (the app engine and any created in tests)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,11 +1,26 @@
 """
 Database session management
 """
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from typing import Generator
+from app.core import metrics
 from app.core.config import settings
+from app.db import query_stats
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including connect time for new connections)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.DB_POOL_WAIT.observe(time.perf_counter() - started)
 
 
 # Convert mysql:// to mysql+pymysql:// if needed
@@ -32,6 +47,7 @@ engine_kwargs = {
 if not database_url.startswith("sqlite"):
     engine_kwargs.update(
         {
+            "poolclass": _TimedQueuePool,
             "pool_pre_ping": bool(settings.DB_POOL_PRE_PING),
             "pool_size": max(1, int(settings.DB_POOL_SIZE)),
             "max_overflow": max(0, int(settings.DB_MAX_OVERFLOW)),
@@ -41,6 +57,17 @@ if not database_url.startswith("sqlite"):
     )
 
 engine = create_engine(database_url, **engine_kwargs)
+query_stats.install()
+
+
+@metrics.register_gauge_sampler
+def _sample_pool_metrics() -> None:
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        metrics.DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        metrics.DB_POOL_OVERFLOW.set(pool.overflow())
+        metrics.DB_POOL_SIZE.set(pool.size())
+
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
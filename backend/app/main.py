@@ -3,28 +3,39 @@ FastAPI main application
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.services.scheduler import reminder_scheduler
 import hashlib
+import hmac
 import logging
 import os
-from datetime import datetime
-import ipaddress
 import json
 import re
 import time
 import uuid
-from threading import Lock
+from typing import Any
 from urllib.parse import parse_qsl, urlencode
 
+from app.core import metrics
 from app.core.security import decode_token
+from app.db import query_stats
 from app.db.session import SessionLocal
-from app.models.security import SecurityBlockLog, SecurityIPRule
+from app.models.security import SecurityBlockLog
 from app.models.user import User
-from app.services import log_service, notification_service
+from app.services import (
+    cache_service,
+    log_service,
+    notification_service,
+    push_campaign_service,
+    request_latency_service,
+    security_rule_service,
+)
 from app.services.upload_file_service import build_upload_response
 
 logger = logging.getLogger(__name__)
@@ -45,9 +56,6 @@ _SENSITIVE_QUERY_KEYS = {
 }
 _REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{8,128}$")
 _CLIENT_PLATFORM_PATTERN = re.compile(r"^[a-z0-9._-]{1,32}$")
-_SECURITY_RULE_CACHE_TTL_SECONDS = max(1.0, float(os.getenv("SECURITY_RULE_CACHE_TTL_SECONDS", "30")))
-_SECURITY_RULE_CACHE_LOCK = Lock()
-_SECURITY_RULE_CACHE: dict[str, dict[str, object]] = {}
 
 
 def _resolve_access_log_sample_rate() -> float:
@@ -59,6 +67,8 @@ def _resolve_access_log_sample_rate() -> float:
 
 
 _ACCESS_LOG_SAMPLE_RATE = _resolve_access_log_sample_rate()
+# Per-request SQL counts go out as a Server-Timing header outside production; sampled access logs carry them everywhere.
+_SQL_SERVER_TIMING = settings.ENVIRONMENT.strip().lower() not in {"production", "prod"}
 
 
 @asynccontextmanager
@@ -67,7 +77,11 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
     log_service.start_async_logger()
+    request_latency_service.start_request_latency_flusher()
+    metrics.start_gauge_sampler()
+    cache_service.start_invalidation_listener()
     notification_service.start_async_push_dispatcher()
+    push_campaign_service.start_campaign_runner()
     scheduler_started = False
     if settings.embedded_scheduler_enabled:
         reminder_scheduler.start()
@@ -80,7 +94,11 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application...")
     if scheduler_started:
         await reminder_scheduler.stop()
+    request_latency_service.shutdown_request_latency_flusher(timeout_seconds=2.0)
+    metrics.shutdown_gauge_sampler()
+    cache_service.shutdown_invalidation_listener(timeout_seconds=2.0)
     log_service.shutdown_async_logger(timeout_seconds=2.0)
+    push_campaign_service.shutdown_campaign_runner(timeout_seconds=5.0)
     notification_service.shutdown_async_push_dispatcher(timeout_seconds=5.0)
     if scheduler_started:
         logger.info("Embedded reminder scheduler stopped")
@@ -105,6 +123,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -261,100 +280,37 @@ def _should_sample_access_log(request_id: str) -> bool:
     return bucket < _ACCESS_LOG_SAMPLE_RATE
 
 
-def _rule_matches_ip(target_type: str, target_value: str, ip_value: str) -> bool:
-    try:
-        client_ip = ipaddress.ip_address(ip_value)
-        if target_type == "ip":
-            return ipaddress.ip_address(target_value) == client_ip
-        if target_type == "cidr":
-            return client_ip in ipaddress.ip_network(target_value, strict=False)
-    except ValueError:
-        return False
-    return False
-
+def _access_log_meta(request) -> dict[str, str]:
+    return {"query": _sanitize_query_string(request.url.query), **_extract_client_meta(request)}
 
-def _load_active_security_rules(db, scope: str):
-    now_ts = time.time()
-    with _SECURITY_RULE_CACHE_LOCK:
-        cache_entry = _SECURITY_RULE_CACHE.get(scope)
-        if cache_entry and float(cache_entry.get("expires_at", 0)) > now_ts:
-            return cache_entry.get("rules", [])
 
-    rows = (
-        db.query(SecurityIPRule)
-        .filter(
-            SecurityIPRule.status == "active",
-            SecurityIPRule.scope.in_([scope, "all"]),
-        )
-        .all()
+def _apply_upload_security_headers(headers: MutableHeaders) -> None:
+    headers.setdefault("X-Content-Type-Options", "nosniff")
+    headers.setdefault("X-Frame-Options", "DENY")
+    headers.setdefault("Referrer-Policy", "no-referrer")
+    headers.setdefault(
+        "Content-Security-Policy",
+        "default-src 'none'; img-src 'self' data: blob:; style-src 'none'; script-src 'none'",
     )
-    rules = [
-        {
-            "id": int(row.id),
-            "target_type": str(row.target_type),
-            "target_value": str(row.target_value),
-            "rule_type": str(row.rule_type),
-            "priority": int(row.priority),
-            "expires_at": row.expires_at,
-        }
-        for row in rows
-    ]
-
-    with _SECURITY_RULE_CACHE_LOCK:
-        _SECURITY_RULE_CACHE[scope] = {
-            "expires_at": now_ts + _SECURITY_RULE_CACHE_TTL_SECONDS,
-            "rules": rules,
-        }
-    return rules
 
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if not content_type.startswith("image/"):
+        headers.setdefault("Content-Disposition", "attachment")
 
-@app.middleware("http")
-async def security_ip_guard(request, call_next):
-    scope = _determine_scope(request.url.path)
-    if not scope:
-        return await call_next(request)
-
-    client_ip = _extract_client_ip(request)
-    if not client_ip:
-        return await call_next(request)
 
+def _block_request(request, request_id: str, scope: str, client_ip: str, decision) -> JSONResponse:
     db = SessionLocal()
     try:
-        now = datetime.utcnow()
-        rules = _load_active_security_rules(db, scope)
-        matched_rules = [
-            rule
-            for rule in rules
-            if (rule["expires_at"] is None or rule["expires_at"] > now)
-            and _rule_matches_ip(str(rule["target_type"]), str(rule["target_value"]), client_ip)
-        ]
-
-        if not matched_rules:
-            return await call_next(request)
-
-        allow_priorities = [int(rule["priority"]) for rule in matched_rules if rule["rule_type"] == "allow"]
-        deny_rules = [rule for rule in matched_rules if rule["rule_type"] == "deny"]
-        deny_priority = min((int(rule["priority"]) for rule in deny_rules), default=None)
-        allow_priority = min(allow_priorities) if allow_priorities else None
-
-        is_allowed = allow_priority is not None and (deny_priority is None or allow_priority <= deny_priority)
-        if is_allowed:
-            return await call_next(request)
-
-        matched_rule = min(deny_rules, key=lambda item: int(item["priority"])) if deny_rules else None
-
         user_id = _resolve_operator_user_id(db, request)
 
-        sanitized_query = _sanitize_query_string(request.url.query)
-        client_meta = _extract_client_meta(request)
-        security_meta = {"query": sanitized_query, **client_meta}
+        security_meta = _access_log_meta(request)
         db.add(
             SecurityBlockLog(
                 ip_address=client_ip,
                 path=request.url.path,
                 method=request.method,
                 scope=scope,
-                matched_rule_id=int(matched_rule["id"]) if matched_rule else None,
+                matched_rule_id=decision.matched_rule_id,
                 block_reason="ip_deny",
                 user_id=user_id,
                 user_agent=request.headers.get("user-agent"),
@@ -362,7 +318,6 @@ async def security_ip_guard(request, call_next):
             )
         )
         db.commit()
-        request_id = _extract_request_id(request)
         log_service.create_system_log_async(
             log_type="security",
             level="warn",
@@ -371,11 +326,12 @@ async def security_ip_guard(request, call_next):
             message="请求被IP策略拦截",
             operator_user_id=user_id,
             target_type="security_ip_rule",
-            target_id=str(matched_rule["id"]) if matched_rule else None,
+            target_id=str(decision.matched_rule_id) if decision.matched_rule_id else None,
             request_id=request_id,
             ip_address=client_ip,
             user_agent=request.headers.get("user-agent"),
             path=request.url.path,
+            route=_route_template(request.scope),
             method=request.method,
             status_code=403,
             meta={"scope": scope, **security_meta},
@@ -390,113 +346,170 @@ async def security_ip_guard(request, call_next):
         db.close()
 
 
-@app.middleware("http")
-async def access_log_middleware(request, call_next):
-    start_time = time.perf_counter()
-    request_id = _extract_request_id(request)
-    path = request.url.path
-    method = request.method
-    client_ip = _extract_client_ip(request)
-    module = _extract_module(path)
-    sanitized_query = _sanitize_query_string(request.url.query)
-    client_meta = _extract_client_meta(request)
-    access_meta = {"query": sanitized_query, **client_meta}
+def _log_request(
+    request,
+    *,
+    request_id: str,
+    client_ip: str,
+    status_code: int,
+    latency_ms: int,
+    message: str,
+    level: str | None = None,
+) -> None:
+    if status_code < 400 and level is None:
+        if not _should_sample_access_log(request_id):
+            return
+        log_type, level, operator_user_id = "access", "info", None
+    else:
+        operator_user_id = _resolve_operator_user_id_for_logging(request)
+        log_type = "error" if status_code >= 500 else "access"
+        level = level or ("error" if status_code >= 500 else "warn")
+    log_service.create_system_log_async(
+        log_type=log_type,
+        level=level,
+        module=_extract_module(request.url.path),
+        action="http.request",
+        message=message,
+        operator_user_id=operator_user_id,
+        request_id=request_id,
+        ip_address=client_ip,
+        user_agent=request.headers.get("user-agent"),
+        path=request.url.path,
+        route=_route_template(request.scope),
+        method=request.method,
+        status_code=status_code,
+        latency_ms=latency_ms,
+        meta=_access_log_meta_with_sql(request),
+    )
 
-    # response default values
-    status_code = 500
-    message = "internal_error"
 
-    try:
-        response = await call_next(request)
-        status_code = response.status_code
-        message = "success" if status_code < 400 else "request_failed"
-    except Exception as exc:
-        latency_ms = int((time.perf_counter() - start_time) * 1000)
-        operator_user_id = _resolve_operator_user_id_for_logging(request)
-        log_service.create_system_log_async(
-            log_type="error",
-            level="critical",
-            module=module,
-            action="http.request",
-            message=str(exc),
-            operator_user_id=operator_user_id,
-            request_id=request_id,
-            ip_address=client_ip,
-            user_agent=request.headers.get("user-agent"),
-            path=path,
-            method=method,
-            status_code=500,
-            latency_ms=latency_ms,
-            meta=access_meta,
-        )
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error", "request_id": request_id},
-            headers={"X-Request-Id": request_id},
+def _access_log_meta_with_sql(request) -> dict[str, Any]:
+    meta: dict[str, Any] = _access_log_meta(request)
+    sql_stats = query_stats.current()
+    if sql_stats is not None and sql_stats.count:
+        meta["sql"] = sql_stats.summary()
+    return meta
+
+
+def _warn_repeated_queries(request, sql_stats: query_stats.QueryStats) -> None:
+    for shape, count in sql_stats.repeated()[:3]:
+        logger.warning(
+            "Possible N+1: %s %s ran one statement %s times (request_id=%s): %s",
+            request.method,
+            request.url.path,
+            count,
+            sql_stats.request_id,
+            shape[:300],
         )
 
-    latency_ms = int((time.perf_counter() - start_time) * 1000)
-    if status_code < 400:
-        if _should_sample_access_log(request_id):
-            log_service.create_system_log_async(
-                log_type="access",
-                level="info",
-                module=module,
-                action="http.request",
-                message=message,
-                operator_user_id=None,
+
+def _route_template(scope: Scope) -> str:
+    return getattr(scope.get("route"), "path", None) or request_latency_service.UNMATCHED_ROUTE
+
+
+def _observe_latency(scope: Scope, status_code: int, start_time: float) -> int:
+    """Feed every request into the per-route latency histogram; returns whole milliseconds for the log row."""
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    route = _route_template(scope)
+    request_latency_service.observe_request(scope["method"], route, status_code, elapsed_ms)
+    metrics.HTTP_REQUEST_DURATION.labels(
+        scope["method"], route, request_latency_service.status_class(status_code)
+    ).observe(elapsed_ms / 1000)
+    return int(elapsed_ms)
+
+
+class RequestPipelineMiddleware:
+    """
+    Request id, IP guard, access log and upload security headers as one
+    pure-ASGI layer.
+
+    Replaces three @app.middleware("http") functions, each of which ran
+    through BaseHTTPMiddleware's extra task and body stream. Query
+    sanitization and client meta are only computed when a log line is
+    written.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sql_stats, sql_token = query_stats.begin()
+        try:
+            await self._handle(scope, receive, send, sql_stats)
+        finally:
+            query_stats.end(sql_token)
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send, sql_stats: query_stats.QueryStats) -> None:
+        start_time = time.perf_counter()
+        request = Request(scope)
+        request_id = _extract_request_id(request)
+        sql_stats.request_id = request_id
+        client_ip = _extract_client_ip(request)
+        path = scope["path"]
+        is_upload = path.startswith("/uploads/")
+        status_code = 500
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("X-Request-Id", request_id)
+                if _SQL_SERVER_TIMING:
+                    headers.append("Server-Timing", sql_stats.server_timing())
+                if is_upload and not 300 <= status_code < 400:
+                    _apply_upload_security_headers(headers)
+            await send(message)
+
+        try:
+            app = self.app
+            guard_scope = _determine_scope(path)
+            if guard_scope and client_ip:
+                decision = security_rule_service.decide(guard_scope, client_ip)
+                if decision.blocked:
+                    app = _block_request(request, request_id, guard_scope, client_ip, decision)
+            await app(scope, receive, send_wrapper)
+        except Exception as exc:
+            latency_ms = _observe_latency(scope, 500, start_time)
+            _log_request(
+                request,
                 request_id=request_id,
-                ip_address=client_ip,
-                user_agent=request.headers.get("user-agent"),
-                path=path,
-                method=method,
-                status_code=status_code,
+                client_ip=client_ip,
+                status_code=500,
                 latency_ms=latency_ms,
-                meta=access_meta,
+                message=str(exc),
+                level="critical",
             )
-    else:
-        operator_user_id = _resolve_operator_user_id_for_logging(request)
-        log_type = "error" if status_code >= 500 else "access"
-        level = "error" if status_code >= 500 else "warn"
-        log_service.create_system_log_async(
-            log_type=log_type,
-            level=level,
-            module=module,
-            action="http.request",
-            message=message,
-            operator_user_id=operator_user_id,
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Internal server error", "request_id": request_id},
+                headers={"X-Request-Id": request_id},
+            )
+            await response(scope, receive, send_wrapper)
+            return
+
+        latency_ms = _observe_latency(scope, status_code, start_time)
+        _log_request(
+            request,
             request_id=request_id,
-            ip_address=client_ip,
-            user_agent=request.headers.get("user-agent"),
-            path=path,
-            method=method,
+            client_ip=client_ip,
             status_code=status_code,
             latency_ms=latency_ms,
-            meta=access_meta,
+            message="success" if status_code < 400 else "request_failed",
         )
+        if _SQL_SERVER_TIMING and sql_stats.max_repeat >= query_stats.REPEAT_WARN_THRESHOLD:
+            _warn_repeated_queries(request, sql_stats)
 
-    response.headers.setdefault("X-Request-Id", request_id)
-    return response
-
-
-@app.middleware("http")
-async def upload_response_security_headers(request, call_next):
-    response = await call_next(request)
-    if request.url.path.startswith("/uploads/"):
-        if 300 <= response.status_code < 400:
-            return response
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("Referrer-Policy", "no-referrer")
-        response.headers.setdefault(
-            "Content-Security-Policy",
-            "default-src 'none'; img-src 'self' data: blob:; style-src 'none'; script-src 'none'",
-        )
 
-        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
-        if not content_type.startswith("image/"):
-            response.headers.setdefault("Content-Disposition", "attachment")
-    return response
+app.add_middleware(RequestPipelineMiddleware)
 
 
 @app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
@@ -523,6 +536,19 @@ async def health_check():
     }
 
 
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics(request: Request):
+        """Prometheus text exposition, aggregated across workers in multiprocess mode."""
+        if settings.METRICS_BEARER_TOKEN:
+            expected = f"Bearer {settings.METRICS_BEARER_TOKEN}"
+            if not hmac.compare_digest(request.headers.get("authorization", "").encode(), expected.encode()):
+                return JSONResponse(status_code=401, content={"detail": "Not authenticated"})
+        payload, content_type = metrics.render_latest()
+        return Response(content=payload, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -32,7 +32,7 @@ from app.models.store_admin_application import StoreAdminApplication
 from app.models.risk import UserRiskState, RiskEvent
 from app.models.home_feed_theme import HomeFeedThemeSetting
 from app.models.security import SecurityIPRule, SecurityBlockLog
-from app.models.system_log import SystemLog
+from app.models.system_log import SystemLog, SystemLogHourlyRollup, RequestLatencyHistogram
 from app.models.appointment_staff_split import AppointmentStaffSplit
 from app.models.appointment_service_item import AppointmentServiceItem
 from app.models.appointment_group import AppointmentGroup
@@ -40,7 +40,12 @@ from app.models.appointment_settlement_event import AppointmentSettlementEvent
 from app.models.vip_level import VIPLevelConfig
 from app.models.store_blocked_slot import StoreBlockedSlot
 from app.models.push_device_token import PushDeviceToken
+from app.models.push_campaign_job import PushCampaignJob
+from app.models.push_outbox import PushOutbox
+from app.models.notification_counter import NotificationCounter
 from app.models.app_version_policy import AppVersionPolicy
 from app.models.support_contact_settings import SupportContactSettings
+from app.models.customer_stats import CustomerStats
+from app.models.technician_ledger import TechnicianLedgerEntry
 
-__all__ = ["User", "VerificationCode", "Store", "StoreImage", "Service", "ServiceCatalog", "Appointment", "AppointmentStatus", "Technician", "StoreHours", "StoreHoliday", "TechnicianUnavailable", "Notification", "NotificationType", "Review", "ReviewReply", "AppointmentReminder", "ReminderType", "ReminderStatus", "StoreFavorite", "StorePortfolio", "Referral", "Pin", "Tag", "pin_tags", "PinFavorite", "GiftCard", "GiftCardTransaction", "DailyCheckIn", "UserPoints", "PointTransaction", "TransactionType", "Coupon", "CouponType", "CouponCategory", "UserCoupon", "CouponStatus", "CouponPhoneGrant", "Promotion", "PromotionService", "PromotionScope", "PromotionDiscountType", "StoreAdminApplication", "UserRiskState", "RiskEvent", "HomeFeedThemeSetting", "SecurityIPRule", "SecurityBlockLog", "SystemLog", "AppointmentStaffSplit", "AppointmentServiceItem", "AppointmentGroup", "AppointmentSettlementEvent", "VIPLevelConfig", "StoreBlockedSlot", "PushDeviceToken", "AppVersionPolicy", "SupportContactSettings"]
+__all__ = ["User", "VerificationCode", "Store", "StoreImage", "Service", "ServiceCatalog", "Appointment", "AppointmentStatus", "Technician", "StoreHours", "StoreHoliday", "TechnicianUnavailable", "Notification", "NotificationType", "Review", "ReviewReply", "AppointmentReminder", "ReminderType", "ReminderStatus", "StoreFavorite", "StorePortfolio", "Referral", "Pin", "Tag", "pin_tags", "PinFavorite", "GiftCard", "GiftCardTransaction", "DailyCheckIn", "UserPoints", "PointTransaction", "TransactionType", "Coupon", "CouponType", "CouponCategory", "UserCoupon", "CouponStatus", "CouponPhoneGrant", "Promotion", "PromotionService", "PromotionScope", "PromotionDiscountType", "StoreAdminApplication", "UserRiskState", "RiskEvent", "HomeFeedThemeSetting", "SecurityIPRule", "SecurityBlockLog", "SystemLog", "SystemLogHourlyRollup", "RequestLatencyHistogram", "AppointmentStaffSplit", "AppointmentServiceItem", "AppointmentGroup", "AppointmentSettlementEvent", "VIPLevelConfig", "StoreBlockedSlot", "PushDeviceToken", "PushCampaignJob", "PushOutbox", "NotificationCounter", "AppVersionPolicy", "SupportContactSettings", "CustomerStats", "TechnicianLedgerEntry"]
@@ -40,6 +40,8 @@ class Appointment(Base):
             "appointment_date",
             "appointment_time",
         ),
+        Index("ix_appointments_schedule_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_store_schedule_id", "store_id", "appointment_date", "appointment_time", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,25 @@
+"""Per-customer, per-store appointment stats projection."""
+from sqlalchemy import Column, DateTime, Float, Integer, UniqueConstraint, func
+
+from app.db.session import Base
+
+
+class CustomerStats(Base):
+    """Materialized appointment aggregates, maintained by crud.customer_stats."""
+
+    __tablename__ = "customer_stats"
+    __table_args__ = (
+        UniqueConstraint("user_id", "store_id", name="uq_customer_stats_user_store"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    store_id = Column(Integer, nullable=False, index=True)
+    total_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    no_show_count = Column(Integer, nullable=False, default=0)
+    completed_spend = Column(Float, nullable=False, default=0.0)
+    last_visit_at = Column(DateTime, nullable=True)
+    next_appointment_at = Column(DateTime, nullable=True, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
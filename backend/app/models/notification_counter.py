@@ -0,0 +1,18 @@
+"""Per-user unread notification counter."""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, func
+
+from app.db.session import Base
+
+
+class NotificationCounter(Base):
+    """
+    Denormalized unread count, maintained by crud.notification in the same
+    transaction as the notification writes and repaired by
+    ``reconcile_unread_counters``. A missing row means zero unread.
+    """
+
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("backend_users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,48 @@
+"""Admin batch push (campaign) job model."""
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, func
+
+from app.db.session import Base
+
+
+class PushCampaignJob(Base):
+    """
+    One super-admin batch push, fanned out in the background by
+    services.push_campaign_service.
+
+    ``user_ids`` / ``custom_data`` hold the request as JSON strings. Targets
+    are processed in ascending user id order and ``last_user_id`` records how
+    far the fan-out got, so a job reclaimed after a crash resumes there.
+    ``claim_token`` identifies the runner holding the job; its writes only
+    apply while the token still matches.
+    """
+
+    __tablename__ = "push_campaign_jobs"
+    __table_args__ = (
+        Index("ix_push_campaign_jobs_status_heartbeat", "status", "heartbeat_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued / running / completed / failed
+    title = Column(String(120), nullable=False)
+    message = Column(String(500), nullable=False)
+    custom_data = Column(Text, nullable=True)
+    store_id = Column(Integer, nullable=True)
+    user_ids = Column(Text, nullable=True)
+    max_users = Column(Integer, nullable=False)
+    target_user_count = Column(Integer, nullable=False, default=0)
+    processed_user_count = Column(Integer, nullable=False, default=0)
+    sent_user_count = Column(Integer, nullable=False, default=0)
+    failed_user_count = Column(Integer, nullable=False, default=0)
+    skipped_user_count = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    deactivated = Column(Integer, nullable=False, default=0)
+    truncated = Column(Boolean, nullable=False, default=False)
+    last_user_id = Column(Integer, nullable=True)
+    error = Column(String(500), nullable=True)
+    claim_token = Column(String(32), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
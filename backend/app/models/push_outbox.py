@@ -0,0 +1,30 @@
+"""Transactional outbox for notification pushes."""
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+
+from app.db.session import Base
+
+
+class PushOutbox(Base):
+    """
+    One pending APNs delivery, inserted in the same transaction as its
+    Notification and drained by services.push_outbox_service.
+
+    Rows are deleted once delivered. ``claim_token`` / ``claimed_until``
+    lease a row to one dispatcher; an expired lease makes it claimable again.
+    Rows that exhaust their attempts stay behind with status ``dead``.
+    """
+
+    __tablename__ = "push_outbox"
+    __table_args__ = (
+        Index("ix_push_outbox_status_available", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    notification_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(10), nullable=False, default="pending")  # pending / dead
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False)
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_until = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
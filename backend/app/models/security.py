@@ -1,7 +1,7 @@
 """
 Security models for IP/CIDR access control
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from sqlalchemy import Column, Integer, String, DateTime, Index, Text, func
 
 from app.db.session import Base
 
@@ -25,6 +25,7 @@ class SecurityIPRule(Base):
 
 class SecurityBlockLog(Base):
     __tablename__ = "security_block_logs"
+    __table_args__ = (Index("ix_security_block_logs_created_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     ip_address = Column(String(64), nullable=False, index=True)
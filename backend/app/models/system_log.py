@@ -1,13 +1,14 @@
 """
 System log model for access/audit/security/business/error events.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text, UniqueConstraint, func
 
 from app.db.session import Base
 
 
 class SystemLog(Base):
     __tablename__ = "system_logs"
+    __table_args__ = (Index("ix_system_logs_created_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     log_type = Column(String(20), nullable=False, index=True)  # access | audit | security | business | error
@@ -25,6 +26,7 @@ class SystemLog(Base):
     ip_address = Column(String(64), nullable=True, index=True)
     user_agent = Column(Text, nullable=True)
     path = Column(String(255), nullable=True, index=True)
+    route = Column(String(255), nullable=True)  # matched route template, e.g. /api/v1/stores/{store_id}
     method = Column(String(16), nullable=True, index=True)
     status_code = Column(Integer, nullable=True, index=True)
     latency_ms = Column(Integer, nullable=True, index=True)
@@ -34,3 +36,58 @@ class SystemLog(Base):
     meta_json = Column(Text, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
+class SystemLogHourlyRollup(Base):
+    """Per-hour log counts; empty strings stand for missing dimensions so the upsert key is never NULL."""
+
+    __tablename__ = "system_log_hourly_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start",
+            "log_type",
+            "level",
+            "module",
+            "action",
+            "route",
+            name="uq_system_log_hourly_rollups_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    log_type = Column(String(20), nullable=False, default="")
+    level = Column(String(10), nullable=False, default="")
+    module = Column(String(50), nullable=False, default="")
+    action = Column(String(80), nullable=False, default="")
+    route = Column(String(255), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    latency_count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(BigInteger, nullable=False, default=0)
+
+
+class RequestLatencyHistogram(Base):
+    """
+    Per-hour latency histogram of every HTTP request, keyed by route template
+    and status class; ``upper_bound_ms`` is the inclusive bucket ceiling.
+    """
+
+    __tablename__ = "request_latency_histograms"
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start",
+            "method",
+            "route",
+            "status_class",
+            "upper_bound_ms",
+            name="uq_request_latency_histograms_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    method = Column(String(10), nullable=False)
+    route = Column(String(255), nullable=False)
+    status_class = Column(String(3), nullable=False)
+    upper_bound_ms = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,31 @@
+"""Technician commission ledger model."""
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, Time, func
+
+from app.db.session import Base
+
+
+class TechnicianLedgerEntry(Base):
+    """
+    One commissionable line of a completed appointment, dated by its work day.
+
+    Split appointments produce one entry per staff split (``split_id`` set);
+    unsplit appointments produce a single entry for the assigned technician.
+    Maintained by crud.technician_ledger.
+    """
+
+    __tablename__ = "technician_ledger_entries"
+    __table_args__ = (
+        Index("ix_technician_ledger_store_date", "store_id", "work_date"),
+        Index("ix_technician_ledger_technician_date", "technician_id", "work_date", "work_time"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    store_id = Column(Integer, nullable=False)
+    technician_id = Column(Integer, nullable=False)
+    appointment_id = Column(Integer, nullable=False, index=True)
+    split_id = Column(Integer, nullable=True)
+    work_date = Column(Date, nullable=False)
+    work_time = Column(Time, nullable=False)
+    amount = Column(Float, nullable=False, default=0.0)
+    commission_amount = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
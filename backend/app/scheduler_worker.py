@@ -7,9 +7,12 @@ import asyncio
 import logging
 import signal
 
+from prometheus_client import start_http_server
+
+from app.core import metrics
 from app.core.config import settings
 from app.services.scheduler import reminder_scheduler
-from app.services import notification_service
+from app.services import notification_service, push_campaign_service
 
 logger = logging.getLogger(__name__)
 
@@ -32,14 +35,21 @@ async def _run_worker() -> None:
         "Scheduler worker starting (embedded_scheduler_enabled=%s)",
         settings.embedded_scheduler_enabled,
     )
+    if settings.SCHEDULER_METRICS_PORT > 0:
+        # Separate process from the web workers, so it exports its own scheduler/push metrics.
+        start_http_server(settings.SCHEDULER_METRICS_PORT)
+        metrics.start_gauge_sampler(always=True)
     notification_service.start_async_push_dispatcher()
+    push_campaign_service.start_campaign_runner()
     reminder_scheduler.start()
 
     try:
         await stop_event.wait()
     finally:
         await reminder_scheduler.stop()
+        push_campaign_service.shutdown_campaign_runner(timeout_seconds=5.0)
         notification_service.shutdown_async_push_dispatcher(timeout_seconds=5.0)
+        metrics.shutdown_gauge_sampler()
         logger.info("Scheduler worker stopped")
 
 
@@ -115,11 +115,11 @@ class AdminPushSendResponse(BaseModel):
 class AdminPushBatchRequest(BaseModel):
     """Super admin batch push payload."""
 
-    user_ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=500)
+    user_ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=5000)
     store_id: Optional[int] = Field(default=None, ge=1)
     title: str = Field(..., min_length=1, max_length=120)
     message: str = Field(..., min_length=1, max_length=500)
-    max_users: int = Field(default=200, ge=1, le=500)
+    max_users: int = Field(default=200, ge=1, le=10000)
     custom_data: Optional[Dict[str, Any]] = None
 
     @model_validator(mode="after")
@@ -129,11 +129,13 @@ class AdminPushBatchRequest(BaseModel):
         return self
 
 
-class AdminPushBatchResponse(BaseModel):
-    """Batch push result."""
+class AdminPushBatchJob(BaseModel):
+    """Batch push job status; counts grow as the background fan-out progresses."""
 
-    detail: str
+    job_id: int = Field(validation_alias="id")
+    status: str
     target_user_count: int
+    processed_user_count: int
     sent_user_count: int
     failed_user_count: int
     skipped_user_count: int
@@ -141,3 +143,10 @@ class AdminPushBatchResponse(BaseModel):
     failed: int
     deactivated: int
     truncated: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -50,7 +50,8 @@ class ReviewAdminItem(ReviewResponse):
 
 class ReviewAdminListResponse(BaseModel):
     """后台评价分页响应"""
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
     items: List[ReviewAdminItem]
+    next_cursor: Optional[str] = None
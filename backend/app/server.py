@@ -3,12 +3,26 @@ Environment-driven web server runner.
 """
 from __future__ import annotations
 
+import os
+
 import uvicorn
 
 from app.core.config import settings
 
 
+def _prepare_metrics_dir(path: str) -> None:
+    """Start from an empty metrics directory; files left by a previous run would be summed in."""
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+    # Exported before app.main (and prometheus_client) is imported here or in the workers.
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
 def main() -> None:
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        _prepare_metrics_dir(settings.PROMETHEUS_MULTIPROC_DIR)
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
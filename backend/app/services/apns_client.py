@@ -0,0 +1,191 @@
+"""
+Concurrent HTTP/2 sender for APNs.
+
+APNs multiplexes many requests as streams over one HTTP/2 connection, so
+instead of posting one device token at a time this module keeps an asyncio
+event loop on a background thread with one ``httpx.AsyncClient`` per APNs
+host (sandbox and production pool separately) and fans a batch of requests
+out as concurrent streams. APNS_MAX_CONCURRENT_REQUESTS caps the streams in
+flight across all hosts; APNS_MAX_CONNECTIONS_PER_HOST caps the connections
+each host's pool may open once a connection's stream limit is reached.
+
+Callers stay synchronous: ``send_many`` blocks the calling thread until
+every request has a result, one ``ApnsResult`` per request, in order.
+APNS_HOST_OVERRIDE points every environment at another host (the local
+stub server in apns_stub_server.py); an ``http://`` override speaks HTTP/2
+with prior knowledge.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SANDBOX_HOST = "https://api.sandbox.push.apple.com"
+_PRODUCTION_HOST = "https://api.push.apple.com"
+
+
+@dataclass(frozen=True)
+class ApnsRequest:
+    token_id: Optional[int]
+    device_token: str
+    environment: str
+    payload: Dict[str, Any]
+    headers: Dict[str, str]
+
+
+@dataclass(frozen=True)
+class ApnsResult:
+    token_id: Optional[int]
+    device_token: str
+    status_code: Optional[int]
+    reason: Optional[str] = None
+    apns_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    @property
+    def retryable(self) -> bool:
+        """Transport errors, throttling and APNs server errors; the same request may succeed later."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+def resolve_host(environment: str) -> str:
+    override = (settings.APNS_HOST_OVERRIDE or "").strip().rstrip("/")
+    if override:
+        return override
+    return _PRODUCTION_HOST if environment == "production" else _SANDBOX_HOST
+
+
+class _ApnsSender:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            self._thread = Thread(target=loop.run_forever, name="apns-sender", daemon=True)
+            self._thread.start()
+            self._loop = loop
+            self._clients = {}
+            self._semaphore = None
+            return loop
+
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        # Only touched from the loop thread, so no lock is needed.
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=host,
+                http1=not host.startswith("http://"),
+                http2=True,
+                timeout=settings.APNS_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=max(1, int(settings.APNS_MAX_CONNECTIONS_PER_HOST)),
+                    max_keepalive_connections=max(1, int(settings.APNS_MAX_CONNECTIONS_PER_HOST)),
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    async def _send_one(self, request: ApnsRequest) -> ApnsResult:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, int(settings.APNS_MAX_CONCURRENT_REQUESTS)))
+        client = self._client_for(resolve_host(request.environment))
+        async with self._semaphore:
+            try:
+                response = await client.post(
+                    f"/3/device/{request.device_token}",
+                    json=request.payload,
+                    headers=request.headers,
+                )
+            except Exception as exc:
+                return ApnsResult(request.token_id, request.device_token, None, error=str(exc) or type(exc).__name__)
+
+        reason = None
+        if response.status_code != 200:
+            try:
+                reason = response.json().get("reason")
+            except Exception:
+                reason = None
+        return ApnsResult(
+            request.token_id,
+            request.device_token,
+            response.status_code,
+            reason=reason,
+            apns_id=response.headers.get("apns-id"),
+        )
+
+    async def _send_all(self, requests: Sequence[ApnsRequest]) -> List[ApnsResult]:
+        return list(await asyncio.gather(*(self._send_one(request) for request in requests)))
+
+    def send_many(self, requests: Sequence[ApnsRequest]) -> List[ApnsResult]:
+        if not requests:
+            return []
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._send_all(list(requests)), loop)
+        # Every request is bounded by the client timeout; the outer wait only guards a stuck loop.
+        waves = len(requests) / max(1, int(settings.APNS_MAX_CONCURRENT_REQUESTS)) + 1
+        try:
+            return future.result(timeout=float(settings.APNS_TIMEOUT_SECONDS) * waves + 5)
+        except FutureTimeoutError:
+            future.cancel()
+            return [
+                ApnsResult(request.token_id, request.device_token, None, error="timeout")
+                for request in requests
+            ]
+
+    async def _close_clients(self) -> None:
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.warning("Failed to close APNs HTTP client cleanly: %s", exc)
+
+    def close(self, timeout_seconds: float = 5.0) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(timeout=timeout_seconds)
+        except Exception as exc:
+            logger.warning("APNs sender shutdown did not finish cleanly: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=timeout_seconds)
+        if not thread.is_alive():
+            loop.close()
+
+
+_SENDER = _ApnsSender()
+
+
+def send_many(requests: Sequence[ApnsRequest]) -> List[ApnsResult]:
+    """Send every request concurrently; results come back in request order."""
+    return _SENDER.send_many(requests)
+
+
+def close(timeout_seconds: float = 5.0) -> None:
+    _SENDER.close(timeout_seconds=timeout_seconds)
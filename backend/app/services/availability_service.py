@@ -0,0 +1,359 @@
+"""
+Store-day availability engine.
+
+Loads every booking constraint for one (store, date) in a fixed number of
+queries and answers slot questions from per-technician minute bitmaps.
+Computed slot lists are cached per (store, technician, date) behind
+versioned keys that write paths bump on every change.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, time
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.service import Service
+from app.models.store_blocked_slot import StoreBlockedSlot
+from app.models.store_holiday import StoreHoliday
+from app.models.store_hours import StoreHours
+from app.models.technician import Technician
+from app.models.technician_unavailable import TechnicianUnavailable
+from app.services import cache_service
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_INTERVAL_MINUTES = 30
+ACTIVE_APPOINTMENT_STATUSES = (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED)
+SLOTS_CACHE_TTL_SECONDS = 300
+VERSION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _floor_minute(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _ceil_minute(value: time) -> int:
+    minute = value.hour * 60 + value.minute
+    if value.second or value.microsecond:
+        minute += 1
+    return minute
+
+
+def _range_mask(start_minute: int, end_minute: int) -> int:
+    start_minute = max(0, start_minute)
+    end_minute = min(MINUTES_PER_DAY, end_minute)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def _format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+@dataclass
+class StoreDaySnapshot:
+    """Raw rows constraining bookings for one store on one date."""
+
+    store_id: int
+    check_date: date
+    store_hours: Optional[StoreHours] = None
+    holidays: list[StoreHoliday] = field(default_factory=list)
+    blocked_slots: list[StoreBlockedSlot] = field(default_factory=list)
+    technicians: dict[int, Technician] = field(default_factory=dict)
+    unavailable_periods: dict[int, list[TechnicianUnavailable]] = field(default_factory=dict)
+    appointments: list[tuple[Appointment, int]] = field(default_factory=list)
+
+
+def load_store_day(
+    db: Session,
+    store_id: int,
+    check_date: date,
+    technician_ids: Optional[Sequence[int]] = None,
+) -> StoreDaySnapshot:
+    """
+    Batch-load store hours, holidays, blocked slots, technician unavailability
+    and active appointments for a store day.
+
+    When ``technician_ids`` is omitted every active technician of the store is
+    loaded. The query count is constant regardless of technician count.
+    """
+    snapshot = StoreDaySnapshot(store_id=store_id, check_date=check_date)
+    snapshot.store_hours = (
+        db.query(StoreHours)
+        .filter(StoreHours.store_id == store_id, StoreHours.day_of_week == check_date.weekday())
+        .first()
+    )
+    snapshot.holidays = (
+        db.query(StoreHoliday)
+        .filter(StoreHoliday.store_id == store_id, StoreHoliday.holiday_date == check_date)
+        .all()
+    )
+    snapshot.blocked_slots = (
+        db.query(StoreBlockedSlot)
+        .filter(
+            StoreBlockedSlot.store_id == store_id,
+            StoreBlockedSlot.blocked_date == check_date,
+            StoreBlockedSlot.status == "active",
+        )
+        .all()
+    )
+
+    technician_query = db.query(Technician)
+    if technician_ids is None:
+        technician_query = technician_query.filter(Technician.store_id == store_id, Technician.is_active == 1)
+    else:
+        normalized_ids = sorted({int(tid) for tid in technician_ids if tid is not None})
+        if not normalized_ids:
+            return snapshot
+        technician_query = technician_query.filter(Technician.id.in_(normalized_ids))
+    snapshot.technicians = {
+        int(row.id): row
+        for row in technician_query.order_by(Technician.name.asc(), Technician.id.asc()).all()
+    }
+    if not snapshot.technicians:
+        return snapshot
+
+    loaded_ids = list(snapshot.technicians.keys())
+    periods = (
+        db.query(TechnicianUnavailable)
+        .filter(
+            TechnicianUnavailable.technician_id.in_(loaded_ids),
+            TechnicianUnavailable.start_date <= check_date,
+            TechnicianUnavailable.end_date >= check_date,
+        )
+        .all()
+    )
+    for period in periods:
+        snapshot.unavailable_periods.setdefault(int(period.technician_id), []).append(period)
+
+    snapshot.appointments = [
+        (appointment, int(duration_minutes or 0))
+        for appointment, duration_minutes in (
+            db.query(Appointment, Service.duration_minutes)
+            .join(Service, Appointment.service_id == Service.id)
+            .filter(
+                Appointment.technician_id.in_(loaded_ids),
+                Appointment.appointment_date == check_date,
+                Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+            )
+            .all()
+        )
+    ]
+    return snapshot
+
+
+class StoreDayAvailability:
+    """
+    Occupancy bitmap for one store day: one bit per minute per technician.
+
+    Store-wide blocks are kept in a shared mask and OR-ed in at lookup time,
+    so a free-window check is a single shift-and-mask.
+    """
+
+    def __init__(self, snapshot: StoreDaySnapshot):
+        self.snapshot = snapshot
+        self.open_minute: Optional[int] = None
+        self.close_minute: Optional[int] = None
+        hours = snapshot.store_hours
+        if (
+            hours is not None
+            and not hours.is_closed
+            and hours.open_time is not None
+            and hours.close_time is not None
+            and hours.close_time > hours.open_time
+        ):
+            self.open_minute = _floor_minute(hours.open_time)
+            self.close_minute = _floor_minute(hours.close_time)
+
+        self._store_mask = 0
+        for slot in snapshot.blocked_slots:
+            self._store_mask |= _range_mask(_floor_minute(slot.start_time), _ceil_minute(slot.end_time))
+
+        self._technician_masks: dict[int, int] = {tid: 0 for tid in snapshot.technicians}
+        self._technicians_off: set[int] = set()
+        for technician_id, periods in snapshot.unavailable_periods.items():
+            for period in periods:
+                if period.start_time is None or period.end_time is None:
+                    self._technicians_off.add(technician_id)
+                    continue
+                self._mark_busy(technician_id, _floor_minute(period.start_time), _ceil_minute(period.end_time))
+        for appointment, duration_minutes in snapshot.appointments:
+            if appointment.technician_id is None:
+                continue
+            start_minute = _floor_minute(appointment.appointment_time)
+            self._mark_busy(int(appointment.technician_id), start_minute, start_minute + duration_minutes)
+
+    def _mark_busy(self, technician_id: int, start_minute: int, end_minute: int) -> None:
+        self._technician_masks[technician_id] = self._technician_masks.get(technician_id, 0) | _range_mask(
+            start_minute, end_minute
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return not self.snapshot.holidays and self.open_minute is not None
+
+    def technician_ids(self) -> list[int]:
+        return list(self.snapshot.technicians.keys())
+
+    def is_technician_off(self, technician_id: int) -> bool:
+        return technician_id in self._technicians_off
+
+    def is_free(self, technician_id: int, start_minute: int, end_minute: int) -> bool:
+        if technician_id in self._technicians_off:
+            return False
+        window = _range_mask(start_minute, end_minute)
+        occupied = self._store_mask | self._technician_masks.get(technician_id, 0)
+        return occupied & window == 0
+
+    def free_slots(
+        self,
+        technician_id: int,
+        duration_minutes: int,
+        interval_minutes: int = SLOT_INTERVAL_MINUTES,
+    ) -> list[dict]:
+        if not self.is_open or technician_id in self._technicians_off:
+            return []
+        duration_minutes = max(int(duration_minutes or 0), 1)
+        occupied = self._store_mask | self._technician_masks.get(technician_id, 0)
+        duration_mask = (1 << duration_minutes) - 1
+
+        slots = []
+        start_minute = self.open_minute
+        while start_minute + duration_minutes <= self.close_minute:
+            if (occupied >> start_minute) & duration_mask == 0:
+                slots.append(
+                    {
+                        "start_time": _format_minute(start_minute),
+                        "end_time": _format_minute(start_minute + duration_minutes),
+                        "duration_minutes": duration_minutes,
+                    }
+                )
+            start_minute += interval_minutes
+        return slots
+
+    def free_slots_by_technician(
+        self,
+        duration_minutes: int,
+        technician_ids: Optional[Iterable[int]] = None,
+        interval_minutes: int = SLOT_INTERVAL_MINUTES,
+    ) -> dict[int, list[dict]]:
+        target_ids = self.technician_ids() if technician_ids is None else list(technician_ids)
+        return {
+            technician_id: self.free_slots(technician_id, duration_minutes, interval_minutes)
+            for technician_id in target_ids
+        }
+
+
+def build_store_day_availability(
+    db: Session,
+    store_id: int,
+    check_date: date,
+    technician_ids: Optional[Sequence[int]] = None,
+) -> StoreDayAvailability:
+    return StoreDayAvailability(load_store_day(db, store_id, check_date, technician_ids=technician_ids))
+
+
+def _store_version_key(store_id: int) -> str:
+    return f"availability:version:{int(store_id)}:v1"
+
+
+def _store_day_version_key(store_id: int, check_date: date) -> str:
+    return f"availability:version:{int(store_id)}:{check_date.isoformat()}:v1"
+
+
+def _slots_cache_key(
+    store_id: int,
+    check_date: date,
+    store_version: str,
+    day_version: str,
+    technician_id: int,
+    duration_minutes: int,
+) -> str:
+    return (
+        f"availability:slots:{int(store_id)}:{check_date.isoformat()}:"
+        f"{store_version}.{day_version}:{int(technician_id)}:{int(duration_minutes)}"
+    )
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _current_version(key: str) -> str:
+    # Versions are random tokens rather than counters, so a version key that
+    # expired or was evicted can never resurrect slot entries cached under it.
+    version = cache_service.get_json(key)
+    if version is None:
+        version = _new_version()
+        cache_service.set_json(key, version, VERSION_CACHE_TTL_SECONDS)
+    return str(version)
+
+
+def _bump_version(key: str) -> None:
+    cache_service.set_json(key, _new_version(), VERSION_CACHE_TTL_SECONDS)
+
+
+def get_free_slots(
+    db: Session,
+    store_id: int,
+    check_date: date,
+    technician_ids: Sequence[int],
+    duration_minutes: int,
+) -> dict[int, list[dict]]:
+    """
+    Return free slots per technician, served from cache where possible.
+
+    Versions are read before computing, so a write that lands while slots
+    are being computed bumps the version and the stale result is stored
+    under a key no reader will ask for again.
+    """
+    store_version = _current_version(_store_version_key(store_id))
+    day_version = _current_version(_store_day_version_key(store_id, check_date))
+
+    result: dict[int, list[dict]] = {}
+    missing_ids: list[int] = []
+    for technician_id in technician_ids:
+        cached = cache_service.get_json(
+            _slots_cache_key(store_id, check_date, store_version, day_version, technician_id, duration_minutes)
+        )
+        if cached is None:
+            missing_ids.append(int(technician_id))
+        else:
+            result[int(technician_id)] = cached
+
+    if missing_ids:
+        availability = build_store_day_availability(db, store_id, check_date, technician_ids=missing_ids)
+        for technician_id in missing_ids:
+            slots = availability.free_slots(technician_id, duration_minutes)
+            cache_service.set_json(
+                _slots_cache_key(store_id, check_date, store_version, day_version, technician_id, duration_minutes),
+                slots,
+                SLOTS_CACHE_TTL_SECONDS,
+            )
+            result[technician_id] = slots
+    return {int(technician_id): result[int(technician_id)] for technician_id in technician_ids}
+
+
+def invalidate_store_day(store_id: Optional[int], check_date: Optional[date]) -> None:
+    if store_id is None or check_date is None:
+        return
+    _bump_version(_store_day_version_key(store_id, check_date))
+
+
+def invalidate_store_days(store_id: Optional[int], dates: Iterable[Optional[date]]) -> None:
+    for check_date in {value for value in dates if value is not None}:
+        invalidate_store_day(store_id, check_date)
+
+
+def invalidate_store(store_id: Optional[int]) -> None:
+    if store_id is None:
+        return
+    _bump_version(_store_version_key(store_id))
+
+
+def invalidate_appointment(appointment: Appointment, previous_date: Optional[date] = None) -> None:
+    invalidate_store_days(appointment.store_id, [appointment.appointment_date, previous_date])
@@ -0,0 +1,237 @@
+"""
+Booking validation context.
+
+Loads every row create_appointment validates against for one booking, that is
+store, service, store hours, holidays, blocked slots, technician
+unavailability, the day's appointments and the user's risk inputs, in a
+constant number of queries, then runs the checks in memory.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, false, or_
+from sqlalchemy.orm import Session
+
+from app.crud import appointment as crud_appointment
+from app.models.appointment import Appointment
+from app.models.risk import UserRiskState
+from app.models.service import Service
+from app.models.store import Store
+from app.models.store_blocked_slot import StoreBlockedSlot
+from app.models.store_holiday import StoreHoliday
+from app.models.store_hours import StoreHours
+from app.models.technician import Technician
+from app.models.technician_unavailable import TechnicianUnavailable
+from app.models.user import User
+from app.services import risk_service
+from app.services.availability_service import ACTIVE_APPOINTMENT_STATUSES, StoreDaySnapshot
+
+
+@dataclass
+class BookingRejection:
+    status_code: int
+    detail: str
+
+
+@dataclass
+class BookingValidationContext:
+    """Prefetched state for validating one booking request."""
+
+    user_id: int
+    appointment_date: date
+    store: Optional[Store] = None
+    service: Optional[Service] = None
+    technician_id: Optional[int] = None
+    technician: Optional[Technician] = None
+    day: Optional[StoreDaySnapshot] = None
+    # (id, technician_id, user_id, appointment_time, duration_minutes, status)
+    appointment_rows: list[tuple] = field(default_factory=list)
+    risk: risk_service.BookingRiskSnapshot = field(default_factory=risk_service.BookingRiskSnapshot)
+
+    def risk_decision(self, *, ip_address: Optional[str] = None, now: Optional[datetime] = None) -> risk_service.RiskDecision:
+        return risk_service.decide_booking_request(self.risk, ip_address=ip_address, now=now)
+
+    def check_slot(self, appointment_time: time) -> Optional[BookingRejection]:
+        """
+        Run the service, holiday, business hours, blocked slot, technician
+        and time conflict checks in create_appointment order. Returns the
+        first failure, or None when the slot can be booked.
+        """
+        service = self.service
+        if not service:
+            return BookingRejection(404, "Service not found")
+        if self.store is None or service.store_id != self.store.id:
+            return BookingRejection(400, "Service does not belong to this store")
+        if service.is_active != 1:
+            return BookingRejection(400, "Service is not available")
+
+        day = self.day
+        if day.holidays:
+            holiday_name = (day.holidays[0].name or "").strip()
+            if holiday_name:
+                return BookingRejection(400, f"The salon is closed on this date for {holiday_name}.")
+            return BookingRejection(400, "The salon is closed on this date.")
+
+        appt_start = datetime.combine(self.appointment_date, appointment_time)
+        appt_end = appt_start + timedelta(minutes=max(int(service.duration_minutes or 0), 1))
+
+        hours = day.store_hours
+        if not hours or hours.is_closed:
+            return BookingRejection(400, "The salon is closed on this date.")
+        if not hours.open_time or not hours.close_time or hours.close_time <= hours.open_time:
+            return BookingRejection(400, "The salon is closed on this date.")
+        open_at = datetime.combine(self.appointment_date, hours.open_time)
+        close_at = datetime.combine(self.appointment_date, hours.close_time)
+        if appt_start < open_at or appt_end > close_at:
+            return BookingRejection(
+                400,
+                "Selected time is outside salon business hours "
+                f"({hours.open_time.strftime('%H:%M')}-{hours.close_time.strftime('%H:%M')}).",
+            )
+
+        for row in day.blocked_slots:
+            blocked_start = datetime.combine(self.appointment_date, row.start_time)
+            blocked_end = datetime.combine(self.appointment_date, row.end_time)
+            if appt_start < blocked_end and appt_end > blocked_start:
+                reason_text = f" ({row.reason})" if row.reason else ""
+                return BookingRejection(
+                    400,
+                    f"This time slot is blocked by store{reason_text}. Please choose another time.",
+                )
+
+        if self.technician_id is not None:
+            if self.technician is None:
+                return BookingRejection(404, "Technician not found")
+            start_time, end_time = appt_start.time(), appt_end.time()
+            for period in day.unavailable_periods.get(int(self.technician_id), []):
+                if period.start_time is None or period.end_time is None:
+                    return BookingRejection(400, "Selected technician is unavailable for this time.")
+                if start_time < period.end_time and end_time > period.start_time:
+                    return BookingRejection(400, "Selected technician is unavailable for this time.")
+
+        conflict = crud_appointment.find_time_conflict(
+            crud_appointment.ProposedBooking(
+                appointment_date=self.appointment_date,
+                appointment_time=appointment_time,
+                duration_minutes=int(service.duration_minutes or 0),
+                technician_id=self.technician_id,
+                user_id=self.user_id,
+            ),
+            [
+                row[:5]
+                for row in self.appointment_rows
+                if row[5] in ACTIVE_APPOINTMENT_STATUSES and row[4] is not None
+            ],
+        )
+        if conflict["has_conflict"]:
+            return BookingRejection(400, conflict["message"])
+        return None
+
+
+def load_booking_context(
+    db: Session,
+    *,
+    user_id: int,
+    store_id: int,
+    service_id: int,
+    appointment_date: date,
+    technician_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> BookingValidationContext:
+    """
+    Batch-load a BookingValidationContext.
+
+    Store, service, store hours, technician, user phone and risk state come
+    back in one joined row; holidays, blocked slots, technician
+    unavailability and the day's appointments take one query each; the
+    rate-limit counters are a single cache read. Nothing is written.
+    """
+    context = BookingValidationContext(
+        user_id=user_id,
+        appointment_date=appointment_date,
+        technician_id=technician_id,
+        day=StoreDaySnapshot(store_id=store_id, check_date=appointment_date),
+    )
+    row = (
+        db.query(Store, Service, StoreHours, Technician, User.phone, UserRiskState.restricted_until)
+        .select_from(Store)
+        .outerjoin(Service, Service.id == service_id)
+        .outerjoin(
+            StoreHours,
+            and_(StoreHours.store_id == Store.id, StoreHours.day_of_week == appointment_date.weekday()),
+        )
+        .outerjoin(Technician, Technician.id == technician_id if technician_id is not None else false())
+        .outerjoin(User, User.id == user_id)
+        .outerjoin(UserRiskState, UserRiskState.user_id == user_id)
+        .filter(Store.id == store_id)
+        .first()
+    )
+    if row is None:
+        return context
+    store, service, store_hours, technician, phone, restricted_until = row
+    context.store = store
+    context.service = service
+    context.technician = technician
+    context.day.store_hours = store_hours
+    if technician is not None:
+        context.day.technicians = {int(technician.id): technician}
+
+    now = now or datetime.now()
+    context.risk.restricted_until = restricted_until
+    context.risk.phone = (phone or "").strip()
+    if not risk_service.is_rate_limit_whitelisted(context.risk.phone):
+        (
+            context.risk.user_events_1m,
+            context.risk.user_events_1h,
+            context.risk.ip_events_1m,
+            context.risk.ip_events_1h,
+        ) = risk_service.count_booking_events(user_id=user_id, ip_address=ip_address, now=now)
+
+    context.day.holidays = (
+        db.query(StoreHoliday)
+        .filter(StoreHoliday.store_id == store_id, StoreHoliday.holiday_date == appointment_date)
+        .all()
+    )
+    context.day.blocked_slots = (
+        db.query(StoreBlockedSlot)
+        .filter(
+            StoreBlockedSlot.store_id == store_id,
+            StoreBlockedSlot.blocked_date == appointment_date,
+            StoreBlockedSlot.status == "active",
+        )
+        .all()
+    )
+    if technician is not None:
+        context.day.unavailable_periods = {
+            int(technician.id): db.query(TechnicianUnavailable)
+            .filter(
+                TechnicianUnavailable.technician_id == technician.id,
+                TechnicianUnavailable.start_date <= appointment_date,
+                TechnicianUnavailable.end_date >= appointment_date,
+            )
+            .all()
+        }
+
+    subject_filter = Appointment.user_id == user_id
+    if technician_id is not None:
+        subject_filter = or_(subject_filter, Appointment.technician_id == technician_id)
+    context.appointment_rows = [
+        tuple(item)
+        for item in db.query(
+            Appointment.id,
+            Appointment.technician_id,
+            Appointment.user_id,
+            Appointment.appointment_time,
+            Service.duration_minutes,
+            Appointment.status,
+        )
+        .outerjoin(Service, Appointment.service_id == Service.id)
+        .filter(Appointment.appointment_date == appointment_date, subject_filter)
+        .all()
+    ]
+    context.risk.same_day_count = sum(1 for item in context.appointment_rows if item[2] == user_id)
+    return context
@@ -1,32 +1,122 @@
 """
-Lightweight read-cache service.
-
-Uses Redis when available and falls back to in-process TTL memory cache.
+Two-tier read-cache service.
+
+L1 is a bounded LRU of decoded values in process memory; L2 is Redis. While
+Redis is reachable an L1 entry lives at most CACHE_L1_TTL_SECONDS, and every
+set/delete is broadcast on a pub/sub channel so the other workers drop their
+L1 copy right away. Without Redis, L1 holds entries for their full TTL and
+is the only tier.
+
+Values returned from the cache are shared between callers; treat them as
+read-only.
+
+``get_or_set_json`` coalesces concurrent loads of one key: within a process
+only one caller runs the loader, and across processes a short Redis lock
+lets one process load while the others wait for its result. Entries it
+stores carry their expiry and load time, so a hot key is refreshed early by
+one caller (XFetch) instead of expiring under load.
 """
 from __future__ import annotations
 
 import json
 import logging
+import math
+import os
+import random
 import threading
 import time
-from typing import Any, Callable, Optional, TypeVar
+import uuid
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
 
 from redis import Redis
 from redis.exceptions import RedisError
 
+from app.core import metrics
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+_L1_MAX_ENTRIES = max(100, int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000")))
+_L1_TTL_SECONDS = max(0.0, float(os.getenv("CACHE_L1_TTL_SECONDS", "5")))
+# XFetch beta: higher refreshes hot keys earlier; 0 disables early refresh.
+_EARLY_REFRESH_BETA = max(0.0, float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0")))
+_LOAD_LOCK_TTL_MS = max(100, int(float(os.getenv("CACHE_LOAD_LOCK_TTL_SECONDS", "10")) * 1000))
+_LOAD_WAIT_SECONDS = max(0.0, float(os.getenv("CACHE_LOAD_WAIT_SECONDS", "2")))
+_LOAD_POLL_SECONDS = 0.05
+
 _CACHE_KEY_PREFIX = "nailsdash:cache:"
+_LOAD_LOCK_PREFIX = "nailsdash:cache-lock:"
+_INVALIDATION_CHANNEL = "nailsdash:cache:invalidate"
+# Entries written by get_or_set_json/set_json: "<prefix><expires_at>:<load seconds>:<json>".
+# JSON never starts with "x", so bare payloads from older writers still read.
+_ENVELOPE_PREFIX = "xf1:"
+_INSTANCE_ID = uuid.uuid4().hex
+_RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
 _LOCAL_CACHE_LOCK = threading.Lock()
-_LOCAL_CACHE: dict[str, tuple[float, str]] = {}
+# Insertion-ordered dict used as the LRU: hits move to the end, eviction pops the front.
+_LOCAL_CACHE: dict[str, tuple[float, "_Entry"]] = {}
 _REDIS_LOCK = threading.Lock()
 _REDIS_CLIENT: Optional[Redis] = None
 _REDIS_DISABLED_UNTIL = 0.0
 _REDIS_RETRY_SECONDS = 30.0
+_LOOKUP_HIT = metrics.CACHE_LOOKUPS.labels(result="hit")
+_LOOKUP_MISS = metrics.CACHE_LOOKUPS.labels(result="miss")
+_TIER_HITS = {tier: metrics.CACHE_TIER_HITS.labels(tier=tier) for tier in ("l1", "l2")}
+_LOADS = {
+    outcome: metrics.CACHE_LOADS.labels(outcome=outcome)
+    for outcome in ("loaded", "early_refresh", "coalesced", "waited")
+}
+_FALLBACKS = {
+    operation: metrics.CACHE_FALLBACKS.labels(operation=operation)
+    for operation in ("get", "set", "delete", "increment", "read_counters")
+}
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    load_seconds: float = 0.0
+
+
+class _CacheStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.early_refreshes = 0
+        self.coalesced = 0
+        self.waited = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.l1_hits + self.l2_hits + self.misses
+            return {
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else None,
+                "loads": self.loads,
+                "early_refreshes": self.early_refreshes,
+                "coalesced": self.coalesced,
+                "waited": self.waited,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_STATS = _CacheStats()
 
 
 def _cache_key(key: str) -> str:
@@ -73,81 +163,415 @@ def _deserialize(value: str) -> Any:
     return json.loads(value)
 
 
-def _get_local(key: str) -> Any | None:
+def _encode_entry(entry: _Entry) -> str:
+    return f"{_ENVELOPE_PREFIX}{entry.expires_at:.3f}:{entry.load_seconds:.4f}:{_serialize(entry.value)}"
+
+
+def _decode_entry(payload: str) -> _Entry:
+    if not payload.startswith(_ENVELOPE_PREFIX):
+        return _Entry(_deserialize(payload), time.time() + _L1_TTL_SECONDS)
+    expires_at, load_seconds, body = payload[len(_ENVELOPE_PREFIX):].split(":", 2)
+    return _Entry(_deserialize(body), float(expires_at), float(load_seconds))
+
+
+def _get_local(key: str) -> Optional[_Entry]:
     now = time.time()
     with _LOCAL_CACHE_LOCK:
-        entry = _LOCAL_CACHE.get(key)
-        if not entry:
+        item = _LOCAL_CACHE.pop(key, None)
+        if item is None or item[0] <= now:
             return None
-        expires_at, payload = entry
-        if expires_at <= now:
+        _LOCAL_CACHE[key] = item
+        return item[1]
+
+
+def _set_local(key: str, entry: _Entry, ttl_seconds: float) -> None:
+    if ttl_seconds <= 0:
+        return
+    evicted = 0
+    with _LOCAL_CACHE_LOCK:
+        _LOCAL_CACHE.pop(key, None)
+        _LOCAL_CACHE[key] = (time.time() + ttl_seconds, entry)
+        while len(_LOCAL_CACHE) > _L1_MAX_ENTRIES:
+            _LOCAL_CACHE.pop(next(iter(_LOCAL_CACHE)))
+            evicted += 1
+    if evicted:
+        _STATS.add(evictions=evicted)
+
+
+def _drop_local(keys: list[str]) -> None:
+    with _LOCAL_CACHE_LOCK:
+        for key in keys:
             _LOCAL_CACHE.pop(key, None)
-            return None
+
+
+def clear_local() -> None:
+    with _LOCAL_CACHE_LOCK:
+        _LOCAL_CACHE.clear()
+
+
+def _local_ttl(ttl_seconds: float, client: Optional[Redis]) -> float:
+    # Redis is the source of truth while it is up; L1 then only absorbs repeat reads.
+    return ttl_seconds if client is None else min(ttl_seconds, _L1_TTL_SECONDS)
+
+
+def _lookup(cache_key: str) -> Optional[_Entry]:
+    entry = _get_local(cache_key)
+    if entry is not None:
+        _record_hit("l1")
+        return entry
+
+    client = _get_redis_client()
+    if client is None:
+        _FALLBACKS["get"].inc()
+    else:
+        try:
+            payload = client.get(cache_key)
+        except RedisError:
+            logger.warning("Redis cache get failed for key=%s", cache_key, exc_info=True)
+            _disable_redis_temporarily()
+            _FALLBACKS["get"].inc()
+        else:
+            entry = _read_payload(cache_key, payload)
+            if entry is not None:
+                _record_hit("l2")
+                return entry
+    _LOOKUP_MISS.inc()
+    _STATS.add(misses=1)
+    return None
+
+
+def _read_payload(cache_key: str, payload: Optional[str]) -> Optional[_Entry]:
+    if payload is None:
+        return None
     try:
-        return _deserialize(payload)
-    except Exception:
-        with _LOCAL_CACHE_LOCK:
-            _LOCAL_CACHE.pop(key, None)
+        entry = _decode_entry(payload)
+    except ValueError:
+        logger.warning("Discarding undecodable cache payload for key=%s", cache_key)
         return None
+    _set_local(cache_key, entry, min(_L1_TTL_SECONDS, entry.expires_at - time.time()))
+    return entry
 
 
-def _set_local(key: str, value: Any, ttl_seconds: float) -> None:
-    payload = _serialize(value)
-    with _LOCAL_CACHE_LOCK:
-        _LOCAL_CACHE[key] = (time.time() + ttl_seconds, payload)
+def _record_hit(tier: str) -> None:
+    _LOOKUP_HIT.inc()
+    _TIER_HITS[tier].inc()
+    _STATS.add(**{f"{tier}_hits": 1})
 
 
-def get_json(key: str) -> Any | None:
-    cache_key = _cache_key(key)
+def _store(cache_key: str, entry: _Entry, ttl_seconds: float) -> None:
     client = _get_redis_client()
+    _set_local(cache_key, entry, _local_ttl(ttl_seconds, client))
     if client is not None:
         try:
-            payload = client.get(cache_key)
-            if payload is not None:
-                return _deserialize(payload)
+            pipe = client.pipeline(transaction=False)
+            pipe.setex(cache_key, max(1, int(ttl_seconds)), _encode_entry(entry))
+            pipe.publish(_INVALIDATION_CHANNEL, f"{_INSTANCE_ID} {cache_key}")
+            pipe.execute()
+            return
         except RedisError:
-            logger.warning("Redis cache get failed for key=%s", key, exc_info=True)
+            logger.warning("Redis cache set failed for key=%s", cache_key, exc_info=True)
             _disable_redis_temporarily()
-    return _get_local(cache_key)
+    _FALLBACKS["set"].inc()
+
+
+def get_json(key: str) -> Any | None:
+    entry = _lookup(_cache_key(key))
+    return None if entry is None else entry.value
 
 
 def set_json(key: str, value: Any, ttl_seconds: float) -> None:
-    cache_key = _cache_key(key)
-    _set_local(cache_key, value, ttl_seconds)
+    _store(_cache_key(key), _Entry(value, time.time() + ttl_seconds), ttl_seconds)
+
+
+def delete_many(keys: list[str]) -> None:
+    """Delete keys from both tiers and drop them from every worker's L1."""
+    if not keys:
+        return
+    cache_keys = [_cache_key(key) for key in keys]
+    _drop_local(cache_keys)
 
     client = _get_redis_client()
     if client is not None:
         try:
-            client.setex(cache_key, max(1, int(ttl_seconds)), _serialize(value))
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(*cache_keys)
+            for cache_key in cache_keys:
+                pipe.publish(_INVALIDATION_CHANNEL, f"{_INSTANCE_ID} {cache_key}")
+            pipe.execute()
+            return
         except RedisError:
-            logger.warning("Redis cache set failed for key=%s", key, exc_info=True)
+            logger.warning("Redis cache delete failed for %s keys", len(keys), exc_info=True)
             _disable_redis_temporarily()
+    _FALLBACKS["delete"].inc()
 
 
 def delete(key: str) -> None:
-    cache_key = _cache_key(key)
-    with _LOCAL_CACHE_LOCK:
-        _LOCAL_CACHE.pop(cache_key, None)
+    delete_many([key])
+
+
+def _increment_local(key: str, amount: int, ttl_seconds: float) -> None:
+    entry = _get_local(key)
+    current = 0
+    if entry is not None:
+        try:
+            current = int(entry.value)
+        except (TypeError, ValueError):
+            current = 0
+    _set_local(key, _Entry(current + amount, time.time() + ttl_seconds), ttl_seconds)
+
+
+def increment_many(items: list[tuple[str, float]], amount: int = 1) -> None:
+    """Add ``amount`` to each (key, ttl_seconds) counter and re-arm its TTL."""
+    if not items:
+        return
+    for key, ttl_seconds in items:
+        _increment_local(_cache_key(key), amount, ttl_seconds)
 
     client = _get_redis_client()
     if client is not None:
         try:
-            client.delete(cache_key)
+            pipe = client.pipeline(transaction=False)
+            for key, ttl_seconds in items:
+                cache_key = _cache_key(key)
+                pipe.incrby(cache_key, amount)
+                pipe.expire(cache_key, max(1, int(ttl_seconds)))
+            pipe.execute()
+            return
         except RedisError:
-            logger.warning("Redis cache delete failed for key=%s", key, exc_info=True)
+            logger.warning("Redis counter increment failed for %s keys", len(items), exc_info=True)
             _disable_redis_temporarily()
+    _FALLBACKS["increment"].inc()
 
 
-def delete_many(keys: list[str]) -> None:
-    for key in keys:
-        delete(key)
+def get_counters(keys: list[str]) -> list[int]:
+    """Read integer counters in one round trip; missing keys read as 0."""
+    if not keys:
+        return []
+    cache_keys = [_cache_key(key) for key in keys]
+    client = _get_redis_client()
+    if client is not None:
+        try:
+            return [int(value or 0) for value in client.mget(cache_keys)]
+        except RedisError:
+            logger.warning("Redis counter read failed for %s keys", len(keys), exc_info=True)
+            _disable_redis_temporarily()
+    _FALLBACKS["read_counters"].inc()
+    values = []
+    for cache_key in cache_keys:
+        entry = _get_local(cache_key)
+        try:
+            values.append(int(entry.value or 0) if entry is not None else 0)
+        except (TypeError, ValueError):
+            values.append(0)
+    return values
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _SingleFlight:
+    """Run one loader per key at a time; concurrent callers share its result."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+
+    def run(self, key: str, fn: Callable[[], Any], stale: Optional[_Entry] = None) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if stale is not None:
+                # Someone is already refreshing this still-valid entry.
+                return stale.value
+            _LOADS["coalesced"].inc()
+            _STATS.add(coalesced=1)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
 
 
-def get_or_set_json(key: str, ttl_seconds: float, loader: Callable[[], T]) -> T:
-    cached = get_json(key)
-    if cached is not None:
-        return cached
+_FLIGHTS = _SingleFlight()
+
+
+def _should_refresh_early(entry: _Entry) -> bool:
+    if entry.load_seconds <= 0 or _EARLY_REFRESH_BETA <= 0:
+        return False
+    # XFetch: the chance of refreshing rises as expiry nears, scaled by how long a load takes.
+    jitter = -math.log(1.0 - random.random())
+    return time.time() + entry.load_seconds * _EARLY_REFRESH_BETA * jitter >= entry.expires_at
+
 
-    value = loader()
-    set_json(key, value, ttl_seconds)
+def _acquire_load_lock(client: Redis, cache_key: str) -> tuple[Optional[str], bool]:
+    """Return (token, acquired); acquired without a token means Redis failed and the caller loads alone."""
+    token = uuid.uuid4().hex
+    try:
+        return token, bool(client.set(f"{_LOAD_LOCK_PREFIX}{cache_key}", token, nx=True, px=_LOAD_LOCK_TTL_MS))
+    except RedisError:
+        logger.warning("Redis cache load lock failed for key=%s", cache_key, exc_info=True)
+        _disable_redis_temporarily()
+        return None, True
+
+
+def _release_load_lock(client: Redis, cache_key: str, token: str) -> None:
+    try:
+        client.eval(_RELEASE_LOCK_SCRIPT, 1, f"{_LOAD_LOCK_PREFIX}{cache_key}", token)
+    except RedisError:
+        logger.warning("Redis cache load lock release failed for key=%s", cache_key, exc_info=True)
+
+
+def _wait_for_load(client: Redis, cache_key: str) -> Optional[_Entry]:
+    deadline = time.monotonic() + _LOAD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_LOAD_POLL_SECONDS)
+        try:
+            entry = _read_payload(cache_key, client.get(cache_key))
+        except RedisError:
+            return None
+        if entry is not None:
+            return entry
+    return None
+
+
+def _load(cache_key: str, ttl_seconds: float, loader: Callable[[], T], stale: Optional[_Entry]) -> T:
+    if stale is None:
+        entry = _get_local(cache_key)
+        if entry is not None and entry.value is not None:
+            # Filled by a flight that finished while this caller was missing.
+            return entry.value
+
+    client = _get_redis_client()
+    token, acquired = (None, True) if client is None else _acquire_load_lock(client, cache_key)
+    if not acquired:
+        if stale is not None:
+            return stale.value
+        entry = _wait_for_load(client, cache_key)
+        if entry is not None and entry.value is not None:
+            _LOADS["waited"].inc()
+            _STATS.add(waited=1)
+            return entry.value
+        token = None
+
+    try:
+        started = time.perf_counter()
+        value = loader()
+        load_seconds = time.perf_counter() - started
+        _store(cache_key, _Entry(value, time.time() + ttl_seconds, load_seconds), ttl_seconds)
+    finally:
+        if token is not None:
+            _release_load_lock(client, cache_key, token)
+    outcome = "loaded" if stale is None else "early_refresh"
+    _LOADS[outcome].inc()
+    _STATS.add(loads=1, early_refreshes=int(stale is not None))
     return value
+
+
+def get_or_set_json(key: str, ttl_seconds: float, loader: Callable[[], T]) -> T:
+    cache_key = _cache_key(key)
+    entry = _lookup(cache_key)
+    if entry is not None and entry.value is not None:
+        if not _should_refresh_early(entry):
+            return entry.value
+        return _FLIGHTS.run(cache_key, lambda: _load(cache_key, ttl_seconds, loader, entry), stale=entry)
+    return _FLIGHTS.run(cache_key, lambda: _load(cache_key, ttl_seconds, loader, None))
+
+
+class _InvalidationListener:
+    """Drops L1 entries that another worker set or deleted, via Redis pub/sub."""
+
+    def __init__(self) -> None:
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = False
+
+    def start(self) -> None:
+        if not settings.REDIS_URL or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_seconds: float = 2.0) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout_seconds)
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop_event.is_set():
+            pubsub = None
+            try:
+                client = Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1.0)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(_INVALIDATION_CHANNEL)
+                # Anything cached while unsubscribed may have missed its invalidation.
+                clear_local()
+                self.connected = True
+                failures = 0
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        handle_invalidation(message["data"])
+            except Exception:
+                failures += 1
+                log = logger.warning if failures == 1 else logger.debug
+                log("Cache invalidation listener disconnected; retrying", exc_info=True)
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            self._stop_event.wait(_REDIS_RETRY_SECONDS)
+
+
+def handle_invalidation(message: str) -> None:
+    sender, _, cache_key = message.partition(" ")
+    if sender != _INSTANCE_ID and cache_key:
+        _drop_local([cache_key])
+        _STATS.add(invalidations=1)
+
+
+_INVALIDATION_LISTENER = _InvalidationListener()
+
+
+@metrics.register_gauge_sampler
+def _sample_cache_metrics() -> None:
+    metrics.CACHE_L1_ENTRIES.set(len(_LOCAL_CACHE))
+
+
+def start_invalidation_listener() -> None:
+    _INVALIDATION_LISTENER.start()
+
+
+def shutdown_invalidation_listener(timeout_seconds: float = 2.0) -> None:
+    _INVALIDATION_LISTENER.stop(timeout_seconds=timeout_seconds)
+
+
+def get_cache_stats() -> dict[str, Any]:
+    """This worker's L1 size and hit/miss/load counters."""
+    return {
+        "l1_entries": len(_LOCAL_CACHE),
+        "l1_capacity": _L1_MAX_ENTRIES,
+        "l1_ttl_seconds": _L1_TTL_SECONDS,
+        "invalidation_listener_connected": _INVALIDATION_LISTENER.connected,
+        **_STATS.snapshot(),
+    }
@@ -0,0 +1,76 @@
+"""
+Versioned keys for cached public catalog reads.
+
+Store details (with images), store services, hours and portfolio pages are
+cached under a per-store version token; the service catalog and category
+list under a global one. CRUD write paths call invalidate_store /
+invalidate_service_catalog after committing, which replaces the token so
+every worker misses on its next read without enumerating keys (portfolio
+pages and catalog filters have unbounded variants).
+
+Cached values are JSON-ready response payloads. Hidden-store visibility is
+still decided per request by the endpoints, from the cached ``is_visible``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from typing import Any, Callable, Optional, TypeVar
+
+from app.services import cache_service
+
+T = TypeVar("T")
+
+CATALOG_CACHE_TTL_SECONDS = 300
+VERSION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+_SERVICE_CATALOG_VERSION_KEY = "catalog:services-version"
+
+
+def _store_version_key(store_id: int) -> str:
+    return f"catalog:store-version:{int(store_id)}"
+
+
+def _current_version(key: str) -> str:
+    # Random tokens, as in availability_service: an evicted version can never resurrect old entries.
+    version = cache_service.get_json(key)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        cache_service.set_json(key, version, VERSION_CACHE_TTL_SECONDS)
+    return str(version)
+
+
+def _bump_version(key: str) -> None:
+    cache_service.set_json(key, uuid.uuid4().hex[:12], VERSION_CACHE_TTL_SECONDS)
+
+
+def _params_digest(params: dict[str, Any]) -> str:
+    if not params:
+        return "-"
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def store_key(store_id: int, kind: str, **params: Any) -> str:
+    version = _current_version(_store_version_key(store_id))
+    return f"catalog:store:{int(store_id)}:{version}:{kind}:{_params_digest(params)}"
+
+
+def service_catalog_key(kind: str, **params: Any) -> str:
+    version = _current_version(_SERVICE_CATALOG_VERSION_KEY)
+    return f"catalog:services:{version}:{kind}:{_params_digest(params)}"
+
+
+def get_or_load(key: str, loader: Callable[[], T]) -> T:
+    return cache_service.get_or_set_json(key, CATALOG_CACHE_TTL_SECONDS, loader)
+
+
+def invalidate_store(store_id: Optional[int]) -> None:
+    """Drop every cached catalog read of ``store_id``; call after committing a change."""
+    if store_id is None:
+        return
+    _bump_version(_store_version_key(store_id))
+
+
+def invalidate_service_catalog() -> None:
+    """Drop the cached service catalog and category list; call after committing a change."""
+    _bump_version(_SERVICE_CATALOG_VERSION_KEY)
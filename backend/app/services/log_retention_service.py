@@ -0,0 +1,130 @@
+"""
+Retention for system logs and their rollups.
+
+On MySQL, system_logs is range-partitioned by day (see migration
+20261017_000400): upcoming days are split off the ``pmax`` partition ahead of
+time and expired days are dropped whole, so retention never deletes rows one
+by one. Other backends (SQLite in dev/tests) delete expired rows in batches
+along ix_system_logs_created_at.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.system_log import RequestLatencyHistogram, SystemLog, SystemLogHourlyRollup
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_LOG_RETENTION_DAYS = max(1, int(os.getenv("SYSTEM_LOG_RETENTION_DAYS", "30")))
+SYSTEM_LOG_ROLLUP_RETENTION_DAYS = max(1, int(os.getenv("SYSTEM_LOG_ROLLUP_RETENTION_DAYS", "400")))
+PARTITION_PRECREATE_DAYS = max(1, int(os.getenv("SYSTEM_LOG_PARTITION_PRECREATE_DAYS", "3")))
+_DELETE_BATCH_ROWS = 5000
+_MAX_PARTITION = "pmax"
+_DAY_PARTITION = re.compile(r"^p(\d{8})$")
+
+
+def partition_name(day: date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def _partition_day(name: str) -> Optional[date]:
+    match = _DAY_PARTITION.match(name or "")
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def list_partitions(db: Session) -> list[str]:
+    """Partition names of system_logs in range order; empty when the table is not partitioned."""
+    if db.get_bind().dialect.name != "mysql":
+        return []
+    rows = db.execute(
+        text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": SystemLog.__tablename__},
+    ).all()
+    return [row[0] for row in rows]
+
+
+def ensure_future_partitions(db: Session, partitions: list[str], today: date) -> list[str]:
+    """Split tomorrow's days off ``pmax`` so inserts never land in the catch-all partition."""
+    days = [day for day in map(_partition_day, partitions) if day is not None]
+    last_day = max(days) if days else today - timedelta(days=1)
+    created = []
+    day = last_day + timedelta(days=1)
+    while day <= today + timedelta(days=PARTITION_PRECREATE_DAYS):
+        name = partition_name(day)
+        upper = (day + timedelta(days=1)).isoformat()
+        db.execute(
+            text(
+                f"ALTER TABLE {SystemLog.__tablename__} REORGANIZE PARTITION {_MAX_PARTITION} INTO ("
+                f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper}')), "
+                f"PARTITION {_MAX_PARTITION} VALUES LESS THAN MAXVALUE)"
+            )
+        )
+        created.append(name)
+        day += timedelta(days=1)
+    return created
+
+
+def drop_expired_partitions(db: Session, partitions: list[str], cutoff: date) -> list[str]:
+    """Drop day partitions that only hold rows from before ``cutoff``."""
+    expired = [name for name in partitions if (_partition_day(name) or cutoff) < cutoff]
+    if expired:
+        db.execute(text(f"ALTER TABLE {SystemLog.__tablename__} DROP PARTITION {', '.join(expired)}"))
+    return expired
+
+
+def delete_expired_rows(db: Session, cutoff: datetime, batch_size: int = _DELETE_BATCH_ROWS) -> int:
+    """Delete rows older than ``cutoff`` in short committed batches to keep lock times small."""
+    deleted = 0
+    while True:
+        ids = [
+            row[0]
+            for row in db.query(SystemLog.id)
+            .filter(SystemLog.created_at < cutoff)
+            .order_by(SystemLog.created_at.asc())
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            return deleted
+        deleted += db.query(SystemLog).filter(SystemLog.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+
+def prune_rollups(db: Session, cutoff: datetime) -> int:
+    deleted = db.query(SystemLogHourlyRollup).filter(SystemLogHourlyRollup.bucket_start < cutoff).delete(
+        synchronize_session=False
+    )
+    deleted += db.query(RequestLatencyHistogram).filter(RequestLatencyHistogram.bucket_start < cutoff).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return deleted
+
+
+def run_log_retention(db: Session, now: Optional[datetime] = None) -> dict[str, Any]:
+    now = now or datetime.utcnow()
+    today = now.date()
+    cutoff_day = today - timedelta(days=SYSTEM_LOG_RETENTION_DAYS)
+    stats: dict[str, Any] = {"created_partitions": [], "dropped_partitions": [], "deleted_rows": 0}
+
+    partitions = list_partitions(db)
+    if partitions:
+        stats["created_partitions"] = ensure_future_partitions(db, partitions, today)
+        stats["dropped_partitions"] = drop_expired_partitions(db, partitions, cutoff_day)
+    else:
+        stats["deleted_rows"] = delete_expired_rows(db, datetime.combine(cutoff_day, datetime.min.time()))
+
+    rollup_cutoff = datetime.combine(today - timedelta(days=SYSTEM_LOG_ROLLUP_RETENTION_DAYS), datetime.min.time())
+    stats["deleted_rollups"] = prune_rollups(db, rollup_cutoff)
+    return stats
@@ -0,0 +1,135 @@
+"""
+Hourly rollups of system logs.
+
+Rows are folded into per-hour counts by (log_type, level, module, action,
+route) in the same transaction that inserts them, so the stats endpoint
+never scans system_logs. Rollups key on the matched route template rather
+than the raw path, so ids in URLs do not add a row per distinct request. Latency percentiles come from the unsampled
+request histograms in request_latency_service.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+from app.models.system_log import SystemLog, SystemLogHourlyRollup
+
+_UPSERT_PAGE_ROWS = 100
+_ROLLUP_DIMENSIONS = ("log_type", "level", "module", "action", "route")
+_ROLLUP_LIMITS = {"log_type": 20, "level": 10, "module": 50, "action": 80, "route": 255}
+
+
+def hour_start(value: datetime) -> datetime:
+    """Truncate to the hour as a naive UTC datetime, the way log timestamps are stored."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _aggregate(rows: Iterable[dict[str, Any]], now: datetime) -> list[dict[str, Any]]:
+    counts: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        bucket_start = hour_start(row.get("created_at") or now)
+        dimensions = tuple(str(row.get(name) or "")[: _ROLLUP_LIMITS[name]] for name in _ROLLUP_DIMENSIONS)
+        key = (bucket_start, *dimensions)
+        entry = counts.get(key)
+        if entry is None:
+            entry = counts[key] = {
+                "bucket_start": bucket_start,
+                **dict(zip(_ROLLUP_DIMENSIONS, dimensions)),
+                "count": 0,
+                "latency_count": 0,
+                "latency_sum_ms": 0,
+            }
+        entry["count"] += 1
+        latency_ms = row.get("latency_ms")
+        if latency_ms is not None:
+            entry["latency_count"] += 1
+            entry["latency_sum_ms"] += int(latency_ms)
+    # Sorted so concurrent writers take row locks in the same order.
+    return [counts[key] for key in sorted(counts)]
+
+
+def upsert_adding(db: Session, table: Table, rows: Sequence[dict[str, Any]], key_columns: Sequence[str]) -> None:
+    """Insert ``rows``, adding their non-key columns onto existing rows with the same key."""
+    if not rows:
+        return
+    add_columns = [name for name in rows[0] if name not in key_columns]
+    dialect = db.get_bind().dialect.name
+    for offset in range(0, len(rows), _UPSERT_PAGE_ROWS):
+        page = list(rows[offset : offset + _UPSERT_PAGE_ROWS])
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+            stmt = mysql_insert(table).values(page)
+            stmt = stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in add_columns})
+        elif dialect in {"sqlite", "postgresql"}:
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(table).values(page)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={name: table.c[name] + stmt.excluded[name] for name in add_columns},
+            )
+        else:
+            for row in page:
+                key_filter = [table.c[name] == row[name] for name in key_columns]
+                updated = db.execute(
+                    table.update()
+                    .where(*key_filter)
+                    .values({name: table.c[name] + row[name] for name in add_columns})
+                ).rowcount
+                if not updated:
+                    db.execute(table.insert().values(row))
+            continue
+        db.execute(stmt)
+
+
+def record_rollups(db: Session, rows: Sequence[dict[str, Any]], now: Optional[datetime] = None) -> None:
+    """Add ``rows`` (system log column values) to the hourly rollups; does not commit."""
+    if not rows:
+        return
+    upsert_adding(
+        db,
+        SystemLogHourlyRollup.__table__,
+        _aggregate(rows, now or datetime.utcnow()),
+        ("bucket_start", *_ROLLUP_DIMENSIONS),
+    )
+
+
+def rebuild_rollups(db: Session, since: Optional[datetime] = None, batch_size: int = 5000) -> int:
+    """Recompute rollups from the raw rows still retained, from the hour containing ``since``."""
+    rollup_query = db.query(SystemLogHourlyRollup)
+    log_filters = []
+    if since is not None:
+        since = hour_start(since)
+        rollup_query = rollup_query.filter(SystemLogHourlyRollup.bucket_start >= since)
+        log_filters.append(SystemLog.created_at >= since)
+    rollup_query.delete(synchronize_session=False)
+
+    columns = [SystemLog.id, SystemLog.created_at, SystemLog.latency_ms]
+    columns += [getattr(SystemLog, name) for name in _ROLLUP_DIMENSIONS]
+    processed = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(*columns)
+            .filter(SystemLog.id > last_id, *log_filters)
+            .order_by(SystemLog.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        record_rollups(db, [dict(row._mapping) for row in batch])
+        db.commit()
+        processed += len(batch)
+        last_id = batch[-1].id
+    db.commit()
+    return processed
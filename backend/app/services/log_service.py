@@ -7,63 +7,271 @@ import json
 import logging
 import os
 import time
+from datetime import datetime
 from queue import Empty, Full, Queue
 from threading import Event, Lock, Thread
 from typing import Any, Optional, Sequence
 
 from fastapi import Request
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.orm import Session
 
+from app.core import metrics
 from app.db.session import SessionLocal
 from app.models.system_log import SystemLog
+from app.services import log_rollup_service
 
 _ASYNC_LOG_QUEUE_SIZE = max(100, int(os.getenv("ASYNC_LOG_QUEUE_SIZE", "5000")))
 _ASYNC_LOG_BATCH_SIZE = max(1, int(os.getenv("ASYNC_LOG_BATCH_SIZE", "100")))
+_ASYNC_LOG_WRITERS = max(1, int(os.getenv("ASYNC_LOG_WRITERS", "1")))
 _ASYNC_LOG_POLL_SECONDS = 0.2
 _ASYNC_LOG_FLUSH_SECONDS = max(0.05, float(os.getenv("ASYNC_LOG_FLUSH_SECONDS", "0.5")))
+_ASYNC_LOG_SPILL_DIR = os.getenv("ASYNC_LOG_SPILL_DIR", "./log_spill")
+_ASYNC_LOG_REPLAY_INTERVAL_SECONDS = 10.0
+# Spill files whose owner is still alive are only claimed after this long without writes.
+_ASYNC_LOG_STALE_REPLAY_SECONDS = 300.0
+# Bind parameter budget per multi-row INSERT, per dialect.
+_INSERT_PARAM_LIMITS = {"sqlite": 999, "mysql": 60000, "postgresql": 30000}
+_INSERT_MAX_ROWS = 1000
 logger = logging.getLogger(__name__)
 
 
+_QUEUE_ENQUEUED = metrics.BACKGROUND_QUEUE_ENQUEUED.labels(queue="system_log")
+_QUEUE_DROPPED = metrics.BACKGROUND_QUEUE_DROPPED.labels(queue="system_log")
+
+
+class _LogWriterStats:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.discarded = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_flush(self, batch_size: int, elapsed_ms: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.last_batch_size = batch_size
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "discarded": self.discarded,
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "batches": self.batches,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "max_flush_ms": round(self.max_flush_ms, 2),
+                "avg_flush_ms": round(self.total_flush_ms / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _is_unavailable_error(exc: Exception) -> bool:
+    return isinstance(exc, (OperationalError, InterfaceError)) or getattr(exc, "connection_invalidated", False)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # EPERM: the process exists but belongs to someone else.
+        return True
+    return True
+
+
+class _LogSpillFile:
+    """
+    Append-only JSON-lines spill for rows that could not reach the database.
+
+    Each process appends to its own file, ``system_logs.<pid>.jsonl``; replay
+    claims a file by renaming it to ``<name>.replaying.<pid>.<ns>``, so
+    concurrent workers never replay the same rows twice. Another process's
+    file is only claimed once its owner has exited or it has gone
+    unwritten for the stale window, so rows are never read while the owner
+    may still be appending them. A claimed file whose replay failed is
+    picked up again the same way.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"system_logs.{os.getpid()}.jsonl")
+
+    def append(self, rows: Sequence[dict[str, Any]]) -> bool:
+        if not self.directory or not rows:
+            return False
+        lines = "".join(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows)
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(lines)
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            return True
+        except OSError:
+            logger.warning("Failed to spill %s system logs to %s", len(rows), self.directory, exc_info=True)
+            return False
+
+    @staticmethod
+    def _owner_pid(name: str) -> Optional[int]:
+        """The appending pid of a spill file, or the claiming pid of a ``.replaying.`` file."""
+        if ".replaying." in name:
+            owner = name.split(".replaying.", 1)[1].split(".")[0]
+        elif name.startswith("system_logs.") and name.endswith(".jsonl"):
+            owner = name[len("system_logs.") : -len(".jsonl")]
+        else:
+            return None
+        return int(owner) if owner.isdigit() else None
+
+    def _claimable(self, name: str, source: str, now: float) -> bool:
+        owner = self._owner_pid(name)
+        if owner is None:
+            return False
+        if owner == os.getpid() and ".replaying." not in name:
+            # Our own appends take self._lock, which claim holds across the rename.
+            return True
+        if owner != os.getpid() and not _pid_alive(owner):
+            return True
+        try:
+            return now - os.path.getmtime(source) >= _ASYNC_LOG_STALE_REPLAY_SECONDS
+        except OSError:
+            return False
+
+    def claim(self) -> list[str]:
+        """Rename claimable spill files to private names and return them."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        claimed = []
+        now = time.time()
+        for name in sorted(os.listdir(self.directory)):
+            source = os.path.join(self.directory, name)
+            if not self._claimable(name, source, now):
+                continue
+            target = os.path.join(self.directory, f"{name.split('.replaying.')[0]}.replaying.{os.getpid()}.{time.monotonic_ns()}")
+            try:
+                with self._lock:
+                    os.rename(source, target)
+            except OSError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def read(path: str) -> list[dict[str, Any]]:
+        rows = []
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    if row.get("created_at"):
+                        row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    rows.append(row)
+                except ValueError:
+                    logger.warning("Skipping corrupt spilled system log line in %s", path)
+        return rows
+
+
 class _AsyncSystemLogWriter:
-    def __init__(self, maxsize: int):
+    def __init__(self, maxsize: int, writers: int = 1, spill_dir: str = ""):
         self._queue: Queue[dict[str, Any]] = Queue(maxsize=maxsize)
         self._stop_event = Event()
         self._lock = Lock()
-        self._thread: Optional[Thread] = None
+        self._replay_lock = Lock()
+        self._threads: list[Thread] = []
+        self._writers = max(1, writers)
+        self._spill = _LogSpillFile(spill_dir)
+        self._next_replay_at = 0.0
+        self.stats = _LogWriterStats()
 
     def start(self) -> None:
         with self._lock:
-            if self._thread and self._thread.is_alive():
+            if self._threads and all(thread.is_alive() for thread in self._threads):
                 return
             self._stop_event.clear()
-            self._thread = Thread(
-                target=self._run,
-                name="system-log-writer",
-                daemon=True,
-            )
-            self._thread.start()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self._writers):
+                thread = Thread(
+                    target=self._run,
+                    name=f"system-log-writer-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
 
     def stop(self, timeout_seconds: float = 2.0) -> None:
         with self._lock:
-            thread = self._thread
+            threads = list(self._threads)
             self._stop_event.set()
-        if thread and thread.is_alive():
-            thread.join(timeout=timeout_seconds)
+        deadline = time.monotonic() + timeout_seconds
+        for thread in threads:
+            if thread.is_alive():
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
 
     def enqueue(self, payload: dict[str, Any]) -> bool:
         self.start()
         try:
             self._queue.put_nowait(payload)
+            self.stats.add(enqueued=1)
+            _QUEUE_ENQUEUED.inc()
             return True
         except Full:
+            self.stats.add(dropped=1)
+            _QUEUE_DROPPED.inc()
             logger.warning("Async system log queue is full; dropping log event")
             return False
 
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "writers": self._writers,
+            **self.stats.snapshot(),
+        }
+
     def _run(self) -> None:
         while not self._stop_event.is_set() or not self._queue.empty():
             try:
                 first_payload = self._queue.get(timeout=_ASYNC_LOG_POLL_SECONDS)
             except Empty:
+                self._maybe_replay()
                 continue
 
             batch = [first_payload]
@@ -77,18 +285,135 @@ class _AsyncSystemLogWriter:
                 except Empty:
                     break
 
-            db = SessionLocal()
             try:
-                if not create_system_logs_batch(db, batch):
-                    for payload in batch:
-                        create_system_log(db, **payload)
+                rows = [_build_system_log_values(**payload) for payload in batch]
+                self.flush_rows(rows)
             finally:
-                db.close()
                 for _payload in batch:
                     self._queue.task_done()
-
-
-_ASYNC_LOG_WRITER = _AsyncSystemLogWriter(maxsize=_ASYNC_LOG_QUEUE_SIZE)
+            self._maybe_replay()
+
+    def flush_rows(self, rows: list[dict[str, Any]]) -> None:
+        """Write ``rows``, spilling whatever the database is unavailable for."""
+        unwritten = self._write_rows(rows)
+        if not unwritten:
+            return
+        # Keep the original time; replay may be much later than the event.
+        spilled_at = datetime.utcnow()
+        for row in unwritten:
+            row.setdefault("created_at", spilled_at)
+        if self._spill.append(unwritten):
+            self.stats.add(spilled=len(unwritten))
+            logger.warning("Database unavailable; spilled %s system logs", len(unwritten))
+        else:
+            self.stats.add(dropped=len(unwritten))
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Insert ``rows`` and return those left unwritten because the database
+        is unavailable. A batch failing for any other reason is retried as
+        two halves, down to single rows, which are discarded.
+        """
+        started = time.perf_counter()
+        pending = [rows]
+        written = 0
+        db = SessionLocal()
+        try:
+            while pending:
+                chunk = pending.pop()
+                try:
+                    _insert_system_log_rows(db, chunk)
+                    db.commit()
+                    written += len(chunk)
+                except Exception as exc:
+                    db.rollback()
+                    if _is_unavailable_error(exc):
+                        return [row for part in [chunk, *reversed(pending)] for row in part]
+                    if len(chunk) > 1:
+                        middle = len(chunk) // 2
+                        pending.extend([chunk[middle:], chunk[:middle]])
+                        continue
+                    self.stats.add(discarded=1)
+                    logger.warning("Discarding system log row that failed to insert: %r", chunk[0], exc_info=True)
+            return []
+        finally:
+            db.close()
+            self.stats.add(written=written)
+            self.stats.record_flush(len(rows), (time.perf_counter() - started) * 1000)
+
+    def _maybe_replay(self) -> None:
+        now = time.monotonic()
+        if now < self._next_replay_at or not self._replay_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_replay_at = now + _ASYNC_LOG_REPLAY_INTERVAL_SECONDS
+            self.replay_spill()
+        finally:
+            self._replay_lock.release()
+
+    def replay_spill(self) -> int:
+        """Re-insert spilled rows; stops once the database is unavailable again."""
+        replayed = 0
+        for path in self._spill.claim():
+            try:
+                rows = self._spill.read(path)
+            except OSError:
+                logger.warning("Failed to read spilled system logs from %s; keeping it for retry", path, exc_info=True)
+                continue
+            unwritten: list[dict[str, Any]] = []
+            for offset in range(0, len(rows), _ASYNC_LOG_BATCH_SIZE):
+                page = rows[offset : offset + _ASYNC_LOG_BATCH_SIZE]
+                unwritten = self._write_rows(page)
+                replayed += len(page) - len(unwritten)
+                if unwritten:
+                    unwritten += rows[offset + _ASYNC_LOG_BATCH_SIZE :]
+                    break
+            if unwritten and not self._spill.append(unwritten):
+                logger.warning(
+                    "Keeping %s for retry after %ss; its unreplayed rows could not be spilled again",
+                    path,
+                    int(_ASYNC_LOG_STALE_REPLAY_SECONDS),
+                )
+                self.stats.add(replayed=replayed)
+                return replayed
+            os.remove(path)
+            if unwritten:
+                break
+        if replayed:
+            logger.info("Replayed %s spilled system logs", replayed)
+        self.stats.add(replayed=replayed)
+        return replayed
+
+
+_ASYNC_LOG_WRITER = _AsyncSystemLogWriter(
+    maxsize=_ASYNC_LOG_QUEUE_SIZE,
+    writers=_ASYNC_LOG_WRITERS,
+    spill_dir=_ASYNC_LOG_SPILL_DIR,
+)
+
+
+@metrics.register_gauge_sampler
+def _sample_queue_metrics() -> None:
+    metrics.BACKGROUND_QUEUE_DEPTH.labels(queue="system_log").set(_ASYNC_LOG_WRITER._queue.qsize())
+
+
+def _insert_page_size(db: Session, column_count: int) -> int:
+    param_limit = _INSERT_PARAM_LIMITS.get(db.get_bind().dialect.name, 999)
+    return max(1, min(_INSERT_MAX_ROWS, param_limit // max(1, column_count)))
+
+
+def _insert_system_log_rows(db: Session, rows: Sequence[dict[str, Any]]) -> None:
+    """
+    One multi-row INSERT ... VALUES per page, sized to the dialect's bind
+    parameter limit, plus the matching hourly rollups in the same transaction.
+    """
+    if not rows:
+        return
+    table = SystemLog.__table__
+    page_size = _insert_page_size(db, len(rows[0]))
+    for offset in range(0, len(rows), page_size):
+        db.execute(table.insert().values(list(rows[offset : offset + page_size])))
+    log_rollup_service.record_rollups(db, rows)
 
 
 def _to_json_text(payload: Optional[Any]) -> Optional[str]:
@@ -116,6 +441,7 @@ def create_system_log(
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None,
     path: Optional[str] = None,
+    route: Optional[str] = None,
     method: Optional[str] = None,
     status_code: Optional[int] = None,
     latency_ms: Optional[int] = None,
@@ -124,7 +450,7 @@ def create_system_log(
     meta: Optional[Any] = None,
 ) -> Optional[SystemLog]:
     try:
-        item = SystemLog(**_build_system_log_values(
+        values = _build_system_log_values(
             log_type=log_type,
             level=level,
             module=module,
@@ -138,14 +464,17 @@ def create_system_log(
             ip_address=ip_address,
             user_agent=user_agent,
             path=path,
+            route=route,
             method=method,
             status_code=status_code,
             latency_ms=latency_ms,
             before=before,
             after=after,
             meta=meta,
-        ))
+        )
+        item = SystemLog(**values)
         db.add(item)
+        log_rollup_service.record_rollups(db, [values])
         db.commit()
         db.refresh(item)
         return item
@@ -167,8 +496,7 @@ def create_system_logs_batch(db: Session, payloads: Sequence[dict[str, Any]]) ->
         return True
 
     try:
-        rows = [_build_system_log_values(**payload) for payload in payloads]
-        db.execute(SystemLog.__table__.insert(), rows)
+        _insert_system_log_rows(db, [_build_system_log_values(**payload) for payload in payloads])
         db.commit()
         return True
     except Exception:
@@ -196,6 +524,7 @@ def create_system_log_async(
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None,
     path: Optional[str] = None,
+    route: Optional[str] = None,
     method: Optional[str] = None,
     status_code: Optional[int] = None,
     latency_ms: Optional[int] = None,
@@ -218,6 +547,7 @@ def create_system_log_async(
             "ip_address": ip_address,
             "user_agent": user_agent,
             "path": path,
+            "route": route,
             "method": method,
             "status_code": status_code,
             "latency_ms": latency_ms,
@@ -243,6 +573,7 @@ def _build_system_log_values(
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None,
     path: Optional[str] = None,
+    route: Optional[str] = None,
     method: Optional[str] = None,
     status_code: Optional[int] = None,
     latency_ms: Optional[int] = None,
@@ -264,6 +595,7 @@ def _build_system_log_values(
         "ip_address": ip_address,
         "user_agent": user_agent,
         "path": path,
+        "route": route,
         "method": method,
         "status_code": status_code,
         "latency_ms": latency_ms,
@@ -281,6 +613,11 @@ def shutdown_async_logger(timeout_seconds: float = 2.0) -> None:
     _ASYNC_LOG_WRITER.stop(timeout_seconds=timeout_seconds)
 
 
+def get_async_logger_metrics() -> dict[str, Any]:
+    """Queue depth, drops, batch sizes and flush latency of the async log writer."""
+    return _ASYNC_LOG_WRITER.metrics()
+
+
 def create_audit_log(
     db: Session,
     *,
@@ -300,12 +637,14 @@ def create_audit_log(
     ip_address = None
     user_agent = None
     path = None
+    route = None
     method = None
     if request:
         forwarded = request.headers.get("x-forwarded-for")
         ip_address = forwarded.split(",")[0].strip() if forwarded else (request.client.host if request.client else None)
         user_agent = request.headers.get("user-agent")
         path = request.url.path
+        route = getattr(request.scope.get("route"), "path", None)
         method = request.method
 
     return create_system_log(
@@ -323,6 +662,7 @@ def create_audit_log(
         ip_address=ip_address,
         user_agent=user_agent,
         path=path,
+        route=route,
         method=method,
         before=before,
         after=after,
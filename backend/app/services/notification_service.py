@@ -1,119 +1,157 @@
 """
 Notification Service
 Handles notification creation and management
+
+Every notification goes through ``create_notifications_bulk``: the rows are
+inserted with one multi-row INSERT, the users' unread counters and the
+push_outbox rows are written in the same transaction, and after the commit
+the affected users' unread-count caches are dropped in one pipelined call
+and the push dispatcher is woken once.
+The ``notify_appointment_*`` helpers accept an ``AppointmentContext`` from
+``load_appointment_contexts`` so callers handling many appointments load
+services, stores and users once instead of per appointment.
 """
-from queue import Empty, Full, Queue
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import Optional
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional
 from datetime import datetime
 import logging
-from threading import Event, Lock, Thread
 
-from app.core.config import settings
-from app.crud.notification import invalidate_unread_count_cache
-from app.db.session import SessionLocal
+from app.crud.notification import add_unread_counts, invalidate_unread_count_caches
 from app.models.notification import Notification, NotificationType
 from app.models.appointment import Appointment
+from app.models.service import Service
 from app.models.user import User
 from app.models.store import Store
-from app.services import push_service
+from app.services import push_outbox_service, push_service
 
 logger = logging.getLogger(__name__)
-_ASYNC_PUSH_POLL_SECONDS = 0.2
-
-
-class _AsyncPushDispatcher:
-    def __init__(self, maxsize: int):
-        self._queue: Queue[int] = Queue(maxsize=maxsize)
-        self._stop_event = Event()
-        self._lock = Lock()
-        self._thread: Optional[Thread] = None
-
-    def start(self) -> None:
-        with self._lock:
-            if self._thread and self._thread.is_alive():
-                return
-            self._stop_event.clear()
-            self._thread = Thread(
-                target=self._run,
-                name="push-dispatcher",
-                daemon=True,
-            )
-            self._thread.start()
-
-    def stop(self, timeout_seconds: float = 5.0) -> None:
-        with self._lock:
-            thread = self._thread
-            self._stop_event.set()
-        if thread and thread.is_alive():
-            thread.join(timeout=timeout_seconds)
-
-    def enqueue(self, notification_id: int) -> bool:
-        self.start()
-        try:
-            self._queue.put_nowait(int(notification_id))
-            return True
-        except Full:
-            logger.warning(
-                "Async push queue is full; dropping push delivery for notification_id=%s",
-                notification_id,
-            )
-            return False
-
-    def _run(self) -> None:
-        while not self._stop_event.is_set() or not self._queue.empty():
-            try:
-                notification_id = self._queue.get(timeout=_ASYNC_PUSH_POLL_SECONDS)
-            except Empty:
-                continue
-
-            db = SessionLocal()
-            try:
-                notification = (
-                    db.query(Notification)
-                    .filter(Notification.id == int(notification_id))
-                    .first()
-                )
-                if not notification:
-                    logger.warning(
-                        "Async push skipped because notification_id=%s was not found",
-                        notification_id,
-                    )
-                else:
-                    push_service.send_push_for_notification(db, notification)
-            except Exception as exc:
-                logger.warning(
-                    "Async push delivery skipped for notification_id=%s (%s)",
-                    notification_id,
-                    exc,
-                    exc_info=True,
-                )
-            finally:
-                db.close()
-                self._queue.task_done()
-
-
-_ASYNC_PUSH_DISPATCHER = _AsyncPushDispatcher(
-    maxsize=max(100, int(settings.ASYNC_PUSH_QUEUE_SIZE)),
-)
+
+
+class NotificationSpec(NamedTuple):
+    user_id: int
+    type: NotificationType
+    title: str
+    message: str
+    appointment_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AppointmentContext:
+    """Rows an appointment notification's text is built from; ``None`` means missing."""
+    service: Optional[Service] = None
+    store: Optional[Store] = None
+    customer: Optional[User] = None
+    store_admin: Optional[User] = None
 
 
 def start_async_push_dispatcher() -> None:
-    _ASYNC_PUSH_DISPATCHER.start()
+    push_outbox_service.start_dispatcher()
 
 
 def shutdown_async_push_dispatcher(timeout_seconds: float = 5.0) -> None:
-    _ASYNC_PUSH_DISPATCHER.stop(timeout_seconds=timeout_seconds)
+    push_outbox_service.shutdown_dispatcher(timeout_seconds=timeout_seconds)
     push_service.close_http_client()
 
 
-def enqueue_notification_push(notification_id: int) -> bool:
-    return _ASYNC_PUSH_DISPATCHER.enqueue(int(notification_id))
+def load_appointment_contexts(db: Session, appointments: Iterable[Appointment]) -> Dict[int, AppointmentContext]:
+    """
+    Load services, stores, customers and store admins for many appointments
+    in at most four queries, keyed by appointment id.
+    """
+    appointments = [appointment for appointment in appointments if appointment is not None]
+    if not appointments:
+        return {}
+    service_ids = {int(item.service_id) for item in appointments if item.service_id is not None}
+    store_ids = {int(item.store_id) for item in appointments if item.store_id is not None}
+    user_ids = {int(item.user_id) for item in appointments if item.user_id is not None}
+
+    services = {
+        int(service.id): service
+        for service in (db.query(Service).filter(Service.id.in_(service_ids)).all() if service_ids else [])
+    }
+    stores = {
+        int(store.id): store
+        for store in (db.query(Store).filter(Store.id.in_(store_ids)).all() if store_ids else [])
+    }
+    customers = {
+        int(user.id): user
+        for user in (db.query(User).filter(User.id.in_(user_ids)).all() if user_ids else [])
+    }
+    store_admins: Dict[int, User] = {}
+    if store_ids:
+        admins = (
+            db.query(User)
+            .filter(User.store_id.in_(store_ids), User.is_active == True)
+            .order_by(User.id.asc())
+            .all()
+        )
+        for admin in admins:
+            store_admins.setdefault(int(admin.store_id), admin)
+
+    return {
+        int(item.id): AppointmentContext(
+            service=services.get(int(item.service_id)) if item.service_id is not None else None,
+            store=stores.get(int(item.store_id)) if item.store_id is not None else None,
+            customer=customers.get(int(item.user_id)) if item.user_id is not None else None,
+            store_admin=store_admins.get(int(item.store_id)) if item.store_id is not None else None,
+        )
+        for item in appointments
+    }
 
 
-def enqueue_notification_push_batch(notification_ids: list[int]) -> None:
-    for notification_id in notification_ids:
-        _ASYNC_PUSH_DISPATCHER.enqueue(int(notification_id))
+def _context_for(db: Session, appointment: Appointment, context: Optional[AppointmentContext]) -> AppointmentContext:
+    if context is not None:
+        return context
+    return load_appointment_contexts(db, [appointment])[int(appointment.id)]
+
+
+def stage_notifications(db: Session, specs: Iterable[NotificationSpec]) -> List[int]:
+    """
+    Insert notifications, their unread-counter increments and push_outbox
+    rows into ``db``'s open transaction without committing, returning the new notification ids.
+    After the caller commits it must call ``publish_staged_notifications``
+    with the affected user ids.
+    """
+    rows = [spec._asdict() for spec in specs]
+    if not rows:
+        return []
+    if db.get_bind().dialect.insert_executemany_returning:
+        # One multi-row INSERT ... RETURNING id (SQLite, PostgreSQL, MariaDB).
+        notification_ids = [int(notification_id) for notification_id in db.execute(
+            insert(Notification).returning(Notification.id), rows
+        ).scalars()]
+    else:
+        # MySQL has no RETURNING; the ORM flush still fetches each row's id.
+        notifications = [Notification(**row) for row in rows]
+        db.add_all(notifications)
+        db.flush()
+        notification_ids = [int(notification.id) for notification in notifications]
+    add_unread_counts(db, Counter(int(row["user_id"]) for row in rows))
+    push_outbox_service.stage_pushes(db, notification_ids)
+    return notification_ids
+
+
+def publish_staged_notifications(user_ids: Iterable[int]) -> None:
+    """Post-commit half of ``stage_notifications``."""
+    user_ids = {int(user_id) for user_id in user_ids}
+    if not user_ids:
+        return
+    invalidate_unread_count_caches(user_ids)
+    push_outbox_service.wake_dispatcher()
+
+
+def create_notifications_bulk(db: Session, specs: Iterable[NotificationSpec]) -> List[int]:
+    """Create many notifications in one transaction, commit it and return their ids."""
+    specs = list(specs)
+    notification_ids = stage_notifications(db, specs)
+    if not notification_ids:
+        return []
+    db.commit()
+    publish_staged_notifications(spec.user_id for spec in specs)
+    return notification_ids
 
 
 def create_notification(
@@ -125,52 +163,44 @@ def create_notification(
     appointment_id: Optional[int] = None
 ) -> Notification:
     """Create a new notification"""
-    notification = Notification(
-        user_id=user_id,
-        type=notification_type,
-        title=title,
-        message=message,
-        appointment_id=appointment_id
+    notification_ids = create_notifications_bulk(
+        db,
+        [NotificationSpec(user_id, notification_type, title, message, appointment_id)],
     )
-    db.add(notification)
-    db.commit()
-    db.refresh(notification)
-    invalidate_unread_count_cache(user_id)
-    enqueue_notification_push(int(notification.id))
-    return notification
+    return db.query(Notification).filter(Notification.id == notification_ids[0]).one()
 
 
-def notify_appointment_created(db: Session, appointment: Appointment):
+def _service_and_store_names(
+    context: AppointmentContext,
+    service_default: str = "Unknown Service",
+    store_default: str = "Unknown Store",
+) -> tuple[str, str]:
+    service_name = context.service.name if context.service else service_default
+    store_name = context.store.name if context.store else store_default
+    return service_name, store_name
+
+
+def notify_appointment_created(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
     Notify store admin when a new appointment is created
     """
-    # Refresh appointment to load relationships
-    db.refresh(appointment)
-    
-    # Get store admin
-    store_admin = db.query(User).filter(
-        User.store_id == appointment.store_id,
-        User.is_active == True
-    ).first()
-    
-    if not store_admin:
+    context = _context_for(db, appointment, context)
+    if not context.store_admin:
         return  # No store admin found
-    
-    # Get appointment details
-    from app.models.service import Service
-    from app.models.user import User as UserModel
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    customer = db.query(UserModel).filter(UserModel.id == appointment.user_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    customer_name = customer.username if customer else "Unknown Customer"
-    
+
+    service_name, _ = _service_and_store_names(context)
+    customer_name = context.customer.username if context.customer else "Unknown Customer"
+
     title = "New Appointment"
     message = f"{customer_name} has booked {service_name} on {appointment.appointment_date} at {appointment.appointment_time.strftime('%H:%M')}. Please confirm the appointment."
-    
+
     create_notification(
         db=db,
-        user_id=store_admin.id,
+        user_id=context.store_admin.id,
         notification_type=NotificationType.APPOINTMENT_CREATED,
         title=title,
         message=message,
@@ -178,21 +208,19 @@ def notify_appointment_created(db: Session, appointment: Appointment):
     )
 
 
-def notify_appointment_confirmed(db: Session, appointment: Appointment):
+def notify_appointment_confirmed(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
     Notify customer when their appointment is confirmed
     """
-    # Get service and store details
-    from app.models.service import Service
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    store_name = store.name if store else "Unknown Store"
-    
+    service_name, store_name = _service_and_store_names(_context_for(db, appointment, context))
+
     title = "Appointment Confirmed"
     message = f"Your appointment for {service_name} at {store_name} on {appointment.appointment_date} at {appointment.appointment_time.strftime('%H:%M')} has been confirmed."
-    
+
     create_notification(
         db=db,
         user_id=appointment.user_id,
@@ -203,23 +231,23 @@ def notify_appointment_confirmed(db: Session, appointment: Appointment):
     )
 
 
-def notify_appointment_cancelled(db: Session, appointment: Appointment, cancelled_by_admin: bool = False):
+def notify_appointment_cancelled(
+    db: Session,
+    appointment: Appointment,
+    cancelled_by_admin: bool = False,
+    context: Optional[AppointmentContext] = None,
+):
     """
     Notify relevant parties when an appointment is cancelled
     """
-    # Get service and store details
-    from app.models.service import Service
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    store_name = store.name if store else "Unknown Store"
-    
+    context = _context_for(db, appointment, context)
+    service_name, store_name = _service_and_store_names(context)
+
     if cancelled_by_admin:
         # Notify customer
         title = "Appointment Cancelled"
         message = f"Your appointment for {service_name} at {store_name} on {appointment.appointment_date} at {appointment.appointment_time.strftime('%H:%M')} has been cancelled by the store."
-        
+
         create_notification(
             db=db,
             user_id=appointment.user_id,
@@ -228,44 +256,35 @@ def notify_appointment_cancelled(db: Session, appointment: Appointment, cancelle
             message=message,
             appointment_id=appointment.id
         )
-    else:
+    elif context.store_admin:
         # Notify store admin
-        store_admin = db.query(User).filter(
-            User.store_id == appointment.store_id,
-            User.is_active == True
-        ).first()
-        
-        if store_admin:
-            customer = db.query(User).filter(User.id == appointment.user_id).first()
-            customer_name = customer.username if customer else "Unknown Customer"
-            title = "Appointment Cancelled"
-            message = f"{customer_name}'s appointment for {service_name} on {appointment.appointment_date} at {appointment.appointment_time.strftime('%H:%M')} has been cancelled."
-            
-            create_notification(
-                db=db,
-                user_id=store_admin.id,
-                notification_type=NotificationType.APPOINTMENT_CANCELLED,
-                title=title,
-                message=message,
-                appointment_id=appointment.id
-            )
-
-
-def notify_appointment_completed(db: Session, appointment: Appointment):
+        customer_name = context.customer.username if context.customer else "Unknown Customer"
+        title = "Appointment Cancelled"
+        message = f"{customer_name}'s appointment for {service_name} on {appointment.appointment_date} at {appointment.appointment_time.strftime('%H:%M')} has been cancelled."
+
+        create_notification(
+            db=db,
+            user_id=context.store_admin.id,
+            notification_type=NotificationType.APPOINTMENT_CANCELLED,
+            title=title,
+            message=message,
+            appointment_id=appointment.id
+        )
+
+
+def notify_appointment_completed(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
     Notify customer when their appointment is completed
     """
-    # Get service and store details
-    from app.models.service import Service
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    store_name = store.name if store else "Unknown Store"
-    
+    service_name, store_name = _service_and_store_names(_context_for(db, appointment, context))
+
     title = "Appointment Completed"
     message = f"Your appointment for {service_name} at {store_name} has been completed. Thank you for choosing us!"
-    
+
     create_notification(
         db=db,
         user_id=appointment.user_id,
@@ -276,28 +295,20 @@ def notify_appointment_completed(db: Session, appointment: Appointment):
     )
 
 
-def notify_appointment_rescheduled(db: Session, appointment: Appointment):
+def notify_appointment_rescheduled(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
     Notify store admin when a customer reschedules an appointment
     """
-    db.refresh(appointment)
-
-    store_admin = db.query(User).filter(
-        User.store_id == appointment.store_id,
-        User.is_active == True
-    ).first()
-
-    if not store_admin:
+    context = _context_for(db, appointment, context)
+    if not context.store_admin:
         return
 
-    from app.models.service import Service
-    from app.models.user import User as UserModel
-
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    customer = db.query(UserModel).filter(UserModel.id == appointment.user_id).first()
-
-    service_name = service.name if service else "Unknown Service"
-    customer_name = customer.username if customer else "Unknown Customer"
+    service_name, _ = _service_and_store_names(context)
+    customer_name = context.customer.username if context.customer else "Unknown Customer"
 
     title = "Appointment Rescheduled"
     message = (
@@ -307,7 +318,7 @@ def notify_appointment_rescheduled(db: Session, appointment: Appointment):
 
     create_notification(
         db=db,
-        user_id=store_admin.id,
+        user_id=context.store_admin.id,
         notification_type=NotificationType.APPOINTMENT_CREATED,
         title=title,
         message=message,
@@ -315,95 +326,92 @@ def notify_appointment_rescheduled(db: Session, appointment: Appointment):
     )
 
 
-def notify_appointment_reminder_24h(db: Session, appointment: Appointment):
-    """
-    Send 24-hour reminder notification for upcoming appointment
-    """
-    # Get service and store details
-    from app.models.service import Service
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    store_name = store.name if store else "Unknown Store"
-    
-    title = "Appointment Reminder - Tomorrow"
-    message = (
-        f"Reminder: You have an appointment tomorrow "
-        f"({appointment.appointment_date.strftime('%B %d, %Y')}) at "
-        f"{appointment.appointment_time.strftime('%I:%M %p')} "
-        f"for {service_name} at {store_name}. We look forward to seeing you!"
+def build_appointment_reminder_24h(appointment: Appointment, context: AppointmentContext) -> NotificationSpec:
+    service_name, store_name = _service_and_store_names(context)
+    return NotificationSpec(
+        user_id=appointment.user_id,
+        type=NotificationType.APPOINTMENT_REMINDER,
+        title="Appointment Reminder - Tomorrow",
+        message=(
+            f"Reminder: You have an appointment tomorrow "
+            f"({appointment.appointment_date.strftime('%B %d, %Y')}) at "
+            f"{appointment.appointment_time.strftime('%I:%M %p')} "
+            f"for {service_name} at {store_name}. We look forward to seeing you!"
+        ),
+        appointment_id=appointment.id,
     )
-    
-    create_notification(
-        db=db,
+
+
+def build_appointment_reminder_1h(appointment: Appointment, context: AppointmentContext) -> NotificationSpec:
+    service_name, store_name = _service_and_store_names(context)
+    return NotificationSpec(
         user_id=appointment.user_id,
-        notification_type=NotificationType.APPOINTMENT_REMINDER,
-        title=title,
-        message=message,
-        appointment_id=appointment.id
+        type=NotificationType.APPOINTMENT_REMINDER,
+        title="Appointment Reminder - In 1 Hour",
+        message=(
+            f"Your appointment for {service_name} at {store_name} "
+            f"is in 1 hour at {appointment.appointment_time.strftime('%I:%M %p')}. "
+            f"Please arrive on time. See you soon!"
+        ),
+        appointment_id=appointment.id,
     )
 
 
-def notify_appointment_reminder_1h(db: Session, appointment: Appointment):
+def notify_appointment_reminder_24h(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
-    Send 1-hour reminder notification for upcoming appointment
+    Send 24-hour reminder notification for upcoming appointment
     """
-    # Get service and store details
-    from app.models.service import Service
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
-    
-    service_name = service.name if service else "Unknown Service"
-    store_name = store.name if store else "Unknown Store"
-    
-    title = "Appointment Reminder - In 1 Hour"
-    message = (
-        f"Your appointment for {service_name} at {store_name} "
-        f"is in 1 hour at {appointment.appointment_time.strftime('%I:%M %p')}. "
-        f"Please arrive on time. See you soon!"
-    )
-    
-    create_notification(
-        db=db,
-        user_id=appointment.user_id,
-        notification_type=NotificationType.APPOINTMENT_REMINDER,
-        title=title,
-        message=message,
-        appointment_id=appointment.id
-    )
+    create_notifications_bulk(db, [build_appointment_reminder_24h(appointment, _context_for(db, appointment, context))])
 
 
-def notify_coupon_granted(db: Session, user_id: int, coupon_name: str, discount_text: str, expires_at: Optional[datetime]):
+def notify_appointment_reminder_1h(
+    db: Session,
+    appointment: Appointment,
+    context: Optional[AppointmentContext] = None,
+):
     """
-    Notify user when a coupon is granted
+    Send 1-hour reminder notification for upcoming appointment
     """
-    title = "New Coupon Received"
+    create_notifications_bulk(db, [build_appointment_reminder_1h(appointment, _context_for(db, appointment, context))])
+
+
+def build_coupon_granted(
+    user_id: int,
+    coupon_name: str,
+    discount_text: str,
+    expires_at: Optional[datetime],
+) -> NotificationSpec:
     message = f"You received {coupon_name} ({discount_text})."
     if expires_at:
         message += f" Expires on {expires_at.strftime('%b %d, %Y')}."
+    return NotificationSpec(user_id, NotificationType.COUPON_GRANTED, "New Coupon Received", message)
 
-    create_notification(
-        db=db,
-        user_id=user_id,
-        notification_type=NotificationType.COUPON_GRANTED,
-        title=title,
-        message=message
-    )
 
-
-def notify_points_earned(db: Session, appointment: Appointment, points: int):
+def notify_coupon_granted(db: Session, user_id: int, coupon_name: str, discount_text: str, expires_at: Optional[datetime]):
     """
-    Notify user when points are earned
+    Notify user when a coupon is granted
     """
-    from app.models.service import Service
-    from app.models.store import Store
+    create_notifications_bulk(db, [build_coupon_granted(user_id, coupon_name, discount_text, expires_at)])
 
-    service = db.query(Service).filter(Service.id == appointment.service_id).first()
-    store = db.query(Store).filter(Store.id == appointment.store_id).first()
 
-    service_name = service.name if service else "your service"
-    store_name = store.name if store else "the salon"
+def notify_points_earned(
+    db: Session,
+    appointment: Appointment,
+    points: int,
+    context: Optional[AppointmentContext] = None,
+):
+    """
+    Notify user when points are earned
+    """
+    service_name, store_name = _service_and_store_names(
+        _context_for(db, appointment, context),
+        service_default="your service",
+        store_default="the salon",
+    )
 
     title = "Points Earned"
     message = f"You earned {points} points for {service_name} at {store_name}."
@@ -471,21 +479,21 @@ def notify_gift_card_claimed(db: Session, purchaser_id: int, recipient_name: str
     )
 
 
-def notify_gift_card_expiring(db: Session, purchaser_id: int, recipient_phone: Optional[str], expires_at: Optional[datetime]):
-    """
-    Notify purchaser when a gift card transfer is expiring soon
-    """
-    title = "Gift Card Expiring Soon"
+def build_gift_card_expiring(
+    purchaser_id: int,
+    recipient_phone: Optional[str],
+    expires_at: Optional[datetime],
+) -> NotificationSpec:
     recipient_text = recipient_phone or "the recipient"
     if expires_at:
         message = f"The gift card sent to {recipient_text} will expire on {expires_at.strftime('%b %d, %Y')}."
     else:
         message = f"The gift card sent to {recipient_text} is expiring soon."
+    return NotificationSpec(purchaser_id, NotificationType.GIFT_CARD_EXPIRING, "Gift Card Expiring Soon", message)
 
-    create_notification(
-        db=db,
-        user_id=purchaser_id,
-        notification_type=NotificationType.GIFT_CARD_EXPIRING,
-        title=title,
-        message=message
-    )
+
+def notify_gift_card_expiring(db: Session, purchaser_id: int, recipient_phone: Optional[str], expires_at: Optional[datetime]):
+    """
+    Notify purchaser when a gift card transfer is expiring soon
+    """
+    create_notifications_bulk(db, [build_gift_card_expiring(purchaser_id, recipient_phone, expires_at)])
@@ -0,0 +1,142 @@
+"""
+Authenticated-principal cache for get_current_user.
+
+A principal is the user's column values plus the risk restriction expiry,
+cached per (user id, version). A short in-process tier sits in front of
+cache_service. Writes that change a user call invalidate_principal after
+commit, which bumps the user's version counter so every process misses on
+its next request.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.risk import UserRiskState
+from app.models.user import User
+from app.services import cache_service
+
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_LOCAL_TTL_SECONDS = 5
+PRINCIPAL_VERSION_TTL_SECONDS = 86400
+
+# The password hash never leaves the database; it loads lazily if accessed.
+_EXCLUDED_COLUMNS = {"password_hash"}
+
+_LOCAL_LOCK = threading.Lock()
+_LOCAL_PRINCIPALS: dict[tuple[int, int], tuple[float, dict[str, Any]]] = {}
+
+
+def _version_key(user_id: int) -> str:
+    return f"auth:principal-version:{user_id}"
+
+
+def _principal_key(user_id: int, version: int) -> str:
+    return f"auth:principal:{user_id}:{version}"
+
+
+def _user_columns() -> list:
+    return [attr for attr in sa_inspect(User).column_attrs if attr.key not in _EXCLUDED_COLUMNS]
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _load_principal(db: Session, user_id: int) -> Optional[dict[str, Any]]:
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return None
+    fields = {attr.key: _dump(getattr(user, attr.key)) for attr in _user_columns()}
+    restricted_until = None
+    if not user.is_admin and user.store_id is None:
+        restricted_until = (
+            db.query(UserRiskState.restricted_until)
+            .filter(UserRiskState.user_id == user.id)
+            .scalar()
+        )
+    return {"user": fields, "restricted_until": _dump(restricted_until)}
+
+
+def _get_local(user_id: int, version: int) -> Optional[dict[str, Any]]:
+    now = time.monotonic()
+    with _LOCAL_LOCK:
+        entry = _LOCAL_PRINCIPALS.get((user_id, version))
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            _LOCAL_PRINCIPALS.pop((user_id, version), None)
+            return None
+        return entry[1]
+
+
+def _set_local(user_id: int, version: int, principal: dict[str, Any]) -> None:
+    now = time.monotonic()
+    with _LOCAL_LOCK:
+        if len(_LOCAL_PRINCIPALS) > 10000:
+            for key in [key for key, (expires_at, _) in _LOCAL_PRINCIPALS.items() if expires_at <= now]:
+                _LOCAL_PRINCIPALS.pop(key, None)
+        _LOCAL_PRINCIPALS[(user_id, version)] = (now + PRINCIPAL_LOCAL_TTL_SECONDS, principal)
+
+
+def get_principal(db: Session, user_id: int) -> Optional[dict[str, Any]]:
+    """Return the cached principal of ``user_id``, loading it on a miss; None if no such user."""
+    version = cache_service.get_counters([_version_key(user_id)])[0]
+    principal = _get_local(user_id, version)
+    if principal is not None:
+        return principal
+
+    cache_key = _principal_key(user_id, version)
+    principal = cache_service.get_json(cache_key)
+    if principal is None:
+        principal = _load_principal(db, user_id)
+        if principal is None:
+            return None
+        cache_service.set_json(cache_key, principal, PRINCIPAL_CACHE_TTL_SECONDS)
+    _set_local(user_id, version, principal)
+    return principal
+
+
+def restricted_until(principal: dict[str, Any]) -> Optional[datetime]:
+    return _parse_datetime(principal.get("restricted_until"))
+
+
+def attach_user(db: Session, principal: dict[str, Any]) -> User:
+    """
+    Rebuild the principal's User and attach it to ``db`` without a query.
+
+    The instance behaves like a loaded row: handlers may read it, change it
+    and commit. Attributes not cached load on first access.
+    """
+    fields = principal["user"]
+    values = {}
+    for attr in _user_columns():
+        value = fields.get(attr.key)
+        if value is not None:
+            python_type = attr.columns[0].type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+        values[attr.key] = value
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_principal(user_id: Optional[int]) -> None:
+    """Drop cached principals of ``user_id``; call after committing a change to the user or their restriction."""
+    if user_id is None:
+        return
+    cache_service.increment_many([(_version_key(int(user_id)), PRINCIPAL_VERSION_TTL_SECONDS)])
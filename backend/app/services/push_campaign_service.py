@@ -0,0 +1,296 @@
+"""
+Background fan-out for super-admin batch pushes.
+
+``create_job`` persists the request and returns immediately; a runner thread
+in every web / scheduler process claims queued jobs with a conditional
+UPDATE that stamps a fresh ``claim_token`` (so exactly one process runs each
+job). Every later write by the runner, including the heartbeat renewed
+before each chunk, is conditional on that token, so a slow runner whose job
+was reclaimed stops instead of sending alongside the new owner. The runner
+resolves the eligible users
+in chunked bulk queries and hands each chunk of PUSH_CAMPAIGN_CHUNK_SIZE
+users to push_service.send_push_to_users, which sends all of their tokens
+as one concurrent APNs batch. Counts and ``last_user_id`` are committed
+after every chunk, so the status endpoint shows progress and a job whose
+runner died (no heartbeat for PUSH_CAMPAIGN_STALE_SECONDS) is reclaimed and
+resumes after the last finished chunk. On shutdown a running job is put back
+in the queue between chunks.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment
+from app.models.push_campaign_job import PushCampaignJob
+from app.models.user import User
+from app.services import push_service
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 2.0
+_INSTANCE_ID = uuid.uuid4().hex[:12]
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+def _chunk_size() -> int:
+    return max(1, int(settings.PUSH_CAMPAIGN_CHUNK_SIZE))
+
+
+def _chunks(values: List[int], size: int) -> List[List[int]]:
+    return [values[index:index + size] for index in range(0, len(values), size)]
+
+
+def create_job(
+    db: Session,
+    *,
+    created_by: Optional[int],
+    title: str,
+    message: str,
+    user_ids: Optional[List[int]],
+    store_id: Optional[int],
+    max_users: int,
+    custom_data: Optional[Dict[str, Any]],
+) -> PushCampaignJob:
+    job = PushCampaignJob(
+        created_by=created_by,
+        status=STATUS_QUEUED,
+        title=title,
+        message=message,
+        user_ids=json.dumps(sorted({int(user_id) for user_id in user_ids or [] if int(user_id) > 0})),
+        store_id=store_id,
+        max_users=int(max_users),
+        custom_data=json.dumps(custom_data) if custom_data is not None else None,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _RUNNER.wake()
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[PushCampaignJob]:
+    return db.query(PushCampaignJob).filter(PushCampaignJob.id == int(job_id)).first()
+
+
+def claim_next_job(db: Session) -> Optional[Tuple[int, str]]:
+    """
+    Claim the oldest queued job, or a running one whose runner stopped
+    heartbeating; returns ``(job_id, claim_token)``.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=max(30, int(settings.PUSH_CAMPAIGN_STALE_SECONDS)))
+    claimable = or_(
+        PushCampaignJob.status == STATUS_QUEUED,
+        (PushCampaignJob.status == STATUS_RUNNING) & (PushCampaignJob.heartbeat_at < stale_before),
+    )
+    candidate_ids = [
+        int(row[0])
+        for row in db.query(PushCampaignJob.id).filter(claimable).order_by(PushCampaignJob.id.asc()).limit(5).all()
+    ]
+    for job_id in candidate_ids:
+        token = uuid.uuid4().hex
+        claimed = (
+            db.query(PushCampaignJob)
+            .filter(PushCampaignJob.id == job_id, claimable)
+            .update(
+                {"status": STATUS_RUNNING, "claim_token": token, "heartbeat_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            return job_id, token
+    return None
+
+
+def _update_claimed(db: Session, job_id: int, claim_token: str, values: Dict[str, Any]) -> bool:
+    """Apply ``values`` and renew the heartbeat only while ``claim_token`` still holds the job."""
+    updated = (
+        db.query(PushCampaignJob)
+        .filter(
+            PushCampaignJob.id == job_id,
+            PushCampaignJob.claim_token == claim_token,
+            PushCampaignJob.status == STATUS_RUNNING,
+        )
+        .update({**values, "heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        logger.warning("Push campaign job %s was reclaimed by another runner; stopping", job_id)
+    return bool(updated)
+
+
+def _resolve_targets(db: Session, job: PushCampaignJob) -> tuple[List[int], bool]:
+    candidate_ids = set(json.loads(job.user_ids or "[]"))
+    if job.store_id is not None:
+        booked_rows = (
+            db.query(Appointment.user_id)
+            .filter(Appointment.store_id == int(job.store_id))
+            .distinct()
+            .all()
+        )
+        candidate_ids.update(int(row[0]) for row in booked_rows if row[0])
+
+    sorted_ids = sorted(candidate_ids)
+    truncated = len(sorted_ids) > job.max_users
+    sorted_ids = sorted_ids[: job.max_users]
+
+    eligible_ids: List[int] = []
+    for chunk in _chunks(sorted_ids, _chunk_size()):
+        rows = (
+            db.query(User.id)
+            .filter(User.id.in_(chunk), User.is_active == True, User.is_admin == False)
+            .all()
+        )
+        eligible_ids.extend(sorted(int(row[0]) for row in rows))
+    return eligible_ids, truncated
+
+
+def run_job(db: Session, job_id: int, claim_token: str, stop_event: Optional[Event] = None) -> None:
+    """
+    Fan out a job claimed with ``claim_token`` chunk by chunk, committing
+    progress after each one. Stops as soon as the token no longer holds the
+    job; if ``stop_event`` is set between chunks the job goes back to the queue.
+    """
+    job = get_job(db, job_id)
+    if job is None:
+        return
+    try:
+        target_ids, truncated = _resolve_targets(db, job)
+        started = {"started_at": datetime.utcnow()} if job.started_at is None else {}
+        if not _update_claimed(
+            db, job_id, claim_token, {**started, "target_user_count": len(target_ids), "truncated": truncated}
+        ):
+            return
+
+        custom_data = json.loads(job.custom_data) if job.custom_data else {"notification_type": "admin_batch_push"}
+        if job.store_id is not None and isinstance(custom_data, dict):
+            custom_data = {**custom_data, "store_id": int(job.store_id)}
+
+        remaining = [user_id for user_id in target_ids if job.last_user_id is None or user_id > job.last_user_id]
+        for chunk in _chunks(remaining, _chunk_size()):
+            if stop_event is not None and stop_event.is_set():
+                _update_claimed(db, job_id, claim_token, {"status": STATUS_QUEUED})
+                return
+            if not _update_claimed(db, job_id, claim_token, {}):
+                return
+            results = push_service.send_push_to_users(
+                db,
+                user_ids=chunk,
+                title=job.title,
+                body=job.message,
+                custom_data=custom_data,
+            )
+            totals = dict.fromkeys(
+                ("sent", "failed", "deactivated", "sent_user_count", "failed_user_count", "skipped_user_count"), 0
+            )
+            for user_id in chunk:
+                result = results.get(user_id, {})
+                user_sent = int(result.get("sent", 0))
+                user_failed = int(result.get("failed", 0))
+                user_deactivated = int(result.get("deactivated", 0))
+                totals["sent"] += user_sent
+                totals["failed"] += user_failed
+                totals["deactivated"] += user_deactivated
+                if user_sent > 0:
+                    totals["sent_user_count"] += 1
+                elif user_failed > 0 or user_deactivated > 0:
+                    totals["failed_user_count"] += 1
+                else:
+                    totals["skipped_user_count"] += 1
+            progress = {name: getattr(PushCampaignJob, name) + value for name, value in totals.items()}
+            progress["processed_user_count"] = PushCampaignJob.processed_user_count + len(chunk)
+            progress["last_user_id"] = chunk[-1]
+            if not _update_claimed(db, job_id, claim_token, progress):
+                return
+
+        _update_claimed(db, job_id, claim_token, {"status": STATUS_COMPLETED, "finished_at": datetime.utcnow()})
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Push campaign job %s failed", job_id)
+        _update_claimed(
+            db,
+            job_id,
+            claim_token,
+            {
+                "status": STATUS_FAILED,
+                "error": (str(exc) or type(exc).__name__)[:500],
+                "finished_at": datetime.utcnow(),
+            },
+        )
+
+
+def run_pending_jobs(db: Session, stop_event: Optional[Event] = None) -> int:
+    processed = 0
+    while stop_event is None or not stop_event.is_set():
+        claim = claim_next_job(db)
+        if claim is None:
+            return processed
+        job_id, claim_token = claim
+        logger.info("Push campaign job %s claimed by %s", job_id, _INSTANCE_ID)
+        run_job(db, job_id, claim_token, stop_event=stop_event)
+        processed += 1
+    return processed
+
+
+class _CampaignRunner:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._wake_event = Event()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = Thread(target=self._run, name="push-campaign-runner", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_seconds: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._stop_event.set()
+            self._wake_event.set()
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout_seconds)
+
+    def wake(self) -> None:
+        self._wake_event.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            db = SessionLocal()
+            try:
+                run_pending_jobs(db, stop_event=self._stop_event)
+            except Exception:
+                logger.exception("Push campaign runner pass failed")
+            finally:
+                db.close()
+            self._wake_event.wait(_POLL_SECONDS)
+            self._wake_event.clear()
+
+
+_RUNNER = _CampaignRunner()
+
+
+def start_campaign_runner() -> None:
+    _RUNNER.start()
+
+
+def shutdown_campaign_runner(timeout_seconds: float = 5.0) -> None:
+    _RUNNER.stop(timeout_seconds=timeout_seconds)
@@ -0,0 +1,228 @@
+"""
+Durable push delivery through the push_outbox table.
+
+Notification writers call ``stage_pushes`` before committing, so the outbox
+row commits (or rolls back) with its Notification; nothing is dropped when
+a queue fills up or lost on restart. A dispatcher thread in every web /
+scheduler process claims up to ASYNC_PUSH_BATCH_SIZE due rows at a time,
+loads their notifications in one query and pushes them as one concurrent
+APNs batch through push_service.send_push_for_notifications.
+
+Claims are leases: on MySQL / PostgreSQL the candidate rows are locked with
+``FOR UPDATE SKIP LOCKED`` so concurrent dispatchers pick disjoint rows;
+elsewhere (SQLite) a conditional UPDATE on expired leases does the same
+job. A dispatcher that dies mid-batch leaves its lease to expire and the
+rows are delivered again, so delivery is at-least-once.
+
+Delivered rows are deleted. A notification whose tokens all failed with a
+retryable error (transport, 429, 5xx) is retried with exponential backoff;
+after PUSH_OUTBOX_MAX_ATTEMPTS its row stays behind with status ``dead``.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.notification import Notification
+from app.models.push_outbox import PushOutbox
+from app.services import push_service
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 1.0
+_LEASE_SECONDS = 120
+_MAX_BACKOFF_SECONDS = 15 * 60
+_SKIP_LOCKED_DIALECTS = {"mysql", "mariadb", "postgresql"}
+
+STATUS_PENDING = "pending"
+STATUS_DEAD = "dead"
+
+_QUEUE_ENQUEUED = metrics.BACKGROUND_QUEUE_ENQUEUED.labels(queue="push")
+
+
+def stage_pushes(db: Session, notification_ids: Iterable[int]) -> int:
+    """
+    Add outbox rows for notifications flushed in ``db``'s open transaction.
+    The caller commits; call ``wake_dispatcher`` afterwards.
+    """
+    now = datetime.utcnow()
+    rows = [
+        PushOutbox(notification_id=int(notification_id), status=STATUS_PENDING, attempts=0, available_at=now)
+        for notification_id in notification_ids
+    ]
+    if rows:
+        db.add_all(rows)
+        _QUEUE_ENQUEUED.inc(len(rows))
+    return len(rows)
+
+
+def _due_filter(now: datetime):
+    return (
+        (PushOutbox.status == STATUS_PENDING)
+        & (PushOutbox.available_at <= now)
+        & or_(PushOutbox.claimed_until.is_(None), PushOutbox.claimed_until < now)
+    )
+
+
+def claim_batch(db: Session, limit: int) -> List[PushOutbox]:
+    """Lease up to ``limit`` due rows to this caller and return them."""
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    lease = {"claim_token": token, "claimed_until": now + timedelta(seconds=_LEASE_SECONDS)}
+    query = db.query(PushOutbox.id).filter(_due_filter(now)).order_by(PushOutbox.id.asc()).limit(limit)
+    if db.get_bind().dialect.name in _SKIP_LOCKED_DIALECTS:
+        candidate_ids = [int(row[0]) for row in query.with_for_update(skip_locked=True).all()]
+        if candidate_ids:
+            db.query(PushOutbox).filter(PushOutbox.id.in_(candidate_ids)).update(lease, synchronize_session=False)
+    else:
+        candidate_ids = [int(row[0]) for row in query.all()]
+        if candidate_ids:
+            # Re-checking the lease makes the UPDATE the claim; rows another dispatcher took are skipped.
+            db.query(PushOutbox).filter(PushOutbox.id.in_(candidate_ids), _due_filter(now)).update(
+                lease, synchronize_session=False
+            )
+    db.commit()
+    if not candidate_ids:
+        return []
+    return db.query(PushOutbox).filter(PushOutbox.claim_token == token).order_by(PushOutbox.id.asc()).all()
+
+
+def _retry_delay_seconds(attempts: int) -> float:
+    base = max(1, int(settings.PUSH_OUTBOX_RETRY_BASE_SECONDS))
+    delay = min(_MAX_BACKOFF_SECONDS, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _schedule_retry(row: PushOutbox, error: str, now: datetime) -> str:
+    row.attempts = int(row.attempts or 0) + 1
+    row.last_error = error[:500]
+    row.claim_token = None
+    row.claimed_until = None
+    if row.attempts >= max(1, int(settings.PUSH_OUTBOX_MAX_ATTEMPTS)):
+        row.status = STATUS_DEAD
+        logger.warning(
+            "Push for notification_id=%s gave up after %s attempts: %s",
+            row.notification_id,
+            row.attempts,
+            error,
+        )
+        return "dead"
+    row.available_at = now + timedelta(seconds=_retry_delay_seconds(row.attempts))
+    return "retried"
+
+
+def deliver_batch(db: Session, rows: List[PushOutbox]) -> Dict[str, int]:
+    """Push a claimed batch and settle each row: delete, reschedule or mark dead."""
+    stats = {"delivered": 0, "retried": 0, "dead": 0, "missing": 0}
+    if not rows:
+        return stats
+
+    notification_ids = sorted({int(row.notification_id) for row in rows})
+    notifications = db.query(Notification).filter(Notification.id.in_(notification_ids)).all()
+    found_ids = {int(notification.id) for notification in notifications}
+
+    try:
+        results = push_service.send_push_for_notifications(db, notifications) if notifications else {}
+        batch_error: Optional[str] = None
+    except Exception as exc:
+        db.rollback()
+        logger.warning("Push outbox batch failed (%s rows): %s", len(rows), exc, exc_info=True)
+        results = {}
+        batch_error = str(exc) or type(exc).__name__
+
+    now = datetime.utcnow()
+    for row in rows:
+        notification_id = int(row.notification_id)
+        if notification_id not in found_ids:
+            db.delete(row)
+            stats["missing"] += 1
+            continue
+        if batch_error is not None:
+            stats[_schedule_retry(row, batch_error, now)] += 1
+            continue
+        result = results.get(notification_id, {})
+        if int(result.get("retryable", 0)) > 0 and int(result.get("sent", 0)) == 0:
+            stats[_schedule_retry(row, f"{result['retryable']} retryable APNs failures", now)] += 1
+            continue
+        db.delete(row)
+        stats["delivered"] += 1
+    db.commit()
+
+    for outcome, count in stats.items():
+        if count:
+            metrics.PUSH_OUTBOX_ROWS.labels(outcome=outcome).inc(count)
+    return stats
+
+
+def process_due(db: Session, limit: Optional[int] = None) -> int:
+    """Claim and deliver one batch; returns the number of rows claimed."""
+    rows = claim_batch(db, limit or max(1, int(settings.ASYNC_PUSH_BATCH_SIZE)))
+    deliver_batch(db, rows)
+    return len(rows)
+
+
+class _OutboxDispatcher:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._wake_event = Event()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = Thread(target=self._run, name="push-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout_seconds: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._stop_event.set()
+            self._wake_event.set()
+        if thread and thread.is_alive():
+            thread.join(timeout=timeout_seconds)
+
+    def wake(self) -> None:
+        self._wake_event.set()
+
+    def _run(self) -> None:
+        batch_size = max(1, int(settings.ASYNC_PUSH_BATCH_SIZE))
+        while not self._stop_event.is_set():
+            claimed = 0
+            db = SessionLocal()
+            try:
+                claimed = process_due(db, batch_size)
+            except Exception:
+                logger.exception("Push outbox dispatch pass failed")
+            finally:
+                db.close()
+            if claimed < batch_size:
+                self._wake_event.wait(_POLL_SECONDS)
+                self._wake_event.clear()
+
+
+_DISPATCHER = _OutboxDispatcher()
+
+
+def wake_dispatcher() -> None:
+    _DISPATCHER.wake()
+
+
+def start_dispatcher() -> None:
+    _DISPATCHER.start()
+
+
+def shutdown_dispatcher(timeout_seconds: float = 5.0) -> None:
+    _DISPATCHER.stop(timeout_seconds=timeout_seconds)
@@ -1,5 +1,8 @@
 """
 APNs push notification service.
+
+Every send resolves its users' active iOS tokens in one query and hands the
+whole batch to apns_client, which posts them as concurrent HTTP/2 streams.
 """
 from __future__ import annotations
 
@@ -7,16 +10,17 @@ import atexit
 import logging
 import os
 import time
+from collections import defaultdict
 from threading import Lock
-from typing import Dict, Optional
+from typing import Dict, Hashable, List, NamedTuple, Optional
 
-import httpx
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.crud import push_device_token as crud_push_device_token
 from app.models.notification import Notification
 from app.models.user import User
+from app.services import apns_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +28,6 @@ _APNS_AUTH_TOKEN: Optional[str] = None
 _APNS_AUTH_TOKEN_ISSUED_AT: int = 0
 _APNS_AUTH_TOKEN_TTL_SECONDS = 50 * 60  # APNs allows max 60 minutes
 _APNS_AUTH_TOKEN_LOCK = Lock()
-_HTTP_CLIENT_LOCK = Lock()
-_HTTP_CLIENT: Optional[httpx.Client] = None
 
 _INVALID_TOKEN_REASONS = {
     "BadDeviceToken",
@@ -34,6 +36,14 @@ _INVALID_TOKEN_REASONS = {
 }
 
 
+class _PushMessage(NamedTuple):
+    key: Hashable
+    user_id: int
+    title: str
+    body: str
+    custom_data: Optional[Dict[str, str | int | float | bool]]
+
+
 def is_push_enabled() -> bool:
     if not settings.APNS_ENABLED:
         return False
@@ -87,28 +97,8 @@ def _build_apns_auth_token() -> Optional[str]:
         return None
 
 
-def _get_http_client() -> httpx.Client:
-    global _HTTP_CLIENT
-    with _HTTP_CLIENT_LOCK:
-        if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
-            _HTTP_CLIENT = httpx.Client(
-                http2=True,
-                timeout=settings.APNS_TIMEOUT_SECONDS,
-            )
-        return _HTTP_CLIENT
-
-
 def close_http_client() -> None:
-    global _HTTP_CLIENT
-    with _HTTP_CLIENT_LOCK:
-        client = _HTTP_CLIENT
-        _HTTP_CLIENT = None
-    if client is None:
-        return
-    try:
-        client.close()
-    except Exception as exc:
-        logger.warning("Failed to close APNs HTTP client cleanly: %s", exc)
+    apns_client.close()
 
 
 atexit.register(close_http_client)
@@ -121,104 +111,166 @@ def _resolve_environment(token_environment: Optional[str]) -> str:
     return "sandbox" if settings.APNS_USE_SANDBOX else "production"
 
 
-def _resolve_apns_host(environment: str) -> str:
-    if environment == "production":
-        return "https://api.push.apple.com"
-    return "https://api.sandbox.push.apple.com"
-
-
-def send_push_to_user(
-    db: Session,
+def _build_apns_request(
+    token_row,
     *,
-    user_id: int,
+    auth_token: str,
     title: str,
     body: str,
-    custom_data: Optional[Dict[str, str | int | float | bool]] = None,
-) -> Dict[str, int]:
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user or not bool(getattr(user, "push_notifications_enabled", True)):
-        return {"sent": 0, "failed": 0, "deactivated": 0}
-
-    if not is_push_enabled():
-        return {"sent": 0, "failed": 0, "deactivated": 0}
-
-    auth_token = _build_apns_auth_token()
-    if not auth_token:
-        return {"sent": 0, "failed": 0, "deactivated": 0}
-
-    tokens = crud_push_device_token.get_active_user_tokens(db, user_id=user_id, platform="ios")
-    if not tokens:
-        return {"sent": 0, "failed": 0, "deactivated": 0}
-
-    result = {"sent": 0, "failed": 0, "deactivated": 0}
-    client = _get_http_client()
-
-    for token_row in tokens:
-        environment = _resolve_environment(token_row.apns_environment)
-        endpoint = f"{_resolve_apns_host(environment)}/3/device/{token_row.device_token}"
-        payload = {
-            "aps": {
-                "alert": {"title": title, "body": body},
-                "sound": "default",
-            }
+    custom_data: Optional[Dict[str, str | int | float | bool]],
+) -> apns_client.ApnsRequest:
+    payload = {
+        "aps": {
+            "alert": {"title": title, "body": body},
+            "sound": "default",
         }
-        if custom_data:
-            payload.update(custom_data)
-
-        headers = {
+    }
+    if custom_data:
+        payload.update(custom_data)
+
+    return apns_client.ApnsRequest(
+        token_id=int(token_row.id),
+        device_token=token_row.device_token,
+        environment=_resolve_environment(token_row.apns_environment),
+        payload=payload,
+        headers={
             "authorization": f"bearer {auth_token}",
             "apns-topic": settings.APNS_BUNDLE_ID,
             "apns-push-type": "alert",
             "apns-priority": "10",
             "content-type": "application/json",
-        }
+        },
+    )
 
-        try:
-            response = client.post(endpoint, json=payload, headers=headers)
-        except Exception as exc:
-            logger.warning("APNs request failed (token_id=%s): %s", token_row.id, exc)
-            result["failed"] += 1
-            continue
 
-        if response.status_code == 200:
-            result["sent"] += 1
-            continue
+def _deliver(db: Session, messages: List[_PushMessage]) -> Dict[Hashable, Dict[str, int]]:
+    """
+    Send every message to every active iOS token of its user as one concurrent
+    batch, then tally results per message key and deactivate rejected tokens.
+    ``retryable`` counts failures worth another attempt (see ApnsResult.retryable).
+    """
+    results: Dict[Hashable, Dict[str, int]] = {
+        message.key: {"sent": 0, "failed": 0, "deactivated": 0, "retryable": 0} for message in messages
+    }
+    if not messages or not is_push_enabled():
+        return results
 
-        result["failed"] += 1
-        reason = None
-        try:
-            reason = response.json().get("reason")
-        except Exception:
-            reason = None
+    auth_token = _build_apns_auth_token()
+    if not auth_token:
+        return results
+
+    user_ids = {int(message.user_id) for message in messages}
+    enabled_user_ids = {
+        int(row[0])
+        for row in db.query(User.id)
+        .filter(User.id.in_(sorted(user_ids)), User.push_notifications_enabled == True)
+        .all()
+    }
+    tokens_by_user: Dict[int, list] = defaultdict(list)
+    for token_row in crud_push_device_token.get_active_tokens_for_users(
+        db, user_ids=enabled_user_ids, platform="ios"
+    ):
+        tokens_by_user[int(token_row.user_id)].append(token_row)
+
+    request_keys: List[Hashable] = []
+    requests: List[apns_client.ApnsRequest] = []
+    for message in messages:
+        for token_row in tokens_by_user.get(int(message.user_id), []):
+            request_keys.append(message.key)
+            requests.append(
+                _build_apns_request(
+                    token_row,
+                    auth_token=auth_token,
+                    title=message.title,
+                    body=message.body,
+                    custom_data=message.custom_data,
+                )
+            )
 
+    invalid_tokens: Dict[Hashable, List[str]] = defaultdict(list)
+    for key, response in zip(request_keys, apns_client.send_many(requests)):
+        if response.ok:
+            results[key]["sent"] += 1
+            continue
+        results[key]["failed"] += 1
+        if response.retryable:
+            results[key]["retryable"] += 1
+        if response.error:
+            logger.warning("APNs request failed (token_id=%s): %s", response.token_id, response.error)
+            continue
         logger.warning(
             "APNs non-200 response (token_id=%s status=%s reason=%s)",
-            token_row.id,
+            response.token_id,
             response.status_code,
-            reason,
+            response.reason,
         )
+        if response.reason in _INVALID_TOKEN_REASONS:
+            invalid_tokens[key].append(response.device_token)
 
-        if reason in _INVALID_TOKEN_REASONS:
-            deactivated = crud_push_device_token.deactivate_tokens_by_value(
-                db, token_values=[token_row.device_token]
-            )
-            result["deactivated"] += deactivated
+    for key, token_values in invalid_tokens.items():
+        results[key]["deactivated"] += crud_push_device_token.deactivate_tokens_by_value(
+            db, token_values=token_values
+        )
+    return results
 
-    return result
 
+def send_push_to_user(
+    db: Session,
+    *,
+    user_id: int,
+    title: str,
+    body: str,
+    custom_data: Optional[Dict[str, str | int | float | bool]] = None,
+) -> Dict[str, int]:
+    return send_push_to_users(
+        db,
+        user_ids=[int(user_id)],
+        title=title,
+        body=body,
+        custom_data=custom_data,
+    )[int(user_id)]
 
-def send_push_for_notification(db: Session, notification: Notification) -> Dict[str, int]:
+
+def send_push_to_users(
+    db: Session,
+    *,
+    user_ids: List[int],
+    title: str,
+    body: str,
+    custom_data: Optional[Dict[str, str | int | float | bool]] = None,
+) -> Dict[int, Dict[str, int]]:
+    """Send the same alert to many users in one concurrent batch; results are keyed by user id."""
+    messages = [
+        _PushMessage(int(user_id), int(user_id), title, body, custom_data)
+        for user_id in dict.fromkeys(int(user_id) for user_id in user_ids)
+    ]
+    return _deliver(db, messages)
+
+
+def _notification_custom_data(notification: Notification) -> Dict[str, str | int | float | bool]:
     custom_data: Dict[str, str | int | float | bool] = {
         "notification_id": int(notification.id),
         "notification_type": str(notification.type.value if hasattr(notification.type, "value") else notification.type),
     }
     if notification.appointment_id is not None:
         custom_data["appointment_id"] = int(notification.appointment_id)
+    return custom_data
 
-    return send_push_to_user(
-        db,
-        user_id=int(notification.user_id),
-        title=notification.title,
-        body=notification.message,
-        custom_data=custom_data,
-    )
+
+def send_push_for_notification(db: Session, notification: Notification) -> Dict[str, int]:
+    return send_push_for_notifications(db, [notification])[int(notification.id)]
+
+
+def send_push_for_notifications(db: Session, notifications: List[Notification]) -> Dict[int, Dict[str, int]]:
+    """Push many notifications in one concurrent batch; results are keyed by notification id."""
+    messages = [
+        _PushMessage(
+            int(notification.id),
+            int(notification.user_id),
+            notification.title,
+            notification.message,
+            _notification_custom_data(notification),
+        )
+        for notification in notifications
+    ]
+    return _deliver(db, messages)
@@ -11,11 +11,12 @@ from app.crud import appointment_reminder as reminder_crud
 from app.core.config import settings
 from app.models.appointment import Appointment
 from app.models.appointment_reminder import AppointmentReminder
-from app.models.notification import Notification, NotificationType
+from app.models.notification import NotificationType
 from app.models.service import Service
 from app.models.store import Store
 from app.models.user import User
-from app.services.notification_service import enqueue_notification_push_batch
+from app.services import notification_service
+from app.services.notification_service import NotificationSpec
 
 logger = logging.getLogger(__name__)
 
@@ -81,7 +82,7 @@ def _build_reminder_notification(
     user: User | None,
     store: Store | None,
     service: Service | None,
-) -> Tuple[Notification | None, str | None]:
+) -> Tuple[NotificationSpec | None, str | None]:
     if not appointment:
         return None, f"Appointment {reminder.appointment_id} not found"
     if not user:
@@ -101,7 +102,7 @@ def _build_reminder_notification(
 
     message += " See you soon!"
     return (
-        Notification(
+        NotificationSpec(
             user_id=reminder.user_id,
             type=NotificationType.APPOINTMENT_REMINDER,
             title=title,
@@ -126,7 +127,7 @@ def _process_reminder_batch(
 
     appointments_by_id, users_by_id, stores_by_id, services_by_id = _load_reminder_context(db, reminders)
 
-    notifications_to_create: List[Notification] = []
+    notifications_to_create: List[NotificationSpec] = []
     sent_reminder_ids: List[int] = []
     failed_errors: Dict[int, str] = {}
 
@@ -160,12 +161,9 @@ def _process_reminder_batch(
             failed_errors[int(reminder.id)] = str(exc)
             batch_stats["failed"] += 1
 
-    notification_ids: List[int] = []
     if notifications_to_create:
         try:
-            db.add_all(notifications_to_create)
-            db.flush()
-            notification_ids = [int(notification.id) for notification in notifications_to_create if notification.id is not None]
+            notification_service.stage_notifications(db, notifications_to_create)
         except Exception as exc:
             db.rollback()
             error_message = f"Failed to persist reminder notifications batch: {exc}"
@@ -176,6 +174,7 @@ def _process_reminder_batch(
             )
             batch_stats["failed"] += len(sent_reminder_ids)
             sent_reminder_ids = []
+            notifications_to_create = []
 
     try:
         reminder_crud.mark_reminders_as_sent(
@@ -197,7 +196,7 @@ def _process_reminder_batch(
         raise RuntimeError(error_message) from exc
     else:
         batch_stats["sent"] += len(sent_reminder_ids)
-        enqueue_notification_push_batch(notification_ids)
+        notification_service.publish_staged_notifications(spec.user_id for spec in notifications_to_create)
 
     return batch_stats
 
@@ -0,0 +1,235 @@
+"""
+Streaming per-route request latency histograms.
+
+The request pipeline records every request (not only the sampled access
+logs) into an in-process, log-bucketed histogram keyed by hour, method,
+route template and status class. A background thread periodically adds
+the accumulated counts onto request_latency_histograms, so percentiles per
+endpoint cost O(buckets) to read no matter how much traffic there was.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+from bisect import bisect_left
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.system_log import RequestLatencyHistogram
+from app.services import log_rollup_service
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_SECONDS = max(1.0, float(os.getenv("REQUEST_LATENCY_FLUSH_SECONDS", "10")))
+# Pending keys kept while the database is unavailable before new ones are dropped.
+_MAX_PENDING_KEYS = 50_000
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _log_bounds(first_ms: int, last_ms: int, growth: float) -> tuple[int, ...]:
+    bounds: list[int] = []
+    value = float(first_ms)
+    while value < last_ms:
+        bound = int(math.ceil(value))
+        if not bounds or bound > bounds[-1]:
+            bounds.append(bound)
+        value *= growth
+    bounds.append(last_ms)
+    return tuple(bounds)
+
+
+# Ceilings grow ~15% per bucket (about 75 buckets from 1ms to 60s), so an
+# interpolated percentile is within a few percent of the exact value.
+LATENCY_BOUNDS_MS = _log_bounds(1, 60_000, 1.15)
+OVERFLOW_BUCKET_MS = 2_147_483_647
+
+
+def latency_bucket(latency_ms: float) -> int:
+    index = bisect_left(LATENCY_BOUNDS_MS, latency_ms)
+    return LATENCY_BOUNDS_MS[index] if index < len(LATENCY_BOUNDS_MS) else OVERFLOW_BUCKET_MS
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def percentile(buckets: Iterable[tuple[int, int]], quantile: float) -> int:
+    """
+    Estimate a percentile from (upper_bound_ms, count) buckets, interpolating
+    linearly inside the bucket that holds the rank.
+    """
+    ordered = sorted((int(upper), int(count)) for upper, count in buckets if count)
+    total = sum(count for _, count in ordered)
+    if not total:
+        return 0
+    rank = max(1, math.ceil(total * quantile))
+    seen = 0
+    for upper, count in ordered:
+        if seen + count >= rank:
+            index = bisect_left(LATENCY_BOUNDS_MS, upper)
+            lower = LATENCY_BOUNDS_MS[index - 1] if index > 0 else 0
+            if upper == OVERFLOW_BUCKET_MS:
+                return lower
+            return int(round(lower + (upper - lower) * (rank - seen) / count))
+        seen += count
+    return LATENCY_BOUNDS_MS[-1]
+
+
+class _LatencyRecorder:
+    def __init__(self) -> None:
+        self._counts: dict[tuple, int] = {}
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        self.dropped = 0
+
+    def observe(self, method: str, route: str, status_code: int, latency_ms: float, now: Optional[datetime] = None) -> None:
+        key = (
+            log_rollup_service.hour_start(now or datetime.utcnow()),
+            method[:10],
+            route[:255],
+            status_class(status_code),
+            latency_bucket(latency_ms),
+        )
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] += 1
+            elif len(self._counts) < _MAX_PENDING_KEYS:
+                self._counts[key] = 1
+            else:
+                self.dropped += 1
+
+    def pending(self) -> dict[tuple, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self) -> int:
+        """Add the pending counts onto the histogram table; they are kept for the next flush on failure."""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, {}
+            if not counts:
+                return 0
+            rows = [
+                {
+                    "bucket_start": key[0],
+                    "method": key[1],
+                    "route": key[2],
+                    "status_class": key[3],
+                    "upper_bound_ms": key[4],
+                    "count": counts[key],
+                }
+                for key in sorted(counts)
+            ]
+            db = SessionLocal()
+            try:
+                log_rollup_service.upsert_adding(
+                    db,
+                    RequestLatencyHistogram.__table__,
+                    rows,
+                    ("bucket_start", "method", "route", "status_class", "upper_bound_ms"),
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to flush request latency histograms; keeping %s keys", len(counts))
+                with self._lock:
+                    for key, count in counts.items():
+                        self._counts[key] = self._counts.get(key, 0) + count
+                return 0
+            finally:
+                db.close()
+            return len(rows)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="request-latency-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_seconds: float = 2.0) -> None:
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout_seconds)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(_FLUSH_SECONDS):
+            self.flush()
+
+
+_RECORDER = _LatencyRecorder()
+
+
+def observe_request(method: str, route: str, status_code: int, latency_ms: float) -> None:
+    _RECORDER.observe(method, route, status_code, latency_ms)
+
+
+def flush_request_latency() -> int:
+    return _RECORDER.flush()
+
+
+def start_request_latency_flusher() -> None:
+    _RECORDER.start()
+
+
+def shutdown_request_latency_flusher(timeout_seconds: float = 2.0) -> None:
+    _RECORDER.stop(timeout_seconds=timeout_seconds)
+
+
+def overall_percentiles(db: Session, since: datetime, quantiles: Sequence[float] = (0.5, 0.95, 0.99)) -> dict[float, int]:
+    rows = (
+        db.query(RequestLatencyHistogram.upper_bound_ms, func.sum(RequestLatencyHistogram.count))
+        .filter(RequestLatencyHistogram.bucket_start >= since)
+        .group_by(RequestLatencyHistogram.upper_bound_ms)
+        .all()
+    )
+    return {quantile: percentile(rows, quantile) for quantile in quantiles}
+
+
+def route_percentiles(db: Session, since: datetime, limit: int = 50) -> list[dict[str, Any]]:
+    """p50/p95/p99 per (method, route, status class) since ``since``, busiest first."""
+    rows = (
+        db.query(
+            RequestLatencyHistogram.method,
+            RequestLatencyHistogram.route,
+            RequestLatencyHistogram.status_class,
+            RequestLatencyHistogram.upper_bound_ms,
+            func.sum(RequestLatencyHistogram.count),
+        )
+        .filter(RequestLatencyHistogram.bucket_start >= since)
+        .group_by(
+            RequestLatencyHistogram.method,
+            RequestLatencyHistogram.route,
+            RequestLatencyHistogram.status_class,
+            RequestLatencyHistogram.upper_bound_ms,
+        )
+        .all()
+    )
+    grouped: dict[tuple[str, str, str], list[tuple[int, int]]] = {}
+    for method, route, klass, upper, count in rows:
+        grouped.setdefault((method, route, klass), []).append((int(upper), int(count)))
+
+    items = []
+    for (method, route, klass), buckets in grouped.items():
+        items.append(
+            {
+                "method": method,
+                "route": route,
+                "status_class": klass,
+                "count": sum(count for _, count in buckets),
+                "p50_ms": percentile(buckets, 0.5),
+                "p95_ms": percentile(buckets, 0.95),
+                "p99_ms": percentile(buckets, 0.99),
+            }
+        )
+    items.sort(key=lambda item: (-item["count"], item["route"], item["method"], item["status_class"]))
+    return items[:limit]
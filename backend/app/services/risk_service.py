@@ -12,6 +12,8 @@ from app.models.appointment import Appointment
 from app.models.risk import RiskEvent, UserRiskState
 from app.models.user import User
 from app.core.config import settings
+from app.services import cache_service
+from app.services import principal_service
 
 
 RATE_LIMIT_USER_PER_MINUTE = 2
@@ -23,6 +25,11 @@ RISK_RESTRICT_HOURS = 24
 RISK_CANCEL_7D_LIMIT = 3
 RISK_NO_SHOW_30D_LIMIT = 2
 
+# Sliding-window counters kept in cache_service, as (window, bucket) seconds.
+# RiskEvent rows remain the audit trail; booking checks only read counters.
+COUNTED_RISK_EVENT_TYPES = {"appointment_created"}
+RISK_COUNTER_WINDOWS = {"1m": (60, 10), "1h": (3600, 300)}
+
 
 @dataclass
 class RiskDecision:
@@ -32,6 +39,18 @@ class RiskDecision:
     message: Optional[str] = None
 
 
+@dataclass
+class BookingRiskSnapshot:
+    """Everything decide_booking_request needs, loaded up front."""
+    restricted_until: Optional[datetime] = None
+    phone: str = ""
+    user_events_1m: float = 0
+    user_events_1h: float = 0
+    ip_events_1m: float = 0
+    ip_events_1h: float = 0
+    same_day_count: int = 0
+
+
 def _get_or_create_user_risk_state(db: Session, user_id: int) -> UserRiskState:
     state = db.query(UserRiskState).filter(UserRiskState.user_id == user_id).first()
     if state:
@@ -64,9 +83,79 @@ def log_risk_event(
     db.add(event)
     db.commit()
     db.refresh(event)
+    if event_type in COUNTED_RISK_EVENT_TYPES:
+        record_risk_counters(event_type, user_id=user_id, ip_address=ip_address)
     return event
 
 
+def _counter_key(event_type: str, scope: str, subject, bucket_seconds: int, bucket: int) -> str:
+    return f"risk:counter:{event_type}:{scope}:{subject}:{bucket_seconds}:{bucket}"
+
+
+def _counter_subjects(user_id: Optional[int], ip_address: Optional[str]) -> list[tuple[str, object]]:
+    subjects = []
+    if user_id is not None:
+        subjects.append(("user", int(user_id)))
+    if ip_address:
+        subjects.append(("ip", ip_address))
+    return subjects
+
+
+def record_risk_counters(
+    event_type: str,
+    *,
+    user_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> None:
+    timestamp = (now or datetime.now()).timestamp()
+    items = []
+    for scope, subject in _counter_subjects(user_id, ip_address):
+        for window_seconds, bucket_seconds in RISK_COUNTER_WINDOWS.values():
+            bucket = int(timestamp // bucket_seconds)
+            items.append(
+                (
+                    _counter_key(event_type, scope, subject, bucket_seconds, bucket),
+                    window_seconds + bucket_seconds,
+                )
+            )
+    cache_service.increment_many(items)
+
+
+def _window_buckets(window_seconds: int, bucket_seconds: int, timestamp: float) -> list[tuple[int, float]]:
+    # Full buckets inside the window, plus the oldest bucket weighted by the
+    # share of it that still falls inside the window.
+    current = int(timestamp // bucket_seconds)
+    bucket_count = window_seconds // bucket_seconds
+    elapsed = (timestamp % bucket_seconds) / bucket_seconds
+    return [(current - offset, 1.0) for offset in range(bucket_count)] + [
+        (current - bucket_count, 1.0 - elapsed)
+    ]
+
+
+def read_risk_counters(
+    event_type: str,
+    *,
+    user_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> dict[tuple[str, str], float]:
+    """Return {(scope, window): estimated count} for every window, in one cache read."""
+    timestamp = (now or datetime.now()).timestamp()
+    plan = []
+    for scope, subject in _counter_subjects(user_id, ip_address):
+        for window_name, (window_seconds, bucket_seconds) in RISK_COUNTER_WINDOWS.items():
+            for bucket, weight in _window_buckets(window_seconds, bucket_seconds, timestamp):
+                plan.append(
+                    ((scope, window_name), _counter_key(event_type, scope, subject, bucket_seconds, bucket), weight)
+                )
+    values = cache_service.get_counters([key for _, key, _ in plan])
+    totals: dict[tuple[str, str], float] = {}
+    for (target, _key, weight), value in zip(plan, values):
+        totals[target] = totals.get(target, 0.0) + value * weight
+    return totals
+
+
 def _count_risk_events(
     db: Session,
     *,
@@ -94,16 +183,34 @@ def _count_user_appointments_on_date(db: Session, *, user_id: int, appointment_d
     )
 
 
-def evaluate_booking_request(
-    db: Session,
+def is_rate_limit_whitelisted(phone: Optional[str]) -> bool:
+    return (phone or "").strip() in set(settings.booking_rate_limit_phone_whitelist_list)
+
+
+def count_booking_events(
     *,
     user_id: int,
-    appointment_date: date,
     ip_address: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> tuple[float, float, float, float]:
+    """Return (user 1m, user 1h, ip 1m, ip 1h) appointment_created counts."""
+    totals = read_risk_counters("appointment_created", user_id=user_id, ip_address=ip_address, now=now)
+    return (
+        totals.get(("user", "1m"), 0.0),
+        totals.get(("user", "1h"), 0.0),
+        totals.get(("ip", "1m"), 0.0),
+        totals.get(("ip", "1h"), 0.0),
+    )
+
+
+def decide_booking_request(
+    snapshot: BookingRiskSnapshot,
+    *,
+    ip_address: Optional[str] = None,
+    now: Optional[datetime] = None,
 ) -> RiskDecision:
-    state = _get_or_create_user_risk_state(db, user_id)
-    now = datetime.now()
-    if state.restricted_until and state.restricted_until > now:
+    now = now or datetime.now()
+    if snapshot.restricted_until and snapshot.restricted_until > now:
         return RiskDecision(
             allowed=False,
             status_code=429,
@@ -111,16 +218,11 @@ def evaluate_booking_request(
             message="Your account is temporarily restricted from booking. Please try again later.",
         )
 
-    one_minute_ago = now - timedelta(minutes=1)
-    one_hour_ago = now - timedelta(hours=1)
-    user_phone = (db.query(User.phone).filter(User.id == user_id).scalar() or "").strip()
-    whitelist_set = set(settings.booking_rate_limit_phone_whitelist_list)
-    is_rate_limit_whitelisted = user_phone in whitelist_set
-
-    if not is_rate_limit_whitelisted:
-        user_1m = _count_risk_events(db, event_type="appointment_created", since=one_minute_ago, user_id=user_id)
-        user_1h = _count_risk_events(db, event_type="appointment_created", since=one_hour_ago, user_id=user_id)
-        if user_1m >= RATE_LIMIT_USER_PER_MINUTE or user_1h >= RATE_LIMIT_USER_PER_HOUR:
+    if not is_rate_limit_whitelisted(snapshot.phone):
+        if (
+            snapshot.user_events_1m >= RATE_LIMIT_USER_PER_MINUTE
+            or snapshot.user_events_1h >= RATE_LIMIT_USER_PER_HOUR
+        ):
             return RiskDecision(
                 allowed=False,
                 status_code=429,
@@ -128,19 +230,18 @@ def evaluate_booking_request(
                 message="Too many booking requests. Please try again in a few minutes.",
             )
 
-        if ip_address:
-            ip_1m = _count_risk_events(db, event_type="appointment_created", since=one_minute_ago, ip_address=ip_address)
-            ip_1h = _count_risk_events(db, event_type="appointment_created", since=one_hour_ago, ip_address=ip_address)
-            if ip_1m >= RATE_LIMIT_IP_PER_MINUTE or ip_1h >= RATE_LIMIT_IP_PER_HOUR:
-                return RiskDecision(
-                    allowed=False,
-                    status_code=429,
-                    error_code="BOOK_RATE_LIMITED",
-                    message="Too many requests from this network. Please retry later.",
-                )
+        if ip_address and (
+            snapshot.ip_events_1m >= RATE_LIMIT_IP_PER_MINUTE
+            or snapshot.ip_events_1h >= RATE_LIMIT_IP_PER_HOUR
+        ):
+            return RiskDecision(
+                allowed=False,
+                status_code=429,
+                error_code="BOOK_RATE_LIMITED",
+                message="Too many requests from this network. Please retry later.",
+            )
 
-    same_day_count = _count_user_appointments_on_date(db, user_id=user_id, appointment_date=appointment_date)
-    if same_day_count >= DAILY_BOOKING_LIMIT:
+    if snapshot.same_day_count >= DAILY_BOOKING_LIMIT:
         return RiskDecision(
             allowed=False,
             status_code=400,
@@ -151,6 +252,36 @@ def evaluate_booking_request(
     return RiskDecision(allowed=True)
 
 
+def evaluate_booking_request(
+    db: Session,
+    *,
+    user_id: int,
+    appointment_date: date,
+    ip_address: Optional[str] = None,
+) -> RiskDecision:
+    state = _get_or_create_user_risk_state(db, user_id)
+    now = datetime.now()
+    snapshot = BookingRiskSnapshot(
+        restricted_until=state.restricted_until,
+        phone=(db.query(User.phone).filter(User.id == user_id).scalar() or "").strip(),
+    )
+    if not (snapshot.restricted_until and snapshot.restricted_until > now) and not is_rate_limit_whitelisted(
+        snapshot.phone
+    ):
+        (
+            snapshot.user_events_1m,
+            snapshot.user_events_1h,
+            snapshot.ip_events_1m,
+            snapshot.ip_events_1h,
+        ) = count_booking_events(user_id=user_id, ip_address=ip_address, now=now)
+    snapshot.same_day_count = _count_user_appointments_on_date(
+        db,
+        user_id=user_id,
+        appointment_date=appointment_date,
+    )
+    return decide_booking_request(snapshot, ip_address=ip_address, now=now)
+
+
 def refresh_user_risk_state(db: Session, *, user_id: int) -> UserRiskState:
     state = _get_or_create_user_risk_state(db, user_id)
     now = datetime.now()
@@ -190,6 +321,7 @@ def refresh_user_risk_state(db: Session, *, user_id: int) -> UserRiskState:
             state.restricted_until = None
 
     db.commit()
+    principal_service.invalidate_principal(user_id)
     db.refresh(state)
     return state
 
@@ -208,6 +340,7 @@ def restrict_user(
     state.manual_note = note
     state.updated_by = admin_id
     db.commit()
+    principal_service.invalidate_principal(user_id)
     db.refresh(state)
     return state
 
@@ -228,6 +361,7 @@ def unrestrict_user(
     else:
         state.risk_level = "normal"
     db.commit()
+    principal_service.invalidate_principal(user_id)
     db.refresh(state)
     return state
 
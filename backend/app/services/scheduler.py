@@ -4,11 +4,16 @@ Runs periodic tasks like sending appointment reminders
 """
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.core import metrics
 from app.db.session import SessionLocal
+from app.services.log_retention_service import run_log_retention
 from app.services.reminder_service import process_pending_reminders
-from app.services.notification_service import notify_gift_card_expiring
+from app.services import notification_service
+from app.crud import customer_stats as customer_stats_crud
 from app.crud import gift_card as gift_card_crud
+from app.crud import notification as notification_crud
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,9 @@ class ReminderScheduler:
         self.interval_minutes = interval_minutes
         self.running = False
         self.task = None
+        self.next_log_retention_at = datetime.utcnow()
+        self.next_counter_reconcile_at = datetime.utcnow()
+        self.next_customer_stats_refresh_at = datetime.utcnow()
     
     async def run(self):
         """Run the scheduler loop"""
@@ -35,28 +43,49 @@ class ReminderScheduler:
         while self.running:
             try:
                 # Process reminders
-                db = SessionLocal()
-                try:
-                    logger.info(f"Checking for pending reminders at {datetime.now()}")
-                    stats = process_pending_reminders(db)
-                    logger.info(f"Reminder check complete: {stats}")
-                    expired_count = gift_card_crud.expire_pending_transfers(db)
-                    if expired_count:
-                        logger.info(f"Gift card transfers expired: {expired_count}")
+                with metrics.scheduler_pass("reminders"):
+                    db = SessionLocal()
+                    try:
+                        logger.info(f"Checking for pending reminders at {datetime.now()}")
+                        stats = process_pending_reminders(db)
+                        logger.info(f"Reminder check complete: {stats}")
+                        expired_count = gift_card_crud.expire_pending_transfers(db)
+                        if expired_count:
+                            logger.info(f"Gift card transfers expired: {expired_count}")
 
-                    expiring_cards = gift_card_crud.get_pending_transfers_expiring_soon(db, within_hours=48)
-                    for card in expiring_cards:
-                        notify_gift_card_expiring(
-                            db=db,
-                            purchaser_id=card.purchaser_id,
-                            recipient_phone=card.recipient_phone,
-                            expires_at=card.claim_expires_at
-                        )
-                        gift_card_crud.mark_transfer_expiry_notified(db, card)
-                    if expiring_cards:
-                        db.commit()
-                finally:
-                    db.close()
+                        expiring_cards = gift_card_crud.get_pending_transfers_expiring_soon(db, within_hours=48)
+                        if expiring_cards:
+                            specs = [
+                                notification_service.build_gift_card_expiring(
+                                    purchaser_id=card.purchaser_id,
+                                    recipient_phone=card.recipient_phone,
+                                    expires_at=card.claim_expires_at,
+                                )
+                                for card in expiring_cards
+                            ]
+                            for card in expiring_cards:
+                                gift_card_crud.mark_transfer_expiry_notified(db, card)
+                            notification_service.create_notifications_bulk(db, specs)
+                    finally:
+                        db.close()
+
+                if datetime.utcnow() >= self.next_log_retention_at:
+                    self.next_log_retention_at = datetime.utcnow() + timedelta(hours=1)
+                    stats = await asyncio.to_thread(self._run_log_retention)
+                    logger.info(f"System log retention complete: {stats}")
+
+                reconcile_seconds = int(settings.NOTIFICATION_COUNTER_RECONCILE_SECONDS)
+                if reconcile_seconds > 0 and datetime.utcnow() >= self.next_counter_reconcile_at:
+                    self.next_counter_reconcile_at = datetime.utcnow() + timedelta(seconds=reconcile_seconds)
+                    stats = await asyncio.to_thread(self._run_counter_reconcile)
+                    logger.info(f"Unread notification counter reconcile complete: {stats}")
+
+                refresh_seconds = int(settings.CUSTOMER_STATS_REFRESH_SECONDS)
+                if refresh_seconds > 0 and datetime.utcnow() >= self.next_customer_stats_refresh_at:
+                    self.next_customer_stats_refresh_at = datetime.utcnow() + timedelta(seconds=refresh_seconds)
+                    refreshed = await asyncio.to_thread(self._run_customer_stats_refresh)
+                    if refreshed:
+                        logger.info(f"Customer stats refreshed for passed appointments: {refreshed}")
                 
                 # Wait for next interval
                 await asyncio.sleep(self.interval_minutes * 60)
@@ -66,6 +95,34 @@ class ReminderScheduler:
                 # Wait a bit before retrying
                 await asyncio.sleep(60)
     
+    @staticmethod
+    def _run_log_retention() -> dict:
+        with metrics.scheduler_pass("log_retention"):
+            db = SessionLocal()
+            try:
+                return run_log_retention(db)
+            finally:
+                db.close()
+
+    @staticmethod
+    def _run_counter_reconcile() -> dict:
+        with metrics.scheduler_pass("notification_counters"):
+            db = SessionLocal()
+            try:
+                return notification_crud.reconcile_unread_counters(db)
+            finally:
+                db.close()
+
+    @staticmethod
+    def _run_customer_stats_refresh() -> int:
+        with metrics.scheduler_pass("customer_stats"):
+            db = SessionLocal()
+            try:
+                # Rows whose stored next appointment has passed move on to the customer's following one.
+                return customer_stats_crud.rebuild_customer_stats(db, stale_only=True)
+            finally:
+                db.close()
+
     def start(self):
         """Start the scheduler in the background"""
         if not self.running:
@@ -0,0 +1,222 @@
+"""
+Compiled IP access rules for the security_ip_guard middleware.
+
+Active rules of a scope are loaded once per refresh and compiled into an
+exact-address table plus a binary prefix trie per IP version, with rules
+pre-sorted by priority. Matching a request is then one dict lookup and one
+trie walk, without touching the database.
+
+Rule writes call invalidate_security_rules, which bumps a shared version
+counter in cache_service; every worker compares it at most once per
+_VERSION_CHECK_SECONDS and recompiles on change instead of waiting for the
+TTL.
+"""
+from __future__ import annotations
+
+import ipaddress
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.db.session import SessionLocal
+from app.models.security import SecurityIPRule
+from app.services import cache_service
+
+logger = logging.getLogger(__name__)
+
+_CACHE_TTL_SECONDS = max(1.0, float(os.getenv("SECURITY_RULE_CACHE_TTL_SECONDS", "30")))
+_VERSION_CHECK_SECONDS = 1.0
+_VERSION_KEY = "security:ip-rules:version"
+_VERSION_TTL_SECONDS = 7 * 86400
+
+# Allow wins a priority tie with deny, as in the original resolution.
+_RULE_TYPE_RANK = {"allow": 0, "deny": 1}
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    rule_type: str
+    priority: int
+    expires_at: Optional[datetime]
+    rank: int = 0
+
+
+@dataclass(frozen=True)
+class IPRuleDecision:
+    """``blocked`` with the deciding deny rule id; unmatched and allowed IPs are not blocked."""
+
+    blocked: bool
+    matched_rule_id: Optional[int] = None
+
+
+_PASS = IPRuleDecision(blocked=False)
+
+
+class _PrefixTrie:
+    """Binary trie over address bits; a node carries the rules of the prefix ending there."""
+
+    __slots__ = ("bits", "root")
+
+    def __init__(self, bits: int) -> None:
+        self.bits = bits
+        self.root: list = [None, None, None]
+
+    def insert(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network, rule: CompiledRule) -> None:
+        node = self.root
+        value = int(network.network_address)
+        for depth in range(network.prefixlen):
+            bit = (value >> (self.bits - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            node[2] = []
+        node[2].append(rule)
+
+    def match(self, value: int) -> list[CompiledRule]:
+        matched: list[CompiledRule] = []
+        node = self.root
+        shift = self.bits - 1
+        while node is not None:
+            if node[2]:
+                matched.extend(node[2])
+            if shift < 0:
+                break
+            node = node[(value >> shift) & 1]
+            shift -= 1
+        return matched
+
+
+@dataclass
+class CompiledRuleSet:
+    exact: dict[tuple[int, int], list[CompiledRule]] = field(default_factory=dict)
+    tries: dict[int, _PrefixTrie] = field(default_factory=lambda: {4: _PrefixTrie(32), 6: _PrefixTrie(128)})
+    rule_count: int = 0
+
+    def decide(self, ip_value: str, now: datetime) -> IPRuleDecision:
+        if not self.rule_count:
+            return _PASS
+        try:
+            address = ipaddress.ip_address(ip_value)
+        except ValueError:
+            return _PASS
+        value = int(address)
+        matched = self.exact.get((address.version, value), []) + self.tries[address.version].match(value)
+        if not matched:
+            return _PASS
+
+        matched.sort(key=lambda rule: rule.rank)
+        any_active = False
+        for rule in matched:
+            if rule.expires_at is not None and rule.expires_at <= now:
+                continue
+            if rule.rule_type == "allow":
+                return _PASS
+            if rule.rule_type == "deny":
+                return IPRuleDecision(blocked=True, matched_rule_id=rule.id)
+            any_active = True
+        # A live rule of another type matched without an allow: blocked, no deciding rule.
+        return IPRuleDecision(blocked=True) if any_active else _PASS
+
+
+def compile_rules(rows: Iterable) -> CompiledRuleSet:
+    """Compile rule rows (target_type/target_value/rule_type/priority/expires_at/id) into a CompiledRuleSet."""
+    rows = sorted(rows, key=lambda row: (int(row.priority), _RULE_TYPE_RANK.get(str(row.rule_type), 2), int(row.id)))
+    compiled = CompiledRuleSet()
+    for rank, row in enumerate(rows):
+        rule = CompiledRule(
+            id=int(row.id),
+            rule_type=str(row.rule_type),
+            priority=int(row.priority),
+            expires_at=row.expires_at,
+            rank=rank,
+        )
+        try:
+            if row.target_type == "ip":
+                address = ipaddress.ip_address(str(row.target_value))
+                compiled.exact.setdefault((address.version, int(address)), []).append(rule)
+            elif row.target_type == "cidr":
+                network = ipaddress.ip_network(str(row.target_value), strict=False)
+                compiled.tries[network.version].insert(network, rule)
+            else:
+                continue
+        except ValueError:
+            logger.warning("Skipping security rule id=%s with invalid target %r", row.id, row.target_value)
+            continue
+        compiled.rule_count += 1
+    return compiled
+
+
+@dataclass
+class _CacheEntry:
+    rules: CompiledRuleSet
+    version: int
+    expires_at: float
+    checked_at: float
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: dict[str, _CacheEntry] = {}
+
+
+def _load_rule_rows(scope: str) -> list:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(
+                SecurityIPRule.id,
+                SecurityIPRule.rule_type,
+                SecurityIPRule.target_type,
+                SecurityIPRule.target_value,
+                SecurityIPRule.priority,
+                SecurityIPRule.expires_at,
+            )
+            .filter(
+                SecurityIPRule.status == "active",
+                SecurityIPRule.scope.in_([scope, "all"]),
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def _read_version() -> int:
+    return cache_service.get_counters([_VERSION_KEY])[0]
+
+
+def get_rule_set(scope: str) -> CompiledRuleSet:
+    """Return the compiled active rules of ``scope``, recompiling on TTL expiry or a published change."""
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        entry = _CACHE.get(scope)
+    if entry is not None and entry.expires_at > now:
+        if now - entry.checked_at < _VERSION_CHECK_SECONDS:
+            return entry.rules
+        version = _read_version()
+        if version == entry.version:
+            entry.checked_at = now
+            return entry.rules
+    else:
+        version = _read_version()
+
+    rules = compile_rules(_load_rule_rows(scope))
+    with _CACHE_LOCK:
+        _CACHE[scope] = _CacheEntry(rules=rules, version=version, expires_at=now + _CACHE_TTL_SECONDS, checked_at=now)
+    return rules
+
+
+def decide(scope: str, ip_value: str, now: Optional[datetime] = None) -> IPRuleDecision:
+    return get_rule_set(scope).decide(ip_value, now or datetime.utcnow())
+
+
+def invalidate_security_rules() -> None:
+    """Make every worker recompile its rules; call after committing a rule change."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+    cache_service.increment_many([(_VERSION_KEY, _VERSION_TTL_SECONDS)])
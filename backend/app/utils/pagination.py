@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque URL-safe token holding the sort key of the last row of
+a page. The next page filters strictly past that key instead of using OFFSET,
+so with an index on the sort columns a deep page costs the same as page one.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Any, Callable, Optional, Sequence
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.services import cache_service
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_PARSERS: dict[str, Callable[[Any], Any]] = {
+    "int": int,
+    "str": str,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "datetime": datetime.fromisoformat,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset ordering; ``kind`` is a key of ``_PARSERS``."""
+
+    column: Any
+    kind: str
+
+
+@dataclass
+class KeysetPage:
+    rows: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, (date, time, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor length mismatch")
+        return tuple(_PARSERS[key.kind](value) for key, value in zip(keys, values))
+    except (ValueError, TypeError, KeyError, UnicodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]):
+    """Rows strictly after ``values`` in descending ``keys`` order."""
+    clauses = []
+    for index, key in enumerate(keys):
+        equal_prefix = [keys[prefix].column == values[prefix] for prefix in range(index)]
+        clauses.append(and_(*equal_prefix, key.column < values[index]))
+    return or_(*clauses)
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[SortKey],
+    *,
+    key_of: Callable[[Any], Sequence[Any]],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> KeysetPage:
+    """
+    Fetch one page ordered by ``keys`` descending.
+
+    A cursor takes precedence over ``skip``; ``skip`` is kept for clients
+    that still page by offset. ``key_of`` extracts the sort key of a row.
+    Raises InvalidCursor for a malformed cursor.
+    """
+    if cursor:
+        query = query.filter(keyset_filter(keys, decode_cursor(cursor, keys)))
+    query = query.order_by(*[key.column.desc() for key in keys])
+    if not cursor and skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    page = KeysetPage(rows=rows[:limit])
+    if len(rows) > limit:
+        page.next_cursor = encode_cursor(key_of(page.rows[-1]))
+    return page
+
+
+def cached_count(query: Query, namespace: str, filters: dict[str, Any], ttl_seconds: float) -> int:
+    """
+    ``query.count()`` cached for ``ttl_seconds`` per filter combination, so
+    paging through a large table does not rescan it for every page.
+    """
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return int(cache_service.get_or_set_json(f"count:{namespace}:{digest}", ttl_seconds, query.count))
@@ -0,0 +1,89 @@
+"""
+Measure APNs sender throughput against the local HTTP/2 stub.
+
+Starts apns_stub_server in-process (or targets --url) and pushes --tokens
+requests through app.services.apns_client at each --concurrency level,
+reporting requests/second, HTTP/2 connections opened and the peak number of
+streams the stub saw in flight. Concurrency 1 is the old one-token-at-a-time
+behaviour.
+
+Usage:
+    python benchmark_apns_sender.py --tokens 2000 --latency-ms 40 --concurrency 1 --concurrency 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from apns_stub_server import StubApnsServer  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services import apns_client  # noqa: E402
+
+
+def _requests(count: int) -> list[apns_client.ApnsRequest]:
+    headers = {"apns-topic": "com.example.bench", "apns-push-type": "alert", "apns-priority": "10"}
+    return [
+        apns_client.ApnsRequest(
+            token_id=index,
+            device_token=f"{index:064x}",
+            environment="production" if index % 2 else "sandbox",
+            payload={"aps": {"alert": {"title": "Benchmark", "body": f"push {index}"}}},
+            headers=headers,
+        )
+        for index in range(count)
+    ]
+
+
+def _run(stub: StubApnsServer, tokens: int, concurrency: int) -> dict:
+    settings.APNS_MAX_CONCURRENT_REQUESTS = concurrency
+    stub.connections = stub.requests = stub.peak_in_flight = 0
+    requests = _requests(tokens)
+    started = time.perf_counter()
+    results = apns_client.send_many(requests)
+    elapsed = time.perf_counter() - started
+    # A fresh sender per level, so the semaphore picks up the new limit.
+    apns_client.close()
+    return {
+        "concurrency": concurrency,
+        "tokens": tokens,
+        "ok": sum(1 for result in results if result.ok),
+        "seconds": round(elapsed, 3),
+        "per_second": round(tokens / elapsed, 1) if elapsed else None,
+        "connections": stub.connections,
+        "peak_in_flight": stub.peak_in_flight,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent APNs sender against a local stub.")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub response delay.")
+    parser.add_argument("--concurrency", type=int, action="append", help="Repeat to compare levels.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    stub = StubApnsServer(latency_seconds=args.latency_ms / 1000).start()
+    settings.APNS_HOST_OVERRIDE = stub.url
+    try:
+        report = [_run(stub, args.tokens, level) for level in (args.concurrency or [1, 10, 100])]
+    finally:
+        stub.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for row in report:
+        print(
+            f"concurrency={row['concurrency']} tokens={row['tokens']} ok={row['ok']} "
+            f"seconds={row['seconds']} per_second={row['per_second']} "
+            f"connections={row['connections']} peak_in_flight={row['peak_in_flight']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
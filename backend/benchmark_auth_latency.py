@@ -0,0 +1,152 @@
+"""
+Measure how a login storm affects the latency of an unrelated endpoint.
+
+Runs the ASGI app in-process against a throwaway SQLite database. A probe
+keeps calling GET /health while ``--logins`` logins run with
+``--concurrency`` in flight, and the probe's p50/p95/p99 are reported next
+to an idle baseline. Any handler that blocks the event loop shows up as a
+probe latency spike. ``--inline-bcrypt`` verifies passwords on the event
+loop, as login did before, for comparison.
+
+Usage:
+  python benchmark_auth_latency.py
+  python benchmark_auth_latency.py --inline-bcrypt
+  python benchmark_auth_latency.py --logins 200 --concurrency 50 --json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="auth-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DEBUG", "false")
+
+import httpx  # noqa: E402
+
+import app.models  # noqa: E402,F401  (register every table on Base.metadata)
+from app.api.v1.endpoints import auth as auth_endpoint  # noqa: E402
+from app.core.security import get_password_hash, verify_password  # noqa: E402
+from app.db.session import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+PHONE = "12125550199"
+PASSWORD = "benchmark-pass"
+
+
+def _seed_user() -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        if db.query(User.id).filter(User.phone == PHONE).first() is None:
+            db.add(User(phone=PHONE, username="bench_user", password_hash=get_password_hash(PASSWORD), is_active=True))
+            db.commit()
+
+
+async def _verify_password_inline(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    samples: list[float] = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def _login_storm(client: httpx.AsyncClient, logins: int, concurrency: int) -> list[int]:
+    gate = asyncio.Semaphore(concurrency)
+    payload = {"phone": PHONE, "password": PASSWORD, "login_portal": "frontend"}
+
+    async def one() -> int:
+        async with gate:
+            response = await client.post("/api/v1/auth/login", json=payload)
+            return response.status_code
+
+    return await asyncio.gather(*(one() for _ in range(logins)))
+
+
+async def _run(logins: int, concurrency: int, idle_seconds: float, interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        idle_task = asyncio.create_task(_probe(client, stop, interval))
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        idle = await idle_task
+
+        stop = asyncio.Event()
+        storm_task = asyncio.create_task(_probe(client, stop, interval))
+        started = time.perf_counter()
+        statuses = await _login_storm(client, logins, concurrency)
+        storm_seconds = time.perf_counter() - started
+        stop.set()
+        storm = await storm_task
+
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "login_status_counts": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        "storm_seconds": round(storm_seconds, 2),
+        "health_idle": _percentiles(idle),
+        "health_during_storm": _percentiles(storm),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Probe /health latency during a login storm.")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--idle-seconds", type=float, default=1.0)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    parser.add_argument("--inline-bcrypt", action="store_true", help="Verify passwords on the event loop.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    _seed_user()
+    if args.inline_bcrypt:
+        auth_endpoint.verify_password_async = _verify_password_inline
+    report = asyncio.run(_run(args.logins, args.concurrency, args.idle_seconds, args.probe_interval))
+    report["inline_bcrypt"] = bool(args.inline_bcrypt)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"logins={report['logins']} concurrency={report['concurrency']} "
+        f"inline_bcrypt={report['inline_bcrypt']} storm_seconds={report['storm_seconds']}"
+    )
+    print(f"login_status_counts={report['login_status_counts']}")
+    for key in ("health_idle", "health_during_storm"):
+        print(f"{key}={report[key]}")
+
+
+if __name__ == "__main__":
+    main()
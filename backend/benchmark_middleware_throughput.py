@@ -0,0 +1,103 @@
+"""
+Measure requests/sec through the full middleware stack.
+
+Drives the ASGI app in-process (no network, no server) with ``--concurrency``
+requests in flight against GET /health and a small JSON route under
+/api/v1/ (which also passes the IP guard). Log writes are counted and
+dropped, so the numbers reflect middleware and routing overhead rather
+than the log queue.
+
+Usage:
+  python benchmark_middleware_throughput.py
+  python benchmark_middleware_throughput.py --requests 20000 --concurrency 50 --json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="middleware-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DEBUG", "false")
+
+import httpx  # noqa: E402
+
+import app.models  # noqa: E402,F401  (register every table on Base.metadata)
+from app.db.session import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import log_service  # noqa: E402
+
+PING_PATH = "/api/v1/_bench/ping"
+_LOG_LINES = 0
+
+
+def _count_log(**_kwargs) -> bool:
+    global _LOG_LINES
+    _LOG_LINES += 1
+    return True
+
+
+async def _ping() -> dict:
+    return {"ok": True}
+
+
+async def _drive(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> dict:
+    remaining = iter(range(total))
+    statuses: dict[int, int] = {}
+
+    async def worker() -> None:
+        for _ in remaining:
+            response = await client.get(path, params={"page": 1, "token": "x"})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def _run(total: int, concurrency: int, warmup: int) -> list[dict]:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = []
+        for path in ("/health", PING_PATH):
+            await _drive(client, path, warmup, concurrency)
+            results.append(await _drive(client, path, total, concurrency))
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure requests/sec through the middleware stack.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    app.add_api_route(PING_PATH, _ping, methods=["GET"], include_in_schema=False)
+    log_service.create_system_log_async = _count_log
+
+    results = asyncio.run(_run(args.requests, args.concurrency, args.warmup))
+    report = {"concurrency": args.concurrency, "log_lines": _LOG_LINES, "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for row in results:
+        print(f"{row['path']}: {row['requests_per_second']} req/s ({row['requests']} in {row['seconds']}s) {row['status_counts']}")
+    print(f"log_lines={report['log_lines']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Shared fixtures for the backend tests.
+
+``db`` is a session on a fresh sqlite file with every table created and the
+module's ``seed_rows`` committed; modules override ``seed_rows`` (or wrap
+``engine``) rather than building their own engine. ``local_cache`` makes
+cache_service use an empty in-process dict instead of Redis; opt in with
+``pytestmark = pytest.mark.usefixtures("local_cache")``.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.db.session import Base
+from app.services import cache_service
+
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    monkeypatch.setattr(cache_service, "_get_redis_client", lambda: None)
+    monkeypatch.setattr(cache_service, "_LOCAL_CACHE", {})
+
+
+@pytest.fixture
+def seed_rows():
+    return []
+
+
+@pytest.fixture
+def engine(tmp_path, seed_rows):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(seed_rows)
+        session.commit()
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import argparse
+
+from app.crud.customer_stats import rebuild_customer_stats
+from app.db.session import SessionLocal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the customer_stats projection from appointments.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Customers refreshed per transaction.")
+    parser.add_argument(
+        "--stale-only",
+        action="store_true",
+        help="Only refresh customers whose stored next appointment is already in the past.",
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        refreshed = rebuild_customer_stats(db, batch_size=args.batch_size, stale_only=args.stale_only)
+    print(f"refreshed_customers={refreshed}")
+
+
+if __name__ == "__main__":
+    main()
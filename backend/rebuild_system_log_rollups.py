@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.services.log_rollup_service import rebuild_rollups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the hourly system log rollups from system_logs.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Log rows folded per transaction.")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Only rebuild hours from this UTC timestamp on (e.g. 2026-10-01T00:00). Defaults to every retained row.",
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        processed = rebuild_rollups(db, since=args.since, batch_size=args.batch_size)
+    print(f"processed_logs={processed}")
+
+
+if __name__ == "__main__":
+    main()
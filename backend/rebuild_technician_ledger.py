@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import argparse
+
+from app.crud.technician_ledger import rebuild_technician_ledger
+from app.db.session import SessionLocal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild technician ledger entries from completed appointments.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Appointments processed per transaction.")
+    parser.add_argument("--store-id", type=int, default=None, help="Only rebuild one store.")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        processed = rebuild_technician_ledger(db, batch_size=args.batch_size, store_id=args.store_id)
+    print(f"processed_appointments={processed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash
+from app.db import query_stats
 from app.db.session import SessionLocal
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.coupon import Coupon, CouponCategory, CouponType
@@ -52,6 +53,8 @@ from app.models.user_points import UserPoints
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000/api/v1").rstrip("/")
 CLEANUP_BEFORE = os.getenv("CLEANUP_BEFORE", "1") != "0"
 CLEANUP_AFTER = os.getenv("CLEANUP_AFTER", "1") == "1"
+# Needs a non-production server, which reports per-request SQL counts in Server-Timing.
+CHECK_QUERY_BUDGETS = os.getenv("CHECK_QUERY_BUDGETS", "1") != "0"
 ET_TZ = ZoneInfo("America/New_York")
 
 ADMIN_PHONE = os.getenv("ADMIN_PHONE", "2125552301")
@@ -158,6 +161,8 @@ def request_json(
     *,
     token: Optional[str] = None,
     expected_statuses: Tuple[int, ...] = (200,),
+    max_queries: Optional[int] = None,
+    max_repeat: Optional[int] = None,
     **kwargs: Any,
 ) -> Dict[str, Any] | List[Any]:
     headers = kwargs.pop("headers", {})
@@ -179,9 +184,11 @@ def request_json(
     try:
         with urllib.request.urlopen(req, timeout=30) as response:
             status = response.getcode()
+            response_headers = response.headers
             raw = response.read().decode("utf-8") if response.length != 0 else ""
     except urllib.error.HTTPError as exc:
         status = exc.code
+        response_headers = exc.headers
         raw = exc.read().decode("utf-8") if exc.fp else ""
     except urllib.error.URLError as exc:
         raise RuntimeError(f"{method} {path} failed to connect: {exc}") from exc
@@ -193,6 +200,8 @@ def request_json(
 
     if status not in expected_statuses:
         raise RuntimeError(f"{method} {path} failed: status={status}, body={payload}")
+    if CHECK_QUERY_BUDGETS and max_queries is not None:
+        query_stats.assert_query_budget(response_headers, max_queries, max_repeat, label=f"{method} {path}")
     return payload
 
 
@@ -661,6 +670,8 @@ def verify_customers(token: str, seed: SeedResult) -> None:
         "/customers/admin?keyword=Alice&include_full_phone=true&has_upcoming=true&skip=0&limit=10",
         token=token,
         expected_statuses=(200,),
+        max_queries=20,
+        max_repeat=3,
     )
     assert_equal(customer_list["total"], 1, "customer list total")
     first_item = customer_list["items"][0]
@@ -675,6 +686,8 @@ def verify_customers(token: str, seed: SeedResult) -> None:
         f"/customers/admin/{seed.primary_customer_id}?include_full_phone=true",
         token=token,
         expected_statuses=(200,),
+        max_queries=20,
+        max_repeat=3,
     )
     assert_equal(detail["phone"], normalize_phone(PRIMARY_CUSTOMER_PHONE), "customer detail full phone")
     assert_equal(float(detail["lifetime_spent"]), 150.0, "customer lifetime spent")
@@ -734,6 +747,8 @@ def verify_logs(token: str, seed: SeedResult) -> None:
         "/logs/admin?module=admin_suite_seed&skip=0&limit=10",
         token=token,
         expected_statuses=(200,),
+        max_queries=15,
+        max_repeat=3,
     )
     assert_equal(log_list["total"], 3, "seed log list total")
     audit_item = find_list_item(log_list["items"], key="id", expected=seed.audit_seed_log_id)
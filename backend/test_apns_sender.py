@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from apns_stub_server import StubApnsServer
+from app.core.config import settings
+from app.models.notification import Notification, NotificationType
+from app.models.push_device_token import PushDeviceToken
+from app.models.user import User
+from app.services import apns_client, push_service
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubApnsServer(latency_seconds=0.1, bad_tokens={"bad"}, unregistered_tokens={"gone"}).start()
+    monkeypatch.setattr(settings, "APNS_HOST_OVERRIDE", server.url)
+    monkeypatch.setattr(settings, "APNS_MAX_CONCURRENT_REQUESTS", 20)
+    try:
+        yield server
+    finally:
+        apns_client.close()
+        server.stop()
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        User(id=1, phone="2125550101", password_hash="hash", username="ann"),
+        User(id=2, phone="2125550102", password_hash="hash", username="bo"),
+        User(id=3, phone="2125550103", password_hash="hash", username="cy", push_notifications_enabled=False),
+        PushDeviceToken(id=10, user_id=1, device_token="aa01", apns_environment="sandbox"),
+        PushDeviceToken(id=11, user_id=1, device_token="gone", apns_environment="production"),
+        PushDeviceToken(id=12, user_id=2, device_token="bb01", apns_environment="production"),
+        PushDeviceToken(id=13, user_id=3, device_token="cc01", apns_environment="sandbox"),
+    ]
+
+
+def test_requests_share_one_connection_as_concurrent_streams(stub) -> None:
+    requests = [
+        apns_client.ApnsRequest(index, "bad" if index == 7 else f"{index:04x}", "sandbox", {"aps": {}}, {})
+        for index in range(40)
+    ]
+
+    started = time.perf_counter()
+    results = apns_client.send_many(requests)
+    elapsed = time.perf_counter() - started
+
+    # 40 requests at 100ms each would take 4s one at a time; 20 streams in flight take two rounds.
+    assert elapsed < 1.5
+    assert stub.connections == 1
+    assert stub.peak_in_flight == 20
+    assert [result.token_id for result in results] == list(range(40))
+    assert (results[7].status_code, results[7].reason, results[7].ok) == (400, "BadDeviceToken", False)
+    assert all(result.ok and result.apns_id for index, result in enumerate(results) if index != 7)
+
+
+def test_unreachable_host_reports_an_error_per_token(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "APNS_HOST_OVERRIDE", "http://127.0.0.1:9")
+    try:
+        results = apns_client.send_many([apns_client.ApnsRequest(1, "aa01", "sandbox", {}, {})])
+    finally:
+        apns_client.close()
+    assert results[0].status_code is None and results[0].error and not results[0].ok
+    assert results[0].retryable
+
+
+def test_notifications_push_as_one_batch_and_deactivate_rejected_tokens(stub, db, monkeypatch) -> None:
+    monkeypatch.setattr(push_service, "is_push_enabled", lambda: True)
+    monkeypatch.setattr(push_service, "_build_apns_auth_token", lambda: "jwt")
+    notifications = [
+        Notification(
+            id=100 + user_id,
+            user_id=user_id,
+            type=NotificationType.COUPON_GRANTED,
+            title="Hi",
+            message="Hello",
+        )
+        for user_id in (1, 2, 3)
+    ]
+
+    results = push_service.send_push_for_notifications(db, notifications)
+
+    assert results == {
+        101: {"sent": 1, "failed": 1, "deactivated": 1, "retryable": 0},
+        102: {"sent": 1, "failed": 0, "deactivated": 0, "retryable": 0},
+        103: {"sent": 0, "failed": 0, "deactivated": 0, "retryable": 0},
+    }
+    assert stub.requests == 3
+    assert db.query(PushDeviceToken).filter(PushDeviceToken.id == 11).one().is_active is False
+    assert push_service.send_push_to_user(db, user_id=1, title="Again", body="Hello") == {
+        "sent": 1,
+        "failed": 0,
+        "deactivated": 0,
+        "retryable": 0,
+    }
@@ -0,0 +1,115 @@
+from datetime import date, time
+
+import pytest
+
+from app.crud import appointment as appointment_crud
+from app.crud.appointment import ProposedBooking
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.service import Service
+
+
+DAY = date(2026, 3, 10)
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        Service(id=1, store_id=1, name="Gel", price=50, duration_minutes=60, is_active=1),
+        Appointment(
+            id=100,
+            user_id=7,
+            store_id=1,
+            service_id=1,
+            technician_id=3,
+            appointment_date=DAY,
+            appointment_time=time(10, 0),
+            status=AppointmentStatus.CONFIRMED,
+        ),
+        Appointment(
+            id=101,
+            user_id=8,
+            store_id=1,
+            service_id=1,
+            technician_id=4,
+            appointment_date=DAY,
+            appointment_time=time(13, 0),
+            status=AppointmentStatus.CANCELLED,
+        ),
+    ]
+
+
+def _booking(hour: int, minute: int = 0, **kwargs) -> ProposedBooking:
+    return ProposedBooking(
+        appointment_date=DAY,
+        appointment_time=time(hour, minute),
+        duration_minutes=kwargs.pop("duration_minutes", 60),
+        **kwargs,
+    )
+
+
+def test_bulk_conflicts_against_existing_appointments(db) -> None:
+    results = appointment_crud.check_time_conflicts_bulk(
+        db,
+        [
+            _booking(10, 30, technician_id=3),
+            _booking(9, 30, user_id=7),
+            _booking(13, 0, technician_id=4),
+        ],
+    )
+
+    assert [result["has_conflict"] for result in results] == [True, True, False]
+    assert results[0]["conflict_type"] == "technician"
+    assert results[0]["message"] == (
+        "The technician is already booked from 10:00 to 11:00. "
+        "Please choose a time after 11:00 or pick another technician."
+    )
+    assert results[1]["conflict_type"] == "user"
+
+    boundary = appointment_crud.check_time_conflicts_bulk(
+        db,
+        [
+            _booking(11, 0, technician_id=3),
+            _booking(9, 0, technician_id=4, duration_minutes=30),
+        ],
+    )
+    assert not any(result["has_conflict"] for result in boundary)
+
+    rescheduled = appointment_crud.check_time_conflicts_bulk(
+        db,
+        [_booking(10, 15, technician_id=3, user_id=7, exclude_appointment_id=100)],
+    )
+    assert not rescheduled[0]["has_conflict"]
+
+
+def test_bulk_conflicts_within_batch(db) -> None:
+    results = appointment_crud.check_time_conflicts_bulk(
+        db,
+        [
+            _booking(14, 0, technician_id=5, user_id=9),
+            _booking(14, 30, technician_id=6, user_id=9),
+            _booking(14, 45, technician_id=5),
+            _booking(15, 45, technician_id=5),
+        ],
+    )
+
+    assert [result["conflict_type"] for result in results] == [None, "user", "technician", None]
+
+
+def test_single_check_matches_bulk_result(db) -> None:
+    single = appointment_crud.check_time_conflict(
+        db,
+        appointment_date=DAY,
+        appointment_time=time(10, 30),
+        service_id=1,
+        technician_id=3,
+    )
+    bulk = appointment_crud.check_time_conflicts_bulk(db, [_booking(10, 30, technician_id=3)])[0]
+    assert single == bulk
+
+    missing = appointment_crud.check_time_conflict(
+        db,
+        appointment_date=DAY,
+        appointment_time=time(10, 30),
+        service_id=999,
+    )
+    assert missing["conflict_type"] == "invalid_service"
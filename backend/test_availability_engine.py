@@ -0,0 +1,114 @@
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import availability_service
+from app.services.availability_service import StoreDayAvailability, StoreDaySnapshot
+
+
+CHECK_DATE = date(2026, 3, 14)
+
+
+def _snapshot(**overrides) -> StoreDaySnapshot:
+    snapshot = StoreDaySnapshot(
+        store_id=1,
+        check_date=CHECK_DATE,
+        store_hours=SimpleNamespace(open_time=time(9, 0), close_time=time(12, 0), is_closed=False),
+        technicians={
+            10: SimpleNamespace(id=10, store_id=1, name="Amy"),
+            11: SimpleNamespace(id=11, store_id=1, name="Bea"),
+        },
+    )
+    for key, value in overrides.items():
+        setattr(snapshot, key, value)
+    return snapshot
+
+
+def _starts(slots: list[dict]) -> list[str]:
+    return [slot["start_time"] for slot in slots]
+
+
+def test_free_slots_follow_store_hours() -> None:
+    availability = StoreDayAvailability(_snapshot())
+    slots = availability.free_slots(10, 60)
+    assert _starts(slots) == ["09:00", "09:30", "10:00", "10:30", "11:00"]
+    assert slots[-1]["end_time"] == "12:00"
+    assert slots[-1]["duration_minutes"] == 60
+
+
+def test_appointments_only_block_their_technician() -> None:
+    appointment = SimpleNamespace(technician_id=10, appointment_time=time(10, 0))
+    availability = StoreDayAvailability(_snapshot(appointments=[(appointment, 45)]))
+
+    assert _starts(availability.free_slots(10, 60)) == ["09:00", "11:00"]
+    assert _starts(availability.free_slots(11, 60)) == ["09:00", "09:30", "10:00", "10:30", "11:00"]
+    assert availability.is_free(10, 10 * 60 + 45, 11 * 60)
+    assert not availability.is_free(10, 10 * 60 + 44, 11 * 60)
+
+
+def test_store_blocked_slots_apply_to_every_technician() -> None:
+    blocked = SimpleNamespace(start_time=time(9, 30), end_time=time(10, 0))
+    availability = StoreDayAvailability(_snapshot(blocked_slots=[blocked]))
+
+    by_technician = availability.free_slots_by_technician(30)
+    assert _starts(by_technician[10]) == ["09:00", "10:00", "10:30", "11:00", "11:30"]
+    assert by_technician[10] == by_technician[11]
+
+
+def test_unavailability_partial_and_full_day() -> None:
+    periods = {
+        10: [SimpleNamespace(start_time=time(9, 0), end_time=time(11, 0))],
+        11: [SimpleNamespace(start_time=None, end_time=None)],
+    }
+    availability = StoreDayAvailability(_snapshot(unavailable_periods=periods))
+
+    assert _starts(availability.free_slots(10, 30)) == ["11:00", "11:30"]
+    assert availability.free_slots(11, 30) == []
+    assert availability.is_technician_off(11)
+
+
+def test_closed_day_and_holiday_return_no_slots() -> None:
+    closed = StoreDayAvailability(
+        _snapshot(store_hours=SimpleNamespace(open_time=None, close_time=None, is_closed=True))
+    )
+    assert not closed.is_open
+    assert closed.free_slots(10, 30) == []
+
+    holiday = StoreDayAvailability(_snapshot(holidays=[SimpleNamespace(name="Closed")]))
+    assert not holiday.is_open
+    assert holiday.free_slots(10, 30) == []
+
+
+@pytest.fixture
+def slot_loads(local_cache, monkeypatch):
+    loads: list[list[int]] = []
+
+    def _build(_db, store_id, check_date, technician_ids=None):
+        loads.append(list(technician_ids or []))
+        return StoreDayAvailability(_snapshot(store_id=store_id, check_date=check_date))
+
+    monkeypatch.setattr(availability_service, "build_store_day_availability", _build)
+    return loads
+
+
+def test_cached_slots_are_reused_until_invalidated(slot_loads) -> None:
+    first = availability_service.get_free_slots(None, 1, CHECK_DATE, [10, 11], 60)
+    second = availability_service.get_free_slots(None, 1, CHECK_DATE, [10, 11], 60)
+    assert first == second
+    assert slot_loads == [[10, 11]]
+
+    availability_service.get_free_slots(None, 1, CHECK_DATE, [10], 30)
+    assert slot_loads[-1] == [10]
+
+    availability_service.invalidate_store_day(1, CHECK_DATE)
+    availability_service.get_free_slots(None, 1, CHECK_DATE, [10, 11], 60)
+    assert slot_loads[-1] == [10, 11]
+
+    availability_service.invalidate_store_day(1, date(2026, 3, 15))
+    availability_service.get_free_slots(None, 1, CHECK_DATE, [10, 11], 60)
+    assert len(slot_loads) == 3
+
+    availability_service.invalidate_store(1)
+    availability_service.get_free_slots(None, 1, CHECK_DATE, [10, 11], 60)
+    assert len(slot_loads) == 4
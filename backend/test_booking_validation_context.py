@@ -0,0 +1,132 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.risk import UserRiskState
+from app.models.service import Service
+from app.models.store import Store
+from app.models.store_blocked_slot import StoreBlockedSlot
+from app.models.store_holiday import StoreHoliday
+from app.models.store_hours import StoreHours
+from app.models.technician import Technician
+from app.models.technician_unavailable import TechnicianUnavailable
+from app.models.user import User
+from app.services import booking_validation_service, risk_service
+
+
+DAY = date(2026, 3, 14)
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        Store(id=1, name="Salon", address="1 Main St", city="NYC", state="NY", time_zone="America/New_York"),
+        StoreHours(store_id=1, day_of_week=DAY.weekday(), open_time=time(9, 0), close_time=time(18, 0), is_closed=False),
+        Service(id=1, store_id=1, name="Gel", price=50, duration_minutes=60, is_active=1),
+        Technician(id=3, store_id=1, name="Amy", is_active=1),
+        User(id=7, phone="2125550100", password_hash="x", username="customer"),
+        StoreBlockedSlot(store_id=1, blocked_date=DAY, start_time=time(12, 0), end_time=time(13, 0), reason="Lunch"),
+        TechnicianUnavailable(technician_id=3, start_date=DAY, end_date=DAY, start_time=time(16, 0), end_time=time(17, 0)),
+        Appointment(
+            user_id=8,
+            store_id=1,
+            service_id=1,
+            technician_id=3,
+            appointment_date=DAY,
+            appointment_time=time(10, 0),
+            status=AppointmentStatus.CONFIRMED,
+        ),
+    ]
+
+
+def _load(db, **kwargs):
+    params = {
+        "user_id": 7,
+        "store_id": 1,
+        "service_id": 1,
+        "appointment_date": DAY,
+        "technician_id": 3,
+        "ip_address": "10.0.0.1",
+    }
+    params.update(kwargs)
+    return booking_validation_service.load_booking_context(db, **params)
+
+
+def test_context_loads_in_constant_queries(db) -> None:
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        context = _load(db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 5
+    assert context.store.id == 1
+    assert context.technician.id == 3
+    assert context.risk_decision(ip_address="10.0.0.1").allowed
+    assert context.check_slot(time(14, 0)) is None
+
+
+@pytest.mark.parametrize(
+    ("appointment_time", "status_code", "detail"),
+    [
+        (time(8, 30), 400, "Selected time is outside salon business hours (09:00-18:00)."),
+        (time(11, 30), 400, "This time slot is blocked by store (Lunch). Please choose another time."),
+        (time(15, 30), 400, "Selected technician is unavailable for this time."),
+        (
+            time(10, 30),
+            400,
+            "The technician is already booked from 10:00 to 11:00. "
+            "Please choose a time after 11:00 or pick another technician.",
+        ),
+    ],
+)
+def test_check_slot_rejections(db, appointment_time, status_code, detail) -> None:
+    rejection = _load(db).check_slot(appointment_time)
+    assert rejection is not None
+    assert (rejection.status_code, rejection.detail) == (status_code, detail)
+
+
+def test_missing_rows_and_holiday(db) -> None:
+    assert _load(db, store_id=99).store is None
+    assert _load(db, service_id=99).check_slot(time(14, 0)).status_code == 404
+    assert _load(db, technician_id=99).check_slot(time(14, 0)).detail == "Technician not found"
+
+    db.add(StoreHoliday(store_id=1, holiday_date=DAY, name="Spring Break"))
+    db.commit()
+    rejection = _load(db).check_slot(time(14, 0))
+    assert rejection.detail == "The salon is closed on this date for Spring Break."
+
+
+def test_risk_inputs_are_prefetched(db) -> None:
+    now = datetime.now()
+    for _ in range(2):
+        risk_service.log_risk_event(db, user_id=7, event_type="appointment_created", ip_address="10.0.0.1")
+    db.add_all(
+        [
+            Appointment(
+                user_id=7,
+                store_id=1,
+                service_id=1,
+                appointment_date=DAY,
+                appointment_time=time(9, 0),
+                status=AppointmentStatus.CANCELLED,
+            ),
+        ]
+    )
+    db.commit()
+
+    context = _load(db)
+    assert (context.risk.user_events_1m, context.risk.ip_events_1h) == (2, 2)
+    assert context.risk.same_day_count == 1
+    assert context.risk_decision(ip_address="10.0.0.1").error_code == "BOOK_RATE_LIMITED"
+
+    db.add(UserRiskState(user_id=7, risk_level="high", restricted_until=now + timedelta(hours=1)))
+    db.commit()
+    assert _load(db).risk_decision().error_code == "BOOK_RESTRICTED"
@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from app.services import cache_service
+
+
+class _FakeRedis:
+    """The handful of Redis commands cache_service uses, against a dict (TTLs ignored)."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.published: list[tuple[str, str]] = []
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.store.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def setex(self, key, _ttl, value):
+        self.store[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def eval(self, _script, _numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client) -> None:
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(cache_service, "_LOCAL_CACHE", {})
+    monkeypatch.setattr(cache_service, "_STATS", cache_service._CacheStats())
+    monkeypatch.setattr(cache_service, "_LOAD_POLL_SECONDS", 0.01)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(cache_service, "_get_redis_client", lambda: client)
+    return client
+
+
+def test_l1_serves_repeat_reads_and_evicts_least_recently_used(redis, monkeypatch) -> None:
+    monkeypatch.setattr(cache_service, "_L1_MAX_ENTRIES", 2)
+    for key in ("a", "b"):
+        cache_service.set_json(key, {"key": key}, 60)
+    assert cache_service.get_json("a") == {"key": "a"}
+    cache_service.set_json("c", {"key": "c"}, 60)
+
+    assert set(cache_service._LOCAL_CACHE) == {cache_service._cache_key("a"), cache_service._cache_key("c")}
+    assert redis.gets == 0
+    assert cache_service.get_json("b") == {"key": "b"}
+    assert redis.gets == 1
+
+    stats = cache_service.get_cache_stats()
+    assert (stats["l1_hits"], stats["l2_hits"], stats["evictions"]) == (1, 1, 2)
+
+
+def test_writes_broadcast_invalidations_that_other_workers_apply(redis) -> None:
+    cache_service.set_json("vip:levels", [1, 2], 60)
+    cache_service.delete("vip:levels")
+    cache_key = cache_service._cache_key("vip:levels")
+    assert [message for _, message in redis.published] == [f"{cache_service._INSTANCE_ID} {cache_key}"] * 2
+
+    cache_service.set_json("vip:levels", [3], 60)
+    cache_service.handle_invalidation(f"{cache_service._INSTANCE_ID} {cache_key}")
+    assert cache_key in cache_service._LOCAL_CACHE
+    cache_service.handle_invalidation(f"another-worker {cache_key}")
+    assert cache_key not in cache_service._LOCAL_CACHE
+    assert cache_service.get_json("vip:levels") == [3]
+
+
+def test_concurrent_misses_run_the_loader_once(monkeypatch) -> None:
+    monkeypatch.setattr(cache_service, "_get_redis_client", lambda: None)
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"rows": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache_service.get_or_set_json("count:x", 30, loader)))
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"rows": 42}] * 8
+    assert cache_service.get_cache_stats()["coalesced"] == 7
+
+
+def test_waits_for_another_process_holding_the_load_lock(redis) -> None:
+    cache_key = cache_service._cache_key("count:y")
+    redis.store[f"{cache_service._LOAD_LOCK_PREFIX}{cache_key}"] = "other-process"
+    entry = cache_service._Entry(7, time.time() + 30, 0.5)
+    threading.Timer(0.05, lambda: redis.store.__setitem__(cache_key, cache_service._encode_entry(entry))).start()
+
+    assert cache_service.get_or_set_json("count:y", 30, lambda: pytest.fail("loader must not run")) == 7
+    assert cache_service.get_cache_stats()["waited"] == 1
+
+
+def test_expiring_entries_refresh_early_without_blocking_readers(redis, monkeypatch) -> None:
+    cache_key = cache_service._cache_key("count:z")
+    # Loads take 5s and the entry expires in 1s, so XFetch always fires.
+    redis.store[cache_key] = cache_service._encode_entry(cache_service._Entry("old", time.time() + 1, 5.0))
+    lock_key = f"{cache_service._LOAD_LOCK_PREFIX}{cache_key}"
+    redis.store[lock_key] = "other-process"
+
+    assert cache_service.get_or_set_json("count:z", 30, lambda: pytest.fail("another process is refreshing")) == "old"
+
+    del redis.store[lock_key]
+    monkeypatch.setattr(cache_service, "_LOCAL_CACHE", {})
+    assert cache_service.get_or_set_json("count:z", 30, lambda: "new") == "new"
+    assert cache_service._decode_entry(redis.store[cache_key]).value == "new"
+    assert lock_key not in redis.store
+    assert cache_service.get_cache_stats()["early_refreshes"] == 1
+
+
+def test_reads_payloads_written_without_an_envelope(redis) -> None:
+    redis.store[cache_service._cache_key("legacy")] = '{"a": 1}'
+    assert cache_service.get_json("legacy") == {"a": 1}
@@ -0,0 +1,92 @@
+from datetime import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.v1.endpoints import services as services_endpoints
+from app.api.v1.endpoints import store_hours as store_hours_endpoints
+from app.api.v1.endpoints import stores as stores_endpoints
+from app.core.security import create_access_token
+from app.crud import service as crud_service
+from app.crud import store as crud_store
+from app.crud import store_hours as crud_store_hours
+from app.db import query_stats
+from app.models.service import Service
+from app.models.store import Store
+from app.models.user import User
+from app.schemas.service import ServiceUpdate
+from app.schemas.store import StoreUpdate
+from app.schemas.store_hours import StoreHoursCreate
+from app.services import catalog_cache_service
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        Store(id=1, name="Glow", address="1 Main St", city="New York", state="NY"),
+        Store(id=2, name="Hidden", address="2 Main St", city="New York", state="NY", is_visible=False),
+        User(id=9, phone="2125550109", password_hash="hash", username="mgr", store_id=2),
+        Service(id=5, store_id=1, name="Gel", price=40, duration_minutes=45, category="nails"),
+    ]
+
+
+def _request(user_id=None) -> Request:
+    headers = []
+    if user_id is not None:
+        headers.append((b"authorization", f"Bearer {create_access_token({'sub': str(user_id)})}".encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_store_detail_is_served_from_cache_until_updated(db) -> None:
+    crud_store.create_store_image(db, store_id=1, image_url="https://cdn.example.com/a.jpg")
+    first = stores_endpoints.get_store(_request(), 1, db)
+    assert first["images"][0]["image_url"] == "https://cdn.example.com/a.jpg"
+
+    with query_stats.query_budget(max_queries=0):
+        assert stores_endpoints.get_store(_request(), 1, db) == first
+        assert stores_endpoints.get_store_images(_request(), 1, db) == first["images"]
+
+    crud_store.update_store(db, store_id=1, store=StoreUpdate(name="Glow Up"))
+    assert stores_endpoints.get_store(_request(), 1, db)["name"] == "Glow Up"
+
+
+def test_hidden_store_stays_hidden_when_served_from_cache(db) -> None:
+    assert stores_endpoints.get_store(_request(user_id=9), 2, db)["name"] == "Hidden"
+
+    for call in (stores_endpoints.get_store, stores_endpoints.get_store_images, stores_endpoints.get_store_services):
+        with pytest.raises(HTTPException) as exc_info:
+            call(_request(), 2, db)
+        assert exc_info.value.status_code == 404
+
+    db.query(Store).filter(Store.id == 2).update({"is_visible": True})
+    db.commit()
+    catalog_cache_service.invalidate_store(2)
+    assert stores_endpoints.get_store(_request(), 2, db)["is_visible"] is True
+
+
+def test_service_writes_invalidate_store_services_and_categories(db) -> None:
+    assert [item["name"] for item in stores_endpoints.get_store_services(_request(), 1, db)] == ["Gel"]
+    assert services_endpoints.get_service_categories(db) == ["nails"]
+
+    crud_service.update_service(db, service_id=5, service=ServiceUpdate(name="Gel X", category="extensions"))
+    assert [item["name"] for item in services_endpoints.get_store_services(1, False, db)] == ["Gel X"]
+    assert services_endpoints.get_service_categories(db) == ["extensions"]
+
+    crud_service.deactivate_service(db, service_id=5)
+    assert stores_endpoints.get_store_services(_request(), 1, db) == []
+    assert [item["id"] for item in services_endpoints.get_store_services(1, True, db)] == [5]
+
+
+def test_store_hours_batch_update_invalidates_cached_hours(db) -> None:
+    assert store_hours_endpoints.get_store_hours(1, db) == []
+    crud_store_hours.batch_create_or_update_store_hours(
+        db,
+        store_id=1,
+        hours_list=[StoreHoursCreate(day_of_week=0, open_time=time(9, 0), close_time=time(18, 0))],
+    )
+    hours = store_hours_endpoints.get_store_hours(1, db)
+    assert [(item["day_of_week"], item["open_time"]) for item in hours] == [(0, "09:00:00")]
@@ -0,0 +1,115 @@
+import importlib.util
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.crud import appointment as crud_appointment
+from app.crud import customer_stats as crud_customer_stats
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.customer_stats import CustomerStats
+from app.models.user import User
+
+
+FUTURE = date.today() + timedelta(days=3)
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        User(id=7, phone="2125550107", password_hash="x", username="ann"),
+        Appointment(
+            id=1,
+            user_id=7,
+            store_id=1,
+            service_id=1,
+            appointment_date=date(2026, 1, 5),
+            appointment_time=time(10, 0),
+            status=AppointmentStatus.COMPLETED,
+            order_amount=80,
+            final_paid_amount=65,
+        ),
+        Appointment(
+            id=2,
+            user_id=7,
+            store_id=2,
+            service_id=1,
+            appointment_date=date(2026, 1, 9),
+            appointment_time=time(10, 0),
+            status=AppointmentStatus.COMPLETED,
+            order_amount=40,
+            final_paid_amount=0,
+        ),
+        Appointment(
+            id=3,
+            user_id=7,
+            store_id=1,
+            service_id=1,
+            appointment_date=FUTURE,
+            appointment_time=time(11, 0),
+            status=AppointmentStatus.CONFIRMED,
+        ),
+    ]
+
+
+@pytest.fixture
+def db(db):
+    crud_customer_stats.rebuild_customer_stats(db)
+    return db
+
+
+def test_rows_are_kept_per_store_and_summed_per_customer(db) -> None:
+    rows = {row.store_id: row for row in db.query(CustomerStats).filter(CustomerStats.user_id == 7)}
+    assert set(rows) == {1, 2}
+    assert (rows[1].total_count, rows[1].completed_spend) == (2, 65.0)
+    assert rows[1].next_appointment_at == datetime.combine(FUTURE, time(11, 0))
+
+    totals = crud_customer_stats.get_user_totals(db, 7)
+    assert (totals["completed_count"], totals["completed_spend"]) == (2, 105.0)
+    assert totals["last_visit_at"] == datetime(2026, 1, 9, 10, 0)
+    assert crud_customer_stats.get_user_totals(db, 7, store_id=2)["next_appointment_at"] is None
+
+
+def test_state_transitions_refresh_the_projection(db) -> None:
+    crud_appointment.cancel_appointment_with_reason(db, 3, cancel_reason="No show")
+    totals = crud_customer_stats.get_user_totals(db, 7, store_id=1)
+    assert (totals["no_show_count"], totals["cancelled_count"], totals["next_appointment_at"]) == (1, 0, None)
+
+    crud_appointment.reschedule_appointment(db, 1, FUTURE, time(9, 0))
+    crud_appointment.cancel_appointment(db, 1)
+    totals = crud_customer_stats.get_user_totals(db, 7, store_id=1)
+    assert (totals["completed_count"], totals["cancelled_count"], totals["completed_spend"]) == (0, 1, 0.0)
+
+
+def test_stale_only_rebuild_clears_past_next_appointments(db) -> None:
+    row = db.query(CustomerStats).filter(CustomerStats.user_id == 7, CustomerStats.store_id == 1).one()
+    row.next_appointment_at = datetime(2026, 1, 1, 9, 0)
+    db.query(Appointment).filter(Appointment.id == 3).update({"appointment_date": date(2026, 1, 1)})
+    db.commit()
+
+    assert crud_customer_stats.rebuild_customer_stats(db, stale_only=True) == 1
+    db.refresh(row)
+    assert row.next_appointment_at is None
+    assert crud_customer_stats.rebuild_customer_stats(db, stale_only=True) == 0
+
+
+def test_migration_backfill_matches_the_rebuild(db) -> None:
+    path = Path(__file__).parent / "alembic" / "versions" / "20261017_000100_add_customer_stats_table.py"
+    spec = importlib.util.spec_from_file_location("customer_stats_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    def snapshot():
+        db.expire_all()
+        return sorted(
+            (row.user_id, row.store_id, row.total_count, row.completed_count, row.completed_spend,
+             row.last_visit_at, row.next_appointment_at)
+            for row in db.query(CustomerStats).all()
+        )
+
+    rebuilt = snapshot()
+    db.query(CustomerStats).delete()
+    db.execute(text(migration.backfill_sql("sqlite")), {"now": datetime.now().replace(microsecond=0)})
+    db.commit()
+    assert snapshot() == rebuilt
@@ -0,0 +1,111 @@
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.endpoints import customers as customers_endpoint
+from app.crud import customer_stats as crud_customer_stats
+from app.models.appointment import Appointment
+from app.models.risk import UserRiskState
+from app.models.user import User
+
+
+@pytest.fixture
+def seed_rows():
+    base = datetime(2026, 1, 1, 12, 0)
+    rows = [
+        User(id=1, phone="2125550001", password_hash="x", username="admin", is_admin=True, created_at=base),
+        User(id=2, phone="2125550002", password_hash="x", username="ann", created_at=base + timedelta(days=1)),
+        User(id=3, phone="2125550003", password_hash="x", username="bob", created_at=base + timedelta(days=2)),
+        User(id=4, phone="2125550004", password_hash="x", username="cat", created_at=base + timedelta(days=3)),
+        UserRiskState(user_id=3, risk_level="high", restricted_until=datetime.now() + timedelta(days=1)),
+    ]
+    future = date.today() + timedelta(days=5)
+    appointments = [
+        (2, 1, future, time(15, 0), "pending", None),
+        (2, 1, future, time(11, 0), "confirmed", None),
+        (2, 2, future + timedelta(days=1), time(9, 0), "pending", None),
+        (2, 1, date(2026, 1, 5), time(10, 0), "completed", None),
+        (3, 1, date(2026, 1, 6), time(10, 0), "cancelled", "Customer No Show"),
+        (3, 1, date(2026, 1, 7), time(10, 0), "cancelled", "changed plans"),
+        (4, 2, future, time(10, 0), "pending", None),
+    ]
+    for user_id, store_id, day, at, status, reason in appointments:
+        rows.append(
+            Appointment(
+                user_id=user_id,
+                store_id=store_id,
+                service_id=1,
+                appointment_date=day,
+                appointment_time=at,
+                status=status,
+                cancel_reason=reason,
+            )
+        )
+    return rows
+
+
+@pytest.fixture
+def db(db):
+    crud_customer_stats.rebuild_customer_stats(db)
+    return db
+
+
+def _list(db, current_user, **params):
+    defaults = {
+        "keyword": None,
+        "include_full_phone": False,
+        "register_from": None,
+        "register_to": None,
+        "restricted_only": False,
+        "risk_level": None,
+        "has_upcoming": None,
+        "skip": 0,
+        "limit": 20,
+    }
+    defaults.update(params)
+    return customers_endpoint.list_customers(request=SimpleNamespace(), db=db, current_user=current_user, **defaults)
+
+
+def _admin():
+    return SimpleNamespace(id=1, is_admin=True, store_id=None)
+
+
+def test_list_customers_reads_stats_projection(db) -> None:
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        response = _list(db, _admin())
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 2
+    assert response.total == 3
+    assert [item.id for item in response.items] == [4, 3, 2]
+
+    ann = response.items[2]
+    assert (ann.total_appointments, ann.completed_count) == (4, 1)
+    assert ann.next_appointment_at == datetime.combine(date.today() + timedelta(days=5), time(11, 0))
+
+    bob = response.items[1]
+    assert (bob.cancelled_count, bob.no_show_count, bob.next_appointment_at) == (1, 1, None)
+    assert (bob.risk_level, bob.status) == ("high", "restricted")
+
+
+def test_list_customers_filters_and_paginates_in_sql(db) -> None:
+    upcoming = _list(db, _admin(), has_upcoming=True, skip=1, limit=1)
+    assert upcoming.total == 2
+    assert [item.id for item in upcoming.items] == [2]
+
+    assert [item.id for item in _list(db, _admin(), has_upcoming=False).items] == [3]
+    assert [item.id for item in _list(db, _admin(), restricted_only=True).items] == [3]
+
+
+def test_store_admin_sees_store_scoped_stats(db) -> None:
+    response = _list(db, SimpleNamespace(id=9, is_admin=False, store_id=2))
+    assert [item.id for item in response.items] == [4, 2]
+    ann = response.items[1]
+    assert ann.total_appointments == 1
+    assert ann.next_appointment_at == datetime.combine(date.today() + timedelta(days=6), time(9, 0))
@@ -7,7 +7,7 @@ Flow covered:
 3. Register/login customer and super admin
 4. Customer registers push device token and verifies normalization/upsert
 5. Customer creates appointment so store-based batch targeting has a real recipient
-6. Super admin sends test push, single push, and store-based batch push
+6. Super admin sends test push, single push, and store-based batch push (polling the job)
 7. Customer disables notifications and verifies all tokens deactivate
 8. Customer re-enables notifications, registers a second token, then unregisters it
 
@@ -20,6 +20,7 @@ from __future__ import annotations
 import json
 import os
 import sys
+import time as time_module
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
@@ -80,6 +81,7 @@ TRUNCATE_TABLES: Sequence[str] = (
     "point_transactions",
     "promotion_services",
     "promotions",
+    "push_campaign_jobs",
     "push_device_tokens",
     "referrals",
     "review_replies",
@@ -454,11 +456,11 @@ def main() -> None:
     assert_true(int(single_push.get("failed", 0)) >= 0, "single push failed should be non-negative")
     assert_true(int(single_push.get("deactivated", 0)) >= 0, "single push deactivated should be non-negative")
 
-    batch_push = request_json(
+    batch_job = request_json(
         "POST",
         "/notifications/admin/send-batch",
         token=super_admin_token,
-        expected_statuses=(200,),
+        expected_statuses=(202,),
         json={
             "store_id": seed.store_id,
             "title": "Smoke Batch Push",
@@ -466,8 +468,21 @@ def main() -> None:
             "custom_data": {"source": "device-push-batch-smoke"},
         },
     )
-    assert_equal(batch_push.get("detail"), "Batch push processed", "batch push detail")
+    assert_true(int(batch_job.get("job_id", 0)) > 0, "batch push job_id")
+    deadline = time_module.monotonic() + 30
+    batch_push = batch_job
+    while batch_push.get("status") not in {"completed", "failed"}:
+        assert_true(time_module.monotonic() < deadline, "batch push job should finish within 30s")
+        time_module.sleep(0.5)
+        batch_push = request_json(
+            "GET",
+            f"/notifications/admin/send-batch/{int(batch_job['job_id'])}",
+            token=super_admin_token,
+            expected_statuses=(200,),
+        )
+    assert_equal(batch_push.get("status"), "completed", "batch push job status")
     assert_equal(int(batch_push.get("target_user_count")), 1, "batch push target_user_count")
+    assert_equal(int(batch_push.get("processed_user_count")), 1, "batch push processed_user_count")
     assert_equal(bool(batch_push.get("truncated")), False, "batch push truncated")
     batch_user_total = (
         int(batch_push.get("sent_user_count", 0))
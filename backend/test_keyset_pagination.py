@@ -0,0 +1,91 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.endpoints import logs as logs_endpoint
+from app.models.system_log import SystemLog
+from app.utils import pagination
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    base = datetime(2026, 5, 1, 12, 0)
+    # Pairs of rows share a timestamp so the id tie-breaker is exercised.
+    return [
+        SystemLog(id=index + 1, log_type="audit", level="info", module="appointments", created_at=base + timedelta(minutes=index // 2))
+        for index in range(7)
+    ]
+
+
+def _list(db, **params):
+    defaults = {
+        "log_type": None,
+        "level": None,
+        "module": None,
+        "action": None,
+        "operator_user_id": None,
+        "operator_role": None,
+        "operator": None,
+        "target_type": None,
+        "target_id": None,
+        "request_id": None,
+        "ip_address": None,
+        "status_code": None,
+        "date_from": None,
+        "date_to": None,
+        "skip": 0,
+        "limit": 3,
+        "cursor": None,
+        "include_total": True,
+    }
+    defaults.update(params)
+    return logs_endpoint.list_logs_admin(db=db, _=None, **defaults)
+
+
+def test_cursor_round_trip_and_validation() -> None:
+    keys = (
+        pagination.SortKey(None, "date"),
+        pagination.SortKey(None, "time"),
+        pagination.SortKey(None, "int"),
+    )
+    values = (date(2026, 5, 1), time(9, 30), 42)
+    assert pagination.decode_cursor(pagination.encode_cursor(values), keys) == values
+
+    for broken in ("not-a-cursor", pagination.encode_cursor([1, 2])):
+        with pytest.raises(pagination.InvalidCursor):
+            pagination.decode_cursor(broken, keys)
+
+
+def test_logs_walk_pages_by_cursor(db) -> None:
+    seen = []
+    cursor = None
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        while True:
+            page = _list(db, cursor=cursor)
+            assert page.total == 7
+            seen.extend(item.id for item in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+    assert sum("count(" in statement.lower() for statement in statements) == 1
+
+    legacy = _list(db, skip=3, include_total=False)
+    assert legacy.total is None
+    assert [item.id for item in legacy.items] == [4, 3, 2]
+
+
+def test_invalid_cursor_is_a_bad_request(db) -> None:
+    with pytest.raises(logs_endpoint.HTTPException) as exc_info:
+        _list(db, cursor="%%%")
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,110 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.system_log import SystemLog
+from app.services import log_service
+
+
+@pytest.fixture
+def engine(engine, monkeypatch):
+    monkeypatch.setattr(log_service, "SessionLocal", sessionmaker(bind=engine))
+    return engine
+
+
+def _rows(count: int, **overrides) -> list[dict]:
+    return [
+        log_service._build_system_log_values(**{"log_type": "access", "level": "info", "request_id": f"r{index}", **overrides})
+        for index in range(count)
+    ]
+
+
+def _count(engine) -> int:
+    with engine.connect() as connection:
+        return len(connection.execute(SystemLog.__table__.select()).fetchall())
+
+
+def test_rows_are_written_as_multi_row_inserts(engine) -> None:
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    writer = log_service._AsyncSystemLogWriter(maxsize=100)
+    try:
+        writer.flush_rows(_rows(120))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # 19 columns under SQLite's 999 bind parameters: 52 rows per statement.
+    assert sum(statement.startswith("INSERT INTO system_logs ") for statement in statements) == 3
+    assert _count(engine) == 120
+    metrics = writer.metrics()
+    assert (metrics["written"], metrics["last_batch_size"], metrics["batches"]) == (120, 120, 1)
+
+
+def test_failed_batch_is_split_until_the_bad_row_is_isolated(engine) -> None:
+    rows = _rows(7)
+    rows[4]["level"] = None  # violates NOT NULL
+    writer = log_service._AsyncSystemLogWriter(maxsize=100)
+    writer.flush_rows(rows)
+
+    assert _count(engine) == 6
+    assert writer.metrics()["discarded"] == 1
+
+
+def test_unavailable_database_spills_and_replays(engine, tmp_path, monkeypatch) -> None:
+    writer = log_service._AsyncSystemLogWriter(maxsize=100, spill_dir=str(tmp_path / "spill"))
+    real_insert = log_service._insert_system_log_rows
+
+    def down(db, rows):
+        raise OperationalError("INSERT", {}, Exception("server has gone away"))
+
+    monkeypatch.setattr(log_service, "_insert_system_log_rows", down)
+    writer.flush_rows(_rows(5))
+    assert writer.metrics()["spilled"] == 5
+    assert writer.replay_spill() == 0  # still down: rows go back to the spill
+
+    monkeypatch.setattr(log_service, "_insert_system_log_rows", real_insert)
+    before_replay = datetime.utcnow()
+    assert writer.replay_spill() == 5
+    assert writer.replay_spill() == 0
+    assert list((tmp_path / "spill").iterdir()) == []
+    with engine.connect() as connection:
+        created = [row.created_at for row in connection.execute(SystemLog.__table__.select())]
+    assert len(created) == 5
+    assert all(value <= before_replay for value in created)
+
+
+def test_claim_skips_files_a_live_process_may_still_append_to(tmp_path) -> None:
+    spill = log_service._LogSpillFile(str(tmp_path))
+    live, dead = os.getppid(), 99999999
+    for name in [
+        f"system_logs.{live}.jsonl",
+        f"system_logs.{dead}.jsonl",
+        f"system_logs.{live}.jsonl.replaying.{live}.1",
+        f"system_logs.{dead}.jsonl.replaying.{dead}.2",
+        f"system_logs.{live}.jsonl.replaying.{live}.3",
+    ]:
+        (tmp_path / name).write_text("{}\n")
+    stale = time.time() - log_service._ASYNC_LOG_STALE_REPLAY_SECONDS - 1
+    os.utime(tmp_path / f"system_logs.{live}.jsonl.replaying.{live}.3", (stale, stale))
+    spill.append(_rows(1))
+
+    assert len(spill.claim()) == 4  # our own file, both dead-owner files and the stale replay
+    assert sorted(path.name for path in tmp_path.iterdir() if f".replaying.{os.getpid()}." not in path.name) == [
+        f"system_logs.{live}.jsonl",
+        f"system_logs.{live}.jsonl.replaying.{live}.1",
+    ]
+
+
+def test_full_queue_counts_drops(monkeypatch) -> None:
+    writer = log_service._AsyncSystemLogWriter(maxsize=1)
+    monkeypatch.setattr(writer, "start", lambda: None)
+    assert writer.enqueue({"log_type": "access", "level": "info"})
+    assert not writer.enqueue({"log_type": "access", "level": "info"})
+    metrics = writer.metrics()
+    assert (metrics["queue_depth"], metrics["dropped"]) == (1, 1)
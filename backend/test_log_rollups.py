@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models.system_log import RequestLatencyHistogram, SystemLog, SystemLogHourlyRollup
+from app.services import log_retention_service, log_rollup_service, log_service
+
+
+NOW = datetime(2026, 10, 17, 15, 30)
+
+
+def _row(created_at, latency_ms=None, **overrides):
+    values = log_service._build_system_log_values(
+        **{"log_type": "access", "level": "info", "module": "stores", "action": "http.request", **overrides}
+    )
+    values.update(created_at=created_at, latency_ms=latency_ms)
+    return values
+
+
+def test_rollups_accumulate_across_batches(db) -> None:
+    log_rollup_service.record_rollups(db, [_row(NOW, 12), _row(NOW.replace(minute=5), 40)])
+    log_rollup_service.record_rollups(db, [_row(NOW, 700), _row(NOW - timedelta(hours=1)), _row(NOW, level="error")])
+    db.commit()
+
+    rows = {
+        (row.bucket_start.hour, row.level): (row.count, row.latency_count, row.latency_sum_ms)
+        for row in db.query(SystemLogHourlyRollup)
+    }
+    assert rows == {(15, "info"): (3, 3, 752), (14, "info"): (1, 0, 0), (15, "error"): (1, 0, 0)}
+
+
+def test_rollups_group_by_route_template_not_raw_path(db) -> None:
+    route = "/api/v1/appointments/{appointment_id}"
+    rows = [_row(NOW, 10, path=f"/api/v1/appointments/{appointment_id}", route=route) for appointment_id in range(50)]
+    log_rollup_service.record_rollups(db, rows)
+    db.commit()
+
+    assert [(row.route, row.count) for row in db.query(SystemLogHourlyRollup)] == [(route, 50)]
+
+
+def test_rebuild_matches_incremental_rollups(db) -> None:
+    rows = [
+        _row(NOW - timedelta(minutes=20 * index), 5 * index, module=f"m{index % 3}", route=f"/api/v1/m{index % 3}/{{id}}")
+        for index in range(12)
+    ]
+    db.add_all(SystemLog(**row) for row in rows)
+    log_rollup_service.record_rollups(db, rows)
+    db.commit()
+
+    def snapshot():
+        return sorted(
+            (row.bucket_start, row.module, row.count, row.latency_sum_ms) for row in db.query(SystemLogHourlyRollup)
+        )
+
+    expected = snapshot()
+    assert log_rollup_service.rebuild_rollups(db, batch_size=5) == 12
+    assert snapshot() == expected
+
+
+def test_retention_deletes_expired_rows_and_rollups(db) -> None:
+    old = NOW - timedelta(days=log_retention_service.SYSTEM_LOG_RETENTION_DAYS + 1)
+    ancient = NOW - timedelta(days=log_retention_service.SYSTEM_LOG_ROLLUP_RETENTION_DAYS + 1)
+    rows = [_row(NOW), _row(old), _row(old), _row(ancient)]
+    db.add_all(SystemLog(**row) for row in rows)
+    log_rollup_service.record_rollups(db, rows)
+    db.commit()
+
+    stats = log_retention_service.run_log_retention(db, now=NOW)
+
+    assert stats["deleted_rows"] == 3
+    assert stats["dropped_partitions"] == []
+    assert [row.created_at for row in db.query(SystemLog)] == [NOW]
+    assert sorted(row.bucket_start for row in db.query(SystemLogHourlyRollup)) == [
+        log_rollup_service.hour_start(old),
+        log_rollup_service.hour_start(NOW),
+    ]
+
+
+def test_stats_endpoint_reads_only_rollups(db, monkeypatch) -> None:
+    from app.api.v1.endpoints import logs
+
+    monkeypatch.setattr(logs, "_get_cached_log_stats", lambda: None)
+    monkeypatch.setattr(logs, "_set_cached_log_stats", lambda result: None)
+    now = datetime.utcnow()
+    log_rollup_service.record_rollups(
+        db,
+        [
+            _row(now, 20),
+            _row(now, 80, module="auth"),
+            _row(now, 300, level="error", path="/api/v1/boom/7", route="/api/v1/boom/{item_id}"),
+            _row(now, log_type="security", module="security", action="security.ip_deny"),
+        ],
+    )
+    db.add(
+        RequestLatencyHistogram(
+            bucket_start=log_rollup_service.hour_start(now),
+            method="GET",
+            route="/api/v1/stores",
+            status_class="2xx",
+            upper_bound_ms=100,
+            count=10,
+        )
+    )
+    db.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        stats = logs.get_log_stats_admin(db=db, _=None)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 5
+    assert not any("FROM system_logs " in statement for statement in statements)
+    assert (stats.today_total, stats.today_error_count, stats.today_security_count) == (4, 1, 1)
+    assert stats.avg_latency_ms == 133
+    assert stats.p50_latency_ms < stats.p95_latency_ms <= stats.p99_latency_ms <= 100
+    assert stats.top_error_paths == [{"path": "/api/v1/boom/{item_id}", "count": 1}]
+    assert stats.top_modules[0] == {"module": "stores", "count": 2}
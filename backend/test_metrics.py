@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.core import metrics
+from app.services import cache_service
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_exports_route_templates_and_requires_token(monkeypatch) -> None:
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **_kwargs: True)
+    labels = {"method": "GET", "route": "/uploads/{file_path:path}", "status_class": "4xx"}
+    before = _value("nailsdash_http_request_duration_seconds_count", **labels)
+
+    with TestClient(main_module.app) as client:
+        client.get("/uploads/missing.txt")
+        monkeypatch.setattr(main_module.settings, "METRICS_BEARER_TOKEN", "scrape-token")
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert _value("nailsdash_http_request_duration_seconds_count", **labels) == before + 1
+    assert 'route="/uploads/{file_path:path}"' in response.text
+    assert "nailsdash_background_queue_depth" in response.text
+    assert "missing.txt" not in response.text
+
+
+def test_cache_hits_misses_and_fallbacks_are_counted(local_cache) -> None:
+    before = {
+        "hit": _value("nailsdash_cache_lookups_total", result="hit"),
+        "miss": _value("nailsdash_cache_lookups_total", result="miss"),
+        "get": _value("nailsdash_cache_fallbacks_total", operation="get"),
+        "set": _value("nailsdash_cache_fallbacks_total", operation="set"),
+    }
+
+    assert cache_service.get_json("metrics:key") is None
+    cache_service.set_json("metrics:key", {"a": 1}, 30)
+    assert cache_service.get_json("metrics:key") == {"a": 1}
+
+    assert _value("nailsdash_cache_lookups_total", result="hit") == before["hit"] + 1
+    assert _value("nailsdash_cache_lookups_total", result="miss") == before["miss"] + 1
+    # The second read is an L1 hit, which never consults Redis.
+    assert _value("nailsdash_cache_fallbacks_total", operation="get") == before["get"] + 1
+    assert _value("nailsdash_cache_fallbacks_total", operation="set") == before["set"] + 1
+
+
+def test_scheduler_pass_records_duration_and_failures() -> None:
+    count_before = _value("nailsdash_scheduler_loop_duration_seconds_count", task="test")
+    failures_before = _value("nailsdash_scheduler_loop_failures_total", task="test")
+
+    with metrics.scheduler_pass("test"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.scheduler_pass("test"):
+            raise RuntimeError("boom")
+
+    assert _value("nailsdash_scheduler_loop_duration_seconds_count", task="test") == count_before + 2
+    assert _value("nailsdash_scheduler_loop_failures_total", task="test") == failures_before + 1
+
+
+_WORKER_SCRIPT = """
+import sys
+from app.core import metrics
+metrics.BACKGROUND_QUEUE_DROPPED.labels(queue="system_log").inc(int(sys.argv[1]))
+metrics.BACKGROUND_QUEUE_DEPTH.labels(queue="system_log").set(int(sys.argv[1]))
+"""
+
+_SCRAPE_SCRIPT = """
+from app.core import metrics
+print(metrics.render_latest()[0].decode())
+"""
+
+
+def test_multiprocess_mode_aggregates_across_workers(tmp_path) -> None:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    def run(script, *args):
+        return subprocess.run(
+            [sys.executable, "-c", script, *args], env=env, cwd=cwd, check=True, capture_output=True, text=True
+        ).stdout
+
+    run(_WORKER_SCRIPT, "3")
+    run(_WORKER_SCRIPT, "4")
+    output = run(_SCRAPE_SCRIPT)
+
+    assert 'nailsdash_background_queue_dropped_total{queue="system_log"} 7.0' in output
+    # Worker processes have exited but were never marked dead, so their live gauges still sum.
+    assert 'nailsdash_background_queue_depth{queue="system_log"} 7.0' in output
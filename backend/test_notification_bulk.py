@@ -0,0 +1,108 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event
+
+from app.crud import notification as crud_notification
+from app.models.appointment import Appointment
+from app.models.notification import Notification, NotificationType
+from app.models.push_outbox import PushOutbox
+from app.models.service import Service
+from app.models.store import Store
+from app.models.user import User
+from app.services import cache_service, notification_service, push_outbox_service
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        Store(id=1, name="Salon", address="1 Main St", city="NYC", state="NY"),
+        Service(id=1, store_id=1, name="Gel", price=50, duration_minutes=60, is_active=1),
+        User(id=1, phone="2125550101", password_hash="hash", username="admin", store_id=1),
+        User(id=2, phone="2125550102", password_hash="hash", username="ann"),
+        User(id=3, phone="2125550103", password_hash="hash", username="bo"),
+    ] + [
+        Appointment(
+            id=10 + index,
+            user_id=2 + index % 2,
+            store_id=1,
+            service_id=1,
+            appointment_date=date(2026, 11, 2),
+            appointment_time=time(10 + index, 0),
+        )
+        for index in range(6)
+    ]
+
+
+def _capture_statements(db):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    return statements, lambda: event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+
+def test_bulk_create_inserts_once_and_invalidates_in_one_call(db, monkeypatch) -> None:
+    deleted_batches = []
+    monkeypatch.setattr(cache_service, "delete_many", lambda keys: deleted_batches.append(list(keys)))
+    wakes = []
+    monkeypatch.setattr(push_outbox_service, "wake_dispatcher", lambda: wakes.append(1))
+    specs = [
+        notification_service.NotificationSpec(2 + index % 2, NotificationType.COUPON_GRANTED, "Coupon", f"#{index}")
+        for index in range(30)
+    ]
+
+    statements, stop = _capture_statements(db)
+    try:
+        notification_ids = notification_service.create_notifications_bulk(db, specs)
+    finally:
+        stop()
+
+    notification_inserts = [sql for sql in statements if sql.startswith("INSERT INTO notifications")]
+    assert len(notification_inserts) == 1
+    assert len(notification_ids) == 30
+    assert db.query(Notification).count() == 30
+    assert sorted(row.notification_id for row in db.query(PushOutbox).all()) == sorted(notification_ids)
+    assert deleted_batches == [[crud_notification._unread_count_cache_key(2), crud_notification._unread_count_cache_key(3)]]
+    assert wakes == [1]
+    assert notification_service.create_notifications_bulk(db, []) == []
+    assert wakes == [1]
+
+
+def test_preloaded_contexts_skip_per_appointment_lookups(db) -> None:
+    appointments = db.query(Appointment).order_by(Appointment.id.asc()).all()
+
+    statements, stop = _capture_statements(db)
+    try:
+        contexts = notification_service.load_appointment_contexts(db, appointments)
+    finally:
+        stop()
+    assert len(statements) == 4
+    assert contexts[10].store_admin.id == 1
+    assert (contexts[11].customer.username, contexts[11].service.name, contexts[11].store.name) == ("bo", "Gel", "Salon")
+
+    specs = [
+        notification_service.build_appointment_reminder_1h(appointment, contexts[appointment.id])
+        for appointment in appointments
+    ]
+    statements, stop = _capture_statements(db)
+    try:
+        notification_service.create_notifications_bulk(db, specs)
+    finally:
+        stop()
+    assert not [sql for sql in statements if sql.startswith("SELECT")]
+
+    # The commit above expired the loaded rows; single-appointment callers load their context once.
+    appointment = db.query(Appointment).filter(Appointment.id == 10).one()
+    context = notification_service.load_appointment_contexts(db, [appointment])[10]
+    statements, stop = _capture_statements(db)
+    try:
+        notification_service.notify_appointment_created(db, appointment, context=context)
+    finally:
+        stop()
+    assert not [sql for sql in statements if "FROM services" in sql or "FROM stores" in sql]
+    created = db.query(Notification).filter(Notification.type == NotificationType.APPOINTMENT_CREATED).one()
+    assert created.user_id == 1
+    assert created.message.startswith("ann has booked Gel on 2026-11-02 at 10:00.")
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import event
+
+from app.crud import notification as crud_notification
+from app.models.notification import Notification, NotificationType
+from app.models.notification_counter import NotificationCounter
+from app.models.user import User
+from app.services import notification_service
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        User(id=1, phone="2125550101", password_hash="hash", username="ann"),
+        User(id=2, phone="2125550102", password_hash="hash", username="bo"),
+        User(id=3, phone="2125550103", password_hash="hash", username="cy"),
+    ]
+
+
+def _notify(db, user_ids):
+    return notification_service.create_notifications_bulk(
+        db,
+        [
+            notification_service.NotificationSpec(user_id, NotificationType.COUPON_GRANTED, "Coupon", "You got a coupon")
+            for user_id in user_ids
+        ],
+    )
+
+
+def _counters(db):
+    db.expire_all()
+    return {row.user_id: row.unread_count for row in db.query(NotificationCounter).all()}
+
+
+def test_writes_keep_counters_in_step_and_reads_skip_count(db) -> None:
+    ids = _notify(db, [1, 1, 1, 2])
+    assert _counters(db) == {1: 3, 2: 1}
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert crud_notification.get_unread_count(db, 1) == 3
+        assert crud_notification.get_unread_count(db, 1) == 3
+        assert crud_notification.get_unread_count(db, 3) == 0
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 2
+    assert not [sql for sql in statements if "count(" in sql.lower()]
+
+    crud_notification.mark_as_read(db, ids[0])
+    crud_notification.mark_as_read(db, ids[0])
+    assert crud_notification.get_unread_count(db, 1) == 2
+
+    assert crud_notification.delete_notification(db, ids[0])  # already read
+    assert crud_notification.delete_notification(db, ids[1])  # unread
+    assert crud_notification.get_unread_count(db, 1) == 1
+
+    assert crud_notification.mark_all_as_read(db, 1) == 1
+    assert crud_notification.mark_all_as_read(db, 1) == 0
+    assert _counters(db) == {1: 0, 2: 1}
+    assert crud_notification.get_unread_count(db, 1) == 0
+
+
+def test_reconciler_repairs_drift_and_drops_cached_counts(db) -> None:
+    ids = _notify(db, [1, 1, 2])
+    assert crud_notification.get_unread_count(db, 1) == 2
+
+    # Writes that bypass crud.notification (cascades, manual fixes) leave the counters stale.
+    db.query(Notification).filter(Notification.id == ids[0]).delete()
+    db.query(NotificationCounter).filter(NotificationCounter.user_id == 2).delete()
+    db.add(NotificationCounter(user_id=3, unread_count=4))
+    db.commit()
+
+    assert crud_notification.reconcile_unread_counters(db, chunk_size=2) == {"checked": 3, "repaired": 3}
+    assert _counters(db) == {1: 1, 2: 1, 3: 0}
+    assert [crud_notification.get_unread_count(db, user_id) for user_id in (1, 2, 3)] == [1, 1, 0]
+    assert crud_notification.reconcile_unread_counters(db) == {"checked": 3, "repaired": 0}
+
+
+def test_reconciler_locks_counters_first_in_each_chunk(db) -> None:
+    _notify(db, [1, 2, 3])
+    events = []
+    on_begin = lambda *args: events.append("BEGIN")  # noqa: E731
+
+    def on_statement(conn, cursor, statement, *args):
+        events.append("LOCK" if statement.startswith("SELECT") and "FROM notification_counters" in statement else "SQL")
+
+    event.listen(db, "after_begin", on_begin)
+    event.listen(db.get_bind(), "before_cursor_execute", on_statement)
+    try:
+        crud_notification.reconcile_unread_counters(db, chunk_size=2)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", on_statement)
+        event.remove(db, "after_begin", on_begin)
+
+    counter_reads = [index for index, name in enumerate(events) if name == "LOCK"]
+    assert len(counter_reads) == 2
+    assert all(events[index - 1] == "BEGIN" for index in counter_reads)
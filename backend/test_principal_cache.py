@@ -0,0 +1,83 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core.security import create_access_token
+from app.crud import user as crud_user
+from app.models.user import User
+from app.services import principal_service, risk_service
+
+
+@pytest.fixture(autouse=True)
+def _local_principals(local_cache, monkeypatch):
+    monkeypatch.setattr(principal_service, "_LOCAL_PRINCIPALS", {})
+
+
+@pytest.fixture
+def seed_rows():
+    return [User(id=5, phone="2125550105", password_hash="hash", username="bob", full_name="Bob")]
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+def _authenticate(db, user_id: int = 5) -> User:
+    token = create_access_token({"sub": str(user_id)})
+    return deps.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+
+
+def _count_statements(db, fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_cached_principal_needs_no_queries(session_factory) -> None:
+    with session_factory() as db:
+        _user, statements = _count_statements(db, lambda: _authenticate(db))
+        assert len(statements) == 2  # user row and restriction expiry
+
+    with session_factory() as db:
+        user, statements = _count_statements(db, lambda: _authenticate(db))
+        assert statements == []
+        assert (user.id, user.username, user.full_name, user.is_active) == (5, "bob", "Bob", True)
+
+        # The rebuilt instance is a regular persistent row.
+        user.full_name = "Robert"
+        db.commit()
+        assert user.password_hash == "hash"
+
+    with session_factory() as db:
+        assert db.get(User, 5).full_name == "Robert"
+
+
+def test_writes_invalidate_the_principal(session_factory) -> None:
+    with session_factory() as db:
+        _authenticate(db)
+        crud_user.update_user(db, 5, {"full_name": "Bobby"})
+    with session_factory() as db:
+        assert _authenticate(db).full_name == "Bobby"
+
+    with session_factory() as db:
+        risk_service.restrict_user(db, user_id=5, admin_id=1, hours=2)
+    with session_factory() as db, pytest.raises(HTTPException) as exc_info:
+        _authenticate(db)
+    assert exc_info.value.status_code == 403
+
+    with session_factory() as db:
+        risk_service.unrestrict_user(db, user_id=5, admin_id=1)
+        assert _authenticate(db).id == 5
+        crud_user.deactivate(db, 5)
+    with session_factory() as db, pytest.raises(HTTPException) as exc_info:
+        _authenticate(db)
+    assert exc_info.value.detail == "User account is inactive"
@@ -0,0 +1,187 @@
+import json
+from datetime import date, datetime, time
+from threading import Event
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import notifications as notifications_endpoints
+from app.core.config import settings
+from app.db import query_stats
+from app.models.appointment import Appointment
+from app.models.push_campaign_job import PushCampaignJob
+from app.models.service import Service
+from app.models.store import Store
+from app.models.user import User
+from app.schemas.notification import AdminPushBatchJob, AdminPushBatchRequest
+from app.services import push_campaign_service, push_service
+
+
+@pytest.fixture
+def seed_rows():
+    rows = [
+        Store(id=1, name="Glow", address="1 Main St", city="New York", state="NY"),
+        Service(id=1, store_id=1, name="Gel", price=40, duration_minutes=45),
+        User(id=1, phone="2125550100", password_hash="hash", username="root", is_admin=True),
+        User(id=2, phone="2125550199", password_hash="hash", username="off", is_active=False),
+    ]
+    for user_id in range(10, 35):
+        rows.append(User(id=user_id, phone=f"21255501{user_id:02d}", password_hash="hash", username=f"c{user_id}"))
+        rows.append(Appointment(
+            store_id=1,
+            service_id=1,
+            user_id=user_id,
+            appointment_date=date(2026, 10, 20),
+            appointment_time=time(10, 0),
+        ))
+    rows.append(Appointment(
+        store_id=1,
+        service_id=1,
+        user_id=2,
+        appointment_date=date(2026, 10, 20),
+        appointment_time=time(11, 0),
+    ))
+    return rows
+
+
+@pytest.fixture
+def sends(monkeypatch):
+    calls = []
+
+    def fake_send(_db, *, user_ids, title, body, custom_data):
+        calls.append((list(user_ids), custom_data))
+        # Odd users have no device; user 13 has a token APNs rejects.
+        return {
+            user_id: {"sent": 0, "failed": 1, "deactivated": 1}
+            if user_id == 13
+            else {"sent": int(user_id % 2 == 0), "failed": 0, "deactivated": 0}
+            for user_id in user_ids
+        }
+
+    monkeypatch.setattr(push_service, "send_push_to_users", fake_send)
+    monkeypatch.setattr(settings, "PUSH_CAMPAIGN_CHUNK_SIZE", 10)
+    return calls
+
+
+def _admin(db) -> User:
+    return db.query(User).filter(User.id == 1).one()
+
+
+def test_batch_push_returns_a_job_and_fans_out_in_chunks(db, sends) -> None:
+    job = notifications_endpoints.send_admin_push_batch(
+        AdminPushBatchRequest(store_id=1, title="Sale", message="20% off", max_users=100),
+        db,
+        _admin(db),
+    )
+    queued = AdminPushBatchJob.model_validate(job)
+    assert (queued.status, queued.processed_user_count) == ("queued", 0)
+    assert sends == []
+
+    with query_stats.query_budget(max_queries=30):
+        assert push_campaign_service.run_pending_jobs(db) == 1
+
+    assert [len(user_ids) for user_ids, _ in sends] == [10, 10, 5]
+    assert sends[0][1] == {"notification_type": "admin_batch_push", "store_id": 1}
+    status = AdminPushBatchJob.model_validate(
+        notifications_endpoints.get_admin_push_batch_job(queued.job_id, db, _admin(db))
+    )
+    assert status.status == "completed" and status.finished_at is not None
+    assert (status.target_user_count, status.processed_user_count, status.truncated) == (25, 25, False)
+    assert (status.sent_user_count, status.failed_user_count, status.skipped_user_count) == (13, 1, 11)
+    assert (status.sent, status.failed, status.deactivated) == (13, 1, 1)
+
+
+def test_job_resumes_after_its_last_finished_chunk(db, sends) -> None:
+    job = push_campaign_service.create_job(
+        db,
+        created_by=1,
+        title="Hi",
+        message="Hello",
+        user_ids=[12, 40, 11, 10, 2],
+        store_id=None,
+        max_users=3,
+        custom_data={"source": "test"},
+    )
+    stop = Event()
+    stop.set()
+    job_id, claim_token = push_campaign_service.claim_next_job(db)
+    assert job_id == job.id
+    push_campaign_service.run_job(db, job.id, claim_token, stop_event=stop)
+    db.refresh(job)
+    assert (job.status, job.processed_user_count, job.truncated) == ("queued", 0, True)
+
+    job.last_user_id = 10
+    db.commit()
+    push_campaign_service.run_pending_jobs(db)
+
+    # max_users keeps ids 2, 10, 11; user 2 is inactive and 10 was already sent.
+    assert sends == [([11], {"source": "test"})]
+    db.refresh(job)
+    assert (job.status, job.target_user_count, job.processed_user_count) == ("completed", 2, 1)
+
+
+def test_claims_are_exclusive_and_failures_are_recorded(db, monkeypatch) -> None:
+    job = push_campaign_service.create_job(
+        db, created_by=1, title="Hi", message="Hello", user_ids=[10], store_id=None, max_users=10, custom_data=None
+    )
+    job_id, claim_token = push_campaign_service.claim_next_job(db)
+    assert job_id == job.id
+    assert push_campaign_service.claim_next_job(db) is None
+
+    def broken_send(*_args, **_kwargs):
+        raise RuntimeError("apns down")
+
+    monkeypatch.setattr(push_service, "send_push_to_users", broken_send)
+    push_campaign_service.run_job(db, job.id, claim_token)
+    db.refresh(job)
+    assert (job.status, job.error) == ("failed", "apns down")
+    assert json.loads(db.query(PushCampaignJob.user_ids).filter(PushCampaignJob.id == job.id).scalar()) == [10]
+
+    with pytest.raises(HTTPException) as exc_info:
+        notifications_endpoints.get_admin_push_batch_job(job.id + 1, db, _admin(db))
+    assert exc_info.value.status_code == 404
+
+
+def test_runner_stops_once_its_job_is_reclaimed(db, sends, monkeypatch) -> None:
+    job = push_campaign_service.create_job(
+        db, created_by=1, title="Hi", message="Hello", user_ids=None, store_id=1, max_users=100, custom_data=None
+    )
+    _, slow_token = push_campaign_service.claim_next_job(db)
+    real_send = push_service.send_push_to_users
+
+    def send_then_lose_the_job(*args, **kwargs):
+        results = real_send(*args, **kwargs)
+        # The heartbeat went stale mid-send and another runner took the job over.
+        db.query(PushCampaignJob).filter(PushCampaignJob.id == job.id).update(
+            {"heartbeat_at": datetime(2000, 1, 1)}, synchronize_session=False
+        )
+        db.commit()
+        assert push_campaign_service.claim_next_job(db)[0] == job.id
+        return results
+
+    monkeypatch.setattr(push_service, "send_push_to_users", send_then_lose_the_job)
+    push_campaign_service.run_job(db, job.id, slow_token)
+
+    assert len(sends) == 1
+    db.refresh(job)
+    assert (job.status, job.processed_user_count, job.last_user_id) == ("running", 0, None)
+
+
+def test_batch_push_rejects_requests_without_eligible_users(db, sends) -> None:
+    db.add(Store(id=2, name="Empty", address="2 Main St", city="New York", state="NY"))
+    db.commit()
+    cases = [
+        (AdminPushBatchRequest(store_id=2, title="Hi", message="Hello"), 400),
+        (AdminPushBatchRequest(user_ids=[1, 2], title="Hi", message="Hello"), 404),
+        (AdminPushBatchRequest(user_ids=[2], store_id=2, title="Hi", message="Hello"), 404),
+    ]
+    for payload, status_code in cases:
+        with pytest.raises(HTTPException) as exc_info:
+            notifications_endpoints.send_admin_push_batch(payload, db, _admin(db))
+        assert exc_info.value.status_code == status_code
+    assert db.query(PushCampaignJob).count() == 0
+
+    job = notifications_endpoints.send_admin_push_batch(
+        AdminPushBatchRequest(user_ids=[1, 12], store_id=2, title="Hi", message="Hello"), db, _admin(db)
+    )
+    assert job.status == "queued"
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.notification import Notification, NotificationType
+from app.models.push_outbox import PushOutbox
+from app.models.user import User
+from app.services import notification_service, push_outbox_service, push_service
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        User(id=1, phone="2125550101", password_hash="hash", username="ann"),
+        User(id=2, phone="2125550102", password_hash="hash", username="bo"),
+    ]
+
+
+def _notify(db, user_id: int) -> Notification:
+    return notification_service.create_notification(
+        db, user_id, NotificationType.COUPON_GRANTED, "Coupon", "You got a coupon"
+    )
+
+
+def test_notification_and_outbox_row_commit_together(db, monkeypatch) -> None:
+    stage_pushes = push_outbox_service.stage_pushes
+
+    def failing_stage(_db, _notification_ids):
+        raise RuntimeError("outbox insert failed")
+
+    monkeypatch.setattr(push_outbox_service, "stage_pushes", failing_stage)
+    with pytest.raises(RuntimeError):
+        _notify(db, 1)
+    db.rollback()
+    assert db.query(Notification).count() == 0
+
+    monkeypatch.setattr(push_outbox_service, "stage_pushes", stage_pushes)
+    notification = _notify(db, 1)
+    rows = db.query(PushOutbox).all()
+    assert [(row.notification_id, row.status, row.attempts) for row in rows] == [(notification.id, "pending", 0)]
+
+
+def test_batches_are_claimed_once_delivered_and_deleted(db, monkeypatch) -> None:
+    sent_batches = []
+
+    def fake_send(_db, notifications):
+        sent_batches.append(sorted(int(notification.id) for notification in notifications))
+        return {int(notification.id): {"sent": 1, "retryable": 0} for notification in notifications}
+
+    monkeypatch.setattr(push_service, "send_push_for_notifications", fake_send)
+    ids = [_notify(db, 1 + index % 2).id for index in range(5)]
+    # A notification deleted before delivery just drops its outbox row.
+    db.query(Notification).filter(Notification.id == ids[4]).delete()
+    db.commit()
+
+    claimed = push_outbox_service.claim_batch(db, 3)
+    assert [row.notification_id for row in claimed] == ids[:3]
+    assert [row.notification_id for row in push_outbox_service.claim_batch(db, 10)] == ids[3:]
+    assert push_outbox_service.claim_batch(db, 10) == []
+
+    assert push_outbox_service.deliver_batch(db, claimed)["delivered"] == 3
+    assert sent_batches == [ids[:3]]
+    assert sorted(row.notification_id for row in db.query(PushOutbox).all()) == ids[3:]
+
+    # Leases expire, so rows a crashed dispatcher held are delivered again.
+    db.query(PushOutbox).update({"claimed_until": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert push_outbox_service.process_due(db, 10) == 2
+    assert sent_batches[-1] == [ids[3]]
+    assert db.query(PushOutbox).count() == 0
+
+
+def test_retryable_failures_back_off_then_go_dead(db, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PUSH_OUTBOX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(
+        push_service,
+        "send_push_for_notifications",
+        lambda _db, notifications: {int(n.id): {"sent": 0, "failed": 2, "retryable": 2} for n in notifications},
+    )
+    notification = _notify(db, 1)
+
+    assert push_outbox_service.process_due(db) == 1
+    row = db.query(PushOutbox).one()
+    assert (row.status, row.attempts, row.claim_token) == ("pending", 1, None)
+    assert row.available_at > datetime.utcnow() + timedelta(seconds=3)
+    assert push_outbox_service.process_due(db) == 0
+
+    row.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    def broken_send(_db, _notifications):
+        raise RuntimeError("apns unreachable")
+
+    monkeypatch.setattr(push_service, "send_push_for_notifications", broken_send)
+    assert push_outbox_service.process_due(db) == 1
+    row = db.query(PushOutbox).one()
+    assert (row.notification_id, row.status, row.attempts, row.last_error) == (
+        notification.id,
+        "dead",
+        2,
+        "apns unreachable",
+    )
+    assert push_outbox_service.process_due(db) == 0
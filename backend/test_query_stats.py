@@ -0,0 +1,93 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import app.main as main_module
+from app.db import query_stats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'query_stats.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e')"))
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def _n_plus_one(engine) -> list[str]:
+    with engine.connect() as connection:
+        ids = [row[0] for row in connection.execute(text("SELECT id FROM items ORDER BY id"))]
+        return [connection.execute(text(f"SELECT name FROM items WHERE id = {item_id}")).scalar() for item_id in ids]
+
+
+def test_statement_shapes_collapse_literals_and_in_lists() -> None:
+    assert query_stats.statement_shape("SELECT name FROM items WHERE id = 7") == (
+        query_stats.statement_shape("SELECT  name\nFROM items WHERE id = 12")
+    )
+    assert query_stats.statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) LIMIT 20") == (
+        "SELECT * FROM t WHERE id IN (?) LIMIT ?"
+    )
+    assert query_stats.statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == (
+        "SELECT * FROM t WHERE id IN (?)"
+    )
+    assert query_stats.statement_shape("SELECT anon_1.id FROM t1 AS anon_1") == "SELECT anon_1.id FROM t1 AS anon_1"
+
+
+def test_query_budget_reports_repeated_shapes(engine) -> None:
+    with query_stats.query_budget(max_queries=6) as stats:
+        _n_plus_one(engine)
+    assert (stats.count, stats.max_repeat) == (6, 5)
+    assert stats.summary()["repeated"][0]["count"] == 5
+
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="ran 5 times > 1.*SELECT name FROM items WHERE id = \\?"):
+        with query_stats.query_budget(max_queries=10, max_repeat=1, label="items"):
+            _n_plus_one(engine)
+
+    # Statements outside a tracked block are not attributed to anything.
+    assert query_stats.current() is None
+
+
+def _pipeline_app(engine) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(main_module.RequestPipelineMiddleware)
+
+    @app.get("/items")
+    def list_items():
+        return _n_plus_one(engine)
+
+    return app
+
+
+def test_pipeline_reports_server_timing_and_logs_sql_meta(engine, monkeypatch) -> None:
+    logs = []
+    monkeypatch.setattr(main_module, "_ACCESS_LOG_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **kwargs: logs.append(kwargs))
+
+    with TestClient(_pipeline_app(engine)) as client:
+        response = client.get("/items", headers={"X-Request-Id": "sql-trace-0001"})
+
+    assert response.json() == ["a", "b", "c", "d", "e"]
+    timing = query_stats.assert_query_budget(response.headers, max_queries=6, max_repeat=5, label="GET /items")
+    assert (timing["queries"], timing["max_repeat"]) == (6, 5)
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="6 queries > budget 2"):
+        query_stats.assert_query_budget(response.headers, max_queries=2)
+
+    sql_meta = logs[-1]["meta"]["sql"]
+    assert (logs[-1]["request_id"], sql_meta["queries"], sql_meta["max_repeat"]) == ("sql-trace-0001", 6, 5)
+
+
+def test_production_omits_server_timing(engine, monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "_SQL_SERVER_TIMING", False)
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **_kwargs: True)
+
+    with TestClient(_pipeline_app(engine)) as client:
+        response = client.get("/items")
+
+    assert "server-timing" not in response.headers
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="no Server-Timing"):
+        query_stats.assert_query_budget(response.headers, max_queries=100)
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main_module
+from app.models.system_log import RequestLatencyHistogram
+from app.services import request_latency_service
+
+
+NOW = datetime(2026, 10, 17, 9, 15)
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = request_latency_service._LatencyRecorder()
+    monkeypatch.setattr(request_latency_service, "_RECORDER", recorder)
+    return recorder
+
+
+@pytest.fixture
+def session_factory(engine, monkeypatch):
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(request_latency_service, "SessionLocal", factory)
+    return factory
+
+
+def test_percentiles_stay_close_to_exact_values() -> None:
+    bounds = request_latency_service.LATENCY_BOUNDS_MS
+    assert bounds[0] == 1 and bounds[-1] == 60_000
+    assert all(later > earlier for earlier, later in zip(bounds, bounds[1:]))
+
+    latencies = [3 + (index * 7919) % 1500 for index in range(5000)]
+    counts: dict[int, int] = {}
+    for latency in latencies:
+        bucket = request_latency_service.latency_bucket(latency)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    ordered = sorted(latencies)
+    for quantile in (0.5, 0.95, 0.99):
+        exact = ordered[int(len(ordered) * quantile) - 1]
+        estimate = request_latency_service.percentile(counts.items(), quantile)
+        assert abs(estimate - exact) <= exact * 0.08
+
+    assert request_latency_service.percentile([], 0.95) == 0
+    overflow = request_latency_service.OVERFLOW_BUCKET_MS
+    assert request_latency_service.percentile([(10, 1), (overflow, 99)], 0.95) == 60_000
+
+
+def test_every_request_is_recorded_by_route_template(recorder, monkeypatch) -> None:
+    monkeypatch.setattr(main_module, "_ACCESS_LOG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **_kwargs: True)
+    with TestClient(main_module.app) as client:
+        for _ in range(3):
+            client.get("/health")
+        client.get("/uploads/missing.txt")
+        client.get("/definitely/not/a/route")
+
+    totals: dict[tuple, int] = {}
+    for (_hour, method, route, klass, _bucket), count in recorder.pending().items():
+        totals[(method, route, klass)] = totals.get((method, route, klass), 0) + count
+    assert totals[("GET", "/health", "2xx")] == 3
+    assert totals[("GET", "/uploads/{file_path:path}", "4xx")] == 1
+    assert totals[("GET", request_latency_service.UNMATCHED_ROUTE, "4xx")] == 1
+
+
+def test_flush_adds_counts_and_keeps_them_on_failure(recorder, session_factory, monkeypatch) -> None:
+    for latency in (4, 4, 180):
+        recorder.observe("GET", "/api/v1/stores", 200, latency, now=NOW)
+    assert recorder.flush() == 2
+    recorder.observe("GET", "/api/v1/stores", 200, 4, now=NOW)
+
+    real_upsert = request_latency_service.log_rollup_service.upsert_adding
+
+    def down(*_args):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(request_latency_service.log_rollup_service, "upsert_adding", down)
+    assert recorder.flush() == 0
+    assert sum(recorder.pending().values()) == 1
+    monkeypatch.setattr(request_latency_service.log_rollup_service, "upsert_adding", real_upsert)
+    assert recorder.flush() == 1
+
+    with session_factory() as db:
+        counts = {row.upper_bound_ms: row.count for row in db.query(RequestLatencyHistogram)}
+        assert counts == {request_latency_service.latency_bucket(4): 3, request_latency_service.latency_bucket(180): 1}
+        items = request_latency_service.route_percentiles(db, NOW.replace(minute=0))
+    assert [(item["route"], item["status_class"], item["count"]) for item in items] == [("/api/v1/stores", "2xx", 4)]
+    assert items[0]["p50_ms"] <= 4 < items[0]["p99_ms"] <= request_latency_service.latency_bucket(180)
@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.services import security_rule_service
+
+
+class _DummyDB:
+    def __init__(self) -> None:
+        self.added = []
+
+    def add(self, obj) -> None:
+        self.added.append(obj)
+
+    def commit(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+def test_upload_responses_get_security_headers(monkeypatch) -> None:
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **_kwargs: True)
+    with TestClient(main_module.app) as client:
+        response = client.get("/uploads/missing.txt")
+
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers.get("x-request-id")
+
+
+def test_blocked_ip_is_logged_once_with_one_request_id(monkeypatch) -> None:
+    db = _DummyDB()
+    logs = []
+    monkeypatch.setattr(main_module, "SessionLocal", lambda: db)
+    monkeypatch.setattr(main_module.log_service, "create_system_log_async", lambda **kwargs: logs.append(kwargs))
+    monkeypatch.setattr(
+        security_rule_service,
+        "decide",
+        lambda scope, ip: security_rule_service.IPRuleDecision(blocked=True, matched_rule_id=9),
+    )
+
+    with TestClient(main_module.app) as client:
+        response = client.get("/api/v1/stores?token=secret", headers={"X-Request-Id": "blocked-trace-1"})
+
+    assert response.status_code == 403
+    assert response.headers["x-request-id"] == "blocked-trace-1"
+    assert [entry.matched_rule_id for entry in db.added] == [9]
+    assert [(entry["action"], entry["status_code"]) for entry in logs] == [
+        ("security.ip_deny", 403),
+        ("http.request", 403),
+    ]
+    assert {entry["request_id"] for entry in logs} == {"blocked-trace-1"}
+    assert logs[-1]["meta"]["query"] == "token=%5BREDACTED%5D"
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import risk_service
+
+
+NOW = datetime(2026, 3, 14, 10, 0, 5)
+
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+def _record(at: datetime, user_id: int = 7, ip_address: str = "10.0.0.1") -> None:
+    risk_service.record_risk_counters("appointment_created", user_id=user_id, ip_address=ip_address, now=at)
+
+
+def test_counters_slide_out_of_the_minute_window() -> None:
+    _record(NOW - timedelta(seconds=30))
+    _record(NOW - timedelta(seconds=5))
+
+    assert risk_service.count_booking_events(user_id=7, ip_address="10.0.0.1", now=NOW) == (2, 2, 2, 2)
+
+    later = NOW + timedelta(seconds=40)
+    user_1m, user_1h, ip_1m, ip_1h = risk_service.count_booking_events(user_id=7, ip_address="10.0.0.1", now=later)
+    assert user_1m == pytest.approx(1.0)
+    assert (user_1h, ip_1h) == (2, 2)
+    assert risk_service.count_booking_events(user_id=8, now=NOW) == (0, 0, 0, 0)
+
+
+def test_oldest_bucket_is_weighted_by_overlap() -> None:
+    _record(NOW - timedelta(seconds=60))
+
+    user_1m = risk_service.count_booking_events(user_id=7, now=NOW)[0]
+    assert user_1m == pytest.approx(0.5)
+
+
+def test_rate_limit_decision_uses_counters() -> None:
+    for seconds in (20, 10):
+        _record(NOW - timedelta(seconds=seconds), user_id=None)
+    _record(NOW - timedelta(seconds=15), ip_address="10.0.0.2")
+    _record(NOW - timedelta(seconds=8), ip_address="10.0.0.2")
+    user_1m, user_1h, ip_1m, ip_1h = risk_service.count_booking_events(user_id=7, ip_address="10.0.0.1", now=NOW)
+    snapshot = risk_service.BookingRiskSnapshot(
+        user_events_1m=user_1m,
+        user_events_1h=user_1h,
+        ip_events_1m=ip_1m,
+        ip_events_1h=ip_1h,
+    )
+    decision = risk_service.decide_booking_request(snapshot, ip_address="10.0.0.1", now=NOW)
+    assert decision.error_code == "BOOK_RATE_LIMITED"
+    assert decision.message == "Too many booking requests. Please try again in a few minutes."
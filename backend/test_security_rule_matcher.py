@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import cache_service, security_rule_service
+
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def _local_rule_cache(local_cache, monkeypatch):
+    monkeypatch.setattr(security_rule_service, "_CACHE", {})
+
+
+def _rule(rule_id, rule_type, target_type, target_value, priority=100, expires_at=None):
+    return SimpleNamespace(
+        id=rule_id,
+        rule_type=rule_type,
+        target_type=target_type,
+        target_value=target_value,
+        priority=priority,
+        expires_at=expires_at,
+    )
+
+
+def test_trie_matching_and_priority_resolution() -> None:
+    compiled = security_rule_service.compile_rules(
+        [
+            _rule(1, "deny", "cidr", "10.0.0.0/8", priority=50),
+            _rule(2, "allow", "cidr", "10.1.0.0/16", priority=50),
+            _rule(3, "deny", "ip", "10.1.2.3", priority=10),
+            _rule(4, "deny", "cidr", "2001:db8::/32"),
+            _rule(5, "deny", "ip", "192.168.1.1", expires_at=NOW - timedelta(minutes=1)),
+            _rule(6, "deny", "cidr", "not-a-network"),
+        ]
+    )
+    assert compiled.rule_count == 5
+
+    def decide(ip):
+        decision = compiled.decide(ip, NOW)
+        return decision.blocked, decision.matched_rule_id
+
+    assert decide("10.9.9.9") == (True, 1)
+    assert decide("10.1.9.9") == (False, None)  # allow wins a priority tie
+    assert decide("10.1.2.3") == (True, 3)
+    assert decide("2001:db8::1") == (True, 4)
+    assert decide("2001:db9::1") == (False, None)
+    assert decide("192.168.1.1") == (False, None)  # expired
+    assert decide("8.8.8.8") == (False, None)
+    assert decide("garbage") == (False, None)
+
+
+def test_invalidation_recompiles_without_waiting_for_ttl(monkeypatch) -> None:
+    rows = [_rule(1, "deny", "ip", "1.2.3.4")]
+    loads = []
+
+    def load(scope):
+        loads.append(scope)
+        return list(rows)
+
+    monkeypatch.setattr(security_rule_service, "_load_rule_rows", load)
+    assert security_rule_service.decide("admin_api", "1.2.3.4", NOW).blocked
+    assert security_rule_service.decide("admin_api", "1.2.3.4", NOW).blocked
+    assert loads == ["admin_api"]
+
+    rows[:] = []
+    security_rule_service.invalidate_security_rules()
+    assert not security_rule_service.decide("admin_api", "1.2.3.4", NOW).blocked
+    assert loads == ["admin_api", "admin_api"]
+
+    # Another worker only sees the bumped version once its check interval elapses.
+    rows[:] = [_rule(2, "deny", "cidr", "1.2.0.0/16")]
+    cache_service.increment_many([(security_rule_service._VERSION_KEY, 60)])
+    entry = security_rule_service._CACHE["admin_api"]
+    entry.checked_at -= security_rule_service._VERSION_CHECK_SECONDS
+    assert security_rule_service.decide("admin_api", "1.2.3.4", NOW).matched_rule_id == 2
@@ -7,10 +7,10 @@ Run:
 
 from app.crud.service import _normalize_commission_payload
 from app.models.service import Service
-from app.api.v1.endpoints.technicians import (
-    _calculate_commission_by_amount,
-    _calculate_split_commission,
-    _calculate_items_commission,
+from app.crud.technician_ledger import (
+    calculate_commission_by_amount,
+    calculate_split_commission,
+    calculate_items_commission,
 )
 
 
@@ -49,12 +49,12 @@ def test_normalize_payload() -> None:
 
 def test_commission_calculation() -> None:
     # Fixed commission for unsplit order.
-    assert _calculate_commission_by_amount(80, Service.COMMISSION_TYPE_FIXED, 15) == 15
+    assert calculate_commission_by_amount(80, Service.COMMISSION_TYPE_FIXED, 15) == 15
     # Percent commission for unsplit order.
-    assert _calculate_commission_by_amount(80, Service.COMMISSION_TYPE_PERCENT, 20) == 16
+    assert calculate_commission_by_amount(80, Service.COMMISSION_TYPE_PERCENT, 20) == 16
 
     # Fixed commission split by amount share.
-    split_fixed = _calculate_split_commission(
+    split_fixed = calculate_split_commission(
         split_amount=20,
         service_total=50,
         commission_type=Service.COMMISSION_TYPE_FIXED,
@@ -63,7 +63,7 @@ def test_commission_calculation() -> None:
     assert round(split_fixed, 2) == 4.0
 
     # Percent commission split by split amount directly.
-    split_percent = _calculate_split_commission(
+    split_percent = calculate_split_commission(
         split_amount=20,
         service_total=50,
         commission_type=Service.COMMISSION_TYPE_PERCENT,
@@ -72,7 +72,7 @@ def test_commission_calculation() -> None:
     assert round(split_percent, 2) == 4.0
 
     # Multi-service unsplit appointment by actual service amounts.
-    total = _calculate_items_commission(
+    total = calculate_items_commission(
         items=[(101, 30.0), (102, 20.0)],
         service_commission_map={
             101: (Service.COMMISSION_TYPE_PERCENT, 20.0),  # 6
@@ -0,0 +1,110 @@
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.endpoints import technicians as technicians_endpoint
+from app.crud import appointment as crud_appointment
+from app.crud import technician_ledger as crud_technician_ledger
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment_staff_split import AppointmentStaffSplit
+from app.models.service import Service
+from app.models.technician import Technician
+from app.models.technician_ledger import TechnicianLedgerEntry
+from app.models.user import User
+from app.schemas.appointment import AppointmentUpdate
+
+
+TODAY = datetime.now(technicians_endpoint.ET_TZ).date()
+ADMIN = SimpleNamespace(id=1, is_admin=True, store_id=None)
+
+
+@pytest.fixture
+def seed_rows():
+    return [
+        User(id=7, phone="2125550107", password_hash="x", username="ann"),
+        Service(id=1, store_id=1, name="Gel", price=50, duration_minutes=60, commission_type="percent", commission_value=20),
+        Service(id=2, store_id=1, name="Art", price=30, duration_minutes=30, commission_type="fixed", commission_value=6),
+        Technician(id=3, store_id=1, name="Amy", is_active=1),
+        Technician(id=4, store_id=1, name="Bea", is_active=1),
+        Appointment(
+            id=10,
+            user_id=7,
+            store_id=1,
+            service_id=1,
+            technician_id=3,
+            appointment_date=date(2026, 1, 5),
+            appointment_time=time(10, 0),
+            status=AppointmentStatus.COMPLETED,
+            order_amount=50,
+        ),
+        Appointment(
+            id=11,
+            user_id=7,
+            store_id=1,
+            service_id=2,
+            appointment_date=TODAY,
+            appointment_time=time(9, 0),
+            status=AppointmentStatus.CONFIRMED,
+            order_amount=30,
+        ),
+        AppointmentStaffSplit(appointment_id=11, technician_id=3, service_id=2, amount=20),
+        AppointmentStaffSplit(appointment_id=11, technician_id=4, service_id=2, amount=10),
+    ]
+
+
+@pytest.fixture
+def db(db):
+    crud_technician_ledger.rebuild_technician_ledger(db)
+    return db
+
+
+def test_completion_writes_split_entries(db) -> None:
+    assert db.query(TechnicianLedgerEntry).count() == 1
+
+    crud_appointment.update_appointment(db, 11, AppointmentUpdate(status=AppointmentStatus.COMPLETED))
+    entries = db.query(TechnicianLedgerEntry).filter(TechnicianLedgerEntry.appointment_id == 11).all()
+    assert sorted((row.technician_id, row.amount, row.commission_amount) for row in entries) == [
+        (3, 20.0, 4.0),
+        (4, 10.0, 2.0),
+    ]
+
+    crud_appointment.cancel_appointment(db, 11)
+    assert db.query(TechnicianLedgerEntry).filter(TechnicianLedgerEntry.appointment_id == 11).count() == 0
+
+
+def test_summary_and_detail_read_the_ledger(db) -> None:
+    crud_appointment.update_appointment(db, 11, AppointmentUpdate(status=AppointmentStatus.COMPLETED))
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        summary = technicians_endpoint.get_technician_performance_summary(store_id=1, db=db, current_user=ADMIN)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 2
+    amy = next(row for row in summary if row["technician_id"] == 3)
+    assert (amy["total_order_count"], amy["total_amount"], amy["total_commission"]) == (2, 70.0, 14.0)
+    assert (amy["today_order_count"], amy["today_amount"], amy["today_commission"]) == (1, 20.0, 4.0)
+
+    detail = technicians_endpoint.get_technician_performance_detail(
+        technician_id=3,
+        date_from=str(TODAY - timedelta(days=1)),
+        date_to=None,
+        skip=0,
+        limit=50,
+        db=db,
+        current_user=ADMIN,
+    )
+    assert (detail["period_order_count"], detail["period_amount"], detail["total_order_count"]) == (1, 20.0, 2)
+    assert [(item["appointment_id"], item["service_name"], item["commission_amount"]) for item in detail["items"]] == [
+        (11, "Art", 4.0)
+    ]
+
+    unsplit = technicians_endpoint.get_technician_performance_detail(
+        technician_id=3, date_from=None, date_to="2026-01-31", skip=0, limit=50, db=db, current_user=ADMIN
+    )
+    assert unsplit["items"][0]["split_id"] == -10
+    assert unsplit["items"][0]["customer_name"] == "ann"
@@ -16,6 +16,12 @@ export interface AvailableSlot {
   end_time: string; // HH:MM
 }
 
+export interface TechnicianAvailableSlots {
+  technician_id: number;
+  technician_name: string;
+  slots: AvailableSlot[];
+}
+
 /**
  * 获取店铺的美甲师列表
  */
@@ -42,3 +48,20 @@ export const getAvailableSlots = async (
     `/api/v1/technicians/${technicianId}/available-slots?date=${date}&service_id=${serviceId}`
   );
 };
+
+/**
+ * 一次获取店铺内多位美甲师的可用时间段
+ */
+export const getStoreAvailableSlots = async (
+  storeId: number,
+  date: string, // YYYY-MM-DD
+  serviceId: number,
+  technicianIds?: number[]
+): Promise<TechnicianAvailableSlots[]> => {
+  const technicianQuery = technicianIds && technicianIds.length > 0
+    ? `&technician_ids=${technicianIds.join(',')}`
+    : '';
+  return apiClient.get(
+    `/api/v1/technicians/available-slots?store_id=${storeId}&date=${date}&service_id=${serviceId}${technicianQuery}`
+  );
+};
@@ -54,7 +54,7 @@ import { StorePortfolioDetail } from './StorePortfolioDetail';
 import StoreReviews from './StoreReviews';
 import { Pin } from '../api/pins';
 import { getStoreRating, StoreRating } from '../api/reviews';
-import { getAvailableSlots, getTechniciansByStore, Technician } from '../api/technicians';
+import { getStoreAvailableSlots, getTechniciansByStore, Technician } from '../api/technicians';
 import {
   addStoreToFavorites,
   checkIfStoreFavorited,
@@ -1127,14 +1127,15 @@ export function StoreDetails({ store, onBack, onBookingComplete, referencePin, s
           return;
         }
 
-        const slotResults = await Promise.all(
-          technicianList.map((tech) =>
-            getAvailableSlots(tech.id, formattedSelectedDate, selectedServiceId).catch(() => [])
-          )
-        );
+        const slotResults = await getStoreAvailableSlots(
+          store.id,
+          formattedSelectedDate,
+          selectedServiceId,
+          technicianList.map((tech) => tech.id)
+        ).catch(() => []);
 
         const combinedSlots = new Set<string>();
-        slotResults.flat().forEach((slot) => {
+        slotResults.flatMap((item) => item.slots).forEach((slot) => {
           combinedSlots.add(slot.start_time);
         });
 